@@ -3,11 +3,36 @@ import pandas as pd
 import requests
 import json
 import os
+import time
+import cProfile
+import pstats
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
-from typing import Dict, Any, Optional, List
+import copy
+import codecs
+import hashlib
+import contextlib
+import gzip
+import bz2
+import lzma
+import io
+import re
+import bisect
+import pickle
+import tempfile
+import queue
+import socket
+import threading
+import uuid
+import weakref
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import OrderedDict
+from functools import cached_property, wraps
+from typing import Dict, Any, Optional, List, Tuple, Callable, Union
 
 # Import streamlit at the top level, but handle the case when it's not available
 try:
@@ -16,8 +41,1166 @@ try:
 except ImportError:
     STREAMLIT_AVAILABLE = False
 
+# pyarrow is optional: without it the analyzer keeps the default NumPy/object dtypes
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# zstandard is optional: it is only needed for .zst inputs
+try:
+    import zstandard
+    ZSTANDARD_AVAILABLE = True
+except ImportError:
+    ZSTANDARD_AVAILABLE = False
+
+# pyinstrument is optional: without it stage profiles fall back to cProfile
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
+
+# Compressed inputs are recognised by their last extension or by their magic bytes
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd'}
+COMPRESSION_MAGIC = {b'\x1f\x8b': 'gzip', b'BZh': 'bz2', b'\xfd7zXZ\x00': 'xz', b'\x28\xb5\x2f\xfd': 'zstd'}
+
+# Box plots ship at most this many outlier points per box, whatever the row count
+BOX_PLOT_MAX_OUTLIERS = 1000
+# Upper bound on Freedman–Diaconis bins, so long-tailed columns keep a compact histogram
+HISTOGRAM_MAX_BINS = 200
+# Timelines use the finest bucket (name, resample rule, shortest width) that fits this many points,
+# then buckets of as many years as needed
+TIMELINE_MAX_POINTS = 500
+TIMELINE_BUCKETS = [
+    ('minute', 'min', pd.Timedelta(minutes=1)),
+    ('hour', 'h', pd.Timedelta(hours=1)),
+    ('day', 'D', pd.Timedelta(days=1)),
+    ('week', 'W-MON', pd.Timedelta(weeks=1)),
+    ('month', 'MS', pd.Timedelta(days=28)),
+    ('quarter', 'QS', pd.Timedelta(days=90)),
+    ('year', 'YS', pd.Timedelta(days=365))
+]
+# Sample size per chart type that draws individual rows (WebGL points, SVG points)
+SAMPLE_SIZES = {'scatter': 50_000, 'relation': 5_000}
+# Share of a sample reserved for the extremes of each numerical column
+SAMPLE_EXTREMES_FRACTION = 0.05
+# Rows guaranteed to every category in a stratified sample, so rare categories do not vanish
+MIN_ROWS_PER_STRATUM = 20
+# Stage profilers that can be attached to the timings, and the functions kept from each cProfile report
+PROFILERS = ['cprofile', 'pyinstrument']
+PROFILE_TOP_FUNCTIONS = 30
+# Metrics are served on this port and/or dumped to this file (Prometheus text format) when the variables are set
+METRICS_PORT_ENV = 'ANALYZER_METRICS_PORT'
+METRICS_FILE_ENV = 'ANALYZER_METRICS_FILE'
+# The unauthenticated metrics endpoint binds to loopback unless this variable names a wider address (e.g. 0.0.0.0)
+METRICS_HOST_ENV = 'ANALYZER_METRICS_HOST'
+METRICS_DEFAULT_HOST = '127.0.0.1'
+# Histogram bucket upper bounds for durations, row counts and column counts
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+ROWS_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+COLUMNS_BUCKETS = (5, 10, 20, 50, 100, 200, 500)
+# Fields recorded for every LLM call (tokens and cost as reported by OpenRouter, times in seconds)
+LLM_CALL_FIELDS = ['time', 'dataset', 'role', 'model_requested', 'model', 'status', 'outcome', 'prompt_chars',
+                   'prompt_tokens', 'completion_tokens', 'total_tokens', 'cost', 'ttfb', 'latency']
+# Models asked in order (overridden by a comma-separated OPENROUTER_MODELS): the next one serves hedges and fallbacks
+LLM_MODELS = ['tngtech/deepseek-r1t2-chimera:free', 'deepseek/deepseek-chat-v3-0324:free']
+LLM_MODELS_ENV = 'OPENROUTER_MODELS'
+# A hedged request to the next model fires when the newest one has streamed nothing for this long
+HEDGE_AFTER_SECONDS = 10.0
+HEDGE_POLL_SECONDS = 0.25
+# Upper bound of each HTTP wait of an LLM request, lowered to what is left of the analysis deadline
+API_TIMEOUT_SECONDS = 120
+# Columns summarised between two deadline checks
+DEADLINE_CHECK_COLUMNS = 50
+# Worker processes shared by the analysis jobs of every session
+JOB_WORKERS = min(4, os.cpu_count() or 1)
+# Progress reported when an analysis job reaches each stage (the LLM call takes the rest)
+JOB_STAGE_PROGRESS = {'statistics': 0.05, 'duplicates': 0.15, 'overview': 0.25, 'numerical': 0.3, 'categorical': 0.4,
+                      'boolean': 0.5, 'prompt': 0.55, 'api_call': 0.6}
+# Results a job sends back: what the worker computed, never the dataset or its profile (the parent keeps those)
+JOB_RESULT_KEYS = ('fingerprint', 'descriptive_stats', 'ai_analysis', 'timings', 'llm_call', 'cancelled')
+# Memory budget of the datasets shared across sessions: unreferenced ones beyond it are evicted, least recently used first
+SHARED_CACHE_MAX_BYTES = 1 << 30
+# Parts of an analysis other sessions reuse: the read-only statistics and AI text, never this session's frame, call or timings
+SHARED_RESULT_KEYS = ('fingerprint', 'statistics', 'descriptive_stats', 'ai_analysis')
+HASH_BLOCK_BYTES = 1 << 20
+
+class ReservoirSample:
+    """
+    Fixed-size uniform random sample of a stream of chunks (algorithm R, vectorised per chunk).
+    Every row seen has the same chance of being in the sample, without knowing the total up front.
+    """
+
+    def __init__(self, size: int, seed: int = 42):
+        self.size = size
+        self.rows_seen = 0
+        self._rng = np.random.default_rng(seed)
+        self._sample = None
+        # Stream position of each sampled row, to hand them back in their original order
+        self._positions = np.empty(0, dtype=np.int64)
+
+    def add(self, chunk: pd.DataFrame):
+        """Offer a chunk to the reservoir"""
+        start, n = self.rows_seen, len(chunk)
+        self.rows_seen += n
+        if n == 0:
+            return
+        
+        # The first rows of the stream fill the reservoir
+        direct = min(n, max(0, self.size - start))
+        if direct:
+            self._sample = chunk.iloc[:direct] if self._sample is None else pd.concat([self._sample, chunk.iloc[:direct]])
+            self._positions = np.concatenate([self._positions, np.arange(start, start + direct)])
+        if direct == n:
+            return
+        
+        # The row at position t replaces slot j ~ U[0, t] when j falls inside the reservoir
+        positions = np.arange(start + direct, start + n)
+        slots = self._rng.integers(0, positions + 1)
+        accepted = np.flatnonzero(slots < self.size)
+        if len(accepted) == 0:
+            return
+        # Successive replacements of the same slot: the last one wins
+        _, first = np.unique(slots[accepted][::-1], return_index=True)
+        accepted = accepted[::-1][first]
+        
+        source = np.arange(self.size)
+        source[slots[accepted]] = self.size + accepted
+        self._sample = pd.concat([self._sample, chunk.iloc[direct:]]).iloc[source]
+        self._positions[slots[accepted]] = positions[accepted]
+
+    def result(self) -> pd.DataFrame:
+        """Sampled rows, in the order they appeared in the stream"""
+        if self._sample is None:
+            return pd.DataFrame()
+        return self._sample.iloc[np.argsort(self._positions, kind='stable')].reset_index(drop=True)
+
+def _locked(method):
+    """Run a memoising profile method under the profile's lock, so sessions sharing the profile fill each entry once"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+class DatasetProfile:
+    """
+    Aggregates of one loaded DataFrame, shared by the analyzer and the interface.
+    Each aggregate is computed on first use and reused until another dataset is loaded.
+    """
+
+    def __init__(self, df: pd.DataFrame, column_types: Dict[str, List[str]]):
+        self.df = df
+        self.column_types = column_types
+        # 64-bit row fingerprints keyed by column subset (None = all columns)
+        self.row_fingerprints = {}
+        # Content hash of the whole dataset, used to key caches outside the analyzer
+        self.fingerprint = None
+        self._value_counts = {}
+        self._box_stats = {}
+        self._histograms = {}
+        self._timelines = {}
+        self._samples = {}
+        # Held while a memoised aggregate is computed: sessions sharing a dataset share its profile
+        self.lock = threading.RLock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # A copy sent to a worker process gets a lock of its own
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def warm(self):
+        """Compute the whole-dataset aggregates now, before other sessions can ask for them at the same time"""
+        for name in ('missing_counts', 'total_missing', 'numeric_summary', 'boolean_summary'):
+            getattr(self, name)
+
+    @property
+    def n_rows(self) -> int:
+        return self.df.shape[0]
+
+    @property
+    def n_columns(self) -> int:
+        return self.df.shape[1]
+
+    @cached_property
+    def missing_counts(self) -> pd.Series:
+        """Missing values per column"""
+        return self.df.isnull().sum()
+
+    @cached_property
+    def total_missing(self) -> int:
+        return int(self.missing_counts.sum())
+
+    @cached_property
+    def numeric_summary(self) -> pd.DataFrame:
+        """One row per numerical column: moments, extremes, percentiles and missing count"""
+        columns = self.column_types['Numerical']
+        if not columns:
+            return pd.DataFrame()
+        
+        numeric = self.df[columns]
+        summary = numeric.agg(['count', 'mean', 'var', 'std', 'min', 'max', 'skew', 'kurt']).T
+        quantiles = numeric.quantile([0.05, 0.25, 0.5, 0.75, 0.95]).T
+        quantiles.columns = ['p05', 'p25', 'median', 'p75', 'p95']
+        summary = summary.join(quantiles).astype('float64')
+        summary['missing'] = self.missing_counts[columns]
+        return summary
+
+    @cached_property
+    def boolean_summary(self) -> pd.DataFrame:
+        """One row per True/False column with the variance and standard deviation of the 0/1 values"""
+        columns = self.column_types['True/False']
+        if not columns:
+            return pd.DataFrame()
+        return self.df[columns].astype('float64').agg(['var', 'std']).T
+
+    @_locked
+    def value_counts(self, column: str) -> pd.Series:
+        """Value counts of a column, most frequent first, computed once per column"""
+        if column not in self._value_counts:
+            self._value_counts[column] = self.df[column].value_counts()
+        return self._value_counts[column]
+
+    def value_percentages(self, column: str) -> pd.Series:
+        """Share of each value among the non-missing values, in percent"""
+        counts = self.value_counts(column)
+        return counts / counts.sum() * 100
+
+    def histogram_bins(self, column: str) -> int:
+        """Freedman–Diaconis bin count from the cached quartiles (Sturges when the IQR is zero)"""
+        summary = self.numeric_summary.loc[column]
+        count, span = summary['count'], summary['max'] - summary['min']
+        if count == 0 or not np.isfinite(span) or span == 0:
+            return 1
+        iqr = summary['p75'] - summary['p25']
+        if iqr > 0:
+            bins = int(np.ceil(span / (2 * iqr / count ** (1 / 3))))
+        else:
+            bins = int(np.ceil(np.log2(count))) + 1
+        return min(max(bins, 1), HISTOGRAM_MAX_BINS)
+
+    @_locked
+    def histogram(self, column: str, bins: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Bin counts and edges of a numerical column, computed once per column and bin count"""
+        bins = bins or self.histogram_bins(column)
+        key = (column, bins)
+        if key not in self._histograms:
+            values = self.df[column].astype('float64').to_numpy()
+            values = values[np.isfinite(values)]
+            if len(values) == 0:
+                self._histograms[key] = (np.zeros(0, dtype='int64'), np.zeros(0))
+            else:
+                self._histograms[key] = np.histogram(values, bins=bins, range=(values.min(), values.max()))
+        return self._histograms[key]
+
+    def histogram_bar(self, column: str, bins: int = None, **trace_kwargs) -> go.Bar:
+        """Histogram of a column as a bar trace: one value per bin instead of the raw column"""
+        counts, edges = self.histogram(column, bins)
+        return go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+            marker_line_width=0, **trace_kwargs
+        )
+
+    @_locked
+    def timeline(self, column: str, max_points: int = TIMELINE_MAX_POINTS) -> Tuple[pd.Series, str]:
+        """
+        Record counts of a date/time column per time bucket, and the bucket name. The bucket is the finest
+        of minute, hour, day, week, month, quarter, year or N years that keeps the timeline within max_points;
+        computed once per column.
+        """
+        key = (column, max_points)
+        if key not in self._timelines:
+            # Resample the cached counts of distinct timestamps rather than the raw column
+            counts = self.value_counts(column)
+            if len(counts) == 0:
+                self._timelines[key] = (pd.Series(dtype='int64'), 'day')
+                return self._timelines[key]
+            
+            dates = pd.DatetimeIndex(counts.index)
+            span = dates.max() - dates.min()
+            # A span of k bucket widths can touch k + 2 buckets once aligned to calendar boundaries
+            intervals = max(max_points - 1, 1)
+            name, rule = next(
+                ((name, rule) for name, rule, width in TIMELINE_BUCKETS if span / width < intervals),
+                (None, None)
+            )
+            if rule is None:
+                years = int(span / (TIMELINE_BUCKETS[-1][2] * intervals)) + 1
+                name, rule = f"{years} years", f"{years}YS"
+            buckets = pd.Series(counts.to_numpy(), index=dates).resample(rule, closed='left', label='left').sum()
+            self._timelines[key] = (buckets, name)
+        return self._timelines[key]
+
+    @_locked
+    def box_stats(self, column: str, by: str = None, max_outliers: int = BOX_PLOT_MAX_OUTLIERS) -> pd.DataFrame:
+        """
+        Tukey box plot statistics of a numerical column, optionally one box per value of another column.
+        Columns: q1, median, q3, lowerfence/upperfence (furthest values within 1.5 IQR), count,
+        n_outliers and outliers, a sorted sample of at most max_outliers values that keeps the extremes.
+        """
+        key = (column, by, max_outliers)
+        if key in self._box_stats:
+            return self._box_stats[key]
+        
+        values = self.df[column].astype('float64').to_numpy()
+        if by is None:
+            # A single box labelled with the column name
+            groups = pd.Categorical.from_codes(np.zeros(len(values), dtype='int8'), categories=[column])
+        else:
+            groups = self.df[by].to_numpy()
+        frame = pd.DataFrame({'group': groups, 'value': values}).dropna()
+        grouped = frame.groupby('group', sort=True, observed=True)['value']
+        
+        stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+        stats.columns = ['q1', 'median', 'q3']
+        stats.index.name = by
+        iqr = stats['q3'] - stats['q1']
+        lower = (stats['q1'] - 1.5 * iqr).reindex(frame['group']).to_numpy()
+        upper = (stats['q3'] + 1.5 * iqr).reindex(frame['group']).to_numpy()
+        inside = (frame['value'].to_numpy() >= lower) & (frame['value'].to_numpy() <= upper)
+        
+        whiskers = frame[inside].groupby('group', sort=True, observed=True)['value'].agg(['min', 'max'])
+        stats['lowerfence'] = whiskers['min']
+        stats['upperfence'] = whiskers['max']
+        stats['count'] = grouped.size()
+        
+        # Outlier sample: each group's extremes first, then a seeded shuffle of the rest
+        outliers = frame[~inside]
+        by_group = outliers.groupby('group', sort=True, observed=True)['value']
+        stats['n_outliers'] = by_group.size().reindex(stats.index, fill_value=0)
+        extremes = by_group.agg(['idxmin', 'idxmax']).to_numpy().ravel()
+        order = pd.Index(extremes).append(outliers.sample(frac=1, random_state=42).index)
+        sample = outliers.loc[order[~order.duplicated()]].groupby('group', observed=True).head(max_outliers)
+        samples = {label: np.sort(group.to_numpy()) for label, group in sample.groupby('group', observed=True)['value']}
+        stats['outliers'] = [samples.get(label, np.empty(0)) for label in stats.index]
+        
+        self._box_stats[key] = stats
+        return stats
+
+    def _uniform_positions(self, candidates: np.ndarray, size: int, rng: np.random.Generator) -> np.ndarray:
+        """Up to size positions drawn without replacement from the candidates"""
+        if size >= len(candidates):
+            return candidates
+        return rng.choice(candidates, size=max(size, 0), replace=False)
+
+    def stratified_sample(self, column: str, size: int, min_per_stratum: int = MIN_ROWS_PER_STRATUM,
+                          seed: int = 42) -> pd.DataFrame:
+        """
+        Sample stratified by a categorical column. Every category (missing values included) gets at
+        least min_per_stratum rows, or all of them if it has fewer; the rest is shared in proportion
+        to the size of each category. With more categories than slots the sample is uniform.
+        """
+        if len(self.df) <= size:
+            return self.df
+        rng = np.random.default_rng(seed)
+        codes, _ = pd.factorize(self.df[column], use_na_sentinel=False)
+        counts = np.bincount(codes)
+        
+        guaranteed = min(min_per_stratum, size // len(counts))
+        if guaranteed == 0:
+            positions = self._uniform_positions(np.arange(len(self.df)), size, rng)
+            return self.df.iloc[np.sort(positions)]
+        
+        floor = np.minimum(counts, guaranteed)
+        surplus = counts - floor
+        quotas = floor + np.floor(surplus * (size - floor.sum()) / max(surplus.sum(), 1)).astype(np.int64)
+        
+        # Random order within each category; the first quotas[category] rows are kept
+        order = np.lexsort((rng.random(len(codes)), codes))
+        stratum_start = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        rank_in_stratum = np.arange(len(order)) - stratum_start[codes[order]]
+        positions = order[rank_in_stratum < quotas[codes[order]]]
+        return self.df.iloc[np.sort(positions)]
+
+    def tail_preserving_sample(self, columns: List[str], size: int,
+                               extremes_fraction: float = SAMPLE_EXTREMES_FRACTION, seed: int = 42) -> pd.DataFrame:
+        """
+        Sample that keeps the rows holding the smallest and largest values of each numerical column
+        (extremes_fraction of the size, split across columns and sides) and fills the rest with a
+        uniform draw from the remaining rows.
+        """
+        if len(self.df) <= size:
+            return self.df
+        rng = np.random.default_rng(seed)
+        per_side = max(1, int(size * extremes_fraction) // (2 * max(1, len(columns))))
+        
+        extremes = [np.empty(0, dtype=np.int64)]
+        for col in columns:
+            values = pd.to_numeric(self.df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            valid = np.flatnonzero(np.isfinite(values))
+            if len(valid) <= 2 * per_side:
+                extremes.append(valid)
+                continue
+            values = values[valid]
+            extremes.append(valid[np.argpartition(values, per_side - 1)[:per_side]])
+            extremes.append(valid[np.argpartition(values, len(values) - per_side)[-per_side:]])
+        extremes = np.unique(np.concatenate(extremes))
+        
+        others = np.ones(len(self.df), dtype=bool)
+        others[extremes] = False
+        drawn = self._uniform_positions(np.flatnonzero(others), size - len(extremes), rng)
+        return self.df.iloc[np.sort(np.concatenate([extremes, drawn]))]
+
+    @_locked
+    def sample(self, chart_type: str, columns: List[str], stratify_by: str = None) -> pd.DataFrame:
+        """
+        Sample of the columns sized for the chart type (SAMPLE_SIZES). Stratified by stratify_by
+        when given, otherwise keeping the extremes of the numerical columns.
+        """
+        key = (chart_type, tuple(columns), stratify_by)
+        if key not in self._samples:
+            size = SAMPLE_SIZES[chart_type]
+            if stratify_by is not None:
+                sample = self.stratified_sample(stratify_by, size)
+            else:
+                numerical = [col for col in columns if col in self.column_types['Numerical']]
+                sample = self.tail_preserving_sample(numerical, size)
+            self._samples[key] = sample[list(columns)]
+        return self._samples[key]
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms, rendered in the Prometheus text format.
+    Metrics are declared once with their help text; values are kept per label set and
+    can be scraped from a small HTTP endpoint or dumped to a file for a textfile collector.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def counter(self, name: str, help_text: str):
+        """Declare a counter"""
+        self._metrics[name] = {'type': 'counter', 'help': help_text, 'values': {}}
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        """Declare a histogram with the given bucket upper bounds"""
+        self._metrics[name] = {'type': 'histogram', 'help': help_text, 'buckets': tuple(buckets), 'values': {}}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add to a counter"""
+        key = tuple(sorted(labels.items()))
+        values = self._metrics[name]['values']
+        with self._lock:
+            values[key] = values.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one observation in a histogram"""
+        metric = self._metrics[name]
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # Per label set: count per bucket (the last one is +Inf), sum and count
+            state = metric['values'].setdefault(key, [[0] * (len(metric['buckets']) + 1), 0.0, 0])
+            state[0][bisect.bisect_left(metric['buckets'], value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def collect(self) -> Dict[str, Dict[Tuple, Any]]:
+        """Take the values recorded so far, leaving the registry empty (a worker process hands them to its parent)"""
+        with self._lock:
+            values = {name: dict(metric['values']) for name, metric in self._metrics.items() if metric['values']}
+            for metric in self._metrics.values():
+                metric['values'].clear()
+        return values
+
+    def merge(self, values: Dict[str, Dict[Tuple, Any]]):
+        """Add values collected in another process"""
+        with self._lock:
+            for name, states in values.items():
+                metric = self._metrics[name]
+                for key, state in states.items():
+                    if metric['type'] == 'counter':
+                        metric['values'][key] = metric['values'].get(key, 0) + state
+                        continue
+                    current = metric['values'].setdefault(key, [[0] * len(state[0]), 0.0, 0])
+                    current[0] = [a + b for a, b in zip(current[0], state[0])]
+                    current[1] += state[1]
+                    current[2] += state[2]
+
+    def value(self, name: str, **labels) -> float:
+        """Current value of a counter, or observation count of a histogram, for one label set"""
+        state = self._metrics[name]['values'].get(tuple(sorted(labels.items())), 0)
+        return state[2] if isinstance(state, list) else state
+
+    @staticmethod
+    def _format_labels(labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = [(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                 for key, value in tuple(labels) + extra]
+        return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}' if pairs else ''
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, metric in self._metrics.items():
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {full_name} {metric['help']}")
+                lines.append(f"# TYPE {full_name} {metric['type']}")
+                for labels, state in metric['values'].items():
+                    if metric['type'] == 'counter':
+                        lines.append(f"{full_name}{self._format_labels(labels)} {state:g}")
+                        continue
+                    bucket_counts, total, count = state
+                    cumulative = 0
+                    for bound, bucket_count in zip(metric['buckets'] + ('+Inf',), bucket_counts):
+                        cumulative += bucket_count
+                        lines.append(f"{full_name}_bucket{self._format_labels(labels, (('le', f'{bound:g}' if bound != '+Inf' else bound),))} {cumulative}")
+                    lines.append(f"{full_name}_sum{self._format_labels(labels)} {total:g}")
+                    lines.append(f"{full_name}_count{self._format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, file_path: str):
+        """Dump the metrics to a file, replaced atomically so a collector never reads a partial file"""
+        temporary_path = f"{file_path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(temporary_path, file_path)
+
+    def serve(self, port: int, host: str = METRICS_DEFAULT_HOST):
+        """Serve the metrics on http://host:port/metrics from a daemon thread (once per process)"""
+        if self._server is not None:
+            return
+        registry = self
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True).start()
+        print(f"📡 Metrics served on http://{host}:{port}/metrics")
+
+METRICS = MetricsRegistry('data_analyzer')
+METRICS.histogram('stage_duration_seconds', "Time spent in each pipeline stage.", SECONDS_BUCKETS)
+METRICS.counter('analyses_total', "Dataset analyses, by outcome.")
+METRICS.counter('rows_processed_total', "Rows of the analyzed datasets.")
+METRICS.counter('columns_processed_total', "Columns of the analyzed datasets.")
+METRICS.histogram('dataset_rows', "Rows per analyzed dataset.", ROWS_BUCKETS)
+METRICS.histogram('dataset_columns', "Columns per analyzed dataset.", COLUMNS_BUCKETS)
+METRICS.counter('cache_requests_total', "Lookups in the analyzer caches, by cache and result (hit or miss).")
+METRICS.counter('api_requests_total', "OpenRouter requests, by HTTP status code (or error class when there is no response).")
+METRICS.histogram('api_request_duration_seconds', "Latency of the OpenRouter requests.", SECONDS_BUCKETS)
+METRICS.histogram('api_time_to_first_byte_seconds', "Time until OpenRouter streams the first generated token.", SECONDS_BUCKETS)
+METRICS.counter('llm_tokens_total', "Tokens reported by OpenRouter, by kind (prompt or completion) and model.")
+METRICS.counter('llm_cost_total', "Cost reported by OpenRouter, in credits, by model.")
+METRICS.counter('llm_requests_total', "LLM requests by role (primary, hedge or fallback) and outcome (won, completed, cancelled or failed).")
+METRICS.counter('analysis_jobs_total', "Analysis jobs collected from the worker pool, by final state.")
+METRICS.histogram('analysis_job_queue_seconds', "Time analysis jobs waited for a worker process.", SECONDS_BUCKETS)
+
+class AnalysisCancelled(Exception):
+    """Raised at a checkpoint of an analysis that was cancelled or ran past its deadline"""
+
+class Deadline:
+    """
+    Time limit and cancellation flag of one analysis run, checked cooperatively between stages and column batches.
+    cancel() may be called from any thread; the run stops at its next check().
+    """
+
+    def __init__(self, seconds: float = None, cancel_event=None, on_stage: Callable[[str], None] = None):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        # Anything with set() and is_set(): a multiprocessing event lets another process cancel the run
+        self._cancelled = threading.Event() if cancel_event is None else cancel_event
+        # Called with the stage name at every check, to report progress
+        self.on_stage = on_stage
+
+    def cancel(self):
+        """Ask the run to stop at its next checkpoint"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None without a time limit)"""
+        if self.seconds is None:
+            return None
+        return max(self.seconds - self.elapsed, 0.0)
+
+    @property
+    def should_stop(self) -> bool:
+        """Whether the run was cancelled or is out of time"""
+        return self.cancelled or self.remaining() == 0.0
+
+    def check(self, stage: str):
+        """Raise AnalysisCancelled when the run was cancelled or is out of time"""
+        if self.on_stage is not None:
+            self.on_stage(stage)
+        if self.cancelled:
+            raise AnalysisCancelled(f"Analysis cancelled during {stage}")
+        if self.remaining() == 0.0:
+            raise AnalysisCancelled(f"Analysis ran past its {self.seconds:g}s deadline during {stage}")
+
+    def timeout(self, limit: float) -> float:
+        """An HTTP timeout of at most limit seconds that does not outlive the deadline"""
+        remaining = self.remaining()
+        return limit if remaining is None else max(min(limit, remaining), 0.1)
+
+    def batches(self, columns: List[str], stage: str, size: int = DEADLINE_CHECK_COLUMNS):
+        """Iterate over columns, checking the deadline before each batch of size columns"""
+        for start in range(0, len(columns), size):
+            self.check(stage)
+            yield from columns[start:start + size]
+
+class StageTimer:
+    """
+    Wall-clock spans of the analysis stages, in the order they start.
+    Spans opened inside another span are recorded under its name (statistics.numerical); when a
+    profiler is set, spans opened with profile=True also keep a cProfile or pyinstrument report.
+    """
+
+    def __init__(self, profiler: str = None, spans: List[Tuple[str, int, float]] = None,
+                 profiles: Dict[str, str] = None):
+        if profiler == 'pyinstrument' and not PYINSTRUMENT_AVAILABLE:
+            print("⚠️ pyinstrument is not installed, profiling with cProfile")
+            profiler = 'cprofile'
+        self.profiler = profiler
+        # (name, depth, seconds) per span; open spans hold 0.0 seconds
+        self.spans = list(spans or [])
+        self.profiles = dict(profiles or {})
+        self._open = []
+        self._profiling = False
+
+    @contextlib.contextmanager
+    def span(self, name: str, profile: bool = False):
+        """Time the body of the with block as one stage"""
+        path = '.'.join(self._open + [name])
+        depth = len(self._open)
+        # A profiled span already covers the spans opened inside it
+        profiler = self._start_profiler() if profile and self.profiler and not self._profiling else None
+        self._profiling = self._profiling or profiler is not None
+        self._open.append(name)
+        index = len(self.spans)
+        self.spans.append((path, depth, 0.0))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.spans[index] = (path, depth, elapsed)
+            self._open.pop()
+            METRICS.observe('stage_duration_seconds', elapsed, stage=path)
+            if profiler is not None:
+                self._profiling = False
+                self.profiles[path] = self._stop_profiler(profiler)
+
+    def _start_profiler(self):
+        if self.profiler == 'pyinstrument':
+            profiler = PyinstrumentProfiler()
+            profiler.start()
+            return profiler
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread
+            return None
+        return profiler
+
+    def _stop_profiler(self, profiler) -> str:
+        if self.profiler == 'pyinstrument':
+            profiler.stop()
+            return profiler.output_text()
+        profiler.disable()
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+        return report.getvalue()
+
+    @property
+    def running(self) -> bool:
+        """Whether a span is open"""
+        return bool(self._open)
+
+    @property
+    def total(self) -> float:
+        """Seconds spent in top-level spans"""
+        return sum(seconds for _, depth, seconds in self.spans if depth == 0)
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per stage (repeated spans are summed), in the order stages first started"""
+        frame = pd.DataFrame(self.spans, columns=['stage', 'depth', 'seconds'])
+        frame = frame.groupby('stage', sort=False).agg(depth=('depth', 'first'), calls=('seconds', 'size'),
+                                                       seconds=('seconds', 'sum')).reset_index()
+        frame['share'] = frame['seconds'] / self.total * 100 if self.total else 0.0
+        return frame
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-data form: seconds per stage, the total and the captured profiles"""
+        frame = self.to_frame()
+        return {
+            'stages': dict(zip(frame['stage'], frame['seconds'].astype(float))),
+            'total': self.total,
+            'profiler': self.profiler,
+            'profiles': dict(self.profiles)
+        }
+
+class DescriptiveStatistics:
+    """
+    Descriptive statistics of one dataset, held as per-column arrays (one table per column kind).
+    Markdown, LLM prompt, JSON and metric-card renderings are built on request and memoised;
+    the model round-trips through to_dict/from_dict (and pickles) so it can be cached.
+    """
+
+    def __init__(self, overview: Dict[str, Any], numerical: Dict[str, Any], categorical: Dict[str, Any],
+                 boolean: Dict[str, Any], stream: Optional[Dict[str, Any]] = None):
+        self.overview = overview
+        self.numerical = numerical
+        self.categorical = categorical
+        self.boolean = boolean
+        self.stream = stream
+        self._renders = {}
+        self._positions = {}
+
+    @classmethod
+    def from_profile(cls, profile: DatasetProfile, duplicate_rows: int,
+                     stream_profile: Optional[Dict[str, Any]] = None, top_n: int = 3,
+                     timer: StageTimer = None, deadline: Deadline = None) -> 'DescriptiveStatistics':
+        """Collect the statistics of a profiled dataset (and of the whole streamed file, when only part was kept)"""
+        timer = timer or StageTimer()
+        deadline = deadline or Deadline()
+        column_types = profile.column_types
+        deadline.check('overview')
+        with timer.span('overview'):
+            overview = {
+                'rows': profile.n_rows,
+                'columns': profile.n_columns,
+                'missing': profile.total_missing,
+                'duplicate_rows': duplicate_rows,
+                'type_counts': {kind: len(columns) for kind, columns in column_types.items()}
+            }
+        
+        # One vectorised pass over all numerical columns: checked once, before it starts
+        deadline.check('numerical')
+        with timer.span('numerical'):
+            summary = profile.numeric_summary
+            numerical = {'column': list(summary.index)}
+            numerical.update({stat: summary[stat].to_numpy() for stat in summary.columns})
+        
+        categorical_cols = column_types['Categorical']
+        with timer.span('categorical'):
+            categorical = {
+                'column': list(categorical_cols),
+                # Value counts are computed column by column here, and reused from the profile below
+                'unique': np.array([len(profile.value_counts(col)) for col in deadline.batches(categorical_cols, 'categorical')],
+                                   dtype=np.int64),
+                'missing': profile.missing_counts[categorical_cols].to_numpy(dtype=np.int64),
+                'top_values': [[(str(value), int(count)) for value, count in profile.value_counts(col).head(top_n).items()]
+                               for col in categorical_cols]
+            }
+        
+        boolean_cols = column_types['True/False']
+        with timer.span('boolean'):
+            boolean = {
+                'column': list(boolean_cols),
+                'values': [[(str(value), int(count), float(profile.value_percentages(col)[value]))
+                            for value, count in profile.value_counts(col).items()] for col in deadline.batches(boolean_cols, 'boolean')],
+                'var': profile.boolean_summary['var'].to_numpy() if boolean_cols else np.empty(0),
+                'std': profile.boolean_summary['std'].to_numpy() if boolean_cols else np.empty(0),
+                'missing': profile.missing_counts[boolean_cols].to_numpy(dtype=np.int64)
+            }
+        
+        stream = None
+        if stream_profile and stream_profile['rows'] > profile.n_rows:
+            numeric = stream_profile['numeric']
+            stream = {
+                'rows': stream_profile['rows'],
+                'columns': len(stream_profile['non_null']),
+                'missing': stream_profile['rows'] * len(stream_profile['non_null']) - int(stream_profile['non_null'].sum()),
+                'kept_rows': profile.n_rows,
+                'sampled': bool(stream_profile.get('sampled')),
+                'numerical': {
+                    'column': list(numeric),
+                    'count': np.array([stats['count'] for stats in numeric.values()], dtype=np.int64),
+                    'mean': np.array([stats['mean'] for stats in numeric.values()], dtype='float64'),
+                    'std': np.array([np.sqrt(stats['m2'] / (stats['count'] - 1)) if stats['count'] > 1 else 0.0
+                                     for stats in numeric.values()], dtype='float64'),
+                    'min': np.array([stats['min'] for stats in numeric.values()], dtype='float64'),
+                    'max': np.array([stats['max'] for stats in numeric.values()], dtype='float64')
+                }
+            }
+        
+        return cls(overview, numerical, categorical, boolean, stream)
+
+    def _position(self, kind: str, column: str) -> Optional[int]:
+        """Row of a column in the numerical, categorical or boolean table"""
+        if kind not in self._positions:
+            self._positions[kind] = {col: i for i, col in enumerate(getattr(self, kind)['column'])}
+        return self._positions[kind].get(column)
+
+    def to_markdown(self) -> str:
+        """Full report in Markdown, as shown in the interface and saved with the results"""
+        if 'markdown' in self._renders:
+            return self._renders['markdown']
+        
+        overview = self.overview
+        parts = [
+            "# 📊 Descriptive Statistics Report\n\n",
+            "## 📋 Dataset Overview\n\n",
+            f"- **Total Rows**: {overview['rows']:,}\n",
+            f"- **Total Columns**: {overview['columns']}\n",
+            f"- **Missing Values**: {overview['missing']}\n",
+            f"- **Duplicate Rows**: {overview['duplicate_rows']}\n\n"
+        ]
+        
+        # Whole-file figures when only part of a streamed file was kept
+        if self.stream:
+            stream = self.stream
+            kept = 'random sample of' if stream['sampled'] else 'first'
+            parts += [
+                "## 📜 Full Source File (streamed)\n\n",
+                f"- **Rows in File**: {stream['rows']:,} ({kept} {stream['kept_rows']:,} loaded)\n",
+                f"- **Columns in File**: {stream['columns']}\n",
+                f"- **Missing Values**: {stream['missing']}\n\n"
+            ]
+            table = stream['numerical']
+            if table['column']:
+                parts.append("| Column | Count | Mean | Std | Min | Max |\n|---|---|---|---|---|---|\n")
+                for i, col in enumerate(table['column']):
+                    parts.append(f"| {col} | {table['count'][i]:,} | {table['mean'][i]:.4f} | {table['std'][i]:.4f} | "
+                                 f"{table['min'][i]:.4f} | {table['max'][i]:.4f} |\n")
+                parts.append("\n")
+        
+        parts.append("## 🔧 Data Types Summary\n\n")
+        for kind, count in overview['type_counts'].items():
+            if count > 0:
+                parts.append(f"- **{kind}**: {count} columns\n")
+        parts.append("\n")
+        
+        table = self.numerical
+        if table['column']:
+            parts.append("## 🔢 Numerical Columns\n\n")
+            for i, col in enumerate(table['column']):
+                parts += [
+                    f"### 📈 {col}\n\n",
+                    f"- **Mean**: {table['mean'][i]:.2f}\n",
+                    f"- **Median**: {table['median'][i]:.2f}\n",
+                    f"- **Variance**: {table['var'][i]:.2f}\n",
+                    f"- **Standard Deviation**: {table['std'][i]:.2f}\n",
+                    f"- **Minimum**: {table['min'][i]:.2f}\n",
+                    f"- **Maximum**: {table['max'][i]:.2f}\n",
+                    f"- **Range**: {table['max'][i] - table['min'][i]:.2f}\n",
+                    f"- **Missing Values**: {int(table['missing'][i])}\n\n"
+                ]
+        
+        table = self.categorical
+        if table['column']:
+            parts.append("## 📝 Categorical Columns\n\n")
+            for i, col in enumerate(table['column']):
+                parts += [
+                    f"### 🏷️ {col}\n\n",
+                    f"- **Unique Values**: {table['unique'][i]}\n",
+                    f"- **Missing Values**: {table['missing'][i]}\n",
+                    f"- **Top 3 Values**:\n"
+                ]
+                parts += [f"  - `{value}`: {count} occurrences\n" for value, count in table['top_values'][i]]
+                parts.append("\n")
+        
+        table = self.boolean
+        if table['column']:
+            parts.append("## ✅ True/False Columns\n\n")
+            for i, col in enumerate(table['column']):
+                parts += [f"### 🔘 {col}\n\n", f"- **Distribution**:\n"]
+                parts += [f"  - `{value}`: {count} ({percentage:.1f}%)\n" for value, count, percentage in table['values'][i]]
+                parts += [
+                    f"- **Variance**: {table['var'][i]:.2f}\n",
+                    f"- **Standard Deviation**: {table['std'][i]:.2f}\n",
+                    f"- **Missing Values**: {table['missing'][i]}\n\n"
+                ]
+        
+        self._renders['markdown'] = ''.join(parts)
+        return self._renders['markdown']
+
+    def to_prompt(self) -> str:
+        """Compact rendering for the LLM prompt: one table row per column instead of one bullet per statistic"""
+        if 'prompt' in self._renders:
+            return self._renders['prompt']
+        
+        overview = self.overview
+        lines = [
+            f"Rows: {overview['rows']:,} | Columns: {overview['columns']} | Missing values: {overview['missing']:,} | "
+            f"Duplicate rows: {overview['duplicate_rows']:,}",
+            "Column types: " + ", ".join(f"{kind} {count}" for kind, count in overview['type_counts'].items() if count)
+        ]
+        if self.stream:
+            kept = 'a random sample of' if self.stream['sampled'] else 'the first'
+            lines.append(f"Source file: {self.stream['rows']:,} rows, {self.stream['columns']} columns; "
+                         f"statistics below cover {kept} {self.stream['kept_rows']:,} rows")
+        
+        table = self.numerical
+        if table['column']:
+            stats = ['mean', 'std', 'min', 'p05', 'p25', 'median', 'p75', 'p95', 'max', 'skew', 'kurt']
+            lines += ["", "Numerical columns:", "| column | " + " | ".join(stats) + " | missing |",
+                      "|---" * (len(stats) + 2) + "|"]
+            for i, col in enumerate(table['column']):
+                values = " | ".join(f"{table[stat][i]:.4g}" for stat in stats)
+                lines.append(f"| {col} | {values} | {int(table['missing'][i])} |")
+        
+        table = self.categorical
+        if table['column']:
+            lines += ["", "Categorical columns:", "| column | unique | missing | top values (count) |", "|---|---|---|---|"]
+            for i, col in enumerate(table['column']):
+                top = ", ".join(f"{value} ({count})" for value, count in table['top_values'][i])
+                lines.append(f"| {col} | {table['unique'][i]} | {table['missing'][i]} | {top} |")
+        
+        table = self.boolean
+        if table['column']:
+            lines += ["", "True/False columns:", "| column | distribution | missing |", "|---|---|---|"]
+            for i, col in enumerate(table['column']):
+                distribution = ", ".join(f"{value} {percentage:.1f}%" for value, _, percentage in table['values'][i])
+                lines.append(f"| {col} | {distribution} | {table['missing'][i]} |")
+        
+        self._renders['prompt'] = "\n".join(lines) + "\n"
+        return self._renders['prompt']
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain, JSON-compatible form of the model (arrays become lists, NaN becomes None)"""
+        def plain(value):
+            if isinstance(value, dict):
+                return {key: plain(item) for key, item in value.items()}
+            if isinstance(value, np.ndarray):
+                value = value.tolist()
+            if isinstance(value, (list, tuple)):
+                return [plain(item) for item in value]
+            if isinstance(value, float) and not np.isfinite(value):
+                return None
+            return value.item() if isinstance(value, np.generic) else value
+        
+        return plain({'overview': self.overview, 'numerical': self.numerical, 'categorical': self.categorical,
+                      'boolean': self.boolean, 'stream': self.stream})
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DescriptiveStatistics':
+        """Rebuild a model from to_dict output"""
+        def arrays(table, nested):
+            return {key: (value if key in ('column',) + nested else np.array(value, dtype='float64'))
+                    for key, value in table.items()}
+        
+        numerical = arrays(data['numerical'], ())
+        categorical = arrays(data['categorical'], ('top_values',))
+        categorical['top_values'] = [[tuple(item) for item in top] for top in categorical['top_values']]
+        boolean = arrays(data['boolean'], ('values',))
+        boolean['values'] = [[tuple(item) for item in values] for values in boolean['values']]
+        for table, counts in [(numerical, ['missing']), (categorical, ['unique', 'missing']), (boolean, ['missing'])]:
+            for key in counts:
+                if key in table:
+                    table[key] = table[key].astype(np.int64)
+        
+        stream = data['stream']
+        if stream:
+            stream = dict(stream, numerical=arrays(stream['numerical'], ()))
+            stream['numerical']['count'] = stream['numerical']['count'].astype(np.int64)
+        return cls(data['overview'], numerical, categorical, boolean, stream)
+
+    def to_json(self) -> str:
+        """JSON text of to_dict, for caches and downloads"""
+        if 'json' not in self._renders:
+            self._renders['json'] = json.dumps(self.to_dict(), ensure_ascii=False)
+        return self._renders['json']
+
+    def metric_cards(self, column: str) -> Dict[str, str]:
+        """Formatted label -> value pairs shown as metric cards for one column"""
+        key = ('cards', column)
+        if key in self._renders:
+            return self._renders[key]
+        
+        cards = {}
+        i = self._position('numerical', column)
+        if i is not None:
+            table = self.numerical
+            cards = {
+                "Mean": f"{table['mean'][i]:.2f}",
+                "Median": f"{table['median'][i]:.2f}",
+                "Variance": f"{table['var'][i]:.2f}",
+                "Standard Deviation": f"{table['std'][i]:.2f}",
+                "Minimum": f"{table['min'][i]:.2f}",
+                "Maximum": f"{table['max'][i]:.2f}",
+                "Missing Values": f"{int(table['missing'][i])}"
+            }
+        i = self._position('categorical', column)
+        if i is not None:
+            cards = {"Unique Categories": f"{self.categorical['unique'][i]}", "Missing Values": f"{self.categorical['missing'][i]}"}
+        i = self._position('boolean', column)
+        if i is not None:
+            cards = {f"{value} Count": f"{count} ({percentage:.1f}%)" for value, count, percentage in self.boolean['values'][i]}
+        
+        self._renders[key] = cards
+        return cards
+
+class LLMUsage:
+    """
+    Every LLM call made by one analyzer (one app session): tokens, time to first byte, latency,
+    cost and model, tagged with the fingerprint of the dataset being analyzed.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def record(self, call: Dict[str, Any]):
+        """Add one call (a dict with the LLM_CALL_FIELDS keys)"""
+        self.calls.append(call)
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per call, oldest first"""
+        return pd.DataFrame(self.calls, columns=LLM_CALL_FIELDS)
+
+    @staticmethod
+    def _aggregate(calls: pd.DataFrame) -> Dict[str, Any]:
+        generation_time = (calls['latency'] - calls['ttfb']).where(calls['completion_tokens'].notna()).sum()
+        return {
+            'calls': len(calls),
+            'failed_calls': int((calls['outcome'] == 'failed').sum()),
+            'cancelled_calls': int((calls['outcome'] == 'cancelled').sum()),
+            'prompt_tokens': int(calls['prompt_tokens'].sum()),
+            'completion_tokens': int(calls['completion_tokens'].sum()),
+            'cost': float(calls['cost'].sum(min_count=1)) if calls['cost'].notna().any() else None,
+            'latency': float(calls['latency'].sum()),
+            'mean_latency': float(calls['latency'].mean()) if len(calls) else None,
+            'mean_ttfb': float(calls['ttfb'].mean()) if calls['ttfb'].notna().any() else None,
+            'completion_tokens_per_second': float(calls['completion_tokens'].sum() / generation_time) if generation_time > 0 else None
+        }
+
+    def totals(self, dataset: str = None) -> Dict[str, Any]:
+        """Totals of the session, or of the calls made for one dataset"""
+        calls = self.to_frame()
+        if dataset is not None:
+            calls = calls[calls['dataset'] == dataset]
+        return self._aggregate(calls)
+
+    def by_dataset(self) -> pd.DataFrame:
+        """Totals per dataset, in the order the datasets were first analyzed"""
+        calls = self.to_frame()
+        rows = [{'dataset': dataset, **self._aggregate(group)} for dataset, group in calls.groupby('dataset', sort=False, dropna=False)]
+        return pd.DataFrame(rows, columns=['dataset', 'calls', 'failed_calls', 'cancelled_calls', 'prompt_tokens', 'completion_tokens', 'cost',
+                                           'latency', 'mean_latency', 'mean_ttfb', 'completion_tokens_per_second'])
+
+class SharedDatasetCache:
+    """
+    Process-wide store of loaded datasets keyed by the content hash of the uploaded bytes (and the load options),
+    so sessions uploading the same file share one frame, its profile and the AI results computed for it.
+    Shared entries are read-only. Sessions hold them through acquire()/put() until release(); entries nobody
+    holds are evicted, least recently used first, once their frames exceed the memory budget.
+    """
+
+    def __init__(self, max_bytes: int = SHARED_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_key(source, *options) -> str:
+        """Hash of a file's bytes (a path or a file-like object, rewound afterwards) and of the options it is loaded with"""
+        digest = hashlib.blake2b(digest_size=16)
+        with contextlib.ExitStack() as stack:
+            if isinstance(source, (str, os.PathLike)):
+                stream = stack.enter_context(open(source, 'rb'))
+            else:
+                stream = source
+                position = stream.tell()
+                stream.seek(0)
+                stack.callback(stream.seek, position)
+            for block in iter(lambda: stream.read(HASH_BLOCK_BYTES), b''):
+                digest.update(block)
+        digest.update(repr(options).encode('utf-8'))
+        return digest.hexdigest()
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry['bytes'] for entry in self._entries.values())
+
+    def acquire(self, key: str) -> Optional[Dict[str, Any]]:
+        """Take a reference on a shared dataset (None when it is not cached)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['refs'] += 1
+                self._entries.move_to_end(key)
+        METRICS.inc('cache_requests_total', cache='shared_dataset', result='hit' if entry is not None else 'miss')
+        return entry
+
+    def put(self, key: str, df: pd.DataFrame, profile: DatasetProfile, stream_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Share a freshly loaded dataset, holding one reference on it (an entry another session added first wins)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {'df': df, 'profile': profile, 'stream_profile': stream_profile, 'results': {}, 'refs': 0,
+                         'bytes': int(df.memory_usage(deep=True).sum())}
+                self._entries[key] = entry
+            entry['refs'] += 1
+            self._entries.move_to_end(key)
+            self._evict()
+        return entry
+
+    def release(self, key: str):
+        """Drop a reference; the dataset stays cached until the memory budget needs its space"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['refs'] = max(entry['refs'] - 1, 0)
+                self._evict()
+
+    def results(self, key: str, variant: Tuple) -> Optional[Dict[str, Any]]:
+        """Statistics and AI text computed for a shared dataset with the given models (a copy each session can update)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            results = entry['results'].get(variant) if entry is not None else None
+        METRICS.inc('cache_requests_total', cache='shared_results', result='hit' if results is not None else 'miss')
+        return dict(results) if results is not None else None
+
+    def store_results(self, key: str, variant: Tuple, results: Dict[str, Any]):
+        """Keep the statistics and AI text of complete results of a shared dataset for the other sessions"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or results.get('cancelled'):
+                return
+            entry['results'][variant] = {name: results[name] for name in SHARED_RESULT_KEYS}
+
+    def _evict(self):
+        # Called with the lock held; entries still referenced are never evicted
+        total = self.total_bytes
+        for key in [key for key, entry in self._entries.items() if entry['refs'] == 0]:
+            if total <= self.max_bytes:
+                break
+            total -= self._entries.pop(key)['bytes']
+            print(f"🧹 Evicted shared dataset {key[:12]}")
+
+    def stats(self) -> Dict[str, int]:
+        """Entries, entries in use, bytes held and the budget"""
+        with self._lock:
+            return {'entries': len(self._entries), 'referenced': sum(1 for entry in self._entries.values() if entry['refs']),
+                    'bytes': self.total_bytes, 'max_bytes': self.max_bytes}
+
+# One store per process, shared by every session
+SHARED_CACHE = SharedDatasetCache()
+
 class ChatBotAnalyzer:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, use_arrow: bool = False, profiler: str = None):
         # Priority: provided key > Streamlit secrets > env var > file
         if api_key is None:
             self.api_key = self.get_api_key_secure()
@@ -35,6 +1218,36 @@ class ChatBotAnalyzer:
             "X-Title": "Data Analyzer"
         }
         self.df = None
+        # One parsed workbook handle per Excel upload, with its sheets cached
+        self._excel_file = None
+        self._excel_source = None
+        self._excel_sheet_cache = {}
+        # Hold text and timestamp columns in Arrow-backed dtypes (requires pyarrow)
+        self.use_arrow = use_arrow and PYARROW_AVAILABLE
+        # Whole-file aggregates gathered while streaming JSON Lines input chunk by chunk
+        self.stream_profile = None
+        # Aggregates of the loaded DataFrame, rebuilt when another one is loaded
+        self._profile = None
+        # Stage timings of the last load, which open the timings of the next analysis
+        self.profiler = profiler
+        self.load_timer = StageTimer(profiler)
+        # Tokens, latency and cost of the LLM calls of this session
+        self.llm_usage = LLMUsage()
+        # Models asked in order, and the wait for output before hedging with the next one
+        self.models = [model.strip() for model in os.environ.get(LLM_MODELS_ENV, '').split(',') if model.strip()] or list(LLM_MODELS)
+        self.hedge_after = HEDGE_AFTER_SECONDS
+        # Key of the shared dataset in use, and the finalizer releasing it if this analyzer is dropped with its session
+        self.shared_key = None
+        self._shared_release = None
+        # Expose the process-wide metrics when a port is configured (the server starts once)
+        if os.environ.get(METRICS_PORT_ENV):
+            METRICS.serve(int(os.environ[METRICS_PORT_ENV]), os.environ.get(METRICS_HOST_ENV) or METRICS_DEFAULT_HOST)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The open Excel workbook stays in this process: a copy sent to a worker only needs the loaded data
+        state = self.__dict__.copy()
+        state.update(_excel_file=None, _excel_source=None, _excel_sheet_cache={}, shared_key=None, _shared_release=None)
+        return state
 
     def get_api_key_secure(self) -> Optional[str]:
         """
@@ -130,11 +1343,100 @@ class ChatBotAnalyzer:
             print(f"❌ Error reading API key file: {e}")
             return None
 
+    def start_load_timer(self) -> StageTimer:
+        """Start the timings of a new load; the next analysis continues them"""
+        self.load_timer = StageTimer(self.profiler)
+        return self.load_timer
+
     def load_data(self, df: pd.DataFrame):
         """Load DataFrame into analyzer"""
+        # Callers that read the file themselves time it in an open load span
+        if not self.load_timer.running:
+            self.start_load_timer()
+        if self.use_arrow:
+            with self.load_timer.span('arrow_conversion'):
+                df = self.to_arrow_dtypes(df)
+        self.release_shared_dataset()
         self.df = df
+        self.stream_profile = None
         print(f"✅ Data loaded successfully: {self.df.shape[0]} rows, {self.df.shape[1]} columns")
 
+    def attach_shared_dataset(self, key: str) -> bool:
+        """Use the dataset another session loaded from identical bytes; False when none is cached under key"""
+        entry = SHARED_CACHE.acquire(key)
+        if entry is None:
+            return False
+        self.release_shared_dataset()
+        self._adopt_shared(key, entry)
+        print(f"♻️ Reusing shared dataset: {self.df.shape[0]} rows, {self.df.shape[1]} columns")
+        return True
+
+    def share_dataset(self, key: str):
+        """Offer the loaded dataset to the other sessions under key (the content hash of the uploaded bytes)"""
+        if self.df is None:
+            return
+        # Filled while this session is the only one holding the profile
+        self.get_profile().warm()
+        self.get_dataset_fingerprint()
+        entry = SHARED_CACHE.put(key, self.df, self.get_profile(), self.stream_profile)
+        # Another session may have shared the same bytes meanwhile: use its copy and let ours go
+        self._adopt_shared(key, entry)
+
+    def _adopt_shared(self, key: str, entry: Dict[str, Any]):
+        self.df = entry['df']
+        self._profile = entry['profile']
+        self.stream_profile = entry['stream_profile']
+        self.shared_key = key
+        self._shared_release = weakref.finalize(self, SHARED_CACHE.release, key)
+
+    def release_shared_dataset(self):
+        """Stop using the shared dataset, if any (it stays cached for other sessions)"""
+        if self._shared_release is not None:
+            self._shared_release()
+        self.shared_key = None
+        self._shared_release = None
+
+    def get_shared_results(self) -> Optional[Dict[str, Any]]:
+        """
+        Results of the analysis another session ran on this shared dataset with the same models, marked 'reused':
+        its statistics and AI text with this session's frame and profile, but no LLM call or timings of its own
+        """
+        if self.shared_key is None:
+            return None
+        shared = SHARED_CACHE.results(self.shared_key, tuple(self.models))
+        if shared is None:
+            return None
+        return {'dataframe': self.df, 'profile': self.get_profile(), **shared,
+                'timings': None, 'llm_call': None, 'cancelled': None, 'reused': True}
+
+    def to_arrow_dtypes(self, df: pd.DataFrame, verbose: bool = True) -> pd.DataFrame:
+        """Convert text columns to string[pyarrow] and timestamps to Arrow timestamps"""
+        if not PYARROW_AVAILABLE or df is None:
+            return df
+        
+        memory_before = df.memory_usage(deep=True).sum()
+        df = df.copy()
+        
+        for col in df.columns:
+            series = df[col]
+            if isinstance(series.dtype, pd.ArrowDtype):
+                continue
+            
+            if pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+                # Only pure text columns; mixed object columns (lists, dicts, numbers) stay as they are
+                if pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+                    df[col] = series.astype('string[pyarrow]')
+            elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+                unit = getattr(series.dtype, 'unit', None) or np.datetime_data(series.dtype)[0]
+                tz = getattr(series.dtype, 'tz', None)
+                df[col] = series.astype(pd.ArrowDtype(pa.timestamp(unit, tz=str(tz) if tz else None)))
+        
+        if not verbose:
+            return df
+        memory_after = df.memory_usage(deep=True).sum()
+        print(f"🏹 Arrow-backed dtypes: {memory_before / 1024**2:.1f} MB -> {memory_after / 1024**2:.1f} MB")
+        return df
+
     def get_excel_sheets(self, file_path: str) -> List[str]:
         """Get list of available sheets in Excel file"""
         try:
@@ -153,45 +1455,10 @@ class ChatBotAnalyzer:
                 print("❌ File is empty")
                 return []
             
-            # Tentar diferentes engines para leitura do Excel
-            engines_to_try = []
-            
-            # Determinar quais engines tentar baseado na extensão do arquivo
-            if file_path.endswith('.xlsx'):
-                engines_to_try = ['openpyxl', 'xlrd']
-            elif file_path.endswith('.xls'):
-                engines_to_try = ['xlrd', 'openpyxl']
-            else:
-                engines_to_try = ['openpyxl', 'xlrd']
-            
-            sheets = []
-            successful_engine = None
-            
-            for engine in engines_to_try:
-                try:
-                    print(f"🔧 Trying engine: {engine}")
-                    excel_file = pd.ExcelFile(file_path, engine=engine)
-                    sheets = excel_file.sheet_names
-                    successful_engine = engine
-                    print(f"✅ Successfully read Excel file with {engine}. Sheets found: {sheets}")
-                    break
-                except ImportError as e:
-                    print(f"⚠️ Engine {engine} not available: {e}")
-                    continue
-                except Exception as e:
-                    print(f"⚠️ Error with engine {engine}: {e}")
-                    continue
-            
-            if not sheets and not successful_engine:
-                # Última tentativa sem engine específica
-                try:
-                    print("🔧 Trying default engine")
-                    excel_file = pd.ExcelFile(file_path)
-                    sheets = excel_file.sheet_names
-                    print(f"✅ Successfully read Excel file with default engine. Sheets found: {sheets}")
-                except Exception as e:
-                    print(f"❌ Failed to read Excel file with any engine: {e}")
-            
+            # pandas picks the engine (openpyxl/xlrd) from the file content, so the
+            # workbook is opened only once and the handle is kept for reading sheets
+            sheets = self.open_excel_workbook(file_path)
+            print(f"✅ Successfully read Excel file. Sheets found: {sheets}")
             return sheets
             
         except Exception as e:
@@ -201,6 +1468,135 @@ class ChatBotAnalyzer:
             print(f"🔍 Stack trace: {traceback.format_exc()}")
             return []
 
+    def open_excel_workbook(self, source) -> List[str]:
+        """Open an Excel workbook (path or uploaded file) once and keep the handle"""
+        self.close_excel_workbook()
+        workbook = source
+        if self.detect_compression(source):
+            # The zip container needs random access: decompress once into memory
+            with self.open_decompressed(source) as stream:
+                workbook = io.BytesIO(stream.read())
+        # openpyxl is opened in read-only mode by pandas, so rows are streamed from the XML
+        self._excel_file = pd.ExcelFile(workbook)
+        self._excel_source = source
+        self._excel_sheet_cache = {}
+        return self._excel_file.sheet_names
+
+    def read_excel_sheet(self, sheet_name=None) -> pd.DataFrame:
+        """Read a sheet from the open workbook, parsing each sheet at most once"""
+        if self._excel_file is None:
+            raise ValueError("No Excel workbook is open")
+        
+        if sheet_name is None:
+            sheet_name = self._excel_file.sheet_names[0]
+        
+        METRICS.inc('cache_requests_total', cache='excel_sheet', result='hit' if sheet_name in self._excel_sheet_cache else 'miss')
+        if sheet_name not in self._excel_sheet_cache:
+            print(f"📑 Parsing sheet: {sheet_name}")
+            self._excel_sheet_cache[sheet_name] = self._excel_file.parse(sheet_name)
+        
+        return self._excel_sheet_cache[sheet_name]
+
+    def close_excel_workbook(self):
+        """Release the open workbook handle and its parsed sheets"""
+        if self._excel_file is not None:
+            self._excel_file.close()
+        self._excel_file = None
+        self._excel_source = None
+        self._excel_sheet_cache = {}
+
+    def analyze_all_sheets(self, max_workers: int = None) -> Optional[Dict[str, Any]]:
+        """Profile every sheet of the open workbook concurrently and build a combined report"""
+        if self._excel_file is None:
+            print("❌ No Excel workbook is open")
+            return None
+        
+        sheet_names = self._excel_file.sheet_names
+        print(f"📚 Profiling {len(sheet_names)} sheets...")
+        
+        # The workbook handle is not thread-safe: sheets are parsed from it one by one
+        # (and cached), then profiled in parallel. pandas releases the GIL in most kernels.
+        sheets = {name: self.read_excel_sheet(name) for name in sheet_names}
+        workers = max_workers or min(len(sheet_names), os.cpu_count() or 1)
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            profiles = list(executor.map(lambda name: self._profile_sheet(name, sheets[name]), sheet_names))
+        
+        summary = pd.DataFrame([profile['summary'] for profile in profiles])
+        sheet_results = {profile['summary']['Sheet']: profile for profile in profiles}
+        
+        print(f"✅ Workbook profiled: {len(sheet_names)} sheets, {int(summary['Rows'].sum()):,} rows")
+        return {
+            'summary': summary,
+            'sheets': sheet_results,
+            'report': self._build_workbook_report(summary, sheet_results)
+        }
+
+    def _profile_sheet(self, sheet_name: str, df: pd.DataFrame) -> Dict[str, Any]:
+        """Profile a single sheet with a shallow copy of the analyzer bound to it"""
+        sheet_analyzer = copy.copy(self)
+        sheet_analyzer.df = self.to_arrow_dtypes(df) if self.use_arrow else df
+        sheet_analyzer.stream_profile = None
+        
+        try:
+            simple_types = sheet_analyzer.get_simple_column_types()
+            summary = {
+                'Sheet': sheet_name,
+                'Rows': df.shape[0],
+                'Columns': df.shape[1],
+                'Missing Values': sheet_analyzer.get_profile().total_missing,
+                'Duplicate Rows': sheet_analyzer.count_duplicate_rows(),
+                'Numerical': len(simple_types['Numerical']),
+                'Categorical': len(simple_types['Categorical']),
+                'True/False': len(simple_types['True/False']),
+                'Date/Time': len(simple_types['Date/Time']),
+                'Status': 'OK'
+            }
+            statistics = sheet_analyzer.generate_descriptive_stats()
+        except Exception as e:
+            print(f"⚠️ Error profiling sheet {sheet_name}: {e}")
+            summary = {'Sheet': sheet_name, 'Rows': df.shape[0], 'Columns': df.shape[1], 'Status': f'Error: {e}'}
+            statistics = f"## ❌ Could not profile sheet\n\n{e}\n"
+        
+        return {'summary': summary, 'statistics': statistics, 'dataframe': sheet_analyzer.df}
+
+    def _build_workbook_report(self, summary: pd.DataFrame, sheet_results: Dict[str, Dict[str, Any]]) -> str:
+        """Build the combined Markdown report for all sheets"""
+        summary = summary.fillna('')
+        header = "| " + " | ".join(summary.columns) + " |"
+        separator = "|" + "---|" * len(summary.columns)
+        rows = ["| " + " | ".join(str(value) for value in row) + " |" for row in summary.itertuples(index=False)]
+        
+        parts = [
+            "# 📚 Workbook Analysis Report\n",
+            "## 📋 Sheets Overview\n",
+            "\n".join([header, separator] + rows) + "\n"
+        ]
+        for sheet_name, result in sheet_results.items():
+            parts.append(f"---\n\n# 📄 Sheet: {sheet_name}\n")
+            parts.append(result['statistics'])
+        
+        return "\n".join(parts)
+
+    def get_profile(self) -> Optional[DatasetProfile]:
+        """Get the shared profile of the loaded DataFrame, building it once per dataset"""
+        if self.df is None:
+            return None
+        built = self._profile is not None and self._profile.df is self.df
+        METRICS.inc('cache_requests_total', cache='profile', result='hit' if built else 'miss')
+        if not built:
+            # Classify via pandas type predicates so Arrow-backed dtypes land in the same groups
+            column_types = {
+                'Numerical': [],
+                'Categorical': [],
+                'True/False': [],
+                'Date/Time': []
+            }
+            for col, dtype in self.df.dtypes.items():
+                column_types[self._get_simple_dtype(dtype)].append(col)
+            self._profile = DatasetProfile(self.df, column_types)
+        return self._profile
+
     def get_simple_column_types(self) -> Dict[str, List[str]]:
         """Get simplified column types grouped by category"""
         if self.df is None:
@@ -211,17 +1607,7 @@ class ChatBotAnalyzer:
                 'Date/Time': []
             }
         
-        numerical_cols = self.df.select_dtypes(include=['int64', 'int32', 'int16', 'int8', 'float64', 'float32', 'float16']).columns.tolist()
-        categorical_cols = self.df.select_dtypes(include=['object', 'category', 'string']).columns.tolist()
-        boolean_cols = self.df.select_dtypes(include='bool').columns.tolist()
-        datetime_cols = self.df.select_dtypes(include=['datetime64', 'timedelta64']).columns.tolist()
-        
-        return {
-            'Numerical': numerical_cols,
-            'Categorical': categorical_cols,
-            'True/False': boolean_cols,
-            'Date/Time': datetime_cols
-        }
+        return self.get_profile().column_types
 
     def get_detailed_column_info(self) -> pd.DataFrame:
         """Get detailed information about each column"""
@@ -229,11 +1615,12 @@ class ChatBotAnalyzer:
             return pd.DataFrame()
         
         column_info = []
+        missing_counts = self.get_profile().missing_counts
         
         for col in self.df.columns:
             col_type = self._get_simple_dtype(self.df[col].dtype)
-            non_null_count = self.df[col].count()
-            null_count = self.df[col].isnull().sum()
+            null_count = missing_counts[col]
+            non_null_count = len(self.df) - null_count
             null_percentage = (null_count / len(self.df)) * 100 if len(self.df) > 0 else 0
             
             column_info.append({
@@ -246,36 +1633,175 @@ class ChatBotAnalyzer:
         
         return pd.DataFrame(column_info)
 
+    def get_row_fingerprints(self, columns: List[str] = None) -> np.ndarray:
+        """
+        Get a 64-bit fingerprint per row (of all columns or of a column subset).
+        Computed once per loaded DataFrame and reused by every duplicate check.
+        """
+        if self.df is None:
+            return np.empty(0, dtype='uint64')
+        
+        # Kept in the dataset profile, so a reload starts from a fresh index
+        profile = self.get_profile()
+        key = tuple(columns) if columns else None
+        with profile.lock:
+            if key not in profile.row_fingerprints:
+                profile.row_fingerprints[key] = self._hash_rows(self.df[list(columns)] if columns else self.df)
+            return profile.row_fingerprints[key]
+
+    def get_dataset_fingerprint(self) -> Optional[str]:
+        """
+        Get a content hash of the loaded DataFrame (values, column names and dtypes).
+        Built from the cached row fingerprints, so it costs no extra pass over the data.
+        """
+        if self.df is None:
+            return None
+        
+        profile = self.get_profile()
+        with profile.lock:
+            if profile.fingerprint is None:
+                digest = hashlib.blake2b(digest_size=16)
+                digest.update(self.get_row_fingerprints().tobytes())
+                digest.update(repr([(str(col), str(dtype)) for col, dtype in self.df.dtypes.items()]).encode('utf-8'))
+                profile.fingerprint = digest.hexdigest()
+            return profile.fingerprint
+
+    def _hash_rows(self, df: pd.DataFrame) -> np.ndarray:
+        """Hash each row into a uint64 with pandas' vectorised object hashing"""
+        if df.shape[1] == 0:
+            return np.zeros(len(df), dtype='uint64')
+        try:
+            return pd.util.hash_pandas_object(df, index=False).to_numpy()
+        except TypeError:
+            # Unhashable cells (lists, dicts) are fingerprinted by their text form
+            return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+
+    def get_duplicate_mask(self, columns: List[str] = None, keep='first') -> np.ndarray:
+        """Boolean mask of duplicated rows, with the same keep semantics as DataFrame.duplicated"""
+        if self.df is None or self.df.shape[1] == 0:
+            return np.zeros(0 if self.df is None else len(self.df), dtype=bool)
+        return pd.Series(self.get_row_fingerprints(columns)).duplicated(keep=keep).to_numpy()
+
+    def count_duplicate_rows(self, columns: List[str] = None) -> int:
+        """Count rows repeating an earlier row (on all columns or a column subset)"""
+        return int(self.get_duplicate_mask(columns).sum())
+
+    def get_duplicate_rows(self, columns: List[str] = None) -> pd.DataFrame:
+        """Get every row that belongs to a group of duplicates"""
+        if self.df is None:
+            return pd.DataFrame()
+        return self.df[self.get_duplicate_mask(columns, keep=False)]
+
+    def get_duplicate_groups(self, columns: List[str] = None) -> pd.DataFrame:
+        """Get one entry per group of identical rows with its size and row positions, largest first"""
+        mask = self.get_duplicate_mask(columns, keep=False)
+        positions = pd.Series(np.flatnonzero(mask))
+        groups = positions.groupby(self.get_row_fingerprints(columns)[mask], sort=False)
+        
+        return pd.DataFrame({
+            'Fingerprint': groups.size().index,
+            'Count': groups.size().to_numpy(),
+            'Rows': groups.agg(list).to_numpy()
+        }).sort_values('Count', ascending=False, kind='stable').reset_index(drop=True)
+
     def _get_simple_dtype(self, dtype):
         """Convert detailed dtype to simplified category"""
-        if np.issubdtype(dtype, np.number):
-            return "Numerical"
-        elif np.issubdtype(dtype, np.bool_):
+        if pd.api.types.is_bool_dtype(dtype):
             return "True/False"
-        elif np.issubdtype(dtype, np.datetime64) or np.issubdtype(dtype, np.timedelta64):
+        elif pd.api.types.is_numeric_dtype(dtype):
+            return "Numerical"
+        elif pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype):
             return "Date/Time"
         else:
             return "Categorical"
 
+    def detect_compression(self, source) -> Optional[str]:
+        """Detect gzip/bz2/xz/zstd compression of a path or upload from its name or magic bytes"""
+        name = source if isinstance(source, str) else getattr(source, 'name', None)
+        if isinstance(name, str):
+            ext = os.path.splitext(name)[1].lower()
+            if ext in COMPRESSION_EXTENSIONS:
+                return COMPRESSION_EXTENSIONS[ext]
+        
+        try:
+            if isinstance(source, str):
+                with open(source, 'rb') as f:
+                    magic = f.read(6)
+            elif hasattr(source, 'read') and hasattr(source, 'seek'):
+                source.seek(0)
+                magic = source.read(6)
+                source.seek(0)
+            else:
+                return None
+        except OSError:
+            return None
+        
+        for signature, compression in COMPRESSION_MAGIC.items():
+            # bz2 headers carry the block size digit after 'BZh'
+            if magic.startswith(signature) and (compression != 'bz2' or magic[3:4].isdigit()):
+                return compression
+        return None
+
+    def open_decompressed(self, source, compression: str = None):
+        """
+        Open a path or upload as a binary stream, decompressing gzip/bz2/xz/zstd on the fly.
+        Uploads are not closed when the returned stream is closed.
+        """
+        compression = compression or self.detect_compression(source)
+        if not isinstance(source, str):
+            source.seek(0)
+        
+        if compression is None:
+            return open(source, 'rb') if isinstance(source, str) else source
+        if compression == 'gzip':
+            return gzip.open(source, 'rb')
+        if compression == 'bz2':
+            return bz2.open(source, 'rb')
+        if compression == 'xz':
+            return lzma.open(source, 'rb')
+        if compression == 'zstd':
+            if not ZSTANDARD_AVAILABLE:
+                raise ImportError("zstandard is required to read .zst files")
+            raw = open(source, 'rb') if isinstance(source, str) else source
+            return zstandard.ZstdDecompressor().stream_reader(raw, closefd=isinstance(source, str))
+        raise ValueError(f"Unsupported compression: {compression}")
+
     def detect_file_format(self, file_path: str) -> str:
-        """Detect file format based on extension and content"""
-        _, ext = os.path.splitext(file_path)
+        """Detect file format based on extension and content (looking inside compressed files)"""
+        base, ext = os.path.splitext(file_path)
+        if ext.lower() in COMPRESSION_EXTENSIONS:
+            # data.csv.gz -> .csv
+            ext = os.path.splitext(base)[1]
         ext = ext.lower()
         
         if ext == '.csv':
             return 'csv'
         elif ext in ['.xlsx', '.xls']:
             return 'excel'
+        elif ext in ['.jsonl', '.ndjson']:
+            return 'jsonl'
         elif ext == '.json':
-            return 'json'
+            return 'jsonl' if self._is_json_lines(file_path) else 'json'
+        elif ext in ['.parquet', '.pq']:
+            return 'parquet'
+        elif ext in ['.feather', '.arrow', '.ipc']:
+            return 'feather'
         else:
             # Try to detect by content for files without extension or unknown
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
+                # Binary columnar formats are recognised by their magic bytes
+                with self.open_decompressed(file_path) as f:
+                    magic = f.read(6)
+                if magic[:4] == b'PAR1':
+                    return 'parquet'
+                if magic == b'ARROW1':
+                    return 'feather'
+                
+                with self._open_json_text(file_path) as f:
                     first_line = f.readline().strip()
                     # Check if it's JSON
                     if first_line.startswith('{') or first_line.startswith('['):
-                        return 'json'
+                        return 'jsonl' if self._is_json_lines(file_path) else 'json'
                     # Check if it's CSV (comma separated)
                     elif ',' in first_line:
                         return 'csv'
@@ -285,24 +1811,354 @@ class ChatBotAnalyzer:
             # Default to CSV for unknown formats
             return 'csv'
 
-    def load_and_preview_data(self, file_path: str, sheet_name: str = None) -> pd.DataFrame:
-        """Load CSV, Excel, or JSON file and return basic information"""
+    def _is_json_lines(self, file_path: str) -> bool:
+        """Check whether the first two non-empty lines are standalone JSON objects"""
+        try:
+            records = []
+            with self._open_json_text(file_path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    records.append(json.loads(line))
+                    if len(records) == 2:
+                        break
+            return len(records) == 2 and all(isinstance(record, dict) for record in records)
+        except (ValueError, UnicodeDecodeError, OSError, EOFError):
+            return False
+
+    def get_columnar_schema(self, source, file_format: str) -> List[str]:
+        """Get column names of a Parquet/Feather file without reading any data"""
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required to read Parquet and Feather files")
+        
+        source = self._columnar_source(source)
+        if file_format == 'parquet':
+            return pq.read_schema(source, memory_map=isinstance(source, str)).names
+        with pa.ipc.open_file(source) as reader:
+            return reader.schema.names
+
+    def read_columnar_file(self, source, file_format: str, columns: List[str] = None, max_rows: int = None) -> pd.DataFrame:
+        """
+        Read a Parquet or Feather/Arrow IPC file reading only the requested columns.
+        Paths are memory-mapped; with max_rows only the leading row groups/batches are read.
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required to read Parquet and Feather files")
+        
+        source = self._columnar_source(source)
+        memory_map = isinstance(source, str)
+        
+        if file_format == 'parquet':
+            parquet_file = pq.ParquetFile(source, memory_map=memory_map)
+            if max_rows is None:
+                table = parquet_file.read(columns=columns)
+            else:
+                # Read only as many row groups as needed to cover max_rows
+                row_groups, rows = [], 0
+                for i in range(parquet_file.num_row_groups):
+                    if rows >= max_rows:
+                        break
+                    row_groups.append(i)
+                    rows += parquet_file.metadata.row_group(i).num_rows
+                table = parquet_file.read_row_groups(row_groups, columns=columns).slice(0, max_rows)
+        elif file_format == 'feather':
+            if max_rows is None:
+                table = feather.read_table(source, columns=columns, memory_map=memory_map)
+            else:
+                if memory_map:
+                    source = pa.memory_map(source)
+                with pa.ipc.open_file(source) as reader:
+                    batches, rows = [], 0
+                    for i in range(reader.num_record_batches):
+                        if rows >= max_rows:
+                            break
+                        batch = reader.get_batch(i)
+                        batches.append(batch.select(columns) if columns else batch)
+                        rows += batch.num_rows
+                    schema = reader.schema if not columns else pa.schema([reader.schema.field(c) for c in columns])
+                    table = pa.Table.from_batches(batches, schema=schema).slice(0, max_rows)
+        else:
+            raise ValueError(f"Unsupported columnar format: {file_format}")
+        
+        print(f"🗂️ Read {table.num_columns} columns, {table.num_rows} rows ({table.nbytes / 1024**2:.1f} MB in Arrow)")
+        return self._arrow_table_to_pandas(table)
+
+    def _columnar_source(self, source):
+        """Accept file paths, raw bytes or file-like objects (e.g. Streamlit uploads)"""
+        if not isinstance(source, (bytes, bytearray)) and self.detect_compression(source):
+            # Parquet/Feather need random access: decompress once into memory
+            with self.open_decompressed(source) as stream:
+                return pa.BufferReader(stream.read())
+        if isinstance(source, str):
+            return source
+        if isinstance(source, (bytes, bytearray)):
+            return pa.BufferReader(source)
+        if hasattr(source, 'getvalue'):
+            # In-memory uploads: wrap the buffer without copying it again
+            return pa.BufferReader(source.getvalue())
+        return source
+
+    def _arrow_table_to_pandas(self, table) -> pd.DataFrame:
+        """Convert an Arrow table to pandas, keeping text/timestamps in Arrow when use_arrow is set"""
+        types_mapper = None
+        if self.use_arrow:
+            def types_mapper(arrow_type):
+                if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type) or pa.types.is_timestamp(arrow_type):
+                    return pd.ArrowDtype(arrow_type)
+                return None
+        return table.to_pandas(types_mapper=types_mapper, split_blocks=True, self_destruct=True)
+
+    def read_json_lines(self, source, chunk_size: int = 10000, max_rows: int = None, random_sample: bool = False):
+        """
+        Read a JSON Lines (NDJSON) file or upload in fixed-size chunks.
+        Nested objects are flattened into dotted columns, as for JSON arrays.
+        Every chunk updates the whole-file profile; only the first max_rows rows are kept,
+        or, with random_sample, a uniform sample of max_rows rows from the whole file.
+        Returns the DataFrame and the streaming profile.
+        """
+        with self._open_json_text(source) as text, pd.read_json(text, lines=True, chunksize=chunk_size) as reader:
+            df, profile = self._collect_chunks(map(self._flatten_json_chunk, reader), max_rows, random_sample)
+        
+        print(f"📜 Streamed {profile['rows']:,} JSON lines in {profile['chunks']} chunks, kept {len(df):,} rows")
+        return df, profile
+
+    def _collect_chunks(self, chunks, max_rows: int = None, random_sample: bool = False):
+        """Feed DataFrame chunks into the streaming profile and keep the first max_rows rows (or a reservoir sample)"""
+        reservoir = ReservoirSample(max_rows) if random_sample and max_rows is not None else None
+        profile = {'rows': 0, 'chunks': 0, 'non_null': pd.Series(dtype='int64'), 'numeric': {}, 'sampled': reservoir is not None}
+        kept, kept_rows = [], 0
+        
+        for chunk in chunks:
+            self._update_stream_profile(profile, chunk)
+            
+            if reservoir is not None:
+                reservoir.add(chunk)
+            elif max_rows is None or kept_rows < max_rows:
+                if max_rows is not None:
+                    chunk = chunk.iloc[:max_rows - kept_rows]
+                # Text columns are compacted per chunk, before the next chunk is parsed
+                kept.append(self.to_arrow_dtypes(chunk, verbose=False) if self.use_arrow else chunk)
+                kept_rows += len(chunk)
+        
+        if reservoir is not None and reservoir.rows_seen:
+            kept = [reservoir.result()]
+        
+        if not kept:
+            return pd.DataFrame(), profile
+        
+        # Columns missing or all-null in some chunks come back as object; restore their dtype
+        df = pd.concat(kept, ignore_index=True).infer_objects()
+        if self.use_arrow:
+            df = self.to_arrow_dtypes(df, verbose=False)
+        return df, profile
+
+    def load_json_lines(self, source, chunk_size: int = 10000, max_rows: int = None,
+                        random_sample: bool = False) -> pd.DataFrame:
+        """Load a JSON Lines file or upload chunk by chunk into the analyzer"""
+        df, profile = self.read_json_lines(source, chunk_size=chunk_size, max_rows=max_rows, random_sample=random_sample)
+        self.load_data(df)
+        self.stream_profile = profile
+        return self.df
+
+    def is_json_array(self, source) -> bool:
+        """Check whether a JSON file or upload is a top-level array"""
+        with self._open_json_text(source) as text:
+            head = text.read(1024).lstrip()
+        return head.startswith('[')
+
+    def read_json_array(self, source, fields: List[str] = None, chunk_size: int = 10000, max_rows: int = None,
+                        random_sample: bool = False):
+        """
+        Stream the records of a top-level JSON array, flattening nested objects into
+        dotted columns (as json_normalize does). With fields (e.g. ['user.name', 'order'])
+        only those paths and their sub-fields are built.
+        Returns the DataFrame and the streaming profile.
+        """
+        keep, ancestors = self._json_field_filter(fields)
+        
+        def record_chunks():
+            rows = []
+            with self._open_json_text(source) as text:
+                for record in self._iter_json_array(text):
+                    if not isinstance(record, dict):
+                        record = {'value': record}
+                    rows.append(self._flatten_json_record(record, keep, ancestors))
+                    if len(rows) == chunk_size:
+                        yield pd.DataFrame(rows)
+                        rows = []
+            if rows:
+                yield pd.DataFrame(rows)
+        
+        df, profile = self._collect_chunks(record_chunks(), max_rows, random_sample)
+        print(f"🧩 Streamed {profile['rows']:,} JSON records in {profile['chunks']} chunks, kept {len(df):,} rows, {df.shape[1]} columns")
+        return df, profile
+
+    def load_json_array(self, source, fields: List[str] = None, chunk_size: int = 10000, max_rows: int = None,
+                        random_sample: bool = False) -> pd.DataFrame:
+        """Load a top-level JSON array into the analyzer, flattening records as they stream"""
+        df, profile = self.read_json_array(source, fields=fields, chunk_size=chunk_size, max_rows=max_rows,
+                                           random_sample=random_sample)
+        self.load_data(df)
+        self.stream_profile = profile
+        return self.df
+
+    def get_json_array_fields(self, source, sample_records: int = 1000) -> List[str]:
+        """List the flattened field paths found in the leading records of a JSON array"""
+        fields = {}
+        with self._open_json_text(source) as text:
+            for i, record in enumerate(self._iter_json_array(text)):
+                if i >= sample_records:
+                    break
+                if isinstance(record, dict):
+                    fields.update(dict.fromkeys(self._flatten_json_record(record)))
+        return list(fields)
+
+    def _open_json_text(self, source):
+        """Open a path or rewind an uploaded file and decode it as UTF-8 text, decompressing if needed"""
+        compressed = self.detect_compression(source) is not None
+        if isinstance(source, str):
+            if not compressed:
+                return open(source, 'r', encoding='utf-8')
+            return io.TextIOWrapper(self.open_decompressed(source), encoding='utf-8')
+        source.seek(0)
+        stream = self.open_decompressed(source) if compressed else source
+        # The upload stays open: later reads (field listing, reload) rewind it again
+        return contextlib.nullcontext(codecs.getreader('utf-8')(stream))
+
+    def _iter_json_array(self, text, block_size: int = 1 << 20):
+        """Yield the elements of a top-level JSON array, holding about one block in memory"""
+        decoder = json.JSONDecoder()
+        separators = re.compile(r'[\s,]*')
+        buffer = text.read(block_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError("Expected a top-level JSON array")
+        pos = 1
+        
+        while True:
+            pos = separators.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                return
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Element cut at the block boundary: keep the unread tail and read on
+                block = text.read(block_size)
+                if not block:
+                    raise
+                buffer = buffer[pos:] + block
+                pos = 0
+                continue
+            yield element
+            pos = end
+
+    def _json_field_filter(self, fields: List[str] = None):
+        """Split JSON paths into the fields to keep and the parent objects to descend into"""
+        if not fields:
+            return None, None
+        keep = {field[2:] if field.startswith('$.') else field for field in fields}
+        ancestors = set()
+        for field in keep:
+            parts = field.split('.')
+            ancestors.update('.'.join(parts[:i]) for i in range(1, len(parts)))
+        return keep, ancestors
+
+    def _flatten_json_record(self, record: Dict[str, Any], keep=None, ancestors=None, prefix: str = '') -> Dict[str, Any]:
+        """Flatten nested objects into dotted keys, skipping paths outside keep"""
+        flat = {}
+        for key, value in record.items():
+            path = f"{prefix}{key}"
+            if keep is not None and path not in keep:
+                if path in ancestors and isinstance(value, dict):
+                    flat.update(self._flatten_json_record(value, keep, ancestors, path + '.'))
+                continue
+            if isinstance(value, dict):
+                # Everything below a kept path is kept; empty objects add no column
+                flat.update(self._flatten_json_record(value, prefix=path + '.'))
+            else:
+                flat[path] = value
+        return flat
+
+    def _flatten_json_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Flatten the nested objects of a parsed JSON Lines chunk into dotted columns, as _flatten_json_record does"""
+        columns, flattened = [], False
+        for col in chunk.columns:
+            values = chunk[col]
+            nested = values.map(lambda value: isinstance(value, dict)) if values.dtype == object else None
+            if nested is None or not nested.any():
+                columns.append(values)
+                continue
+            flattened = True
+            # Scalars mixed with objects keep their own column, next to the object's sub-fields
+            if values[~nested].notna().any():
+                columns.append(values.where(~nested))
+            columns.append(pd.DataFrame([self._flatten_json_record(value, prefix=f"{col}.") if is_object else {}
+                                         for value, is_object in zip(values, nested)], index=chunk.index))
+        return pd.concat(columns, axis=1) if flattened else chunk
+
+    def _update_stream_profile(self, profile: Dict[str, Any], chunk: pd.DataFrame):
+        """Merge one chunk into the running row counts, null counts and numeric moments"""
+        profile['rows'] += len(chunk)
+        profile['chunks'] += 1
+        profile['non_null'] = profile['non_null'].add(chunk.count(), fill_value=0).astype('int64')
+        
+        for col in chunk.select_dtypes(include='number').columns:
+            values = chunk[col].dropna().to_numpy(dtype='float64')
+            if len(values) == 0:
+                continue
+            
+            # Chan et al. parallel update of count/mean/M2, stable for any number of chunks
+            stats = profile['numeric'].setdefault(col, {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': np.inf, 'max': -np.inf})
+            count, mean = len(values), values.mean()
+            m2 = ((values - mean) ** 2).sum()
+            total = stats['count'] + count
+            delta = mean - stats['mean']
+            stats['mean'] += delta * count / total
+            stats['m2'] += m2 + delta ** 2 * stats['count'] * count / total
+            stats['count'] = total
+            stats['min'] = min(stats['min'], values.min())
+            stats['max'] = max(stats['max'], values.max())
+
+    def load_and_preview_data(self, file_path: str, sheet_name: str = None, columns: List[str] = None, max_rows: int = None,
+                              random_sample: bool = False) -> pd.DataFrame:
+        """Load CSV, Excel, JSON, Parquet or Feather file and return basic information"""
         try:
             file_format = self.detect_file_format(file_path)
             print(f"📁 Detected file format: {file_format}")
+            self.release_shared_dataset()
+            self.stream_profile = None
+            timer = self.start_load_timer()
             
-            if file_format == 'csv':
-                self.df = pd.read_csv(file_path)
-            elif file_format == 'excel':
-                if sheet_name:
-                    self.df = pd.read_excel(file_path, sheet_name=sheet_name)
-                else:
+            with timer.span('load', profile=True):
+                if file_format == 'csv':
+                    with self.open_decompressed(file_path) as stream:
+                        self.df = pd.read_csv(stream)
+                elif file_format == 'excel':
+                    # Reuse the open workbook when switching sheets of the same file
+                    if self._excel_file is None or self._excel_source != file_path:
+                        self.open_excel_workbook(file_path)
                     # Load first sheet by default
-                    self.df = pd.read_excel(file_path)
-            elif file_format == 'json':
-                self.df = pd.read_json(file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_format}")
+                    self.df = self.read_excel_sheet(sheet_name)
+                elif file_format == 'json':
+                    if self.is_json_array(file_path):
+                        # Arrays of records are flattened as they stream, never held as a whole document
+                        self.df, self.stream_profile = self.read_json_array(file_path, fields=columns, max_rows=max_rows,
+                                                                                 random_sample=random_sample)
+                    else:
+                        with self._open_json_text(file_path) as text:
+                            self.df = pd.read_json(text)
+                elif file_format == 'jsonl':
+                    # Already compacted chunk by chunk
+                    self.df, self.stream_profile = self.read_json_lines(file_path, max_rows=max_rows,
+                                                                            random_sample=random_sample)
+                elif file_format in ['parquet', 'feather']:
+                    self.df = self.read_columnar_file(file_path, file_format, columns=columns, max_rows=max_rows)
+                else:
+                    raise ValueError(f"Unsupported file format: {file_format}")
+            
+            if self.use_arrow and self.stream_profile is None:
+                with timer.span('arrow_conversion'):
+                    self.df = self.to_arrow_dtypes(self.df)
             
             print(f"✅ Dataset loaded successfully: {self.df.shape[0]} rows, {self.df.shape[1]} columns")
             print(f"📊 Data types: {dict(self.df.dtypes)}")
@@ -314,94 +2170,35 @@ class ChatBotAnalyzer:
             if file_format == 'json':
                 try:
                     print("🔄 Trying alternative JSON loading method...")
-                    with open(file_path, 'r', encoding='utf-8') as f:
+                    with self._open_json_text(file_path) as f:
                         data = json.load(f)
                     self.df = pd.json_normalize(data)
+                    if self.use_arrow:
+                        self.df = self.to_arrow_dtypes(self.df)
                     print(f"✅ JSON loaded successfully with json_normalize: {self.df.shape}")
                     return self.df
                 except Exception as json_error:
                     print(f"❌ Alternative JSON loading also failed: {json_error}")
             return None
 
+    def get_descriptive_statistics(self, timer: StageTimer = None, deadline: Deadline = None) -> Optional[DescriptiveStatistics]:
+        """Typed descriptive statistics of the loaded dataset, rendered on request"""
+        if self.df is None:
+            return None
+        timer = timer or StageTimer()
+        deadline = deadline or Deadline()
+        with timer.span('column_types'):
+            profile = self.get_profile()
+        deadline.check('duplicates')
+        with timer.span('duplicates'):
+            duplicate_rows = self.count_duplicate_rows()
+        return DescriptiveStatistics.from_profile(profile, duplicate_rows, self.stream_profile, timer=timer, deadline=deadline)
+
     def generate_descriptive_stats(self) -> str:
         """Generate comprehensive descriptive statistics in Markdown format"""
         if self.df is None:
             return "## ❌ No data loaded\n\nPlease load a dataset first."
-            
-        stats_summary = "# 📊 Descriptive Statistics Report\n\n"
-        
-        # Dataset Overview
-        stats_summary += "## 📋 Dataset Overview\n\n"
-        stats_summary += f"- **Total Rows**: {self.df.shape[0]:,}\n"
-        stats_summary += f"- **Total Columns**: {self.df.shape[1]}\n"
-        stats_summary += f"- **Missing Values**: {self.df.isnull().sum().sum()}\n"
-        stats_summary += f"- **Duplicate Rows**: {self.df.duplicated().sum()}\n\n"
-        
-        # Data Types Summary
-        stats_summary += "## 🔧 Data Types Summary\n\n"
-        
-        # Count by category instead of iterating through individual dtypes
-        numerical_count = len(self.df.select_dtypes(include=['int64', 'int32', 'int16', 'int8', 'float64', 'float32', 'float16']).columns)
-        categorical_count = len(self.df.select_dtypes(include=['object', 'category', 'string']).columns)
-        boolean_count = len(self.df.select_dtypes(include='bool').columns)
-        datetime_count = len(self.df.select_dtypes(include=['datetime64', 'timedelta64']).columns)
-        
-        if numerical_count > 0:
-            stats_summary += f"- **Numerical**: {numerical_count} columns\n"
-        if categorical_count > 0:
-            stats_summary += f"- **Categorical**: {categorical_count} columns\n"
-        if boolean_count > 0:
-            stats_summary += f"- **True/False**: {boolean_count} columns\n"
-        if datetime_count > 0:
-            stats_summary += f"- **Date/Time**: {datetime_count} columns\n"
-        
-        stats_summary += "\n"
-        
-        # Numerical columns
-        numerical_cols = self.df.select_dtypes(include=['int64', 'int32', 'int16', 'int8', 'float64', 'float32', 'float16']).columns
-        if len(numerical_cols) > 0:
-            stats_summary += "## 🔢 Numerical Columns\n\n"
-            for col in numerical_cols:
-                stats_summary += f"### 📈 {col}\n\n"
-                stats_summary += f"- **Mean**: {self.df[col].mean():.2f}\n"
-                stats_summary += f"- **Median**: {self.df[col].median():.2f}\n"
-                stats_summary += f"- **Variance**: {self.df[col].var():.2f}\n"
-                stats_summary += f"- **Standard Deviation**: {self.df[col].std():.2f}\n"
-                stats_summary += f"- **Minimum**: {self.df[col].min():.2f}\n"
-                stats_summary += f"- **Maximum**: {self.df[col].max():.2f}\n"
-                stats_summary += f"- **Range**: {self.df[col].max() - self.df[col].min():.2f}\n"
-                stats_summary += f"- **Missing Values**: {self.df[col].isnull().sum()}\n\n"
-        
-        # Categorical columns
-        categorical_cols = self.df.select_dtypes(include=['object', 'category', 'string']).columns
-        if len(categorical_cols) > 0:
-            stats_summary += "## 📝 Categorical Columns\n\n"
-            for col in categorical_cols:
-                stats_summary += f"### 🏷️ {col}\n\n"
-                stats_summary += f"- **Unique Values**: {self.df[col].nunique()}\n"
-                stats_summary += f"- **Missing Values**: {self.df[col].isnull().sum()}\n"
-                stats_summary += f"- **Top 3 Values**:\n"
-                top_values = self.df[col].value_counts().head(3)
-                for value, count in top_values.items():
-                    stats_summary += f"  - `{value}`: {count} occurrences\n"
-                stats_summary += "\n"
-        
-        # Boolean columns
-        boolean_cols = self.df.select_dtypes(include='bool').columns
-        if len(boolean_cols) > 0:
-            stats_summary += "## ✅ True/False Columns\n\n"
-            for col in boolean_cols:
-                stats_summary += f"### 🔘 {col}\n\n"
-                value_counts = self.df[col].value_counts()
-                percentage = self.df[col].value_counts(normalize=True) * 100
-                stats_summary += f"- **Distribution**:\n"
-                for val, count in value_counts.items():
-                    stats_summary += f"  - `{val}`: {count} ({percentage[val]:.1f}%)\n"
-                stats_summary += f"- **Variance**: {self.df[col].var():.2f}\n"
-                stats_summary += f"- **Standard Deviation**: {self.df[col].std():.2f}\n"
-                stats_summary += f"- **Missing Values**: {self.df[col].isnull().sum()}\n\n"
-        
-        return stats_summary
+        return self.get_descriptive_statistics().to_markdown()
     
     def create_analysis_prompt(self, stats_summary: str) -> str:
         """Create detailed prompt for API with markdown formatting request"""
@@ -437,178 +2234,275 @@ class ChatBotAnalyzer:
         return prompt
     
     def generate_visualizations(self) -> Dict[str, go.Figure]:
-        """Generate interactive visualizations for the dataset"""
+        """Generate interactive visualizations for the dataset (the app builds its own per tab)"""
         if self.df is None or self.df.empty:
             return {}
         
+        profile = self.get_profile()
         visualizations = {}
+        for name, builder in [
+            ('data_types', self._build_data_types_figure),
+            ('missing_data', self._build_missing_data_figure),
+            ('numerical_distributions', self._build_numerical_distributions_figure),
+            ('categorical_distributions', self._build_categorical_distributions_figure),
+            ('boolean_distributions', self._build_boolean_distributions_figure),
+            ('datetime_distributions', self._build_datetime_distributions_figure),
+            ('correlation_heatmap', self._build_correlation_heatmap_figure)
+        ]:
+            fig = builder(profile)
+            if fig is not None:
+                visualizations[name] = fig
         
-        # Data types pie chart
-        def categorize_dtype(dtype):
-            if np.issubdtype(dtype, np.number):
-                return "Numerical"
-            elif np.issubdtype(dtype, np.bool_):
-                return "Boolean"
-            elif np.issubdtype(dtype, np.datetime64) or np.issubdtype(dtype, np.timedelta64):
-                return "Date/Time"
-            else:
-                return "Categorical"
+        return visualizations
+
+    def _build_data_types_figure(self, profile: DatasetProfile) -> Optional[go.Figure]:
+        """Data types pie chart"""
+        dtype_counts = pd.Series({
+            ("Boolean" if group == "True/False" else group): len(cols)
+            for group, cols in profile.column_types.items() if cols
+        }).sort_values(ascending=False)
         
-        dtype_counts = self.df.dtypes.apply(categorize_dtype).value_counts()
+        if len(dtype_counts) == 0:
+            return None
+        fig_dtypes = px.pie(
+            values=dtype_counts.values,
+            names=dtype_counts.index,
+            title="Data Types Distribution",
+            color_discrete_sequence=px.colors.qualitative.Set3
+        )
+        fig_dtypes.update_traces(textposition='inside', textinfo='percent+label')
+        fig_dtypes.update_layout(height=400, showlegend=False)
+        return fig_dtypes
+
+    def _build_missing_data_figure(self, profile: DatasetProfile) -> Optional[go.Figure]:
+        """Missing data bar chart"""
+        missing_data = profile.missing_counts
+        missing_data = missing_data[missing_data > 0]
+        if len(missing_data) == 0:
+            return None
+        fig_missing = px.bar(
+            x=missing_data.values,
+            y=missing_data.index,
+            orientation='h',
+            title="Missing Values by Column",
+            color=missing_data.values,
+            color_continuous_scale='Viridis'
+        )
+        fig_missing.update_layout(height=400, xaxis_title="Missing Values Count", yaxis_title="Columns")
+        return fig_missing
+
+    def _build_numerical_distributions_figure(self, profile: DatasetProfile) -> Optional[go.Figure]:
+        """Numerical columns distributions"""
+        numerical_cols = profile.column_types['Numerical']
+        if len(numerical_cols) == 0:
+            return None
+        n_cols = min(3, len(numerical_cols))
+        n_rows = (len(numerical_cols) + n_cols - 1) // n_cols
         
-        if len(dtype_counts) > 0:
-            fig_dtypes = px.pie(
-                values=dtype_counts.values,
-                names=dtype_counts.index,
-                title="Data Types Distribution",
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            fig_dtypes.update_traces(textposition='inside', textinfo='percent+label')
-            fig_dtypes.update_layout(height=400, showlegend=False)
-            visualizations['data_types'] = fig_dtypes
+        fig_dist = make_subplots(
+            rows=n_rows, cols=n_cols,
+            subplot_titles=numerical_cols[:n_rows*n_cols],
+            horizontal_spacing=0.1,
+            vertical_spacing=min(0.15, 0.9 / n_rows)
+        )
         
-        # Missing data bar chart
-        missing_data = self.df.isnull().sum()
-        missing_data = missing_data[missing_data > 0]
-        if len(missing_data) > 0:
-            fig_missing = px.bar(
-                x=missing_data.values,
-                y=missing_data.index,
-                orientation='h',
-                title="Missing Values by Column",
-                color=missing_data.values,
-                color_continuous_scale='Viridis'
-            )
-            fig_missing.update_layout(height=400, xaxis_title="Missing Values Count", yaxis_title="Columns")
-            visualizations['missing_data'] = fig_missing
-        
-        # Numerical columns distributions
-        numerical_cols = self.df.select_dtypes(include=['int64', 'int32', 'int16', 'int8', 'float64', 'float32', 'float16']).columns
-        if len(numerical_cols) > 0:
-            n_cols = min(3, len(numerical_cols))
-            n_rows = (len(numerical_cols) + n_cols - 1) // n_cols
-            
-            fig_dist = make_subplots(
-                rows=n_rows, cols=n_cols,
-                subplot_titles=numerical_cols[:n_rows*n_cols],
-                horizontal_spacing=0.1,
-                vertical_spacing=0.15
-            )
+        for i, col in enumerate(numerical_cols[:n_rows*n_cols]):
+            row = i // n_cols + 1
+            col_num = i % n_cols + 1
             
-            for i, col in enumerate(numerical_cols[:n_rows*n_cols]):
-                row = i // n_cols + 1
-                col_num = i % n_cols + 1
-                
-                fig_dist.add_trace(
-                    go.Histogram(x=self.df[col], name=col, nbinsx=20),
-                    row=row, col=col_num
-                )
-            
-            fig_dist.update_layout(height=300*n_rows, title_text="Numerical Variables Distributions", showlegend=False)
-            visualizations['numerical_distributions'] = fig_dist
-        
-        # Categorical columns distributions
-        categorical_cols = self.df.select_dtypes(include=['object', 'category', 'string']).columns
-        if len(categorical_cols) > 0:
-            n_cols = min(3, len(categorical_cols))
-            n_rows = (len(categorical_cols) + n_cols - 1) // n_cols
-
-            fig_cat_dist = make_subplots(
-                rows=n_rows, cols=n_cols,
-                subplot_titles=categorical_cols[:n_rows*n_cols],
-                horizontal_spacing=0.1,
-                vertical_spacing=0.15
+            fig_dist.add_trace(
+                profile.histogram_bar(col, name=col),
+                row=row, col=col_num
             )
+        
+        fig_dist.update_layout(height=300*n_rows, title_text="Numerical Variables Distributions", showlegend=False)
+        return fig_dist
+
+    def _build_categorical_distributions_figure(self, profile: DatasetProfile) -> Optional[go.Figure]:
+        """Categorical columns distributions"""
+        categorical_cols = profile.column_types['Categorical']
+        if len(categorical_cols) == 0:
+            return None
+        n_cols = min(3, len(categorical_cols))
+        n_rows = (len(categorical_cols) + n_cols - 1) // n_cols
+
+        fig_cat_dist = make_subplots(
+            rows=n_rows, cols=n_cols,
+            subplot_titles=categorical_cols[:n_rows*n_cols],
+            horizontal_spacing=0.1,
+            vertical_spacing=min(0.15, 0.9 / n_rows)
+        )
+        
+        for i, col in enumerate(categorical_cols[:n_rows*n_cols]):
+            row = i // n_cols + 1
+            col_num = i % n_cols + 1
             
-            for i, col in enumerate(categorical_cols[:n_rows*n_cols]):
-                row = i // n_cols + 1
-                col_num = i % n_cols + 1
-                
-                # For categorical data, use bar chart with value counts
-                value_counts = self.df[col].value_counts().head(10)  # Top 10 values only
-                fig_cat_dist.add_trace(
-                    go.Bar(x=value_counts.index, y=value_counts.values, name=col),
-                    row=row, col=col_num
-                )
-            
-            fig_cat_dist.update_layout(height=300*n_rows, title_text="Categorical Variables Distributions", showlegend=False)
-            visualizations['categorical_distributions'] = fig_cat_dist
-
-        # Boolean columns distributions
-        boolean_cols = self.df.select_dtypes(include='bool').columns
-        if len(boolean_cols) > 0:
-            n_cols = min(3, len(boolean_cols))
-            n_rows = (len(boolean_cols) + n_cols - 1) // n_cols
-
-            fig_bool_dist = make_subplots(
-                rows=n_rows, cols=n_cols,
-                subplot_titles=boolean_cols[:n_rows*n_cols],
-                horizontal_spacing=0.1,
-                vertical_spacing=0.15,
-                specs=[[{"type": "pie"} for _ in range(n_cols)] for _ in range(n_rows)]
+            # For categorical data, use bar chart with value counts
+            value_counts = profile.value_counts(col).head(10)  # Top 10 values only
+            fig_cat_dist.add_trace(
+                go.Bar(x=value_counts.index, y=value_counts.values, name=col),
+                row=row, col=col_num
             )
+        
+        fig_cat_dist.update_layout(height=300*n_rows, title_text="Categorical Variables Distributions", showlegend=False)
+        return fig_cat_dist
+
+    def _build_boolean_distributions_figure(self, profile: DatasetProfile) -> Optional[go.Figure]:
+        """Boolean columns distributions"""
+        boolean_cols = profile.column_types['True/False']
+        if len(boolean_cols) == 0:
+            return None
+        n_cols = min(3, len(boolean_cols))
+        n_rows = (len(boolean_cols) + n_cols - 1) // n_cols
+
+        fig_bool_dist = make_subplots(
+            rows=n_rows, cols=n_cols,
+            subplot_titles=boolean_cols[:n_rows*n_cols],
+            horizontal_spacing=0.1,
+            vertical_spacing=min(0.15, 0.9 / n_rows),
+            specs=[[{"type": "pie"} for _ in range(n_cols)] for _ in range(n_rows)]
+        )
+        
+        for i, col in enumerate(boolean_cols[:n_rows*n_cols]):
+            row = i // n_cols + 1
+            col_num = i % n_cols + 1
             
-            for i, col in enumerate(boolean_cols[:n_rows*n_cols]):
-                row = i // n_cols + 1
-                col_num = i % n_cols + 1
-                
-                # For boolean data, use pie chart
-                value_counts = self.df[col].value_counts()
-                fig_bool_dist.add_trace(
-                    go.Pie(labels=[str(label) for label in value_counts.index], 
-                          values=value_counts.values, name=col),
-                    row=row, col=col_num
-                )
-            
-            fig_bool_dist.update_layout(height=300*n_rows, title_text="Boolean Variables Distributions", showlegend=False)
-            visualizations['boolean_distributions'] = fig_bool_dist
-
-        # Date/time columns distributions
-        datetime_cols = self.df.select_dtypes(include=['datetime64']).columns
-        if len(datetime_cols) > 0:
-            n_cols = min(3, len(datetime_cols))
-            n_rows = (len(datetime_cols) + n_cols - 1) // n_cols
-
-            fig_date_dist = make_subplots(
-                rows=n_rows, cols=n_cols,
-                subplot_titles=datetime_cols[:n_rows*n_cols],
-                horizontal_spacing=0.1,
-                vertical_spacing=0.15
+            # For boolean data, use pie chart
+            value_counts = profile.value_counts(col)
+            fig_bool_dist.add_trace(
+                go.Pie(labels=[str(label) for label in value_counts.index], 
+                      values=value_counts.values, name=col),
+                row=row, col=col_num
             )
+        
+        fig_bool_dist.update_layout(height=300*n_rows, title_text="Boolean Variables Distributions", showlegend=False)
+        return fig_bool_dist
+
+    def _build_datetime_distributions_figure(self, profile: DatasetProfile) -> Optional[go.Figure]:
+        """Date/time columns distributions"""
+        datetime_cols = [col for col in profile.column_types['Date/Time'] if pd.api.types.is_datetime64_any_dtype(profile.df[col])]
+        if len(datetime_cols) == 0:
+            return None
+        n_cols = min(3, len(datetime_cols))
+        n_rows = (len(datetime_cols) + n_cols - 1) // n_cols
+
+        fig_date_dist = make_subplots(
+            rows=n_rows, cols=n_cols,
+            subplot_titles=datetime_cols[:n_rows*n_cols],
+            horizontal_spacing=0.1,
+            vertical_spacing=min(0.15, 0.9 / n_rows)
+        )
+        
+        for i, col in enumerate(datetime_cols[:n_rows*n_cols]):
+            row = i // n_cols + 1
+            col_num = i % n_cols + 1
             
-            for i, col in enumerate(datetime_cols[:n_rows*n_cols]):
-                row = i // n_cols + 1
-                col_num = i % n_cols + 1
-                
-                # For datetime data, use line chart with value counts over time
-                date_counts = self.df[col].value_counts().sort_index()
-                fig_date_dist.add_trace(
-                    go.Scatter(x=date_counts.index, y=date_counts.values, mode='lines', name=col),
-                    row=row, col=col_num
-                )
-            
-            fig_date_dist.update_layout(height=300*n_rows, title_text="Date/Time Variables Distributions", showlegend=False)
-            visualizations['datetime_distributions'] = fig_date_dist
-
-        # Correlation heatmap for numerical data only
-        numerical_cols_for_corr = self.df.select_dtypes(include=['int64', 'int32', 'int16', 'int8', 'float64', 'float32', 'float16']).columns
-        if len(numerical_cols_for_corr) > 1:
-            corr_matrix = self.df[numerical_cols_for_corr].corr()
-            fig_corr = px.imshow(
-                corr_matrix,
-                title="Correlation Heatmap (Numerical Variables)",
-                color_continuous_scale='RdBu_r',
-                aspect="auto"
+            # For datetime data, use line chart with record counts per time bucket
+            date_counts, _ = profile.timeline(col)
+            fig_date_dist.add_trace(
+                go.Scatter(x=date_counts.index, y=date_counts.values, mode='lines', name=col),
+                row=row, col=col_num
             )
-            fig_corr.update_layout(height=500)
-            visualizations['correlation_heatmap'] = fig_corr
         
-        return visualizations
+        fig_date_dist.update_layout(height=300*n_rows, title_text="Date/Time Variables Distributions", showlegend=False)
+        return fig_date_dist
+
+    def _build_correlation_heatmap_figure(self, profile: DatasetProfile) -> Optional[go.Figure]:
+        """Correlation heatmap for numerical data only"""
+        numerical_cols_for_corr = profile.column_types['Numerical']
+        if len(numerical_cols_for_corr) <= 1:
+            return None
+        corr_matrix = profile.df[numerical_cols_for_corr].corr()
+        fig_corr = px.imshow(
+            corr_matrix,
+            title="Correlation Heatmap (Numerical Variables)",
+            color_continuous_scale='RdBu_r',
+            aspect="auto"
+        )
+        fig_corr.update_layout(height=500)
+        return fig_corr
          
-    def call_open_router_api(self, prompt: str) -> Optional[str]:
-        """Make API call to Open Router"""
+    def call_open_router_api(self, prompt: str, models: List[str] = None, deadline: Deadline = None) -> Optional[str]:
+        """
+        Make API call to Open Router, asking the models in order (self.models by default).
+        When the newest request has streamed nothing after self.hedge_after seconds, a hedged request goes to the
+        next model; when every open request has failed, the next model is asked as a fallback. The first complete
+        answer wins and the requests still streaming are cancelled, as they all are once the deadline is reached.
+        """
+        models = list(models or self.models)
+        deadline = deadline or Deadline()
+        dataset = self.get_dataset_fingerprint()
+        answers = queue.Queue()
+        # Set on return, when the responses still open are aborted so that silent streams drop their connection too
+        cancelled = threading.Event()
+        responses = []
+        # First-byte events of the requests still running, oldest first
+        in_flight = []
+        # Set on return too: a complete answer is counted once the coordinator has labelled it won, or left it completed
+        settled = threading.Event()
+        launched = 0
+        
+        def launch(role: str):
+            nonlocal launched
+            first_byte = threading.Event()
+            in_flight.append(first_byte)
+            model = models[launched]
+            launched += 1
+            timeout = deadline.timeout(API_TIMEOUT_SECONDS)
+            
+            def run():
+                content, call = self._stream_completion(model, prompt, role, dataset, first_byte, cancelled, timeout, responses)
+                answers.put((first_byte, content, call))
+                if content:
+                    settled.wait()
+                METRICS.inc('llm_requests_total', role=role, outcome=call['outcome'])
+            
+            # Daemon threads: a cancelled request still connecting never holds up the interpreter at exit
+            threading.Thread(target=run, name=f'llm-{role}', daemon=True).start()
+        
+        launch('primary')
+        launched_at = time.perf_counter()
+        try:
+            while in_flight:
+                if deadline.should_stop:
+                    print("🛑 Analysis cancelled or out of time, dropping the LLM requests")
+                    return None
+                try:
+                    first_byte, content, call = answers.get(timeout=HEDGE_POLL_SECONDS)
+                except queue.Empty:
+                    # Hedge only one request at a time, and only while the newest one is silent
+                    newest = in_flight[-1]
+                    if (len(in_flight) == 1 and launched < len(models) and not newest.is_set()
+                            and time.perf_counter() - launched_at >= self.hedge_after):
+                        print(f"⏳ No output after {self.hedge_after:.0f}s, hedging with the next model...")
+                        launch('hedge')
+                        launched_at = time.perf_counter()
+                    continue
+                
+                in_flight.remove(first_byte)
+                if content:
+                    call['outcome'] = 'won'
+                    return content
+                if not in_flight and launched < len(models):
+                    print("🔁 Falling back to the next model...")
+                    launch('fallback')
+                    launched_at = time.perf_counter()
+            return None
+        finally:
+            cancelled.set()
+            for response in responses:
+                self._abort_response(response)
+            settled.set()
+
+    def _stream_completion(self, model: str, prompt: str, role: str, dataset: Optional[str], first_byte: threading.Event,
+                           cancelled: threading.Event, timeout: float = API_TIMEOUT_SECONDS,
+                           responses: List[requests.Response] = None) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Stream one completion from one model, recording its usage; returns the answer (None if it failed or was cancelled).
+        The response is added to responses, for the caller to abort it once cancelled.
+        """
         payload = {
-            "model": "tngtech/deepseek-r1t2-chimera:free",
+            "model": model,
             "messages": [
                 {
                     "role": "system",
@@ -621,88 +2515,213 @@ class ChatBotAnalyzer:
             ],
             "temperature": 0.2,
             "max_tokens": 4000,
-            "stream": False
+            # Streamed as server-sent events, so the first generated token is seen as soon as it exists
+            "stream": True,
+            # Ask OpenRouter to report the cost alongside the token counts
+            "usage": {"include": True}
         }
         
+        call = dict.fromkeys(LLM_CALL_FIELDS)
+        call.update(time=time.time(), dataset=dataset, role=role, model_requested=model, model=model, prompt_chars=len(prompt))
+        parts = []
+        response = None
+        start = time.perf_counter()
         try:
-            response = requests.post(self.base_url, headers=self.headers, json=payload, timeout=120)
+            response = requests.post(self.base_url, headers=self.headers, json=payload, timeout=timeout, stream=True)
+            if responses is not None:
+                responses.append(response)
+            # Cancelled before the caller could see this response: it will not be aborted, so stop here
+            if cancelled.is_set():
+                call['outcome'] = 'cancelled'
+                return None, call
+            call['status'] = response.status_code
+            METRICS.inc('api_requests_total', status=response.status_code)
             response.raise_for_status()
             
-            result = response.json()
-            return result['choices'][0]['message']['content']
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if cancelled.is_set():
+                    break
+                # Comment lines (": OPENROUTER PROCESSING") only keep the connection alive
+                if not line or not line.startswith('data: '):
+                    continue
+                if line == 'data: [DONE]':
+                    break
+                chunk = json.loads(line[len('data: '):])
+                if 'error' in chunk:
+                    raise ValueError(chunk['error'].get('message', chunk['error']))
+                call['model'] = chunk.get('model') or call['model']
+                delta = chunk['choices'][0].get('delta', {}) if chunk.get('choices') else {}
+                # Reasoning models stream their reasoning first: it counts as output, but not as answer
+                if (delta.get('content') or delta.get('reasoning')) and not first_byte.is_set():
+                    call['ttfb'] = time.perf_counter() - start
+                    first_byte.set()
+                    METRICS.observe('api_time_to_first_byte_seconds', call['ttfb'])
+                if delta.get('content'):
+                    parts.append(delta['content'])
+                if chunk.get('usage'):
+                    usage = chunk['usage']
+                    call.update(prompt_tokens=usage.get('prompt_tokens'), completion_tokens=usage.get('completion_tokens'),
+                                total_tokens=usage.get('total_tokens'), cost=usage.get('cost'))
+            
+            if cancelled.is_set():
+                call['outcome'] = 'cancelled'
+                return None, call
+            call['outcome'] = 'completed' if parts else 'failed'
+            for kind in ['prompt', 'completion']:
+                if call[f'{kind}_tokens'] is not None:
+                    METRICS.inc('llm_tokens_total', call[f'{kind}_tokens'], kind=kind, model=call['model'])
+            if call['cost'] is not None:
+                METRICS.inc('llm_cost_total', call['cost'], model=call['model'])
+            return ''.join(parts) or None, call
             
-        except requests.exceptions.RequestException as e:
-            print(f"❌ API Error: {e}")
-            if hasattr(e, 'response') and e.response is not None:
+        except Exception as e:
+            # Aborted by the caller, or cut off by the analysis deadline (the only thing shortening the timeout)
+            if cancelled.is_set() or (isinstance(e, requests.exceptions.Timeout) and timeout < API_TIMEOUT_SECONDS):
+                call['outcome'] = 'cancelled'
+                return None, call
+            call['outcome'] = 'failed'
+            if call['status'] is None:
+                call['status'] = type(e).__name__
+                METRICS.inc('api_requests_total', status=type(e).__name__)
+            print(f"❌ API Error ({model}): {e}")
+            if getattr(e, 'response', None) is not None:
                 print(f"Response: {e.response.text}")
-            return None
+            return None, call
+        finally:
+            # Closed by the thread reading it: closing from another thread would wait for the pending read
+            if response is not None:
+                response.close()
+            call['latency'] = time.perf_counter() - start
+            self.llm_usage.record(call)
+            METRICS.observe('api_request_duration_seconds', call['latency'])
+
+    @staticmethod
+    def _abort_response(response: requests.Response):
+        """Wake the thread reading a response: shutting its socket down needs none of the locks close() waits for"""
+        sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+        if sock is not None:
+            with contextlib.suppress(OSError):
+                socket.socket.shutdown(sock, socket.SHUT_RDWR)
+
+    def _record_analysis_metrics(self, succeeded: bool, cancelled: bool = False):
+        """Count an analysis and the size of its dataset, then refresh the metrics file when one is configured"""
+        METRICS.inc('analyses_total', outcome='cancelled' if cancelled else 'success' if succeeded else 'failure')
+        METRICS.inc('rows_processed_total', len(self.df))
+        METRICS.inc('columns_processed_total', len(self.df.columns))
+        METRICS.observe('dataset_rows', len(self.df))
+        METRICS.observe('dataset_columns', len(self.df.columns))
+        if os.environ.get(METRICS_FILE_ENV):
+            METRICS.write(os.environ[METRICS_FILE_ENV])
 
-    def analyze_dataset(self) -> Dict[str, Any]:
-        """Analyze the currently loaded dataset"""
+    def analyze_dataset(self, deadline: Union[float, Deadline] = None) -> Dict[str, Any]:
+        """
+        Analyze the currently loaded dataset, within deadline (seconds or a Deadline that can be cancelled).
+        A run stopped after the statistics returns them without the AI analysis, with the reason in 'cancelled'.
+        """
         if self.df is None:
             return None
         
         print("🚀 Starting Data Analysis...")
+        deadline = deadline if isinstance(deadline, Deadline) else Deadline(deadline)
         
-        # Generate descriptive stats
-        print("📈 Generating descriptive statistics...")
-        stats_summary = self.generate_descriptive_stats()
+        # Stages of this analysis follow the ones of the last load
+        timer = StageTimer(self.profiler, self.load_timer.spans, self.load_timer.profiles)
+        descriptive_stats = None
         
-        # Generate visualizations
-        print("🎨 Creating visualizations...")
-        visualizations = self.generate_visualizations()
-        
-        # Create analysis prompt
-        prompt = self.create_analysis_prompt(stats_summary)
+        try:
+            # Generate descriptive stats
+            print("📈 Generating descriptive statistics...")
+            deadline.check('statistics')
+            with timer.span('statistics', profile=True):
+                descriptive_stats = self.get_descriptive_statistics(timer, deadline)
+            
+            # Create analysis prompt from the compact rendering of the statistics
+            deadline.check('prompt')
+            with timer.span('prompt'):
+                prompt = self.create_analysis_prompt(descriptive_stats.to_prompt())
+            
+            # Call API
+            print("🤖 Calling API for detailed analysis...")
+            deadline.check('api_call')
+            calls_before = len(self.llm_usage.calls)
+            with timer.span('api_call', profile=True):
+                analysis_result = self.call_open_router_api(prompt, deadline=deadline)
+            deadline.check('api_call')
+        except AnalysisCancelled as e:
+            print(f"🛑 {e}")
+            print(f"⏱️ Stages took {timer.total:.2f}s")
+            self._record_analysis_metrics(False, cancelled=True)
+            if descriptive_stats is None:
+                return None
+            # Partial results: everything but the AI analysis
+            return self._analysis_results(descriptive_stats, None, timer, None, cancelled=str(e))
         
-        # Call API
-        print("🤖 Calling API for detailed analysis...")
-        analysis_result = self.call_open_router_api(prompt)
+        llm_call = next((call for call in self.llm_usage.calls[calls_before:] if call['outcome'] == 'won'), None)
+        print(f"⏱️ Stages took {timer.total:.2f}s")
+        self._record_analysis_metrics(bool(analysis_result))
         
         if analysis_result:
-            results = {
-                'dataframe': self.df,
-                'statistics': stats_summary,
-                'ai_analysis': analysis_result,
-                'visualizations': visualizations
-            }
-            
-            return results
+            return self._analysis_results(descriptive_stats, analysis_result, timer, llm_call)
         else:
             print("❌ Failed to get analysis from API")
             return None
     
-    def analyze_file(self, file_path: str, sheet_name: str = None, save_output: bool = False, output_dir: str = None) -> Dict[str, Any]:
-        """Main method to analyze data file (CSV, Excel, JSON)"""
+    def _analysis_results(self, descriptive_stats: DescriptiveStatistics, analysis_result: Optional[str], timer: StageTimer,
+                          llm_call: Optional[Dict[str, Any]], cancelled: str = None) -> Dict[str, Any]:
+        """Results of an analysis of the loaded dataset"""
+        return {
+            'dataframe': self.df,
+            'profile': self.get_profile(),
+            'fingerprint': self.get_dataset_fingerprint(),
+            'statistics': descriptive_stats.to_markdown(),
+            'descriptive_stats': descriptive_stats,
+            'ai_analysis': analysis_result,
+            'timings': timer,
+            'llm_call': llm_call,
+            # Why the run stopped early (None when it completed)
+            'cancelled': cancelled
+        }
+    
+    def analyze_file(self, file_path: str, sheet_name: str = None, save_output: bool = False, output_dir: str = None,
+                     columns: List[str] = None) -> Dict[str, Any]:
+        """Main method to analyze data file (CSV, Excel, JSON, Parquet, Feather)"""
         
         print("🚀 Starting Data Analysis...")
         
         # Load data
-        df = self.load_and_preview_data(file_path, sheet_name)
+        df = self.load_and_preview_data(file_path, sheet_name, columns=columns)
         if df is None:
             return None
         
+        # Stages of this analysis follow the ones of the last load
+        timer = StageTimer(self.profiler, self.load_timer.spans, self.load_timer.profiles)
+        
         # Generate descriptive stats
         print("📈 Generating descriptive statistics...")
-        stats_summary = self.generate_descriptive_stats()
-        
-        # Generate visualizations
-        print("🎨 Creating visualizations...")
-        visualizations = self.generate_visualizations()
+        with timer.span('statistics', profile=True):
+            descriptive_stats = self.get_descriptive_statistics(timer)
         
-        # Create analysis prompt
-        prompt = self.create_analysis_prompt(stats_summary)
+        # Create analysis prompt from the compact rendering of the statistics
+        with timer.span('prompt'):
+            prompt = self.create_analysis_prompt(descriptive_stats.to_prompt())
         
         # Call API
         print("🤖 Calling API for detailed analysis...")
-        analysis_result = self.call_open_router_api(prompt)
+        calls_before = len(self.llm_usage.calls)
+        with timer.span('api_call', profile=True):
+            analysis_result = self.call_open_router_api(prompt)
+        llm_call = next((call for call in self.llm_usage.calls[calls_before:] if call['outcome'] == 'won'), None)
+        print(f"⏱️ Stages took {timer.total:.2f}s")
+        self._record_analysis_metrics(bool(analysis_result))
         
         if analysis_result:
             results = {
                 'dataframe': df,
-                'statistics': stats_summary,
+                'statistics': descriptive_stats.to_markdown(),
+                'descriptive_stats': descriptive_stats,
                 'ai_analysis': analysis_result,
-                'visualizations': visualizations
+                'timings': timer,
+                'llm_call': llm_call
             }
             
             # Save results if requested
@@ -754,4 +2773,150 @@ class ChatBotAnalyzer:
         print(f"💾 Results saved as Markdown files:")
         print(f"   - {base_path}_statistics.txt")
         print(f"   - {base_path}_ai_analysis.txt")
-        print(f"   - {base_path}_complete_report.txt")
\ No newline at end of file
+        print(f"   - {base_path}_complete_report.txt")
+
+def _init_job_worker():
+    """Worker processes neither serve nor write the metrics: they hand them back with each result"""
+    os.environ.pop(METRICS_PORT_ENV, None)
+    os.environ.pop(METRICS_FILE_ENV, None)
+
+def _run_analysis_job(payload: bytes, data_path: Optional[str], seconds: Optional[float], submitted: float, status,
+                      cancel_event):
+    """Run one analysis in a worker process; returns what it computed, the LLM calls made and the metrics recorded"""
+    analyzer = pickle.loads(payload)
+    status.update(state='running', started=time.time())
+    METRICS.observe('analysis_job_queue_seconds', time.time() - submitted)
+    if data_path is not None:
+        analyzer.df = pd.read_pickle(data_path)
+    deadline = Deadline(seconds, cancel_event,
+                        on_stage=lambda stage: status.update(stage=stage, progress=JOB_STAGE_PROGRESS.get(stage, status['progress'])))
+    # Time spent waiting for a worker counts against the deadline
+    deadline.started -= time.time() - submitted
+    calls_before = len(analyzer.llm_usage.calls)
+    results = analyzer.analyze_dataset(deadline)
+    status.update(stopped=deadline.should_stop)
+    if results is not None:
+        results = {key: results[key] for key in JOB_RESULT_KEYS}
+    return results, analyzer.llm_usage.calls[calls_before:], METRICS.collect()
+
+class JobExecutor:
+    """
+    Pool of worker processes that run analyses away from the Streamlit script thread and its GIL.
+    submit() returns a job id to poll with status(); result() collects a finished job once, merging its
+    LLM calls into the submitting analyzer and its metrics into this process. The dataset reaches the worker
+    as a temporary file and never comes back: the results are completed with the frame and profile kept here.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS):
+        self.max_workers = max_workers
+        self._pool = None
+        self._manager = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _start(self):
+        # Spawned rather than forked: a fork of the multi-threaded server could inherit a held lock
+        context = multiprocessing.get_context('spawn')
+        self._manager = context.Manager()
+        self._pool = ProcessPoolExecutor(self.max_workers, mp_context=context, initializer=_init_job_worker)
+
+    def submit(self, analyzer: ChatBotAnalyzer, seconds: float = None) -> str:
+        """Queue an analysis of the analyzer's loaded dataset within seconds (None = no limit); returns the job id"""
+        # Written now, so the job sees the dataset as it is at submission whatever the session does next;
+        # the pickled analyzer only carries its settings and LLM usage
+        worker_analyzer = copy.copy(analyzer)
+        worker_analyzer.df = None
+        worker_analyzer._profile = None
+        payload = pickle.dumps(worker_analyzer, protocol=pickle.HIGHEST_PROTOCOL)
+        data_path = self._write_dataset(analyzer.df)
+        with self._lock:
+            if self._pool is None:
+                self._start()
+            job_id = uuid.uuid4().hex[:12]
+            submitted = time.time()
+            status = self._manager.dict(state='queued', stage=None, progress=0.0, seconds=seconds, started=None, stopped=False)
+            cancel_event = self._manager.Event()
+            future = self._pool.submit(_run_analysis_job, payload, data_path, seconds, submitted, status, cancel_event)
+            future.add_done_callback(lambda _: self._remove_dataset(data_path))
+            self._jobs[job_id] = {'analyzer': analyzer, 'df': analyzer.df, 'profile': analyzer.get_profile(),
+                                  'future': future, 'status': status, 'cancel': cancel_event, 'submitted': submitted,
+                                  'shared_key': analyzer.shared_key, 'models': tuple(analyzer.models)}
+        return job_id
+
+    @staticmethod
+    def _write_dataset(df: Optional[pd.DataFrame]) -> Optional[str]:
+        """Write a dataset to a temporary file for a worker to read; only the path goes through the pool"""
+        if df is None:
+            return None
+        descriptor, path = tempfile.mkstemp(prefix='analysis-job-', suffix='.pkl')
+        os.close(descriptor)
+        df.to_pickle(path)
+        return path
+
+    @staticmethod
+    def _remove_dataset(path: Optional[str]):
+        """Remove the file of a job that is over (done, failed or dropped from the queue)"""
+        if path is not None:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        State (queued, running, done, failed or cancelled), last stage reached, progress from 0 to 1, time limit,
+        seconds since submission, and whether a cancellation was requested; None for an unknown job
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        future = job['future']
+        info = dict(job['status'])
+        if future.cancelled():
+            info['state'] = 'cancelled'
+        elif future.done():
+            info['state'] = 'failed' if future.exception() is not None else 'done'
+            info['progress'] = 1.0
+        info.update(elapsed=time.time() - job['submitted'], cancelling=job['cancel'].is_set())
+        return info
+
+    def cancel(self, job_id: str):
+        """Drop a queued job, or ask a running one to stop at its next checkpoint"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job['cancel'].set()
+            job['future'].cancel()
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Collect a finished job (partial results when it was stopped, None when nothing was computed); raises its error"""
+        with self._lock:
+            job = self._jobs.pop(job_id)
+        future = job['future']
+        if future.cancelled():
+            METRICS.inc('analysis_jobs_total', state='cancelled')
+            return None
+        try:
+            job_results, calls, metrics = future.result()
+        except Exception:
+            METRICS.inc('analysis_jobs_total', state='failed')
+            raise
+        
+        analyzer = job['analyzer']
+        analyzer.llm_usage.calls.extend(calls)
+        METRICS.merge(metrics)
+        METRICS.inc('analysis_jobs_total', state='done')
+        results = None
+        if job_results is not None:
+            # The dataset as it was at submission, with the profile this process already holds for it
+            profile = job['profile']
+            with profile.lock:
+                if profile.fingerprint is None:
+                    profile.fingerprint = job_results['fingerprint']
+            results = {'dataframe': job['df'], 'profile': profile,
+                       'statistics': job_results['descriptive_stats'].to_markdown(), **job_results}
+        if job['shared_key'] is not None and results is not None:
+            SHARED_CACHE.store_results(job['shared_key'], job['models'], results)
+        if os.environ.get(METRICS_FILE_ENV):
+            METRICS.write(os.environ[METRICS_FILE_ENV])
+        return results
+
+# One pool per process, shared by every session
+JOBS = JobExecutor()
@@ -4,13 +4,27 @@ import pandas as pd
 import tempfile
 import os
 import base64
+import json
+import time
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import numpy as np
 
 # Import from our modules
-from en_01_analyzer import ChatBotAnalyzer
+from en_01_analyzer import ChatBotAnalyzer, JOBS, SHARED_CACHE, PYARROW_AVAILABLE, PYINSTRUMENT_AVAILABLE, COMPRESSION_EXTENSIONS, PROFILERS
+
+# Wide Parquet/Feather files ask which columns to read before loading
+MAX_COLUMNS_WITHOUT_SELECTION = 50
+COLUMNAR_EXTENSIONS = {'parquet': 'parquet', 'feather': 'feather', 'arrow': 'feather'}
+# Formats read as a stream of records, which the row limit applies to
+STREAMED_EXTENSIONS = ('json', 'jsonl', 'ndjson')
+
+# Figures memoized with st.cache_data are keyed by the dataset fingerprint plus their parameters
+CHART_CACHE_ENTRIES = 512
+
+# Default time limit of an analysis (0 = none), and how often a running analysis is polled
+ANALYSIS_DEADLINE_SECONDS = 300
+ANALYSIS_POLL_SECONDS = 0.5
 
 # Set page configuration
 st.set_page_config(
@@ -230,6 +244,30 @@ def get_download_link(content, filename, text):
     b64 = base64.b64encode(content.encode()).decode()
     return f'<a href="data:file/txt;base64,{b64}" download="{filename}" class="download-btn">{text}</a>'
 
+def get_file_extension(file_name):
+    """Get the data format extension, looking past a compression suffix (data.csv.gz -> csv)"""
+    base, ext = os.path.splitext(file_name.lower())
+    if ext in COMPRESSION_EXTENSIONS:
+        ext = os.path.splitext(base)[1]
+    return ext.lstrip('.')
+
+def get_row_limit():
+    """Row cap and sampling chosen in the sidebar for the streamed JSON formats"""
+    return {'max_rows': st.session_state.stream_max_rows or None, 'random_sample': st.session_state.stream_random_sample}
+
+def get_content_key(uploaded_file, *options):
+    """Key of an upload in the shared dataset cache: its bytes and the options it is loaded with"""
+    file_extension = get_file_extension(uploaded_file.name)
+    if file_extension in STREAMED_EXTENSIONS:
+        options = tuple(get_row_limit().values()) + options
+    return SHARED_CACHE.content_key(uploaded_file, file_extension, st.session_state.analyzer.use_arrow, *options)
+
+def share_loaded_dataset(key, df_before):
+    """Offer a dataset this session just loaded to the other sessions uploading the same bytes"""
+    analyzer = st.session_state.analyzer
+    if analyzer.df is not None and analyzer.df is not df_before and analyzer.shared_key is None:
+        analyzer.share_dataset(key)
+
 def display_welcome_screen(uploaded_file=None):
     """Display welcome screen with app information"""
     # Título sem ícone
@@ -263,7 +301,7 @@ def display_welcome_screen(uploaded_file=None):
         <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 1rem;">
             <div style="padding: 0.5rem;">
                 <h4 style="margin: 0.5rem 0; font-size: 1rem; color: #3498db;">📊 Multi-Format Support</h4>
-                <p style="font-size: 0.9rem; margin: 0; line-height: 1.4;">Analyze CSV, Excel (XLSX), and JSON files with automatic format detection</p>
+                <p style="font-size: 0.9rem; margin: 0; line-height: 1.4;">Analyze CSV, Excel (XLSX), JSON, JSON Lines, Parquet and Feather files with automatic format detection</p>
             </div>
             <div style="padding: 0.5rem;">
                 <h4 style="margin: 0.5rem 0; font-size: 1rem; color: #2ecc71;">📈 Smart Data Analysis</h4>
@@ -299,7 +337,7 @@ def display_welcome_screen(uploaded_file=None):
             st.markdown("""
             <div class="card">
                 <ol style="font-size: 0.9rem; margin: 0.5rem 0; padding-left: 1.2rem; line-height: 1.6;">
-                    <li style="margin-bottom: 0.8rem;"><strong>Upload your data file</strong> - CSV, Excel (XLSX), or JSON format</li>
+                    <li style="margin-bottom: 0.8rem;"><strong>Upload your data file</strong> - CSV, Excel (XLSX), JSON, JSON Lines, Parquet or Feather format</li>
                     <li style="margin-bottom: 0.8rem;"><strong>Select worksheet</strong> (if Excel file) in the sidebar</li>
                     <li style="margin-bottom: 0.8rem;"><strong>Click "Analyze Dataset"</strong> to start the analysis process</li>
                     <li style="margin-bottom: 0.8rem;"><strong>Wait for processing</strong> - automatic format detection and analysis</li>
@@ -360,73 +398,231 @@ def display_column_types_cards(analyzer):
     with col4:
         st.markdown(create_type_card(datetime_count, "Date/Time Columns", "#f39c12"), unsafe_allow_html=True)
 
-def create_correlation_heatmap(df):
-    """Create correlation heatmap for all variables"""
-    if df is None or df.empty:
-        st.warning("No data available for correlation analysis")
-        return None
-        
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def create_correlation_heatmap(dataset_key, _df, _simple_types):
+    """Create correlation heatmap for all variables (cached per dataset)"""
     # Create a copy of the dataframe for encoding
-    df_encoded = df.copy()
+    df_encoded = _df.copy()
+    simple_types = _simple_types
     
-    # Encode categorical variables
-    for col in df_encoded.select_dtypes(include=['object', 'category']).columns:
+    # Encode categorical variables (factorize works directly on Arrow-backed strings)
+    for col in simple_types['Categorical']:
         df_encoded[col] = pd.factorize(df_encoded[col])[0]
     
     # Encode boolean variables
-    for col in df_encoded.select_dtypes(include='bool').columns:
+    for col in simple_types['True/False']:
         df_encoded[col] = df_encoded[col].astype(int)
     
-    # Calculate correlation matrix
-    try:
-        corr_matrix = df_encoded.corr()
+    # Encode date/time variables as seconds since the minimum (same correlation, also for Arrow timestamps)
+    for col in simple_types['Date/Time']:
+        df_encoded[col] = (df_encoded[col] - df_encoded[col].min()).dt.total_seconds()
+    
+    # Calculate correlation matrix (errors are reported by the caller, and not cached)
+    corr_matrix = df_encoded.corr()
+    
+    # Create heatmap
+    fig = px.imshow(
+        corr_matrix,
+        title="Correlation Matrix (All Variables)",
+        color_continuous_scale='RdBu_r',
+        aspect="auto",
+        range_color=[-1, 1],
+        labels=dict(color="Correlation")
+    )
+    
+    fig.update_layout(
+        height=600,
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        coloraxis_colorbar=dict(
+            title="Correlation",
+            tickvals=[-1, -0.5, 0, 0.5, 1],
+            ticktext=["-1.0", "-0.5", "0.0", "0.5", "1.0"]
+        )
+    )
+    
+    return fig
+
+def create_box_plot(box_stats, title, color='#e74c3c'):
+    """Build a box plot from precomputed statistics: only quartiles, whiskers and sampled outliers reach the browser"""
+    fig = go.Figure()
+    for label, stats in box_stats.iterrows():
+        fig.add_trace(go.Box(
+            x=[str(label)], q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']],
+            lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']],
+            name=str(label), marker_color=color
+        ))
+        if len(stats['outliers']) > 0:
+            fig.add_trace(go.Scatter(
+                x=[str(label)] * len(stats['outliers']), y=stats['outliers'],
+                mode='markers', marker=dict(color=color, size=4),
+                name=f"{label} outliers", showlegend=False
+            ))
+    fig.update_layout(title=title)
+    return fig
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def build_numerical_charts(dataset_key, col, _profile, bins=None):
+    """Build the distribution area chart and the box plot of a numerical column (cached per dataset and column)"""
+    fig_area = None
+    # Counts come from the profile's histogram service, shared with the analyzer's own figures
+    hist_values, bin_edges = _profile.histogram(col, bins)
+    if hist_values.sum() > 0:
+        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+        
+        fig_area = px.area(
+            x=bin_centers, 
+            y=hist_values, 
+            title=f"Distribution - {col}",
+            labels={'x': col, 'y': 'Frequency'}
+        )
         
-        # Create heatmap
-        fig = px.imshow(
-            corr_matrix,
-            title="Correlation Matrix (All Variables)",
-            color_continuous_scale='RdBu_r',
-            aspect="auto",
-            range_color=[-1, 1],
-            labels=dict(color="Correlation")
+        fig_area.update_traces(
+            line=dict(color='#3498db', width=2),
+            fillcolor='rgba(52, 152, 219, 0.5)'
         )
         
-        fig.update_layout(
-            height=600,
+        fig_area.update_layout(
             paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
             font=dict(color='white'),
-            coloraxis_colorbar=dict(
-                title="Correlation",
-                tickvals=[-1, -0.5, 0, 0.5, 1],
-                ticktext=["-1.0", "-0.5", "0.0", "0.5", "1.0"]
-            )
+            showlegend=False,
+            xaxis_title=col,
+            yaxis_title="Frequency"
         )
-        
-        return fig
-    except Exception as e:
-        st.error(f"Could not generate correlation matrix: {str(e)}")
-        return None
+    
+    # Box plot
+    fig_box = create_box_plot(_profile.box_stats(col), f"Box Plot - {col}")
+    fig_box.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        showlegend=False,
+        yaxis_title=col
+    )
+    
+    return fig_area, fig_box
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def build_category_bar_chart(dataset_key, col, _profile, top_n=10):
+    """Build the top categories bar chart of a categorical column (cached per dataset and column)"""
+    value_counts = _profile.value_counts(col).head(top_n)
+    
+    if len(value_counts) <= 5:
+        # Horizontal bar chart for 5 or fewer categories
+        fig_bar = px.bar(
+            x=value_counts.values,
+            y=value_counts.index,
+            orientation='h',
+            title=f"Top Categories - {col}",
+            color_discrete_sequence=['#3498db']
+        )
+        fig_bar.update_layout(
+            xaxis_title="Count",
+            yaxis_title="Categories",
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='white'),
+            showlegend=False
+        )
+    else:
+        # Vertical bar chart for more than 5 categories
+        fig_bar = px.bar(
+            x=value_counts.index,
+            y=value_counts.values,
+            title=f"Top Categories - {col}",
+            color_discrete_sequence=['#3498db']
+        )
+        fig_bar.update_layout(
+            xaxis_title="Categories",
+            yaxis_title="Count",
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='white'),
+            showlegend=False
+        )
+        fig_bar.update_xaxes(tickangle=45)
+    
+    return fig_bar
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def build_boolean_donut_chart(dataset_key, col, _profile):
+    """Build the True/False donut chart of a boolean column (cached per dataset and column)"""
+    value_counts = _profile.value_counts(col)
+    colors = {'True': 'rgba(46, 204, 113, 0.8)', 'False': 'rgba(231, 76, 60, 0.8)'}
+    color_sequence = [colors.get(str(label), '#3498db') for label in value_counts.index]
+
+    fig_donut = px.pie(
+        values=value_counts.values,
+        names=[str(label) for label in value_counts.index],
+        title=f"Distribution - {col}",
+        hole=0.5,
+        color_discrete_sequence=color_sequence
+    )
+    fig_donut.update_traces(
+        textposition='inside', 
+        textinfo='percent+label',
+        marker=dict(line=dict(color="#000000", width=2)),
+        textfont=dict(color='white', size=14)
+    )
+    fig_donut.update_layout(
+        height=400,
+        showlegend=True,
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.2,
+            xanchor="center",
+            x=0.5
+        )
+    )
+    
+    return fig_donut
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def build_timeline_chart(dataset_key, col, _profile):
+    """Build the record count timeline of a date/time column (cached per dataset and column)"""
+    # Bucketed by the profile (minute to N years) so the line stays within a fixed point budget
+    timeline_data, bucket = _profile.timeline(col)
+    fig_timeline = px.line(
+        x=timeline_data.index,
+        y=timeline_data.values,
+        title=f"Timeline - {col} (per {bucket})",
+        labels={'x': 'Date', 'y': f'Records per {bucket}'}
+    )
+    fig_timeline.update_traces(line=dict(color='#3498db', width=3))
+    fig_timeline.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        showlegend=False
+    )
+    
+    return fig_timeline
 
 def display_exploratory_analysis(results):
     """Display exploratory data analysis with tabs"""
     st.markdown('<div class="section-header">📊 Exploratory Data Analysis</div>', unsafe_allow_html=True)
     
     # Download button
-    if 'ai_analysis' in results and 'statistics' in results:
+    if results.get('ai_analysis') and 'statistics' in results:
         combined_report = f"# Data Analysis Report\n\n## Descriptive Statistics\n\n{results['statistics']}\n\n## AI Analysis\n\n{results['ai_analysis']}"
         st.markdown(get_download_link(combined_report, "complete_analysis_report.txt", "📥 Download Complete Report (TXT)"), unsafe_allow_html=True)
     
     # Overview cards
     df = results['dataframe']
+    profile = results['profile']
     col1, col2, col3, col4, col5 = st.columns(5)
     with col1:
         st.markdown(create_stat_card(f"{df.shape[0]:,}", "Total Rows", "📈", "#2ecc71"), unsafe_allow_html=True)
     with col2:
         st.markdown(create_stat_card(f"{df.shape[1]}", "Total Columns", "📊", "#3498db"), unsafe_allow_html=True)
     with col3:
-        st.markdown(create_stat_card(f"{df.isnull().sum().sum():,}", "Missing Values", "⚠️", "#f39c12"), unsafe_allow_html=True)
+        st.markdown(create_stat_card(f"{profile.total_missing:,}", "Missing Values", "⚠️", "#f39c12"), unsafe_allow_html=True)
     with col4:
-        st.markdown(create_stat_card(f"{df.duplicated().sum():,}", "Duplicated Rows", "🔍", "#e74c3c"), unsafe_allow_html=True)
+        st.markdown(create_stat_card(f"{st.session_state.analyzer.count_duplicate_rows():,}", "Duplicated Rows", "🔍", "#e74c3c"), unsafe_allow_html=True)
     with col5:
         total_cells = df.shape[0] * df.shape[1]
         st.markdown(create_stat_card(f"{total_cells:,}", "Total Cells", "🔢", "#9b59b6"), unsafe_allow_html=True)
@@ -437,7 +633,7 @@ def display_exploratory_analysis(results):
     
     # Create tabs for different data types
     tab_names = ["Overview"]
-    simple_types = analyzer.get_simple_column_types()
+    simple_types = profile.column_types
     
     if simple_types['Numerical']:
         tab_names.append("Numerical Columns")
@@ -448,35 +644,41 @@ def display_exploratory_analysis(results):
     if simple_types['Date/Time']:
         tab_names.append("Date/Time Columns")
     
-    tabs = st.tabs(tab_names)
+    # Lazy tabs: only the selected tab runs, so its figures are built the first time it is opened
+    tabs = st.tabs(tab_names, key="eda_tabs", on_change="rerun")
     
     # Overview Tab
     with tabs[0]:
-        display_overview_tab(results)
+        if tabs[0].open:
+            display_overview_tab(results)
     
     # Numerical Columns Tab
     if simple_types['Numerical']:
         tab_index = tab_names.index("Numerical Columns")
         with tabs[tab_index]:
-            display_numerical_tab(results)
+            if tabs[tab_index].open:
+                display_numerical_tab(results)
     
     # Categorical Columns Tab
     if simple_types['Categorical']:
         tab_index = tab_names.index("Categorical Columns")
         with tabs[tab_index]:
-            display_categorical_tab(results)
+            if tabs[tab_index].open:
+                display_categorical_tab(results)
     
     # True/False Columns Tab
     if simple_types['True/False']:
         tab_index = tab_names.index("True/False Columns")
         with tabs[tab_index]:
-            display_boolean_tab(results)
+            if tabs[tab_index].open:
+                display_boolean_tab(results)
     
     # Date/Time Columns Tab
     if simple_types['Date/Time']:
         tab_index = tab_names.index("Date/Time Columns")
         with tabs[tab_index]:
-            display_datetime_tab(results)
+            if tabs[tab_index].open:
+                display_datetime_tab(results)
 
 def display_overview_tab(results):
     """Display overview tab content"""
@@ -498,8 +700,10 @@ def display_overview_tab(results):
     # Correlation heatmap
     st.markdown("### 🔗 Correlation Matrix")
     try:
-        corr_fig = create_correlation_heatmap(df)
-        if corr_fig:
+        if df.empty:
+            st.warning("No data available for correlation analysis")
+        else:
+            corr_fig = create_correlation_heatmap(results['fingerprint'], df, results['profile'].column_types)
             st.plotly_chart(corr_fig, use_container_width=True)
     except Exception as e:
         st.error(f"Could not generate correlation matrix: {str(e)}")
@@ -507,9 +711,11 @@ def display_overview_tab(results):
 def display_numerical_tab(results):
     """Display numerical columns analysis"""
     df = results['dataframe']
-    numerical_cols = df.select_dtypes(include=['int64', 'int32', 'int16', 'int8', 'float64', 'float32', 'float16']).columns
+    profile = results['profile']
+    numerical_cols = profile.column_types['Numerical']
     
     for col in numerical_cols:
+        cards = results['descriptive_stats'].metric_cards(col)
         with st.container():
             st.markdown(f'<div class="analysis-card">', unsafe_allow_html=True)
             st.markdown(f"#### 📈 {col}")
@@ -517,66 +723,32 @@ def display_numerical_tab(results):
             # Statistics
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Mean", f"{df[col].mean():.2f}")
-                st.metric("Median", f"{df[col].median():.2f}")
-                st.metric("Variance", f"{df[col].var():.2f}")
+                for label in ("Mean", "Median", "Variance"):
+                    st.metric(label, cards[label])
             with col2:
-                st.metric("Standard Deviation", f"{df[col].std():.2f}")
-                st.metric("Minimum", f"{df[col].min():.2f}")
-                st.metric("Maximum", f"{df[col].max():.2f}")
+                for label in ("Standard Deviation", "Minimum", "Maximum"):
+                    st.metric(label, cards[label])
             
-            st.metric("Missing Values", f"{df[col].isnull().sum()}")
+            st.metric("Missing Values", cards["Missing Values"])
             
             # Visualizations
+            fig_area, fig_box = build_numerical_charts(results['fingerprint'], col, profile)
             viz_col1, viz_col2 = st.columns(2)
             with viz_col1:
                 # Area chart
-                chart_data = df[col].dropna()
-                if len(chart_data) > 0:
-                    hist_values, bin_edges = np.histogram(chart_data, bins=50)
-                    bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-                    
-                    fig_area = px.area(
-                        x=bin_centers, 
-                        y=hist_values, 
-                        title=f"Distribution - {col}",
-                        labels={'x': col, 'y': 'Frequency'}
-                    )
-                    
-                    fig_area.update_traces(
-                        line=dict(color='#3498db', width=2),
-                        fillcolor='rgba(52, 152, 219, 0.5)'
-                    )
-                    
-                    fig_area.update_layout(
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        font=dict(color='white'),
-                        showlegend=False,
-                        xaxis_title=col,
-                        yaxis_title="Frequency"
-                    )
-                    
+                if fig_area is not None:
                     st.plotly_chart(fig_area, use_container_width=True)
             
             with viz_col2:
                 # Box plot
-                fig_box = px.box(df, y=col, title=f"Box Plot - {col}")
-                fig_box.update_traces(marker_color='#e74c3c')
-                fig_box.update_layout(
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    showlegend=False
-                )
                 st.plotly_chart(fig_box, use_container_width=True)
             
             st.markdown('</div>', unsafe_allow_html=True)
 
 def display_categorical_tab(results):
     """Display categorical columns analysis"""
-    df = results['dataframe']
-    categorical_cols = df.select_dtypes(include=['object', 'category', 'string']).columns
+    profile = results['profile']
+    categorical_cols = profile.column_types['Categorical']
     
     for col in categorical_cols:
         with st.container():
@@ -584,57 +756,21 @@ def display_categorical_tab(results):
             st.markdown(f"#### 🏷️ {col}")
             
             # Statistics
-            unique_count = df[col].nunique()
-            missing_count = df[col].isnull().sum()
-            top_values = df[col].value_counts().head(3)
+            cards = results['descriptive_stats'].metric_cards(col)
+            top_values = profile.value_counts(col).head(3)
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Unique Categories", unique_count)
-                st.metric("Missing Values", missing_count)
+                st.metric("Unique Categories", cards["Unique Categories"])
+                st.metric("Missing Values", cards["Missing Values"])
             
             with col2:
                 st.markdown("**Top 3 Categories:**")
                 for value, count in top_values.items():
                     st.write(f"- `{value}`: {count} occurrences")
             
-            # Bar chart with conditional orientation
-            value_counts = df[col].value_counts().head(10)  # Top 10 only
-            
-            if len(value_counts) <= 5:
-                # Horizontal bar chart for 5 or fewer categories
-                fig_bar = px.bar(
-                    x=value_counts.values,
-                    y=value_counts.index,
-                    orientation='h',
-                    title=f"Top Categories - {col}",
-                    color_discrete_sequence=['#3498db']
-                )
-                fig_bar.update_layout(
-                    xaxis_title="Count",
-                    yaxis_title="Categories",
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    showlegend=False
-                )
-            else:
-                # Vertical bar chart for more than 5 categories
-                fig_bar = px.bar(
-                    x=value_counts.index,
-                    y=value_counts.values,
-                    title=f"Top Categories - {col}",
-                    color_discrete_sequence=['#3498db']
-                )
-                fig_bar.update_layout(
-                    xaxis_title="Categories",
-                    yaxis_title="Count",
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    showlegend=False
-                )
-                fig_bar.update_xaxes(tickangle=45)
+            # Bar chart with conditional orientation (top 10 only)
+            fig_bar = build_category_bar_chart(results['fingerprint'], col, profile)
             
             st.plotly_chart(fig_bar, use_container_width=True)
             
@@ -642,78 +778,45 @@ def display_categorical_tab(results):
 
 def display_boolean_tab(results):
     """Display boolean columns analysis"""
-    df = results['dataframe']
-    boolean_cols = df.select_dtypes(include='bool').columns
+    profile = results['profile']
+    boolean_cols = profile.column_types['True/False']
     
     for col in boolean_cols:
         with st.container():
             st.markdown(f'<div class="analysis-card">', unsafe_allow_html=True)
             st.markdown(f"#### ✅ {col}")
             
-            value_counts = df[col].value_counts()
-            percentages = df[col].value_counts(normalize=True) * 100
-            
             col1, col2 = st.columns([1, 2])
             
             with col1:
                 # Metrics
-                for val, count in value_counts.items():
-                    percentage = percentages[val]
-                    st.metric(
-                        f"{val} Count", 
-                        f"{count} ({percentage:.1f}%)"
-                    )
+                for label, value in results['descriptive_stats'].metric_cards(col).items():
+                    st.metric(label, value)
             
             with col2:
                 # Donut chart
-                colors = {'True': 'rgba(46, 204, 113, 0.8)', 'False': 'rgba(231, 76, 60, 0.8)'}
-                color_sequence = [colors.get(str(label), '#3498db') for label in value_counts.index]
-
-                fig_donut = px.pie(
-                    values=value_counts.values,
-                    names=[str(label) for label in value_counts.index],
-                    title=f"Distribution - {col}",
-                    hole=0.5,
-                    color_discrete_sequence=color_sequence
-                )
-                fig_donut.update_traces(
-                    textposition='inside', 
-                    textinfo='percent+label',
-                    marker=dict(line=dict(color="#000000", width=2)),
-                    textfont=dict(color='white', size=14)
-                )
-                fig_donut.update_layout(
-                    height=400,
-                    showlegend=True,
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=-0.2,
-                        xanchor="center",
-                        x=0.5
-                    )
-                )
+                fig_donut = build_boolean_donut_chart(results['fingerprint'], col, profile)
                 st.plotly_chart(fig_donut, use_container_width=True)
 
 def display_datetime_tab(results):
     """Display datetime columns analysis"""
     df = results['dataframe']
-    datetime_cols = df.select_dtypes(include=['datetime64']).columns
+    profile = results['profile']
+    datetime_cols = [col for col in profile.column_types['Date/Time']
+                     if pd.api.types.is_datetime64_any_dtype(df[col])]
     
     for col in datetime_cols:
         with st.container():
             st.markdown(f'<div class="analysis-card">', unsafe_allow_html=True)
             st.markdown(f"#### 📅 {col}")
             
-            # Statistics
-            min_date = df[col].min()
-            max_date = df[col].max()
+            # Statistics (extremes come from the distinct dates already counted)
+            date_counts = profile.value_counts(col)
+            min_date = date_counts.index.min()
+            max_date = date_counts.index.max()
             date_range = max_date - min_date
             
             # Most frequent date
-            date_counts = df[col].value_counts()
             most_frequent_date = date_counts.index[0] if len(date_counts) > 0 else None
             most_frequent_count = date_counts.iloc[0] if len(date_counts) > 0 else 0
             
@@ -729,20 +832,7 @@ def display_datetime_tab(results):
                     st.metric("Frequency", most_frequent_count)
             
             # Timeline chart
-            timeline_data = df[col].value_counts().sort_index()
-            fig_timeline = px.line(
-                x=timeline_data.index,
-                y=timeline_data.values,
-                title=f"Timeline - {col}",
-                labels={'x': 'Date', 'y': 'Record Count'}
-            )
-            fig_timeline.update_traces(line=dict(color='#3498db', width=3))
-            fig_timeline.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white'),
-                showlegend=False
-            )
+            fig_timeline = build_timeline_chart(results['fingerprint'], col, profile)
             st.plotly_chart(fig_timeline, use_container_width=True)
             
             st.markdown('</div>', unsafe_allow_html=True)
@@ -752,10 +842,14 @@ def display_llm_insights(results):
     st.markdown('<div class="section-header">🤖 Insights Generated</div>', unsafe_allow_html=True)
     
     # Download button
-    if 'ai_analysis' in results and 'statistics' in results:
+    if results.get('ai_analysis') and 'statistics' in results:
         combined_report = f"# Data Analysis Report\n\n## Descriptive Statistics\n\n{results['statistics']}\n\n## AI Analysis\n\n{results['ai_analysis']}"
         st.markdown(get_download_link(combined_report, "complete_analysis_report.txt", "📥 Download Complete Report (TXT)"), unsafe_allow_html=True)
     
+    if results.get('cancelled'):
+        st.warning(f"⏹️ {results['cancelled']}. The statistics and charts are available; run the analysis again for the AI insights.")
+        return
+    
     if 'ai_analysis' not in results or not results['ai_analysis']:
         st.error("No AI analysis available. Please run the analysis first.")
         return
@@ -821,6 +915,181 @@ def display_llm_insights(results):
         </div>
         """, unsafe_allow_html=True)
         st.markdown(f'<div class="card">{analysis_text}</div>', unsafe_allow_html=True)
+    
+    display_llm_usage(results)
+
+def format_optional(value, template):
+    """Format a value that may be missing (None or NaN)"""
+    return "-" if value is None or pd.isna(value) else template.format(value)
+
+def display_llm_usage(results):
+    """Display tokens, latency and cost of this analysis' LLM call and of the whole session"""
+    st.markdown("### 📟 LLM Usage")
+    
+    call = results.get('llm_call')
+    if results.get('reused'):
+        st.info("♻️ This analysis was reused from another session on the same data: no LLM call was made for it here")
+    elif call:
+        st.markdown(f"**This analysis** — model `{call['model'] or call['model_requested']}` ({call['role']} request), status {call['status']}")
+        cards = [
+            (format_optional(call['prompt_tokens'], "{:,}"), "Prompt Tokens", "📝", "#3498db"),
+            (format_optional(call['completion_tokens'], "{:,}"), "Completion Tokens", "💬", "#9b59b6"),
+            (format_optional(call['ttfb'], "{:.2f}s"), "Time to First Byte", "📡", "#f39c12"),
+            (format_optional(call['latency'], "{:.2f}s"), "Total Latency", "⏱️", "#e74c3c"),
+            (format_optional(call['cost'], "{:.5f}"), "Cost (credits)", "💰", "#2ecc71")
+        ]
+        for column, card in zip(st.columns(len(cards)), cards):
+            with column:
+                st.markdown(create_stat_card(*card), unsafe_allow_html=True)
+    
+    usage = st.session_state.analyzer.llm_usage
+    if not usage.calls:
+        return
+    
+    totals = usage.totals()
+    st.markdown(
+        f"**This session** — {totals['calls']} calls ({totals['failed_calls']} failed, {totals['cancelled_calls']} cancelled), "
+        f"{totals['prompt_tokens']:,} prompt + {totals['completion_tokens']:,} completion tokens, "
+        f"mean latency {format_optional(totals['mean_latency'], '{:.2f}s')}, "
+        f"mean time to first byte {format_optional(totals['mean_ttfb'], '{:.2f}s')}, "
+        f"{format_optional(totals['completion_tokens_per_second'], '{:.1f}')} completion tokens/s, "
+        f"cost {format_optional(totals['cost'], '{:.5f}')}"
+    )
+    
+    by_dataset = usage.by_dataset()
+    by_dataset['dataset'] = by_dataset['dataset'].fillna('-').str[:12]
+    st.dataframe(
+        by_dataset.rename(columns={
+            'dataset': 'Dataset', 'calls': 'Calls', 'failed_calls': 'Failed', 'cancelled_calls': 'Cancelled',
+            'prompt_tokens': 'Prompt Tokens', 'completion_tokens': 'Completion Tokens', 'cost': 'Cost', 'latency': 'Total Latency (s)',
+            'mean_latency': 'Mean Latency (s)', 'mean_ttfb': 'Mean TTFB (s)', 'completion_tokens_per_second': 'Completion Tokens/s'
+        }).round(4),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    with st.expander("📜 All LLM calls", expanded=False):
+        calls = usage.to_frame()
+        calls['time'] = pd.to_datetime(calls['time'], unit='s')
+        calls['dataset'] = calls['dataset'].fillna('-').str[:12]
+        st.dataframe(calls.round({'cost': 6, 'ttfb': 4, 'latency': 4}), use_container_width=True, hide_index=True)
+
+def display_performance_panel(results):
+    """Display the stage timings of the last load and analysis, with any captured profiles"""
+    st.markdown('<div class="section-header">⏱️ Performance</div>', unsafe_allow_html=True)
+    
+    timer = results['timings']
+    if timer is None:
+        st.info("♻️ This analysis was reused from another session on the same data: timings appear when this session "
+                "runs its own analysis")
+        return
+    stages = timer.to_frame()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown(create_stat_card(f"{timer.total:.2f}s", "Total Time", "⏱️", "#2ecc71"), unsafe_allow_html=True)
+    with col2:
+        st.markdown(create_stat_card(f"{len(stages)}", "Stages", "🧩", "#3498db"), unsafe_allow_html=True)
+    with col3:
+        slowest = stages[stages['depth'] == 0].nlargest(1, 'seconds')
+        slowest_name = slowest['stage'].iloc[0] if not slowest.empty else "-"
+        st.markdown(create_stat_card(slowest_name, "Slowest Stage", "🐢", "#e74c3c"), unsafe_allow_html=True)
+    
+    # Top-level stages as bars; nested stages are listed in the table below
+    top_level = stages[stages['depth'] == 0]
+    fig = px.bar(top_level, x='seconds', y='stage', orientation='h', title="Time per Stage",
+                 labels={'seconds': 'Seconds', 'stage': 'Stage'}, color_discrete_sequence=['#667eea'])
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        yaxis=dict(autorange='reversed'),
+        height=max(250, 40 * len(top_level))
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    table = stages.assign(stage=['\u2003' * depth + name.rsplit('.', 1)[-1] for name, depth in zip(stages['stage'], stages['depth'])])
+    st.dataframe(
+        table[['stage', 'calls', 'seconds', 'share']].rename(columns={
+            'stage': 'Stage', 'calls': 'Calls', 'seconds': 'Seconds', 'share': 'Share of Total (%)'
+        }).round({'Seconds': 4, 'Share of Total (%)': 1}),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.markdown(get_download_link(json.dumps(timer.to_dict(), indent=2), "analysis_timings.json", "📥 Download Timings (JSON)"),
+                unsafe_allow_html=True)
+    
+    if timer.profiles:
+        st.markdown(f"### 🔬 Profiles ({timer.profiler})")
+        for stage, report in timer.profiles.items():
+            with st.expander(f"🔬 {stage}", expanded=False):
+                st.code(report, language=None)
+    else:
+        st.info("Select a profiler in the sidebar to capture profiles of the next load and analysis.")
+
+def wait_for_analysis(job_id):
+    """Poll an analysis job until it ends, then keep its (possibly partial) results"""
+    # Every rerun (a click on Cancel included) interrupts this loop at its next update and polls again
+    progress = st.empty()
+    while True:
+        status = JOBS.status(job_id)
+        if status is None or status['state'] in ('done', 'failed', 'cancelled'):
+            break
+        if status['cancelling']:
+            message = "⏹️ Cancelling analysis..."
+        elif status['state'] == 'queued':
+            message = f"⏳ Waiting for a worker... {status['elapsed']:.0f}s"
+        else:
+            message = f"🤖 Analyzing dataset with AI ({status['stage']})... {status['elapsed']:.0f}s"
+            if status['seconds']:
+                message += f" ({max(status['seconds'] - status['elapsed'], 0):.0f}s left)"
+        progress.progress(status['progress'], text=message)
+        time.sleep(ANALYSIS_POLL_SECONDS)
+    progress.empty()
+    st.session_state.analysis_job = None
+    
+    if status is None:
+        st.error("❌ The analysis job is no longer available. Please run it again.")
+        return
+    try:
+        results = JOBS.result(job_id)
+    except Exception as e:
+        st.error(f"❌ Error during analysis: {str(e)}")
+        return
+    if results:
+        st.session_state.analysis_results = results
+        st.session_state.workbook_results = None
+        st.rerun()
+    elif status['cancelling'] or status['stopped']:
+        st.warning("⏹️ Analysis stopped before the statistics were ready.")
+    else:
+        st.error("❌ Analysis failed. Please check your data and try again.")
+
+def display_workbook_analysis(workbook_results):
+    """Display per-sheet summary and combined report for a whole workbook"""
+    st.markdown('<div class="section-header">📚 Workbook Analysis</div>', unsafe_allow_html=True)
+    
+    st.markdown(get_download_link(workbook_results['report'], "workbook_analysis_report.txt", "📥 Download Workbook Report (TXT)"), unsafe_allow_html=True)
+    
+    summary = workbook_results['summary']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.markdown(create_stat_card(f"{len(summary)}", "Sheets", "📑", "#3498db"), unsafe_allow_html=True)
+    with col2:
+        st.markdown(create_stat_card(f"{int(summary['Rows'].sum()):,}", "Total Rows", "📈", "#2ecc71"), unsafe_allow_html=True)
+    with col3:
+        st.markdown(create_stat_card(f"{int(summary['Columns'].sum()):,}", "Total Columns", "📊", "#9b59b6"), unsafe_allow_html=True)
+    with col4:
+        missing = int(summary['Missing Values'].sum()) if 'Missing Values' in summary else 0
+        st.markdown(create_stat_card(f"{missing:,}", "Missing Values", "⚠️", "#f39c12"), unsafe_allow_html=True)
+    
+    st.markdown("### 📋 Sheets Overview")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+    
+    st.markdown("### 📄 Sheet Reports")
+    for sheet_name, sheet_result in workbook_results['sheets'].items():
+        with st.expander(f"📄 {sheet_name}", expanded=False):
+            st.markdown(sheet_result['statistics'])
 
 def main():
     """Main application function"""
@@ -829,6 +1098,8 @@ def main():
         st.session_state.analyzer = None
     if 'analysis_results' not in st.session_state:
         st.session_state.analysis_results = None
+    if 'workbook_results' not in st.session_state:
+        st.session_state.workbook_results = None
     if 'file_uploaded' not in st.session_state:
         st.session_state.file_uploaded = False
     if 'current_file' not in st.session_state:
@@ -837,6 +1108,12 @@ def main():
         st.session_state.selected_sheet = None
     if 'excel_sheets' not in st.session_state:
         st.session_state.excel_sheets = []
+    if 'columnar_columns' not in st.session_state:
+        st.session_state.columnar_columns = []
+    if 'selected_columns' not in st.session_state:
+        st.session_state.selected_columns = None
+    if 'analysis_job' not in st.session_state:
+        st.session_state.analysis_job = None
     
     # Initialize analyzer
     if not initialize_analyzer():
@@ -846,11 +1123,71 @@ def main():
     with st.sidebar:
         st.markdown("## ⚙️ Configuration")
         
+        # Arrow-backed storage for text and timestamp columns
+        st.session_state.analyzer.use_arrow = st.checkbox(
+            "🏹 Arrow-backed storage",
+            value=st.session_state.analyzer.use_arrow,
+            disabled=not PYARROW_AVAILABLE,
+            help="Store text and date columns in Arrow dtypes to reduce memory. Applies to files loaded after enabling (requires pyarrow)."
+        ) and PYARROW_AVAILABLE
+        
+        # Stage timings panel, optionally with a profile of each stage
+        show_performance = st.checkbox(
+            "⏱️ Performance panel",
+            key="show_performance",
+            help="Show the time spent in each load and analysis stage"
+        )
+        if show_performance:
+            profilers = [None] + [name for name in PROFILERS if name != 'pyinstrument' or PYINSTRUMENT_AVAILABLE]
+            st.session_state.analyzer.profiler = st.selectbox(
+                "🔬 Profiler",
+                profilers,
+                index=profilers.index(st.session_state.analyzer.profiler) if st.session_state.analyzer.profiler in profilers else 0,
+                format_func=lambda name: "Off" if name is None else name,
+                help="Capture a profile of the slow stages of the next load and analysis"
+            )
+        else:
+            st.session_state.analyzer.profiler = None
+        
+        # Time limit of the next analysis; a running one can also be cancelled
+        st.number_input(
+            "⏳ Time limit (seconds)",
+            min_value=0,
+            value=ANALYSIS_DEADLINE_SECONDS,
+            step=30,
+            key="analysis_deadline",
+            help="Stop the analysis after this many seconds, keeping the statistics computed so far (0 = no limit)"
+        )
+        
+        # Sessions analyzing the same file with the same models share the AI results
+        st.checkbox(
+            "♻️ Reuse shared results",
+            value=True,
+            key="reuse_shared_results",
+            help="Show the analysis another session already ran on identical data instead of calling the AI again"
+        )
+        
+        # Streamed JSON formats keep the first rows or a uniform sample; memory stays bounded by the chunk size
+        st.number_input(
+            "📏 Max rows (JSON / JSON Lines)",
+            min_value=0,
+            value=0,
+            step=10_000,
+            key="stream_max_rows",
+            help="Keep at most this many rows of JSON and JSON Lines uploads, profiling the whole file as it streams (0 = all rows)"
+        )
+        st.checkbox(
+            "🎲 Random sample",
+            key="stream_random_sample",
+            disabled=not st.session_state.stream_max_rows,
+            help="Keep a uniform random sample of the whole file instead of its first rows"
+        )
+        
         # File upload
         uploaded_file = st.file_uploader(
             "📁 Upload Data File",
-            type=['csv', 'xlsx', 'json'],
-            help="Upload CSV, Excel (XLSX), or JSON files"
+            type=['csv', 'xlsx', 'json', 'jsonl', 'ndjson', 'parquet', 'feather', 'arrow', 'gz', 'bz2', 'xz', 'zst'],
+            help="Upload CSV, Excel (XLSX), JSON, JSON Lines, Parquet or Feather/Arrow IPC files, optionally compressed (.gz, .bz2, .xz, .zst)"
         )
         
         # Handle file upload
@@ -862,26 +1199,37 @@ def main():
                 st.session_state.file_uploaded = True
                 st.session_state.current_file = uploaded_file
                 st.session_state.analysis_results = None
+                st.session_state.workbook_results = None
                 st.session_state.selected_sheet = None
                 st.session_state.excel_sheets = []
+                st.session_state.columnar_columns = []
+                st.session_state.selected_columns = None
                 
                 # Process the uploaded file
-                with st.spinner("🔄 Processing uploaded file..."):
+                with st.spinner("🔄 Processing uploaded file..."), st.session_state.analyzer.start_load_timer().span('load', profile=True):
                     try:
-                        file_extension = uploaded_file.name.split('.')[-1].lower()
+                        file_extension = get_file_extension(uploaded_file.name)
+                        # Compressed uploads are decompressed as a stream by the readers
+                        compression = st.session_state.analyzer.detect_compression(uploaded_file)
+                        # Identical bytes uploaded by another session are not parsed again
+                        content_key = get_content_key(uploaded_file)
+                        df_before = st.session_state.analyzer.df
+                        
+                        if st.session_state.analyzer.attach_shared_dataset(content_key):
+                            st.success("♻️ Dataset already loaded by another session - reusing it!")
                         
-                        if file_extension == 'csv':
-                            df = pd.read_csv(uploaded_file)
+                        elif file_extension == 'csv':
+                            df = pd.read_csv(uploaded_file, compression=compression)
                             st.session_state.analyzer.load_data(df)
                             st.success("✅ CSV file loaded successfully!")
                             
                         elif file_extension == 'xlsx':
-                            excel_file = pd.ExcelFile(uploaded_file)
-                            sheet_names = excel_file.sheet_names
+                            # Parse the workbook once; sheets are read from this handle and cached
+                            sheet_names = st.session_state.analyzer.open_excel_workbook(uploaded_file)
                             st.session_state.excel_sheets = sheet_names
                             
                             if len(sheet_names) == 1:
-                                df = pd.read_excel(uploaded_file, sheet_name=sheet_names[0])
+                                df = st.session_state.analyzer.read_excel_sheet(sheet_names[0])
                                 st.session_state.analyzer.load_data(df)
                                 st.success(f"✅ Excel file loaded successfully! (Sheet: {sheet_names[0]})")
                             else:
@@ -889,36 +1237,115 @@ def main():
                                 st.info(f"📑 Excel file has {len(sheet_names)} sheets. Please select one below.")
                             
                         elif file_extension == 'json':
-                            df = pd.read_json(uploaded_file)
-                            st.session_state.analyzer.load_data(df)
-                            st.success("✅ JSON file loaded successfully!")
+                            if st.session_state.analyzer.is_json_array(uploaded_file):
+                                # Records are flattened as they stream; wide documents pick their fields first
+                                fields = st.session_state.analyzer.get_json_array_fields(uploaded_file)
+                                st.session_state.columnar_columns = fields
+                                
+                                if len(fields) <= MAX_COLUMNS_WITHOUT_SELECTION:
+                                    st.session_state.analyzer.load_json_array(uploaded_file, **get_row_limit())
+                                    st.session_state.selected_columns = fields
+                                    st.success("✅ JSON file loaded successfully!")
+                                else:
+                                    st.info(f"🧩 JSON records have {len(fields)} fields. Please select the fields to load below.")
+                            else:
+                                df = pd.read_json(uploaded_file, compression=compression)
+                                st.session_state.analyzer.load_data(df)
+                                st.success("✅ JSON file loaded successfully!")
+                        
+                        elif file_extension in ['jsonl', 'ndjson']:
+                            # Parsed in fixed-size chunks, so memory follows the chunk size
+                            st.session_state.analyzer.load_json_lines(uploaded_file, **get_row_limit())
+                            st.success("✅ JSON Lines file loaded successfully!")
+                        
+                        elif file_extension in COLUMNAR_EXTENSIONS:
+                            # Read only the schema first; data is read per selected column
+                            file_format = COLUMNAR_EXTENSIONS[file_extension]
+                            columns = st.session_state.analyzer.get_columnar_schema(uploaded_file, file_format)
+                            st.session_state.columnar_columns = columns
+                            
+                            if len(columns) <= MAX_COLUMNS_WITHOUT_SELECTION:
+                                df = st.session_state.analyzer.read_columnar_file(uploaded_file, file_format)
+                                st.session_state.analyzer.load_data(df)
+                                st.session_state.selected_columns = columns
+                                st.success(f"✅ {file_format.capitalize()} file loaded successfully!")
+                            else:
+                                st.info(f"🗂️ File has {len(columns)} columns. Please select the columns to load below.")
+                        
+                        share_loaded_dataset(content_key, df_before)
                         
                     except Exception as e:
                         st.error(f"❌ Error loading file: {str(e)}")
                         st.session_state.file_uploaded = False
                         st.session_state.current_file = None
             
-            # Sheet selection for Excel files - CORREÇÃO: Condicional simplificada
-            if (uploaded_file.name.endswith('.xlsx') and 
-                st.session_state.selected_sheet is None and
+            # Sheet selection for Excel files - stays visible so cached sheets can be switched
+            if (get_file_extension(uploaded_file.name) == 'xlsx' and 
                 len(st.session_state.excel_sheets) > 1):
                 
                 try:
+                    sheets = st.session_state.excel_sheets
                     selected_sheet = st.selectbox(
                         "📑 Select Worksheet",
-                        st.session_state.excel_sheets,
+                        sheets,
+                        index=sheets.index(st.session_state.selected_sheet) if st.session_state.selected_sheet in sheets else 0,
                         help="Choose which worksheet to analyze"
                     )
                     
-                    if st.button("Load Selected Sheet", type="secondary"):
-                        with st.spinner(f"🔄 Loading sheet: {selected_sheet}..."):
-                            df = pd.read_excel(uploaded_file, sheet_name=selected_sheet)
-                            st.session_state.analyzer.load_data(df)
+                    if st.button("Load Selected Sheet", type="secondary", disabled=selected_sheet == st.session_state.selected_sheet):
+                        with st.spinner(f"🔄 Loading sheet: {selected_sheet}..."), st.session_state.analyzer.start_load_timer().span('load', profile=True):
+                            sheet_key = get_content_key(uploaded_file, 'sheet', selected_sheet)
+                            df_before = st.session_state.analyzer.df
+                            if not st.session_state.analyzer.attach_shared_dataset(sheet_key):
+                                df = st.session_state.analyzer.read_excel_sheet(selected_sheet)
+                                st.session_state.analyzer.load_data(df)
+                                share_loaded_dataset(sheet_key, df_before)
                             st.session_state.selected_sheet = selected_sheet
+                            st.session_state.analysis_results = None
                             st.success(f"✅ Sheet '{selected_sheet}' loaded successfully!")
                             st.rerun()
+                    
+                    # Whole-workbook mode: profile every sheet in parallel
+                    if st.button("📚 Analyze All Sheets", type="secondary", use_container_width=True):
+                        with st.spinner(f"📚 Profiling {len(sheets)} sheets..."):
+                            st.session_state.workbook_results = st.session_state.analyzer.analyze_all_sheets()
+                            st.session_state.analysis_results = None
+                            st.rerun()
                 except Exception as e:
                     st.error(f"❌ Error reading Excel file: {str(e)}")
+            
+            # Column selection for wide Parquet/Feather files and nested JSON arrays
+            file_extension = get_file_extension(uploaded_file.name)
+            if ((file_extension in COLUMNAR_EXTENSIONS or file_extension == 'json') and
+                st.session_state.selected_columns is None and
+                len(st.session_state.columnar_columns) > MAX_COLUMNS_WITHOUT_SELECTION):
+                
+                try:
+                    selected_columns = st.multiselect(
+                        "🗂️ Select Columns",
+                        st.session_state.columnar_columns,
+                        default=st.session_state.columnar_columns[:MAX_COLUMNS_WITHOUT_SELECTION],
+                        help="Only the selected columns are read from the file"
+                    )
+                    
+                    if st.button("Load Selected Columns", type="secondary", disabled=not selected_columns):
+                        with st.spinner(f"🔄 Loading {len(selected_columns)} columns..."), st.session_state.analyzer.start_load_timer().span('load', profile=True):
+                            columns_key = get_content_key(uploaded_file, 'columns', tuple(selected_columns))
+                            df_before = st.session_state.analyzer.df
+                            if not st.session_state.analyzer.attach_shared_dataset(columns_key):
+                                if file_extension == 'json':
+                                    st.session_state.analyzer.load_json_array(uploaded_file, fields=selected_columns, **get_row_limit())
+                                else:
+                                    df = st.session_state.analyzer.read_columnar_file(
+                                        uploaded_file, COLUMNAR_EXTENSIONS[file_extension], columns=selected_columns
+                                    )
+                                    st.session_state.analyzer.load_data(df)
+                                share_loaded_dataset(columns_key, df_before)
+                            st.session_state.selected_columns = selected_columns
+                            st.success(f"✅ {len(selected_columns)} columns loaded successfully!")
+                            st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Error reading file: {str(e)}")
         
         # Analysis button
         st.markdown("---")
@@ -926,46 +1353,63 @@ def main():
             "🚀 Analyze Dataset",
             type="primary",
             use_container_width=True,
-            disabled=not st.session_state.file_uploaded or st.session_state.analyzer.df is None
+            disabled=(not st.session_state.file_uploaded or st.session_state.analyzer.df is None
+                      or st.session_state.analysis_job is not None)
         )
         
         if analyze_clicked:
-            if st.session_state.analyzer.df is not None:
-                with st.spinner("🤖 Analyzing dataset with AI..."):
-                    try:
-                        results = st.session_state.analyzer.analyze_dataset()
-                        if results:
-                            st.session_state.analysis_results = results
-                            st.success("✅ Analysis completed successfully!")
-                            st.rerun()
-                        else:
-                            st.error("❌ Analysis failed. Please check your data and try again.")
-                    except Exception as e:
-                        st.error(f"❌ Error during analysis: {str(e)}")
+            shared_results = st.session_state.analyzer.get_shared_results() if st.session_state.reuse_shared_results else None
+            if shared_results is not None:
+                st.session_state.analysis_results = shared_results
+                st.session_state.workbook_results = None
+                st.success("♻️ Showing the analysis another session ran on this dataset")
+            elif st.session_state.analyzer.df is not None:
+                # Run in the worker pool: this session stays responsive and other sessions keep their share of the CPU
+                st.session_state.analysis_job = JOBS.submit(st.session_state.analyzer, st.session_state.analysis_deadline or None)
             else:
                 st.error("❌ Please upload and load a data file first.")
         
+        if st.session_state.analysis_job is not None:
+            st.button("⏹️ Cancel Analysis", on_click=JOBS.cancel, args=(st.session_state.analysis_job,), use_container_width=True)
+            wait_for_analysis(st.session_state.analysis_job)
+        
         # Clear analysis button
-        if st.session_state.analysis_results:
+        if st.session_state.analysis_results or st.session_state.workbook_results:
             if st.button("🗑️ Clear Analysis", type="secondary", use_container_width=True):
                 st.session_state.analysis_results = None
+                st.session_state.workbook_results = None
                 st.session_state.file_uploaded = False
                 st.session_state.current_file = None
                 st.session_state.selected_sheet = None
                 st.session_state.excel_sheets = []
+                st.session_state.columnar_columns = []
+                st.session_state.selected_columns = None
+                st.session_state.analyzer.close_excel_workbook()
+                st.session_state.analyzer.release_shared_dataset()
                 st.session_state.analyzer.df = None
                 st.rerun()
     
     # Main content area - CORREÇÃO: Lógica de exibição corrigida
     if st.session_state.analysis_results is not None:
         # Show analysis results
-        tab1, tab2 = st.tabs(["📊 Exploratory Data Analysis", "🤖 AI Insights"])
+        tab_names = ["📊 Exploratory Data Analysis", "🤖 AI Insights"]
+        if st.session_state.show_performance:
+            tab_names.append("⏱️ Performance")
+        tabs = st.tabs(tab_names)
         
-        with tab1:
+        with tabs[0]:
             display_exploratory_analysis(st.session_state.analysis_results)
         
-        with tab2:
+        with tabs[1]:
             display_llm_insights(st.session_state.analysis_results)
+        
+        if st.session_state.show_performance:
+            with tabs[2]:
+                display_performance_panel(st.session_state.analysis_results)
+    
+    elif st.session_state.workbook_results is not None:
+        # Show whole-workbook profiling results
+        display_workbook_analysis(st.session_state.workbook_results)
     
     elif st.session_state.file_uploaded and st.session_state.current_file is not None:
         # Show welcome screen with file loaded (but no analysis yet)
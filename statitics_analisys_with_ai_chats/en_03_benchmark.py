@@ -0,0 +1,331 @@
+# en_03_benchmark.py
+#
+# Benchmark of the ChatBotAnalyzer pipeline on synthetic datasets, stage by stage, with the LLM call replaced
+# by a local stub. Every run is appended to a JSON Lines file so commits can be compared:
+#
+#   python en_03_benchmark.py                              # every dataset, scale 1
+#   python en_03_benchmark.py --datasets tall wide --scale 0.2 --arrow
+#   python en_03_benchmark.py --compare a1b2c3d            # compare the latest run with another commit
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Callable
+
+import numpy as np
+import pandas as pd
+
+from en_01_analyzer import ChatBotAnalyzer, LLM_CALL_FIELDS
+
+# resource only exists on Unix; without it the process peak memory is not recorded
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+# Results accumulated across commits, one record per dataset and run
+RESULTS_FILE = os.path.join(BENCHMARK_DIR, "en_benchmark_results.jsonl")
+# Fixed answer of the LLM stub
+LLM_STUB_RESPONSE = "## Insights\n\n- Answer generated locally by the benchmark.\n"
+
+
+def _random_text(rng: np.random.Generator, n: int, words: int) -> np.ndarray:
+    """Sentences of words drawn from a fixed vocabulary"""
+    vocabulary = np.array(["data", "customer", "order", "delivery", "product", "price", "delay", "quality",
+                           "support", "payment", "account", "refund", "discount", "stock", "service", "review"])
+    draws = vocabulary[rng.integers(0, len(vocabulary), size=(n, words))]
+    return np.array([" ".join(row) for row in draws], dtype=object)
+
+
+def make_tall(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Many rows and a few columns of every type"""
+    return pd.DataFrame({
+        'amount': rng.lognormal(3, 1, n),
+        'quantity': rng.integers(1, 50, n),
+        'discount': rng.normal(0.1, 0.05, n),
+        'rating': rng.integers(1, 6, n).astype(float),
+        'region': rng.choice(['North', 'Northeast', 'Midwest', 'Southeast', 'South'], n),
+        'channel': rng.choice(['store', 'web', 'app', 'phone'], n, p=[0.4, 0.3, 0.25, 0.05]),
+        'returning': rng.random(n) < 0.35,
+        'order_date': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 4 * 365 * 24 * 3600, n), unit='s')
+    })
+
+
+def make_wide(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Few rows and hundreds of columns (3 numerical for every categorical one)"""
+    columns = {}
+    for i in range(200):
+        if i % 4 == 3:
+            columns[f'cat_{i:03d}'] = rng.choice([f'c{k}' for k in range(8)], n)
+        else:
+            columns[f'num_{i:03d}'] = rng.normal(i, 1 + i % 7, n)
+    return pd.DataFrame(columns)
+
+
+def make_text(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Long free-text columns next to a few numerical ones"""
+    return pd.DataFrame({
+        'comment': _random_text(rng, n, 30),
+        'title': _random_text(rng, n, 6),
+        'score': rng.integers(1, 6, n),
+        'read_time': rng.exponential(40, n)
+    })
+
+
+def make_high_cardinality(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Near-unique identifiers and categories with tens of thousands of values"""
+    return pd.DataFrame({
+        'transaction_id': np.char.add('T', rng.permutation(n).astype(str)),
+        'customer_id': np.char.add('C', rng.integers(0, max(1, n // 4), n).astype(str)),
+        'product': np.char.add('P', rng.zipf(1.3, n).clip(max=50_000).astype(str)),
+        'amount': rng.gamma(2, 50, n),
+        'installments': rng.integers(1, 13, n)
+    })
+
+
+def make_datetimes(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Several date/time columns with different spans"""
+    start = pd.Timestamp('2015-01-01')
+    columns = {f'event_{i}': start + pd.to_timedelta(rng.integers(0, 10 * 365 * 24 * 3600 // (i + 1), n), unit='s')
+               for i in range(8)}
+    columns['duration'] = rng.exponential(3600, n)
+    columns['attempts'] = rng.integers(0, 5, n)
+    return pd.DataFrame(columns)
+
+
+def make_nulls(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Mixed columns with 20% to 70% missing values"""
+    df = make_tall(n, rng)
+    for i, col in enumerate(df.columns):
+        missing = rng.random(n) < 0.2 + 0.5 * i / len(df.columns)
+        df[col] = df[col].astype(object if df[col].dtype == bool else df[col].dtype).mask(missing)
+    return df
+
+
+# Name -> (generator, rows at scale 1)
+DATASETS = {
+    'tall': (make_tall, 300_000),
+    'wide': (make_wide, 5_000),
+    'text': (make_text, 100_000),
+    'high_cardinality': (make_high_cardinality, 200_000),
+    'datetimes': (make_datetimes, 100_000),
+    'nulls': (make_nulls, 200_000)
+}
+
+
+def current_commit() -> str:
+    """Current commit (with -dirty when there are uncommitted changes), or 'unknown' outside git"""
+    try:
+        output = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=BENCHMARK_DIR,
+                                capture_output=True, text=True, timeout=30)
+        return output.stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def make_analyzer(use_arrow: bool) -> ChatBotAnalyzer:
+    """Analyzer whose LLM requests are answered by a local stub, still going through the real request coordinator"""
+    analyzer = ChatBotAnalyzer(api_key='benchmark', use_arrow=use_arrow)
+
+    def stream_stub(model, prompt, role, dataset, first_byte, cancelled, *args):
+        first_byte.set()
+        call = dict.fromkeys(LLM_CALL_FIELDS)
+        call.update(time=time.time(), dataset=dataset, role=role, model_requested=model, model=model,
+                    prompt_chars=len(prompt), latency=0.0, outcome='completed')
+        analyzer.llm_usage.record(call)
+        return LLM_STUB_RESPONSE, call
+
+    analyzer._stream_completion = stream_stub
+    return analyzer
+
+
+def run_stages(path: str, measure: Callable[[str], Any], use_arrow: bool):
+    """Run every pipeline stage once on the file, measuring each one with measure(name)"""
+    analyzer = make_analyzer(use_arrow)
+    with measure('load'):
+        analyzer.load_and_preview_data(path)
+
+    # The dtype conversion the load applies with use_arrow, measured on its own over the file read raw
+    raw_df = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    with measure('type_correction'):
+        analyzer.to_arrow_dtypes(raw_df, verbose=False)
+    del raw_df
+
+    with measure('statistics'):
+        analyzer.get_descriptive_statistics().to_markdown()
+
+    with measure('visualizations'):
+        analyzer.generate_visualizations()
+
+    # Pearson is the only correlation method of the English analyzer
+    numerical_columns = analyzer.get_profile().column_types['Numerical']
+    with measure('correlation_pearson'):
+        analyzer.df[numerical_columns].corr()
+
+    with measure('prompt'):
+        analyzer.create_analysis_prompt(analyzer.get_descriptive_statistics().to_prompt())
+
+    # Cold end-to-end analysis on another analyzer, without the caches filled above
+    cold_analyzer = make_analyzer(use_arrow)
+    cold_analyzer.load_data(analyzer.df)
+    with measure('full_analysis'):
+        cold_analyzer.analyze_dataset()
+
+
+def benchmark_dataset(name: str, scale: float, repeats: int, track_memory: bool, use_arrow: bool,
+                      file_format: str, directory: str) -> Dict[str, Any]:
+    """Generate a dataset, write it in the given format and measure the stages (median of the repeats and peak memory)"""
+    generator, base_rows = DATASETS[name]
+    df = generator(max(10, int(base_rows * scale)), np.random.default_rng(42))
+    path = os.path.join(directory, f"{name}.{file_format}")
+    # CSV keeps no dtypes: datetimes and booleans with missing values come back as text
+    if file_format == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+    timings: Dict[str, List[float]] = {}
+    memory: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def measure_time(stage):
+        start = time.perf_counter()
+        yield
+        timings.setdefault(stage, []).append(time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def measure_peak(stage):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        yield
+        memory[stage] = (tracemalloc.get_traced_memory()[1] - current) / 2**20
+
+    # The analyzer logs every stage to the terminal
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeats):
+            run_stages(path, measure_time, use_arrow)
+
+        # Separate pass under tracemalloc, which slows allocations down
+        if track_memory:
+            tracemalloc.start()
+            try:
+                run_stages(path, measure_peak, use_arrow)
+            finally:
+                tracemalloc.stop()
+
+    return {
+        'dataset': name,
+        'rows': int(df.shape[0]),
+        'columns': int(df.shape[1]),
+        'format': file_format,
+        'file_size_mb': round(os.path.getsize(path) / 2**20, 2),
+        'stages': {
+            stage: {'seconds': round(statistics.median(values), 4),
+                    'peak_memory_mb': round(memory[stage], 2) if stage in memory else None}
+            for stage, values in timings.items()
+        }
+    }
+
+
+def load_results(results_file: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(results_file):
+        return []
+    with open(results_file, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(records: List[Dict[str, Any]], baseline: str = None):
+    """Compare the latest run with the one of another commit (by default the previous commit in the file)"""
+    if not records:
+        print("No saved results to compare.")
+        return
+
+    current = records[-1]['commit']
+    commits = list(dict.fromkeys(record['commit'] for record in records))
+    if baseline is None:
+        previous = [commit for commit in commits if commit != current]
+        if not previous:
+            print(f"Only results for commit {current} are saved.")
+            return
+        baseline = previous[-1]
+    else:
+        baseline = next((commit for commit in reversed(commits) if commit.startswith(baseline)), baseline)
+
+    # The latest record of each (commit, dataset, scale, format, arrow) wins
+    latest = {(record['commit'], record['dataset'], record['scale'], record['format'], record['use_arrow']): record
+              for record in records}
+    print(f"\nComparison: {baseline} -> {current} (change in median time)")
+    for (commit, dataset, scale, file_format, use_arrow), record in latest.items():
+        if commit != current or (baseline, dataset, scale, file_format, use_arrow) not in latest:
+            continue
+        base = latest[(baseline, dataset, scale, file_format, use_arrow)]['stages']
+        print(f"\n  {dataset} (scale {scale}, {file_format}{', arrow' if use_arrow else ''})")
+        for stage, result in record['stages'].items():
+            if stage not in base:
+                continue
+            before, after = base[stage]['seconds'], result['seconds']
+            change = f"{(after - before) / before * 100:+.1f}%" if before > 0 else "n/a"
+            print(f"    {stage:<20} {before:>9.3f}s {after:>9.3f}s {change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ChatBotAnalyzer pipeline on synthetic datasets")
+    parser.add_argument('--datasets', nargs='+', choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplies the row count of every dataset")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per stage; the median is kept")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet', help="Format of the loaded file")
+    parser.add_argument('--arrow', action='store_true', help="Load with Arrow-backed dtypes (use_arrow=True)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    parser.add_argument('--output', default=RESULTS_FILE, help="JSON Lines file the results are appended to")
+    parser.add_argument('--compare', nargs='?', const='', default=None, metavar='COMMIT',
+                        help="Only compare saved results (with the given commit or the previous one)")
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        compare(load_results(args.output), args.compare or None)
+        return
+
+    environment = {
+        'commit': current_commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'scale': args.scale,
+        'repeats': args.repeats,
+        'use_arrow': args.arrow
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.datasets:
+            print(f"⏱️ {name}...", flush=True)
+            record = {**environment, **benchmark_dataset(name, args.scale, args.repeats, not args.no_memory,
+                                                         args.arrow, args.format, directory)}
+            if RESOURCE_AVAILABLE:
+                # ru_maxrss is in KB on Linux: the process peak so far, not just this dataset's
+                record['process_peak_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+            print(f"   {record['rows']:,} rows × {record['columns']} columns, {record['file_size_mb']} MB as {args.format}")
+            for stage, result in record['stages'].items():
+                peak = f"{result['peak_memory_mb']:>9.1f} MB" if result['peak_memory_mb'] is not None else ""
+                print(f"   {stage:<20} {result['seconds']:>9.3f}s {peak}")
+
+            with open(args.output, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    print(f"\n💾 Results appended to {args.output}")
+    compare(load_results(args.output))
+
+
+if __name__ == "__main__":
+    main()
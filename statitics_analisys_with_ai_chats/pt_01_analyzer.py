@@ -4,13 +4,36 @@ import requests
 import json
 import os
 import time
+import cProfile
+import pstats
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
-from typing import Dict, Any, Optional, List, Tuple
+import copy
+import codecs
+import hashlib
+import contextlib
+import gzip
+import bz2
+import lzma
+import io
+import re
+import bisect
+import pickle
+import tempfile
+import queue
+import socket
+import threading
+import uuid
+import weakref
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import OrderedDict
+from functools import cached_property, wraps
+from typing import Dict, Any, Optional, List, Tuple, Callable, Union
 from scipy.stats import chi2_contingency, spearmanr, kendalltau, pearsonr
-import scipy.stats as stats
 
 try:
     import streamlit as st
@@ -18,8 +41,1242 @@ try:
 except ImportError:
     STREAMLIT_DISPONIVEL = False
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
+
+# zstandard é opcional: só é necessário para arquivos .zst
+try:
+    import zstandard
+    ZSTANDARD_DISPONIVEL = True
+except ImportError:
+    ZSTANDARD_DISPONIVEL = False
+
+# pyinstrument é opcional: sem ele os perfis das etapas usam o cProfile
+try:
+    from pyinstrument import Profiler as PerfiladorPyinstrument
+    PYINSTRUMENT_DISPONIVEL = True
+except ImportError:
+    PYINSTRUMENT_DISPONIVEL = False
+
+# Arquivos comprimidos são reconhecidos pela última extensão ou pela assinatura (magic bytes)
+EXTENSOES_COMPRESSAO = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd'}
+ASSINATURAS_COMPRESSAO = {b'\x1f\x8b': 'gzip', b'BZh': 'bz2', b'\xfd7zXZ\x00': 'xz', b'\x28\xb5\x2f\xfd': 'zstd'}
+
+# Box plots enviam no máximo esta quantidade de pontos atípicos por caixa, qualquer que seja o número de linhas
+MAX_ATIPICOS_BOXPLOT = 1000
+# Limite de classes de Freedman–Diaconis, para colunas de cauda longa manterem um histograma compacto
+MAX_CLASSES_HISTOGRAMA = 200
+# Classes por eixo da grade de densidade 2D usada nos gráficos de dispersão grandes
+CLASSES_DENSIDADE_2D = 100
+# Linhas temporais usam o menor intervalo (nome, regra de resample, menor largura) que caiba nesta quantidade de pontos,
+# depois intervalos de quantos anos forem precisos
+MAX_PONTOS_LINHA_TEMPORAL = 500
+INTERVALOS_LINHA_TEMPORAL = [
+    ('minuto', 'min', pd.Timedelta(minutes=1)),
+    ('hora', 'h', pd.Timedelta(hours=1)),
+    ('dia', 'D', pd.Timedelta(days=1)),
+    ('semana', 'W-MON', pd.Timedelta(weeks=1)),
+    ('mês', 'MS', pd.Timedelta(days=28)),
+    ('trimestre', 'QS', pd.Timedelta(days=90)),
+    ('ano', 'YS', pd.Timedelta(days=365))
+]
+# Tamanho da amostra por tipo de gráfico que desenha linhas individuais (pontos WebGL, pontos SVG)
+TAMANHOS_AMOSTRA = {'dispersao': 50_000, 'relacao': 5_000}
+# Fração da amostra reservada aos extremos de cada coluna numérica
+FRACAO_EXTREMOS_AMOSTRA = 0.05
+# Linhas garantidas a cada categoria na amostra estratificada, para categorias raras não sumirem
+MIN_LINHAS_ESTRATO = 20
+# Perfiladores que podem acompanhar os tempos das etapas, e funções mantidas em cada relatório do cProfile
+PERFILADORES = ['cprofile', 'pyinstrument']
+MAX_FUNCOES_PERFIL = 30
+# Métricas servidas nesta porta e/ou gravadas neste arquivo (formato texto do Prometheus) quando as variáveis existem
+VARIAVEL_PORTA_METRICAS = 'ANALISADOR_PORTA_METRICAS'
+VARIAVEL_ARQUIVO_METRICAS = 'ANALISADOR_ARQUIVO_METRICAS'
+# O endpoint de métricas, sem autenticação, escuta só no loopback, a menos que esta variável indique
+# um endereço mais amplo (ex.: 0.0.0.0)
+VARIAVEL_HOST_METRICAS = 'ANALISADOR_HOST_METRICAS'
+HOST_PADRAO_METRICAS = '127.0.0.1'
+# Limites superiores das faixas dos histogramas de duração, número de linhas e número de colunas
+FAIXAS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+FAIXAS_LINHAS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+FAIXAS_COLUNAS = (5, 10, 20, 50, 100, 200, 500)
+# Campos registrados em cada chamada ao LLM (tokens e custo informados pelo OpenRouter, tempos em segundos)
+CAMPOS_CHAMADA_LLM = ['momento', 'conjunto', 'papel', 'modelo_solicitado', 'modelo', 'status', 'resultado', 'caracteres_prompt',
+                      'tokens_prompt', 'tokens_resposta', 'tokens_total', 'custo', 'tempo_primeiro_byte', 'latencia']
+# Modelos consultados em ordem (substituídos por OPENROUTER_MODELS, separados por vírgula): o seguinte atende hedges e reservas
+MODELOS_LLM = ['tngtech/deepseek-r1t2-chimera:free', 'deepseek/deepseek-chat-v3-0324:free']
+VARIAVEL_MODELOS_LLM = 'OPENROUTER_MODELS'
+# Uma requisição de hedge ao modelo seguinte parte quando a mais recente não transmitiu nada por este tempo
+ESPERA_HEDGE_SEGUNDOS = 10.0
+INTERVALO_VERIFICACAO_HEDGE = 0.25
+# Limite de cada espera HTTP de uma requisição ao LLM, reduzido ao que resta do prazo da análise
+TEMPO_LIMITE_API_SEGUNDOS = 120
+# Colunas resumidas entre duas verificações do prazo
+COLUNAS_POR_VERIFICACAO_PRAZO = 50
+# Processos de trabalho compartilhados pelas tarefas de análise de todas as sessões
+PROCESSOS_TAREFAS = min(4, os.cpu_count() or 1)
+# Progresso informado quando uma tarefa de análise chega a cada etapa (a chamada ao LLM ocupa o resto)
+PROGRESSO_ETAPAS_TAREFA = {'estatisticas': 0.05, 'duplicadas': 0.15, 'visao_geral': 0.25, 'numericas': 0.3,
+                           'categoricas': 0.4, 'booleanas': 0.5, 'prompt': 0.55, 'chamada_api': 0.6}
+# Resultados que uma tarefa devolve: o que o processo de trabalho calculou, nunca o conjunto nem seu perfil (ficam no processo principal)
+CHAVES_RESULTADO_TAREFA = ('assinatura', 'estatisticas_descritivas', 'analise_ia', 'tempo_analise', 'tempos', 'chamada_llm',
+                           'cancelada')
+# Orçamento de memória dos conjuntos compartilhados entre sessões: os sem referência além dele saem, os usados há mais tempo primeiro
+MAX_BYTES_CACHE_COMPARTILHADO = 1 << 30
+# Partes de uma análise que outras sessões reutilizam: estatísticas e texto da IA, somente leitura, nunca o DataFrame,
+# a chamada ou os tempos desta sessão
+CHAVES_RESULTADO_COMPARTILHADO = ('assinatura', 'estatisticas', 'estatisticas_descritivas', 'analise_ia')
+BYTES_BLOCO_HASH = 1 << 20
+
+class AmostraReservatorio:
+    """
+    Amostra aleatória uniforme de tamanho fixo de um fluxo de blocos (algoritmo R, vetorizado por bloco).
+    Cada linha vista tem a mesma chance de estar na amostra, sem conhecer o total de antemão.
+    """
+
+    def __init__(self, tamanho: int, semente: int = 42):
+        self.tamanho = tamanho
+        self.linhas_vistas = 0
+        self._rng = np.random.default_rng(semente)
+        self._amostra = None
+        # Posição de cada linha da amostra no fluxo, para devolvê-las na ordem original
+        self._posicoes = np.empty(0, dtype=np.int64)
+
+    def adicionar(self, bloco: pd.DataFrame):
+        """Oferecer um bloco ao reservatório"""
+        inicio, n = self.linhas_vistas, len(bloco)
+        self.linhas_vistas += n
+        if n == 0:
+            return
+        
+        # As primeiras linhas do fluxo enchem o reservatório
+        diretas = min(n, max(0, self.tamanho - inicio))
+        if diretas:
+            self._amostra = bloco.iloc[:diretas] if self._amostra is None else pd.concat([self._amostra, bloco.iloc[:diretas]])
+            self._posicoes = np.concatenate([self._posicoes, np.arange(inicio, inicio + diretas)])
+        if diretas == n:
+            return
+        
+        # A linha de posição t substitui a vaga j ~ U[0, t] quando j cai dentro do reservatório
+        posicoes = np.arange(inicio + diretas, inicio + n)
+        vagas = self._rng.integers(0, posicoes + 1)
+        aceitas = np.flatnonzero(vagas < self.tamanho)
+        if len(aceitas) == 0:
+            return
+        # Substituições sucessivas da mesma vaga: vale a última
+        vagas_invertidas = vagas[aceitas][::-1]
+        _, primeiras = np.unique(vagas_invertidas, return_index=True)
+        aceitas = aceitas[::-1][primeiras]
+        
+        origem = np.arange(self.tamanho)
+        origem[vagas[aceitas]] = self.tamanho + aceitas
+        self._amostra = pd.concat([self._amostra, bloco.iloc[diretas:]]).iloc[origem]
+        self._posicoes[vagas[aceitas]] = posicoes[aceitas]
+
+    def resultado(self) -> pd.DataFrame:
+        """Linhas amostradas, na ordem em que apareceram no fluxo"""
+        if self._amostra is None:
+            return pd.DataFrame()
+        return self._amostra.iloc[np.argsort(self._posicoes, kind='stable')].reset_index(drop=True)
+
+def _com_trava(metodo):
+    """Executar um método de memoização do perfil sob sua trava, para que sessões que o compartilham preencham cada entrada uma vez"""
+    @wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        with self.trava:
+            return metodo(self, *args, **kwargs)
+    return envoltorio
+
+class PerfilConjuntoDados:
+    """
+    Agregados de um DataFrame carregado, compartilhados pelo analisador e pela interface.
+    Cada agregado é calculado no primeiro uso e reutilizado até outro conjunto ser carregado.
+    """
+
+    def __init__(self, df: pd.DataFrame, tipos_colunas: Dict[str, List[str]]):
+        self.df = df
+        self.tipos_colunas = tipos_colunas
+        # Hashes de 64 bits das linhas por subconjunto de colunas (None = todas)
+        self.hashes_linhas = {}
+        # Hash do conteúdo do conjunto inteiro, usado como chave de caches fora do analisador
+        self.assinatura = None
+        self._contagens_valores = {}
+        self._estatisticas_boxplot = {}
+        self._histogramas = {}
+        self._regressoes = {}
+        self._densidades = {}
+        self._linhas_temporais = {}
+        self._amostras = {}
+        # Tomada enquanto um agregado memoizado é calculado: sessões que compartilham um conjunto compartilham seu perfil
+        self.trava = threading.RLock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Uma cópia enviada a um processo de trabalho ganha sua própria trava
+        estado = self.__dict__.copy()
+        del estado['trava']
+        return estado
+
+    def __setstate__(self, estado: Dict[str, Any]):
+        self.__dict__.update(estado)
+        self.trava = threading.RLock()
+
+    def aquecer(self):
+        """Calcular já os agregados do conjunto inteiro, antes que outras sessões possam pedi-los ao mesmo tempo"""
+        for nome in ('contagem_ausentes', 'total_ausentes', 'resumo_numerico', 'resumo_booleano'):
+            getattr(self, nome)
+
+    @property
+    def num_linhas(self) -> int:
+        return self.df.shape[0]
+
+    @property
+    def num_colunas(self) -> int:
+        return self.df.shape[1]
+
+    @cached_property
+    def contagem_ausentes(self) -> pd.Series:
+        """Valores ausentes por coluna"""
+        return self.df.isnull().sum()
+
+    @cached_property
+    def total_ausentes(self) -> int:
+        return int(self.contagem_ausentes.sum())
+
+    @cached_property
+    def resumo_numerico(self) -> pd.DataFrame:
+        """Uma linha por coluna numérica: momentos, extremos, percentis e ausentes"""
+        colunas = self.tipos_colunas['Numéricas']
+        if not colunas:
+            return pd.DataFrame()
+        
+        numericas = self.df[colunas]
+        resumo = numericas.agg(['count', 'mean', 'var', 'std', 'min', 'max', 'skew', 'kurt']).T
+        resumo.columns = ['contagem', 'media', 'variancia', 'desvio_padrao', 'minimo', 'maximo', 'assimetria', 'curtose']
+        percentis = numericas.quantile([0.05, 0.25, 0.5, 0.75, 0.95]).T
+        percentis.columns = ['p05', 'p25', 'mediana', 'p75', 'p95']
+        resumo = resumo.join(percentis).astype('float64')
+        resumo['ausentes'] = self.contagem_ausentes[colunas]
+        return resumo
+
+    @cached_property
+    def resumo_booleano(self) -> pd.DataFrame:
+        """Uma linha por coluna Verdadeiro/Falso com variância e desvio padrão dos valores 0/1"""
+        colunas = self.tipos_colunas['Verdadeiro/Falso']
+        if not colunas:
+            return pd.DataFrame()
+        resumo = self.df[colunas].astype('float64').agg(['var', 'std']).T
+        resumo.columns = ['variancia', 'desvio_padrao']
+        return resumo
+
+    @_com_trava
+    def contagem_valores(self, coluna: str) -> pd.Series:
+        """Contagem de valores de uma coluna, mais frequentes primeiro, calculada uma vez por coluna"""
+        if coluna not in self._contagens_valores:
+            self._contagens_valores[coluna] = self.df[coluna].value_counts()
+        return self._contagens_valores[coluna]
+
+    def percentuais_valores(self, coluna: str) -> pd.Series:
+        """Participação de cada valor entre os não ausentes, em percentual"""
+        contagens = self.contagem_valores(coluna)
+        return contagens / contagens.sum() * 100
+
+    def num_classes_histograma(self, coluna: str) -> int:
+        """Número de classes de Freedman–Diaconis a partir dos quartis em cache (Sturges quando o IQR é zero)"""
+        resumo = self.resumo_numerico.loc[coluna]
+        contagem, amplitude = resumo['contagem'], resumo['maximo'] - resumo['minimo']
+        if contagem == 0 or not np.isfinite(amplitude) or amplitude == 0:
+            return 1
+        iqr = resumo['p75'] - resumo['p25']
+        if iqr > 0:
+            classes = int(np.ceil(amplitude / (2 * iqr / contagem ** (1 / 3))))
+        else:
+            classes = int(np.ceil(np.log2(contagem))) + 1
+        return min(max(classes, 1), MAX_CLASSES_HISTOGRAMA)
+
+    @_com_trava
+    def histograma(self, coluna: str, classes: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Contagens e limites das classes de uma coluna numérica, calculados uma vez por coluna e número de classes"""
+        classes = classes or self.num_classes_histograma(coluna)
+        chave = (coluna, classes)
+        if chave not in self._histogramas:
+            valores = self.df[coluna].astype('float64').to_numpy()
+            valores = valores[np.isfinite(valores)]
+            if len(valores) == 0:
+                self._histogramas[chave] = (np.zeros(0, dtype='int64'), np.zeros(0))
+            else:
+                self._histogramas[chave] = np.histogram(valores, bins=classes, range=(valores.min(), valores.max()))
+        return self._histogramas[chave]
+
+    def barras_histograma(self, coluna: str, classes: int = None, **opcoes_trace) -> go.Bar:
+        """Histograma de uma coluna como trace de barras: um valor por classe em vez da coluna bruta"""
+        contagens, limites = self.histograma(coluna, classes)
+        return go.Bar(
+            x=(limites[:-1] + limites[1:]) / 2, y=contagens, width=np.diff(limites),
+            marker_line_width=0, **opcoes_trace
+        )
+
+    def _pares_finitos(self, coluna_x: str, coluna_y: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Valores de duas colunas numéricas como float64, só nas linhas em que ambos são finitos"""
+        x = self.df[coluna_x].astype('float64').to_numpy()
+        y = self.df[coluna_y].astype('float64').to_numpy()
+        finitos = np.isfinite(x) & np.isfinite(y)
+        return x[finitos], y[finitos]
+
+    @_com_trava
+    def regressao_linear(self, coluna_x: str, coluna_y: str) -> Dict[str, float]:
+        """
+        Reta de mínimos quadrados de y em função de x a partir das estatísticas suficientes
+        (n, médias, Sxx, Sxy, Syy), calculadas uma vez por par de colunas.
+        """
+        chave = (coluna_x, coluna_y)
+        if chave not in self._regressoes:
+            x, y = self._pares_finitos(coluna_x, coluna_y)
+            n = len(x)
+            if n < 2:
+                self._regressoes[chave] = {'n': n, 'inclinacao': np.nan, 'intercepto': np.nan,
+                                           'r2': np.nan, 'x_min': np.nan, 'x_max': np.nan}
+                return self._regressoes[chave]
+            
+            media_x, media_y = x.mean(), y.mean()
+            dx, dy = x - media_x, y - media_y
+            sxx, sxy, syy = np.dot(dx, dx), np.dot(dx, dy), np.dot(dy, dy)
+            inclinacao = sxy / sxx if sxx > 0 else np.nan
+            self._regressoes[chave] = {
+                'n': n,
+                'inclinacao': inclinacao,
+                'intercepto': media_y - inclinacao * media_x,
+                'r2': sxy * sxy / (sxx * syy) if sxx > 0 and syy > 0 else np.nan,
+                'x_min': x.min(),
+                'x_max': x.max()
+            }
+        return self._regressoes[chave]
+
+    @_com_trava
+    def densidade_2d(self, coluna_x: str, coluna_y: str, classes: int = CLASSES_DENSIDADE_2D) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Contagens de uma grade classes x classes sobre duas colunas numéricas (contagens[i, j]: classe i de x, j de y)"""
+        chave = (coluna_x, coluna_y, classes)
+        if chave not in self._densidades:
+            x, y = self._pares_finitos(coluna_x, coluna_y)
+            self._densidades[chave] = np.histogram2d(x, y, bins=classes)
+        return self._densidades[chave]
+
+    @_com_trava
+    def linha_temporal(self, coluna: str, max_pontos: int = MAX_PONTOS_LINHA_TEMPORAL) -> Tuple[pd.Series, str]:
+        """
+        Contagem de registros de uma coluna data/hora por intervalo de tempo, e o nome do intervalo: o menor entre
+        minuto, hora, dia, semana, mês, trimestre, ano ou N anos que mantém a linha temporal em até max_pontos;
+        calculada uma vez por coluna.
+        """
+        chave = (coluna, max_pontos)
+        if chave not in self._linhas_temporais:
+            # Reagrupa a contagem em cache dos instantes distintos, não a coluna bruta
+            contagens = self.contagem_valores(coluna)
+            if len(contagens) == 0:
+                self._linhas_temporais[chave] = (pd.Series(dtype='int64'), 'dia')
+                return self._linhas_temporais[chave]
+            
+            datas = pd.DatetimeIndex(contagens.index)
+            amplitude = datas.max() - datas.min()
+            # Uma amplitude de k larguras pode tocar k + 2 intervalos depois de alinhada ao calendário
+            divisoes = max(max_pontos - 1, 1)
+            nome, regra = next(
+                ((nome, regra) for nome, regra, largura in INTERVALOS_LINHA_TEMPORAL if amplitude / largura < divisoes),
+                (None, None)
+            )
+            if regra is None:
+                anos = int(amplitude / (INTERVALOS_LINHA_TEMPORAL[-1][2] * divisoes)) + 1
+                nome, regra = f"{anos} anos", f"{anos}YS"
+            por_intervalo = pd.Series(contagens.to_numpy(), index=datas).resample(regra, closed='left', label='left').sum()
+            self._linhas_temporais[chave] = (por_intervalo, nome)
+        return self._linhas_temporais[chave]
+
+    @_com_trava
+    def estatisticas_boxplot(self, coluna: str, agrupar_por: str = None, max_atipicos: int = MAX_ATIPICOS_BOXPLOT) -> pd.DataFrame:
+        """
+        Estatísticas de box plot (Tukey) de uma coluna numérica, opcionalmente uma caixa por valor de outra coluna.
+        Colunas: q1, mediana, q3, limite_inferior/limite_superior (valores mais distantes dentro de 1,5 IQR),
+        contagem, num_atipicos e atipicos, uma amostra ordenada de até max_atipicos valores que mantém os extremos.
+        """
+        chave = (coluna, agrupar_por, max_atipicos)
+        if chave in self._estatisticas_boxplot:
+            return self._estatisticas_boxplot[chave]
+        
+        valores = self.df[coluna].astype('float64').to_numpy()
+        if agrupar_por is None:
+            # Uma única caixa, com o nome da coluna
+            grupos = pd.Categorical.from_codes(np.zeros(len(valores), dtype='int8'), categories=[coluna])
+        else:
+            grupos = self.df[agrupar_por].to_numpy()
+        dados = pd.DataFrame({'grupo': grupos, 'valor': valores}).dropna()
+        agrupado = dados.groupby('grupo', sort=True, observed=True)['valor']
+        
+        estatisticas = agrupado.quantile([0.25, 0.5, 0.75]).unstack()
+        estatisticas.columns = ['q1', 'mediana', 'q3']
+        estatisticas.index.name = agrupar_por
+        iqr = estatisticas['q3'] - estatisticas['q1']
+        limite_baixo = (estatisticas['q1'] - 1.5 * iqr).reindex(dados['grupo']).to_numpy()
+        limite_alto = (estatisticas['q3'] + 1.5 * iqr).reindex(dados['grupo']).to_numpy()
+        dentro = (dados['valor'].to_numpy() >= limite_baixo) & (dados['valor'].to_numpy() <= limite_alto)
+        
+        bigodes = dados[dentro].groupby('grupo', sort=True, observed=True)['valor'].agg(['min', 'max'])
+        estatisticas['limite_inferior'] = bigodes['min']
+        estatisticas['limite_superior'] = bigodes['max']
+        estatisticas['contagem'] = agrupado.size()
+        
+        # Amostra de atípicos: primeiro os extremos de cada grupo, depois o restante embaralhado com semente fixa
+        atipicos = dados[~dentro]
+        por_grupo = atipicos.groupby('grupo', sort=True, observed=True)['valor']
+        estatisticas['num_atipicos'] = por_grupo.size().reindex(estatisticas.index, fill_value=0)
+        extremos = por_grupo.agg(['idxmin', 'idxmax']).to_numpy().ravel()
+        ordem = pd.Index(extremos).append(atipicos.sample(frac=1, random_state=42).index)
+        amostra = atipicos.loc[ordem[~ordem.duplicated()]].groupby('grupo', observed=True).head(max_atipicos)
+        amostras = {rotulo: np.sort(grupo.to_numpy()) for rotulo, grupo in amostra.groupby('grupo', observed=True)['valor']}
+        estatisticas['atipicos'] = [amostras.get(rotulo, np.empty(0)) for rotulo in estatisticas.index]
+        
+        self._estatisticas_boxplot[chave] = estatisticas
+        return estatisticas
+
+    def _posicoes_uniformes(self, candidatas: np.ndarray, tamanho: int, rng: np.random.Generator) -> np.ndarray:
+        """Até tamanho posições sorteadas sem reposição entre as candidatas"""
+        if tamanho >= len(candidatas):
+            return candidatas
+        return rng.choice(candidatas, size=max(tamanho, 0), replace=False)
+
+    def amostra_estratificada(self, coluna: str, tamanho: int, min_por_estrato: int = MIN_LINHAS_ESTRATO,
+                              semente: int = 42) -> pd.DataFrame:
+        """
+        Amostra estratificada por uma coluna categórica. Cada categoria (inclusive a de ausentes) recebe
+        ao menos min_por_estrato linhas, ou todas se tiver menos; o restante é repartido na proporção
+        do tamanho de cada categoria. Com mais categorias que vagas, a amostra é uniforme.
+        """
+        if len(self.df) <= tamanho:
+            return self.df
+        rng = np.random.default_rng(semente)
+        codigos, _ = pd.factorize(self.df[coluna], use_na_sentinel=False)
+        contagens = np.bincount(codigos)
+        
+        garantidas = min(min_por_estrato, tamanho // len(contagens))
+        if garantidas == 0:
+            posicoes = self._posicoes_uniformes(np.arange(len(self.df)), tamanho, rng)
+            return self.df.iloc[np.sort(posicoes)]
+        
+        piso = np.minimum(contagens, garantidas)
+        excedente = contagens - piso
+        cotas = piso + np.floor(excedente * (tamanho - piso.sum()) / max(excedente.sum(), 1)).astype(np.int64)
+        
+        # Ordem aleatória dentro de cada categoria; ficam as primeiras cotas[categoria] linhas
+        ordem = np.lexsort((rng.random(len(codigos)), codigos))
+        inicio_estrato = np.concatenate([[0], np.cumsum(contagens)[:-1]])
+        posicao_no_estrato = np.arange(len(ordem)) - inicio_estrato[codigos[ordem]]
+        posicoes = ordem[posicao_no_estrato < cotas[codigos[ordem]]]
+        return self.df.iloc[np.sort(posicoes)]
+
+    def amostra_preservando_extremos(self, colunas: List[str], tamanho: int,
+                                     fracao_extremos: float = FRACAO_EXTREMOS_AMOSTRA, semente: int = 42) -> pd.DataFrame:
+        """
+        Amostra que mantém as linhas com os menores e maiores valores de cada coluna numérica
+        (fracao_extremos do tamanho, dividida entre colunas e lados) e completa o tamanho com
+        um sorteio uniforme das demais linhas.
+        """
+        if len(self.df) <= tamanho:
+            return self.df
+        rng = np.random.default_rng(semente)
+        por_lado = max(1, int(tamanho * fracao_extremos) // (2 * max(1, len(colunas))))
+        
+        extremos = [np.empty(0, dtype=np.int64)]
+        for col in colunas:
+            valores = pd.to_numeric(self.df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            validas = np.flatnonzero(np.isfinite(valores))
+            if len(validas) <= 2 * por_lado:
+                extremos.append(validas)
+                continue
+            valores = valores[validas]
+            extremos.append(validas[np.argpartition(valores, por_lado - 1)[:por_lado]])
+            extremos.append(validas[np.argpartition(valores, len(valores) - por_lado)[-por_lado:]])
+        extremos = np.unique(np.concatenate(extremos))
+        
+        demais = np.ones(len(self.df), dtype=bool)
+        demais[extremos] = False
+        sorteadas = self._posicoes_uniformes(np.flatnonzero(demais), tamanho - len(extremos), rng)
+        return self.df.iloc[np.sort(np.concatenate([extremos, sorteadas]))]
+
+    @_com_trava
+    def amostra(self, tipo_grafico: str, colunas: List[str], estratificar_por: str = None) -> pd.DataFrame:
+        """
+        Amostra das colunas com o tamanho definido para o tipo de gráfico (TAMANHOS_AMOSTRA).
+        Estratificada por estratificar_por quando informado; senão preserva os extremos das colunas numéricas.
+        """
+        chave = (tipo_grafico, tuple(colunas), estratificar_por)
+        if chave not in self._amostras:
+            tamanho = TAMANHOS_AMOSTRA[tipo_grafico]
+            if estratificar_por is not None:
+                amostra = self.amostra_estratificada(estratificar_por, tamanho)
+            else:
+                numericas = [col for col in colunas if col in self.tipos_colunas['Numéricas']]
+                amostra = self.amostra_preservando_extremos(numericas, tamanho)
+            self._amostras[chave] = amostra[list(colunas)]
+        return self._amostras[chave]
+
+class RegistroMetricas:
+    """
+    Contadores e histogramas do processo inteiro, no formato texto do Prometheus.
+    As métricas são declaradas uma vez com seu texto de ajuda; os valores ficam por conjunto de rótulos e
+    podem ser lidos de um pequeno endpoint HTTP ou gravados num arquivo para um coletor de arquivos texto.
+    """
+
+    def __init__(self, espaco_nomes: str):
+        self.espaco_nomes = espaco_nomes
+        self._metricas = {}
+        self._trava = threading.Lock()
+        self._servidor = None
+
+    def contador(self, nome: str, ajuda: str):
+        """Declarar um contador"""
+        self._metricas[nome] = {'tipo': 'counter', 'ajuda': ajuda, 'valores': {}}
+
+    def histograma(self, nome: str, ajuda: str, faixas: Tuple[float, ...]):
+        """Declarar um histograma com os limites superiores das faixas"""
+        self._metricas[nome] = {'tipo': 'histogram', 'ajuda': ajuda, 'faixas': tuple(faixas), 'valores': {}}
+
+    def incrementar(self, nome: str, valor: float = 1, **rotulos):
+        """Somar a um contador"""
+        chave = tuple(sorted(rotulos.items()))
+        valores = self._metricas[nome]['valores']
+        with self._trava:
+            valores[chave] = valores.get(chave, 0) + valor
+
+    def observar(self, nome: str, valor: float, **rotulos):
+        """Registrar uma observação num histograma"""
+        metrica = self._metricas[nome]
+        chave = tuple(sorted(rotulos.items()))
+        with self._trava:
+            # Por conjunto de rótulos: contagem por faixa (a última é +Inf), soma e contagem
+            estado = metrica['valores'].setdefault(chave, [[0] * (len(metrica['faixas']) + 1), 0.0, 0])
+            estado[0][bisect.bisect_left(metrica['faixas'], valor)] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    def coletar(self) -> Dict[str, Dict[Tuple, Any]]:
+        """Retirar os valores registrados até agora, deixando o registro vazio (um processo de trabalho os entrega ao pai)"""
+        with self._trava:
+            valores = {nome: dict(metrica['valores']) for nome, metrica in self._metricas.items() if metrica['valores']}
+            for metrica in self._metricas.values():
+                metrica['valores'].clear()
+        return valores
+
+    def mesclar(self, valores: Dict[str, Dict[Tuple, Any]]):
+        """Somar valores coletados em outro processo"""
+        with self._trava:
+            for nome, estados in valores.items():
+                metrica = self._metricas[nome]
+                for chave, estado in estados.items():
+                    if metrica['tipo'] == 'counter':
+                        metrica['valores'][chave] = metrica['valores'].get(chave, 0) + estado
+                        continue
+                    atual = metrica['valores'].setdefault(chave, [[0] * len(estado[0]), 0.0, 0])
+                    atual[0] = [a + b for a, b in zip(atual[0], estado[0])]
+                    atual[1] += estado[1]
+                    atual[2] += estado[2]
+
+    def valor(self, nome: str, **rotulos) -> float:
+        """Valor atual de um contador, ou número de observações de um histograma, para um conjunto de rótulos"""
+        estado = self._metricas[nome]['valores'].get(tuple(sorted(rotulos.items())), 0)
+        return estado[2] if isinstance(estado, list) else estado
+
+    @staticmethod
+    def _formatar_rotulos(rotulos, extras: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pares = [(chave, str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                 for chave, valor in tuple(rotulos) + extras]
+        return '{' + ','.join(f'{chave}="{valor}"' for chave, valor in pares) + '}' if pares else ''
+
+    def renderizar(self) -> str:
+        """Todas as métricas no formato de exposição em texto do Prometheus"""
+        linhas = []
+        with self._trava:
+            for nome, metrica in self._metricas.items():
+                nome_completo = f"{self.espaco_nomes}_{nome}"
+                linhas.append(f"# HELP {nome_completo} {metrica['ajuda']}")
+                linhas.append(f"# TYPE {nome_completo} {metrica['tipo']}")
+                for rotulos, estado in metrica['valores'].items():
+                    if metrica['tipo'] == 'counter':
+                        linhas.append(f"{nome_completo}{self._formatar_rotulos(rotulos)} {estado:g}")
+                        continue
+                    contagens_faixas, soma, contagem = estado
+                    acumulado = 0
+                    for limite, contagem_faixa in zip(metrica['faixas'] + ('+Inf',), contagens_faixas):
+                        acumulado += contagem_faixa
+                        linhas.append(f"{nome_completo}_bucket{self._formatar_rotulos(rotulos, (('le', f'{limite:g}' if limite != '+Inf' else limite),))} {acumulado}")
+                    linhas.append(f"{nome_completo}_sum{self._formatar_rotulos(rotulos)} {soma:g}")
+                    linhas.append(f"{nome_completo}_count{self._formatar_rotulos(rotulos)} {contagem}")
+        return '\n'.join(linhas) + '\n'
+
+    def gravar(self, caminho_arquivo: str):
+        """Gravar as métricas num arquivo, substituído de forma atômica para o coletor nunca ler um arquivo pela metade"""
+        caminho_temporario = f"{caminho_arquivo}.tmp"
+        with open(caminho_temporario, 'w', encoding='utf-8') as f:
+            f.write(self.renderizar())
+        os.replace(caminho_temporario, caminho_arquivo)
+
+    def servir(self, porta: int, host: str = HOST_PADRAO_METRICAS):
+        """Servir as métricas em http://host:porta/metrics a partir de uma thread daemon (uma vez por processo)"""
+        if self._servidor is not None:
+            return
+        registro = self
+        
+        class ManipuladorMetricas(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                corpo = registro.renderizar().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._servidor = ThreadingHTTPServer((host, porta), ManipuladorMetricas)
+        threading.Thread(target=self._servidor.serve_forever, name='servidor-metricas', daemon=True).start()
+        print(f"📡 Métricas servidas em http://{host}:{porta}/metrics")
+
+METRICAS = RegistroMetricas('analisador_dados')
+METRICAS.histograma('duracao_etapa_segundos', "Tempo gasto em cada etapa do pipeline.", FAIXAS_SEGUNDOS)
+METRICAS.contador('analises_total', "Análises de conjuntos de dados, por resultado.")
+METRICAS.contador('linhas_processadas_total', "Linhas dos conjuntos analisados.")
+METRICAS.contador('colunas_processadas_total', "Colunas dos conjuntos analisados.")
+METRICAS.histograma('linhas_conjunto', "Linhas por conjunto analisado.", FAIXAS_LINHAS)
+METRICAS.histograma('colunas_conjunto', "Colunas por conjunto analisado.", FAIXAS_COLUNAS)
+METRICAS.contador('consultas_cache_total', "Consultas aos caches do analisador, por cache e resultado (acerto ou falha).")
+METRICAS.contador('requisicoes_api_total', "Requisições ao OpenRouter, por código HTTP (ou classe do erro quando não há resposta).")
+METRICAS.histograma('duracao_requisicao_api_segundos', "Latência das requisições ao OpenRouter.", FAIXAS_SEGUNDOS)
+METRICAS.histograma('tempo_primeiro_byte_api_segundos', "Tempo até o OpenRouter transmitir o primeiro token gerado.", FAIXAS_SEGUNDOS)
+METRICAS.contador('tokens_llm_total', "Tokens informados pelo OpenRouter, por tipo (prompt ou resposta) e modelo.")
+METRICAS.contador('custo_llm_total', "Custo informado pelo OpenRouter, em créditos, por modelo.")
+METRICAS.contador('requisicoes_llm_total', "Requisições ao LLM por papel (principal, hedge ou reserva) e resultado (venceu, concluida, cancelada ou falhou).")
+METRICAS.contador('tarefas_analise_total', "Tarefas de análise recolhidas do grupo de processos, por estado final.")
+METRICAS.histograma('espera_tarefa_analise_segundos', "Tempo que as tarefas de análise esperaram por um processo de trabalho.", FAIXAS_SEGUNDOS)
+
+class AnaliseCancelada(Exception):
+    """Lançada em um ponto de verificação de uma análise cancelada ou que passou do prazo"""
+
+class Prazo:
+    """
+    Tempo limite e sinal de cancelamento de uma análise, verificados cooperativamente entre etapas e lotes de colunas.
+    cancelar() pode ser chamado de qualquer thread; a análise para na próxima verificar().
+    """
+
+    def __init__(self, segundos: float = None, evento_cancelamento=None, ao_verificar: Callable[[str], None] = None):
+        self.segundos = segundos
+        self.inicio = time.monotonic()
+        # Qualquer objeto com set() e is_set(): um evento de multiprocessing permite cancelar a partir de outro processo
+        self._cancelado = threading.Event() if evento_cancelamento is None else evento_cancelamento
+        # Chamado com o nome da etapa a cada verificação, para informar o progresso
+        self.ao_verificar = ao_verificar
+
+    def cancelar(self):
+        """Pedir que a análise pare no próximo ponto de verificação"""
+        self._cancelado.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado.is_set()
+
+    @property
+    def decorrido(self) -> float:
+        return time.monotonic() - self.inicio
+
+    def restante(self) -> Optional[float]:
+        """Segundos até o prazo (None sem tempo limite)"""
+        if self.segundos is None:
+            return None
+        return max(self.segundos - self.decorrido, 0.0)
+
+    @property
+    def deve_parar(self) -> bool:
+        """Se a análise foi cancelada ou está sem tempo"""
+        return self.cancelado or self.restante() == 0.0
+
+    def verificar(self, etapa: str):
+        """Lançar AnaliseCancelada quando a análise foi cancelada ou está sem tempo"""
+        if self.ao_verificar is not None:
+            self.ao_verificar(etapa)
+        if self.cancelado:
+            raise AnaliseCancelada(f"Análise cancelada durante {etapa}")
+        if self.restante() == 0.0:
+            raise AnaliseCancelada(f"Análise passou do prazo de {self.segundos:g}s durante {etapa}")
+
+    def tempo_limite(self, limite: float) -> float:
+        """Um tempo limite HTTP de no máximo limite segundos que não ultrapassa o prazo"""
+        restante = self.restante()
+        return limite if restante is None else max(min(limite, restante), 0.1)
+
+    def lotes(self, colunas: List[str], etapa: str, tamanho: int = COLUNAS_POR_VERIFICACAO_PRAZO):
+        """Percorrer as colunas, verificando o prazo antes de cada lote de tamanho colunas"""
+        for inicio in range(0, len(colunas), tamanho):
+            self.verificar(etapa)
+            yield from colunas[inicio:inicio + tamanho]
+
+class CronometroEtapas:
+    """
+    Tempos de relógio das etapas da análise, na ordem em que começam.
+    Etapas abertas dentro de outra são registradas sob o nome dela (estatisticas.numericas); com um
+    perfilador definido, etapas abertas com perfilar=True guardam também um relatório do cProfile ou pyinstrument.
+    """
+
+    def __init__(self, perfilador: str = None, etapas: List[Tuple[str, int, float]] = None,
+                 perfis: Dict[str, str] = None):
+        if perfilador == 'pyinstrument' and not PYINSTRUMENT_DISPONIVEL:
+            print("⚠️ pyinstrument não está instalado, perfilando com cProfile")
+            perfilador = 'cprofile'
+        self.perfilador = perfilador
+        # (nome, nível, segundos) por etapa; etapas abertas ficam com 0.0 segundos
+        self.etapas = list(etapas or [])
+        self.perfis = dict(perfis or {})
+        self._abertas = []
+        self._perfilando = False
+
+    @contextlib.contextmanager
+    def etapa(self, nome: str, perfilar: bool = False):
+        """Medir o corpo do bloco with como uma etapa"""
+        caminho = '.'.join(self._abertas + [nome])
+        nivel = len(self._abertas)
+        # Uma etapa perfilada já cobre as etapas abertas dentro dela
+        perfilador = self._iniciar_perfilador() if perfilar and self.perfilador and not self._perfilando else None
+        self._perfilando = self._perfilando or perfilador is not None
+        self._abertas.append(nome)
+        indice = len(self.etapas)
+        self.etapas.append((caminho, nivel, 0.0))
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            decorrido = time.perf_counter() - inicio
+            self.etapas[indice] = (caminho, nivel, decorrido)
+            self._abertas.pop()
+            METRICAS.observar('duracao_etapa_segundos', decorrido, etapa=caminho)
+            if perfilador is not None:
+                self._perfilando = False
+                self.perfis[caminho] = self._parar_perfilador(perfilador)
+
+    def _iniciar_perfilador(self):
+        if self.perfilador == 'pyinstrument':
+            perfilador = PerfiladorPyinstrument()
+            perfilador.start()
+            return perfilador
+        perfilador = cProfile.Profile()
+        try:
+            perfilador.enable()
+        except ValueError:
+            # Já há outro perfilador ativo nesta thread
+            return None
+        return perfilador
+
+    def _parar_perfilador(self, perfilador) -> str:
+        if self.perfilador == 'pyinstrument':
+            perfilador.stop()
+            return perfilador.output_text()
+        perfilador.disable()
+        relatorio = io.StringIO()
+        pstats.Stats(perfilador, stream=relatorio).sort_stats('cumulative').print_stats(MAX_FUNCOES_PERFIL)
+        return relatorio.getvalue()
+
+    @property
+    def em_andamento(self) -> bool:
+        """Se há alguma etapa aberta"""
+        return bool(self._abertas)
+
+    @property
+    def total(self) -> float:
+        """Segundos gastos nas etapas de primeiro nível"""
+        return sum(segundos for _, nivel, segundos in self.etapas if nivel == 0)
+
+    def para_tabela(self) -> pd.DataFrame:
+        """Uma linha por etapa (etapas repetidas são somadas), na ordem em que cada uma começou"""
+        tabela = pd.DataFrame(self.etapas, columns=['etapa', 'nivel', 'segundos'])
+        tabela = tabela.groupby('etapa', sort=False).agg(nivel=('nivel', 'first'), chamadas=('segundos', 'size'),
+                                                         segundos=('segundos', 'sum')).reset_index()
+        tabela['percentual'] = tabela['segundos'] / self.total * 100 if self.total else 0.0
+        return tabela
+
+    def para_dict(self) -> Dict[str, Any]:
+        """Versão em dados simples: segundos por etapa, o total e os perfis capturados"""
+        tabela = self.para_tabela()
+        return {
+            'etapas': dict(zip(tabela['etapa'], tabela['segundos'].astype(float))),
+            'total': self.total,
+            'perfilador': self.perfilador,
+            'perfis': dict(self.perfis)
+        }
+
+class EstatisticasDescritivas:
+    """
+    Estatísticas descritivas de um conjunto de dados, guardadas como arrays por coluna (uma tabela por tipo de coluna).
+    As versões em Markdown, prompt do LLM, JSON e cartões de métricas são geradas sob demanda e memorizadas;
+    o modelo vai e volta por para_dict/de_dict (e pickle) para poder ser guardado em cache.
+    """
+
+    def __init__(self, visao_geral: Dict[str, Any], numericas: Dict[str, Any], categoricas: Dict[str, Any],
+                 booleanas: Dict[str, Any], fluxo: Optional[Dict[str, Any]] = None):
+        self.visao_geral = visao_geral
+        self.numericas = numericas
+        self.categoricas = categoricas
+        self.booleanas = booleanas
+        self.fluxo = fluxo
+        self._renderizacoes = {}
+        self._posicoes = {}
+
+    @classmethod
+    def de_perfil(cls, perfil: PerfilConjuntoDados, linhas_duplicadas: int,
+                  perfil_fluxo: Optional[Dict[str, Any]] = None, num_principais: int = 3,
+                  cronometro: CronometroEtapas = None, prazo: Prazo = None) -> 'EstatisticasDescritivas':
+        """Reunir as estatísticas de um conjunto perfilado (e do arquivo lido em blocos, quando só parte foi mantida)"""
+        cronometro = cronometro or CronometroEtapas()
+        prazo = prazo or Prazo()
+        tipos_colunas = perfil.tipos_colunas
+        prazo.verificar('visao_geral')
+        with cronometro.etapa('visao_geral'):
+            visao_geral = {
+                'linhas': perfil.num_linhas,
+                'colunas': perfil.num_colunas,
+                'ausentes': perfil.total_ausentes,
+                'linhas_duplicadas': linhas_duplicadas,
+                'contagem_tipos': {tipo: len(colunas) for tipo, colunas in tipos_colunas.items()}
+            }
+        
+        # Uma passada vetorizada por todas as colunas numéricas: verificada uma vez, antes de começar
+        prazo.verificar('numericas')
+        with cronometro.etapa('numericas'):
+            resumo = perfil.resumo_numerico
+            numericas = {'coluna': list(resumo.index)}
+            numericas.update({est: resumo[est].to_numpy() for est in resumo.columns})
+        
+        colunas_categoricas = tipos_colunas['Categóricas']
+        with cronometro.etapa('categoricas'):
+            categoricas = {
+                'coluna': list(colunas_categoricas),
+                # As contagens de valores são calculadas coluna a coluna aqui, e reaproveitadas do perfil abaixo
+                'unicos': np.array([len(perfil.contagem_valores(col)) for col in prazo.lotes(colunas_categoricas, 'categoricas')],
+                                   dtype=np.int64),
+                'ausentes': perfil.contagem_ausentes[colunas_categoricas].to_numpy(dtype=np.int64),
+                'principais': [[(str(valor), int(contagem)) for valor, contagem in perfil.contagem_valores(col).head(num_principais).items()]
+                               for col in colunas_categoricas]
+            }
+        
+        colunas_booleanas = tipos_colunas['Verdadeiro/Falso']
+        with cronometro.etapa('booleanas'):
+            booleanas = {
+                'coluna': list(colunas_booleanas),
+                'valores': [[(str(valor), int(contagem), float(perfil.percentuais_valores(col)[valor]))
+                             for valor, contagem in perfil.contagem_valores(col).items()] for col in prazo.lotes(colunas_booleanas, 'booleanas')],
+                'variancia': perfil.resumo_booleano['variancia'].to_numpy() if colunas_booleanas else np.empty(0),
+                'desvio_padrao': perfil.resumo_booleano['desvio_padrao'].to_numpy() if colunas_booleanas else np.empty(0),
+                'ausentes': perfil.contagem_ausentes[colunas_booleanas].to_numpy(dtype=np.int64)
+            }
+        
+        fluxo = None
+        if perfil_fluxo and perfil_fluxo['linhas'] > perfil.num_linhas:
+            numericas_fluxo = perfil_fluxo['numericas']
+            fluxo = {
+                'linhas': perfil_fluxo['linhas'],
+                'colunas': len(perfil_fluxo['nao_nulos']),
+                'ausentes': perfil_fluxo['linhas'] * len(perfil_fluxo['nao_nulos']) - int(perfil_fluxo['nao_nulos'].sum()),
+                'linhas_mantidas': perfil.num_linhas,
+                'amostrado': bool(perfil_fluxo.get('amostrado')),
+                'numericas': {
+                    'coluna': list(numericas_fluxo),
+                    'contagem': np.array([est['contagem'] for est in numericas_fluxo.values()], dtype=np.int64),
+                    'media': np.array([est['media'] for est in numericas_fluxo.values()], dtype='float64'),
+                    'desvio_padrao': np.array([np.sqrt(est['m2'] / (est['contagem'] - 1)) if est['contagem'] > 1 else 0.0
+                                               for est in numericas_fluxo.values()], dtype='float64'),
+                    'min': np.array([est['min'] for est in numericas_fluxo.values()], dtype='float64'),
+                    'max': np.array([est['max'] for est in numericas_fluxo.values()], dtype='float64')
+                }
+            }
+        
+        return cls(visao_geral, numericas, categoricas, booleanas, fluxo)
+
+    def _posicao(self, tipo: str, coluna: str) -> Optional[int]:
+        """Linha de uma coluna na tabela de numéricas, categóricas ou booleanas"""
+        if tipo not in self._posicoes:
+            self._posicoes[tipo] = {col: i for i, col in enumerate(getattr(self, tipo)['coluna'])}
+        return self._posicoes[tipo].get(coluna)
+
+    def para_markdown(self) -> str:
+        """Relatório completo em Markdown, exibido na interface e salvo com os resultados"""
+        if 'markdown' in self._renderizacoes:
+            return self._renderizacoes['markdown']
+        
+        visao = self.visao_geral
+        partes = [
+            "# 📊 Relatório de Estatísticas Descritivas\n\n",
+            "## 📋 Visão Geral do Conjunto de Dados\n\n",
+            f"- **Total de Linhas**: {visao['linhas']:,}\n",
+            f"- **Total de Colunas**: {visao['colunas']}\n",
+            f"- **Valores Ausentes**: {visao['ausentes']}\n",
+            f"- **Linhas Duplicadas**: {visao['linhas_duplicadas']}\n\n"
+        ]
+        
+        # Números do arquivo inteiro quando só parte dele foi mantida
+        if self.fluxo:
+            fluxo = self.fluxo
+            mantidas = 'amostra aleatória de' if fluxo['amostrado'] else 'primeiras'
+            partes += [
+                "## 📜 Arquivo de Origem Completo (lido em blocos)\n\n",
+                f"- **Linhas no Arquivo**: {fluxo['linhas']:,} ({mantidas} {fluxo['linhas_mantidas']:,} carregadas)\n",
+                f"- **Colunas no Arquivo**: {fluxo['colunas']}\n",
+                f"- **Valores Ausentes**: {fluxo['ausentes']}\n\n"
+            ]
+            tabela = fluxo['numericas']
+            if tabela['coluna']:
+                partes.append("| Coluna | Contagem | Média | Desvio Padrão | Mín | Máx |\n|---|---|---|---|---|---|\n")
+                for i, col in enumerate(tabela['coluna']):
+                    partes.append(f"| {col} | {tabela['contagem'][i]:,} | {tabela['media'][i]:.4f} | {tabela['desvio_padrao'][i]:.4f} | "
+                                  f"{tabela['min'][i]:.4f} | {tabela['max'][i]:.4f} |\n")
+                partes.append("\n")
+        
+        partes.append("## 🔧 Resumo de Tipos de Dados\n\n")
+        for tipo, contagem in visao['contagem_tipos'].items():
+            if contagem > 0:
+                partes.append(f"- **{tipo}**: {contagem} colunas\n")
+        partes.append("\n")
+        
+        tabela = self.numericas
+        if tabela['coluna']:
+            partes.append("## 🔢 Colunas Numéricas\n\n")
+            for i, col in enumerate(tabela['coluna']):
+                partes += [
+                    f"### 📈 {col}\n\n",
+                    f"- **Média**: {tabela['media'][i]:.2f}\n",
+                    f"- **Mediana**: {tabela['mediana'][i]:.2f}\n",
+                    f"- **Variância**: {tabela['variancia'][i]:.2f}\n",
+                    f"- **Desvio Padrão**: {tabela['desvio_padrao'][i]:.2f}\n",
+                    f"- **Mínimo**: {tabela['minimo'][i]:.2f}\n",
+                    f"- **Máximo**: {tabela['maximo'][i]:.2f}\n",
+                    f"- **Intervalo**: {tabela['maximo'][i] - tabela['minimo'][i]:.2f}\n",
+                    f"- **Valores Ausentes**: {int(tabela['ausentes'][i])}\n",
+                    f"- **Percentil 05**: {tabela['p05'][i]:.2f}\n",
+                    f"- **Percentil 25**: {tabela['p25'][i]:.2f}\n",
+                    f"- **Percentil 75**: {tabela['p75'][i]:.2f}\n",
+                    f"- **Percentil 95**: {tabela['p95'][i]:.2f}\n",
+                    f"- **IQR**: {tabela['p75'][i] - tabela['p25'][i]:.2f}\n"
+                ]
+                if tabela['media'][i] != 0:
+                    partes.append(f"- **Coeficiente de Variação**: {tabela['desvio_padrao'][i] / tabela['media'][i] * 100:.2f}%\n")
+                partes += [
+                    f"- **Curtose**: {tabela['curtose'][i]:.2f}\n",
+                    f"- **Assimetria**: {tabela['assimetria'][i]:.2f}\n\n"
+                ]
+        
+        tabela = self.categoricas
+        if tabela['coluna']:
+            partes.append("## 📝 Colunas Categóricas\n\n")
+            for i, col in enumerate(tabela['coluna']):
+                partes += [
+                    f"### 🏷️ {col}\n\n",
+                    f"- **Valores Únicos**: {tabela['unicos'][i]}\n",
+                    f"- **Valores Ausentes**: {tabela['ausentes'][i]}\n",
+                    f"- **3 Valores Principais**:\n"
+                ]
+                partes += [f"  - `{valor}`: {contagem} ocorrências\n" for valor, contagem in tabela['principais'][i]]
+                partes.append("\n")
+        
+        tabela = self.booleanas
+        if tabela['coluna']:
+            partes.append("## ✅ Colunas Verdadeiro/Falso\n\n")
+            for i, col in enumerate(tabela['coluna']):
+                partes += [f"### 🔘 {col}\n\n", f"- **Distribuição**:\n"]
+                partes += [f"  - `{valor}`: {contagem} ({percentual:.1f}%)\n" for valor, contagem, percentual in tabela['valores'][i]]
+                partes += [
+                    f"- **Variância**: {tabela['variancia'][i]:.2f}\n",
+                    f"- **Desvio Padrão**: {tabela['desvio_padrao'][i]:.2f}\n",
+                    f"- **Valores Ausentes**: {tabela['ausentes'][i]}\n\n"
+                ]
+        
+        self._renderizacoes['markdown'] = ''.join(partes)
+        return self._renderizacoes['markdown']
+
+    def para_prompt(self) -> str:
+        """Versão compacta para o prompt do LLM: uma linha de tabela por coluna em vez de um item por estatística"""
+        if 'prompt' in self._renderizacoes:
+            return self._renderizacoes['prompt']
+        
+        visao = self.visao_geral
+        linhas = [
+            f"Linhas: {visao['linhas']:,} | Colunas: {visao['colunas']} | Valores ausentes: {visao['ausentes']:,} | "
+            f"Linhas duplicadas: {visao['linhas_duplicadas']:,}",
+            "Tipos de coluna: " + ", ".join(f"{tipo} {contagem}" for tipo, contagem in visao['contagem_tipos'].items() if contagem)
+        ]
+        if self.fluxo:
+            mantidas = 'uma amostra aleatória de' if self.fluxo['amostrado'] else 'as primeiras'
+            linhas.append(f"Arquivo de origem: {self.fluxo['linhas']:,} linhas, {self.fluxo['colunas']} colunas; "
+                          f"as estatísticas abaixo cobrem {mantidas} {self.fluxo['linhas_mantidas']:,} linhas")
+        
+        tabela = self.numericas
+        if tabela['coluna']:
+            estatisticas = ['media', 'desvio_padrao', 'minimo', 'p05', 'p25', 'mediana', 'p75', 'p95', 'maximo', 'assimetria', 'curtose']
+            linhas += ["", "Colunas numéricas:", "| coluna | " + " | ".join(estatisticas) + " | ausentes |",
+                       "|---" * (len(estatisticas) + 2) + "|"]
+            for i, col in enumerate(tabela['coluna']):
+                valores = " | ".join(f"{tabela[est][i]:.4g}" for est in estatisticas)
+                linhas.append(f"| {col} | {valores} | {int(tabela['ausentes'][i])} |")
+        
+        tabela = self.categoricas
+        if tabela['coluna']:
+            linhas += ["", "Colunas categóricas:", "| coluna | únicos | ausentes | principais valores (contagem) |", "|---|---|---|---|"]
+            for i, col in enumerate(tabela['coluna']):
+                principais = ", ".join(f"{valor} ({contagem})" for valor, contagem in tabela['principais'][i])
+                linhas.append(f"| {col} | {tabela['unicos'][i]} | {tabela['ausentes'][i]} | {principais} |")
+        
+        tabela = self.booleanas
+        if tabela['coluna']:
+            linhas += ["", "Colunas Verdadeiro/Falso:", "| coluna | distribuição | ausentes |", "|---|---|---|"]
+            for i, col in enumerate(tabela['coluna']):
+                distribuicao = ", ".join(f"{valor} {percentual:.1f}%" for valor, _, percentual in tabela['valores'][i])
+                linhas.append(f"| {col} | {distribuicao} | {tabela['ausentes'][i]} |")
+        
+        self._renderizacoes['prompt'] = "\n".join(linhas) + "\n"
+        return self._renderizacoes['prompt']
+
+    def para_dict(self) -> Dict[str, Any]:
+        """Forma simples e compatível com JSON do modelo (arrays viram listas, NaN vira None)"""
+        def simples(valor):
+            if isinstance(valor, dict):
+                return {chave: simples(item) for chave, item in valor.items()}
+            if isinstance(valor, np.ndarray):
+                valor = valor.tolist()
+            if isinstance(valor, (list, tuple)):
+                return [simples(item) for item in valor]
+            if isinstance(valor, float) and not np.isfinite(valor):
+                return None
+            return valor.item() if isinstance(valor, np.generic) else valor
+        
+        return simples({'visao_geral': self.visao_geral, 'numericas': self.numericas, 'categoricas': self.categoricas,
+                        'booleanas': self.booleanas, 'fluxo': self.fluxo})
+
+    @classmethod
+    def de_dict(cls, dados: Dict[str, Any]) -> 'EstatisticasDescritivas':
+        """Reconstruir um modelo a partir da saída de para_dict"""
+        def arrays(tabela, aninhadas):
+            return {chave: (valor if chave in ('coluna',) + aninhadas else np.array(valor, dtype='float64'))
+                    for chave, valor in tabela.items()}
+        
+        numericas = arrays(dados['numericas'], ())
+        categoricas = arrays(dados['categoricas'], ('principais',))
+        categoricas['principais'] = [[tuple(item) for item in principais] for principais in categoricas['principais']]
+        booleanas = arrays(dados['booleanas'], ('valores',))
+        booleanas['valores'] = [[tuple(item) for item in valores] for valores in booleanas['valores']]
+        for tabela, contagens in [(numericas, ['ausentes']), (categoricas, ['unicos', 'ausentes']), (booleanas, ['ausentes'])]:
+            for chave in contagens:
+                if chave in tabela:
+                    tabela[chave] = tabela[chave].astype(np.int64)
+        
+        fluxo = dados['fluxo']
+        if fluxo:
+            fluxo = dict(fluxo, numericas=arrays(fluxo['numericas'], ()))
+            fluxo['numericas']['contagem'] = fluxo['numericas']['contagem'].astype(np.int64)
+        return cls(dados['visao_geral'], numericas, categoricas, booleanas, fluxo)
+
+    def para_json(self) -> str:
+        """Texto JSON de para_dict, para caches e downloads"""
+        if 'json' not in self._renderizacoes:
+            self._renderizacoes['json'] = json.dumps(self.para_dict(), ensure_ascii=False)
+        return self._renderizacoes['json']
+
+    def cartoes_metricas(self, coluna: str) -> Dict[str, str]:
+        """Pares rótulo -> valor formatado exibidos como cartões de métricas de uma coluna"""
+        chave = ('cartoes', coluna)
+        if chave in self._renderizacoes:
+            return self._renderizacoes[chave]
+        
+        cartoes = {}
+        i = self._posicao('numericas', coluna)
+        if i is not None:
+            tabela = self.numericas
+            media, desvio_padrao = tabela['media'][i], tabela['desvio_padrao'][i]
+            cartoes = {
+                "Média": f"{media:.2f}",
+                "Mediana": f"{tabela['mediana'][i]:.2f}",
+                "Variância": f"{tabela['variancia'][i]:.2f}",
+                "Desvio Padrão": f"{desvio_padrao:.2f}",
+                "Mínimo": f"{tabela['minimo'][i]:.2f}",
+                "Máximo": f"{tabela['maximo'][i]:.2f}",
+                "Valores Ausentes": f"{int(tabela['ausentes'][i])}",
+                "Percentil 5": f"{tabela['p05'][i]:.2f}",
+                "Percentil 25 (Q1)": f"{tabela['p25'][i]:.2f}",
+                "Percentil 75 (Q3)": f"{tabela['p75'][i]:.2f}",
+                "Percentil 95": f"{tabela['p95'][i]:.2f}",
+                "IQR (Q3 - Q1)": f"{tabela['p75'][i] - tabela['p25'][i]:.2f}",
+                "Coeficiente de Variação (CV)": f"{desvio_padrao / media * 100:.2f}%" if media != 0 else "Indefinido",
+                "Curtose": f"{tabela['curtose'][i]:.2f}",
+                "Assimetria": f"{tabela['assimetria'][i]:.2f}"
+            }
+        i = self._posicao('categoricas', coluna)
+        if i is not None:
+            cartoes = {"Categorias Únicas": f"{self.categoricas['unicos'][i]}", "Valores Ausentes": f"{self.categoricas['ausentes'][i]}"}
+        i = self._posicao('booleanas', coluna)
+        if i is not None:
+            cartoes = {f"Contagem {valor}": f"{contagem} ({percentual:.1f}%)" for valor, contagem, percentual in self.booleanas['valores'][i]}
+        
+        self._renderizacoes[chave] = cartoes
+        return cartoes
+
+class UsoLLM:
+    """
+    Todas as chamadas ao LLM feitas por um analisador (uma sessão do app): tokens, tempo até o primeiro byte,
+    latência, custo e modelo, marcadas com a assinatura do conjunto de dados analisado.
+    """
+
+    def __init__(self):
+        self.chamadas = []
+
+    def registrar(self, chamada: Dict[str, Any]):
+        """Acrescentar uma chamada (um dict com as chaves de CAMPOS_CHAMADA_LLM)"""
+        self.chamadas.append(chamada)
+
+    def para_tabela(self) -> pd.DataFrame:
+        """Uma linha por chamada, da mais antiga para a mais recente"""
+        return pd.DataFrame(self.chamadas, columns=CAMPOS_CHAMADA_LLM)
+
+    @staticmethod
+    def _agregar(chamadas: pd.DataFrame) -> Dict[str, Any]:
+        tempo_geracao = (chamadas['latencia'] - chamadas['tempo_primeiro_byte']).where(chamadas['tokens_resposta'].notna()).sum()
+        return {
+            'chamadas': len(chamadas),
+            'chamadas_falhas': int((chamadas['resultado'] == 'falhou').sum()),
+            'chamadas_canceladas': int((chamadas['resultado'] == 'cancelada').sum()),
+            'tokens_prompt': int(chamadas['tokens_prompt'].sum()),
+            'tokens_resposta': int(chamadas['tokens_resposta'].sum()),
+            'custo': float(chamadas['custo'].sum(min_count=1)) if chamadas['custo'].notna().any() else None,
+            'latencia': float(chamadas['latencia'].sum()),
+            'latencia_media': float(chamadas['latencia'].mean()) if len(chamadas) else None,
+            'primeiro_byte_medio': float(chamadas['tempo_primeiro_byte'].mean()) if chamadas['tempo_primeiro_byte'].notna().any() else None,
+            'tokens_resposta_por_segundo': float(chamadas['tokens_resposta'].sum() / tempo_geracao) if tempo_geracao > 0 else None
+        }
+
+    def totais(self, conjunto: str = None) -> Dict[str, Any]:
+        """Totais da sessão, ou das chamadas feitas para um conjunto de dados"""
+        chamadas = self.para_tabela()
+        if conjunto is not None:
+            chamadas = chamadas[chamadas['conjunto'] == conjunto]
+        return self._agregar(chamadas)
+
+    def por_conjunto(self) -> pd.DataFrame:
+        """Totais por conjunto de dados, na ordem em que cada conjunto foi analisado pela primeira vez"""
+        chamadas = self.para_tabela()
+        linhas = [{'conjunto': conjunto, **self._agregar(grupo)} for conjunto, grupo in chamadas.groupby('conjunto', sort=False, dropna=False)]
+        return pd.DataFrame(linhas, columns=['conjunto', 'chamadas', 'chamadas_falhas', 'chamadas_canceladas', 'tokens_prompt', 'tokens_resposta', 'custo',
+                                             'latencia', 'latencia_media', 'primeiro_byte_medio', 'tokens_resposta_por_segundo'])
+
+class CacheConjuntosCompartilhado:
+    """
+    Armazenamento por processo dos conjuntos carregados, indexado pelo hash do conteúdo enviado (e das opções de carga),
+    para que sessões que enviam o mesmo arquivo compartilhem um único DataFrame, seu perfil e os resultados de IA calculados.
+    As entradas compartilhadas são somente leitura. As sessões as seguram via adquirir()/incluir() até liberar(); as que
+    ninguém segura saem, as usadas há mais tempo primeiro, quando os DataFrames passam do orçamento de memória.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES_CACHE_COMPARTILHADO):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def chave_conteudo(origem, *opcoes) -> str:
+        """Hash dos bytes de um arquivo (caminho ou objeto de arquivo, rebobinado depois) e das opções com que é carregado"""
+        resumo = hashlib.blake2b(digest_size=16)
+        with contextlib.ExitStack() as pilha:
+            if isinstance(origem, (str, os.PathLike)):
+                fluxo = pilha.enter_context(open(origem, 'rb'))
+            else:
+                fluxo = origem
+                posicao = fluxo.tell()
+                fluxo.seek(0)
+                pilha.callback(fluxo.seek, posicao)
+            for bloco in iter(lambda: fluxo.read(BYTES_BLOCO_HASH), b''):
+                resumo.update(bloco)
+        resumo.update(repr(opcoes).encode('utf-8'))
+        return resumo.hexdigest()
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entrada['bytes'] for entrada in self._entradas.values())
+
+    def adquirir(self, chave: str) -> Optional[Dict[str, Any]]:
+        """Tomar uma referência a um conjunto compartilhado (None quando não está no cache)"""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                entrada['referencias'] += 1
+                self._entradas.move_to_end(chave)
+        METRICAS.incrementar('consultas_cache_total', cache='conjunto_compartilhado', resultado='acerto' if entrada is not None else 'falha')
+        return entrada
+
+    def incluir(self, chave: str, df: pd.DataFrame, perfil: PerfilConjuntoDados, perfil_fluxo: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Compartilhar um conjunto recém-carregado, segurando uma referência a ele (vale a entrada que outra sessão incluiu antes)"""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                entrada = {'df': df, 'perfil': perfil, 'perfil_fluxo': perfil_fluxo, 'resultados': {}, 'referencias': 0,
+                           'bytes': int(df.memory_usage(deep=True).sum())}
+                self._entradas[chave] = entrada
+            entrada['referencias'] += 1
+            self._entradas.move_to_end(chave)
+            self._despejar()
+        return entrada
+
+    def liberar(self, chave: str):
+        """Soltar uma referência; o conjunto segue no cache até o orçamento de memória precisar do espaço"""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                entrada['referencias'] = max(entrada['referencias'] - 1, 0)
+                self._despejar()
+
+    def resultados(self, chave: str, variante: Tuple) -> Optional[Dict[str, Any]]:
+        """Estatísticas e texto da IA calculados para um conjunto compartilhado com os mesmos modelos e contexto (uma cópia que cada sessão pode alterar)"""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            resultados = entrada['resultados'].get(variante) if entrada is not None else None
+        METRICAS.incrementar('consultas_cache_total', cache='resultados_compartilhados', resultado='acerto' if resultados is not None else 'falha')
+        return dict(resultados) if resultados is not None else None
+
+    def guardar_resultados(self, chave: str, variante: Tuple, resultados: Dict[str, Any]):
+        """Guardar as estatísticas e o texto da IA de resultados completos de um conjunto compartilhado para as outras sessões"""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None or resultados.get('cancelada'):
+                return
+            entrada['resultados'][variante] = {nome: resultados[nome] for nome in CHAVES_RESULTADO_COMPARTILHADO}
+
+    def _despejar(self):
+        # Chamado com a trava tomada; entradas ainda referenciadas nunca saem
+        total = self.total_bytes
+        for chave in [chave for chave, entrada in self._entradas.items() if entrada['referencias'] == 0]:
+            if total <= self.max_bytes:
+                break
+            total -= self._entradas.pop(chave)['bytes']
+            print(f"🧹 Conjunto compartilhado {chave[:12]} removido do cache")
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Entradas, entradas em uso, bytes ocupados e o orçamento"""
+        with self._trava:
+            return {'entradas': len(self._entradas),
+                    'referenciadas': sum(1 for entrada in self._entradas.values() if entrada['referencias']),
+                    'bytes': self.total_bytes, 'max_bytes': self.max_bytes}
+
+# Um armazenamento por processo, compartilhado por todas as sessões
+CACHE_COMPARTILHADO = CacheConjuntosCompartilhado()
+
 class AnalisadorChatBot:
-    def __init__(self, chave_api: str = None):
+    def __init__(self, chave_api: str = None, usar_arrow: bool = False, perfilador: str = None):
         if chave_api is None:
             self.chave_api = self.obter_chave_api_segura()
         else:
@@ -37,9 +1294,39 @@ class AnalisadorChatBot:
         }
         self.df = None
         self._cache_estatisticas = None
-        self._cache_tipos = None
+        # Agregados do DataFrame carregado, recriados quando outro é carregado
+        self._perfil = None
+        # Um único handle da pasta de trabalho Excel por upload, com planilhas em cache
+        self._arquivo_excel = None
+        self._origem_excel = None
+        self._cache_planilhas = {}
+        # Texto e datas em dtypes Arrow (string[pyarrow], timestamp[pyarrow]) para reduzir memória
+        self.usar_arrow = usar_arrow and PYARROW_DISPONIVEL
+        # Agregados do arquivo inteiro coletados ao ler JSON Lines em blocos
+        self.perfil_fluxo = None
+        # Tempos das etapas da última carga, que abrem os tempos da próxima análise
+        self.perfilador = perfilador
+        self.cronometro_carga = CronometroEtapas(perfilador)
+        # Tokens, latência e custo das chamadas ao LLM desta sessão
+        self.uso_llm = UsoLLM()
+        # Modelos consultados em ordem, e a espera por saída antes do hedge com o seguinte
+        self.modelos = [modelo.strip() for modelo in os.environ.get(VARIAVEL_MODELOS_LLM, '').split(',') if modelo.strip()] or list(MODELOS_LLM)
+        self.espera_hedge = ESPERA_HEDGE_SEGUNDOS
+        # Chave do conjunto compartilhado em uso, e o finalizador que o libera se este analisador sair com sua sessão
+        self.chave_compartilhada = None
+        self._liberar_compartilhado = None
+        # Expor as métricas do processo quando há uma porta configurada (o servidor sobe uma única vez)
+        if os.environ.get(VARIAVEL_PORTA_METRICAS):
+            METRICAS.servir(int(os.environ[VARIAVEL_PORTA_METRICAS]), os.environ.get(VARIAVEL_HOST_METRICAS) or HOST_PADRAO_METRICAS)
 
     # === MÉTODOS DE CONFIGURAÇÃO DA API ===
+    def __getstate__(self) -> Dict[str, Any]:
+        # A pasta de trabalho Excel aberta fica neste processo: uma cópia enviada a um processo de trabalho só precisa dos dados carregados
+        estado = self.__dict__.copy()
+        estado.update(_arquivo_excel=None, _origem_excel=None, _cache_planilhas={}, chave_compartilhada=None,
+                      _liberar_compartilhado=None)
+        return estado
+
     def obter_chave_api_segura(self) -> Optional[str]:
         """Obter chave API com segurança"""
         if STREAMLIT_DISPONIVEL:
@@ -125,30 +1412,183 @@ class AnalisadorChatBot:
         
         return df
 
+    def converter_para_arrow(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Converter colunas de texto e data/hora para dtypes Arrow"""
+        if not PYARROW_DISPONIVEL or df is None:
+            return df
+        
+        df = df.copy()
+        for col in df.columns:
+            serie = df[col]
+            if isinstance(serie.dtype, pd.ArrowDtype):
+                continue
+            
+            if pd.api.types.is_object_dtype(serie.dtype) or pd.api.types.is_string_dtype(serie.dtype):
+                # Apenas colunas de texto puro; objetos mistos permanecem como estão
+                if pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty'):
+                    df[col] = serie.astype('string[pyarrow]')
+            elif pd.api.types.is_datetime64_any_dtype(serie.dtype):
+                unidade = getattr(serie.dtype, 'unit', None) or np.datetime_data(serie.dtype)[0]
+                fuso = getattr(serie.dtype, 'tz', None)
+                df[col] = serie.astype(pd.ArrowDtype(pa.timestamp(unidade, tz=str(fuso) if fuso else None)))
+        
+        return df
+
+    def iniciar_cronometro_carga(self) -> CronometroEtapas:
+        """Iniciar os tempos de uma nova carga; a próxima análise continua a partir deles"""
+        self.cronometro_carga = CronometroEtapas(self.perfilador)
+        return self.cronometro_carga
+
     def carregar_dados(self, df: pd.DataFrame):
         """Carregar DataFrame no analisador"""
-        self.df = df
-        self.df = self.corrigir_tipos_incorretos(self.df)
+        # Quem lê o arquivo por conta própria mede a leitura numa etapa de carga aberta
+        if not self.cronometro_carga.em_andamento:
+            self.iniciar_cronometro_carga()
+        self.liberar_conjunto_compartilhado()
+        with self.cronometro_carga.etapa('correcao_tipos', perfilar=True):
+            self.df = self.corrigir_tipos_incorretos(df)
+        if self.usar_arrow:
+            with self.cronometro_carga.etapa('conversao_arrow'):
+                self.df = self.converter_para_arrow(self.df)
+        self.perfil_fluxo = None
         self._cache_estatisticas = None
-        self._cache_tipos = None
+        self._perfil = None
+
+    def usar_conjunto_compartilhado(self, chave: str) -> bool:
+        """Usar o conjunto que outra sessão carregou dos mesmos bytes; False quando não há nenhum no cache com essa chave"""
+        entrada = CACHE_COMPARTILHADO.adquirir(chave)
+        if entrada is None:
+            return False
+        self.liberar_conjunto_compartilhado()
+        self._adotar_compartilhado(chave, entrada)
+        print(f"♻️ Reutilizando conjunto compartilhado: {self.df.shape[0]} linhas, {self.df.shape[1]} colunas")
+        return True
+
+    def compartilhar_conjunto(self, chave: str):
+        """Oferecer o conjunto carregado às outras sessões com a chave (o hash do conteúdo enviado)"""
+        if self.df is None:
+            return
+        # Preenchidos enquanto só esta sessão segura o perfil
+        self.obter_perfil().aquecer()
+        self.obter_assinatura_conjunto()
+        entrada = CACHE_COMPARTILHADO.incluir(chave, self.df, self.obter_perfil(), self.perfil_fluxo)
+        # Outra sessão pode ter compartilhado os mesmos bytes nesse meio tempo: usar a cópia dela e soltar a nossa
+        self._adotar_compartilhado(chave, entrada)
+
+    def _adotar_compartilhado(self, chave: str, entrada: Dict[str, Any]):
+        if entrada['df'] is not self.df:
+            self._cache_estatisticas = None
+        self.df = entrada['df']
+        self._perfil = entrada['perfil']
+        self.perfil_fluxo = entrada['perfil_fluxo']
+        self.chave_compartilhada = chave
+        self._liberar_compartilhado = weakref.finalize(self, CACHE_COMPARTILHADO.liberar, chave)
+
+    def liberar_conjunto_compartilhado(self):
+        """Deixar de usar o conjunto compartilhado, se houver (ele segue no cache para as outras sessões)"""
+        if self._liberar_compartilhado is not None:
+            self._liberar_compartilhado()
+        self.chave_compartilhada = None
+        self._liberar_compartilhado = None
+
+    def obter_resultados_compartilhados(self, contexto_usuario: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Resultado da análise que outra sessão fez sobre este conjunto compartilhado com os mesmos modelos e contexto,
+        marcado 'reutilizado': suas estatísticas e texto da IA com o DataFrame e o perfil desta sessão, mas sem chamada
+        ao LLM nem tempos próprios
+        """
+        if self.chave_compartilhada is None:
+            return None
+        compartilhados = CACHE_COMPARTILHADO.resultados(self.chave_compartilhada, (tuple(self.modelos), contexto_usuario))
+        if compartilhados is None:
+            return None
+        return {'dataframe': self.df, 'perfil': self.obter_perfil(), **compartilhados,
+                'tempos': None, 'chamada_llm': None, 'cancelada': None, 'reutilizado': True}
+
+    def detectar_compressao(self, origem) -> Optional[str]:
+        """Detectar compressão gzip/bz2/xz/zstd de um caminho ou upload pelo nome ou assinatura"""
+        nome = origem if isinstance(origem, str) else getattr(origem, 'name', None)
+        if isinstance(nome, str):
+            ext = os.path.splitext(nome)[1].lower()
+            if ext in EXTENSOES_COMPRESSAO:
+                return EXTENSOES_COMPRESSAO[ext]
+        
+        try:
+            if isinstance(origem, str):
+                with open(origem, 'rb') as f:
+                    assinatura = f.read(6)
+            elif hasattr(origem, 'read') and hasattr(origem, 'seek'):
+                origem.seek(0)
+                assinatura = origem.read(6)
+                origem.seek(0)
+            else:
+                return None
+        except OSError:
+            return None
+        
+        for prefixo, compressao in ASSINATURAS_COMPRESSAO.items():
+            # Cabeçalhos bz2 trazem o dígito do tamanho de bloco após 'BZh'
+            if assinatura.startswith(prefixo) and (compressao != 'bz2' or assinatura[3:4].isdigit()):
+                return compressao
+        return None
+
+    def abrir_descomprimido(self, origem, compressao: str = None):
+        """
+        Abrir caminho ou upload como fluxo binário, descomprimindo gzip/bz2/xz/zstd sob demanda.
+        Uploads não são fechados quando o fluxo retornado é fechado.
+        """
+        compressao = compressao or self.detectar_compressao(origem)
+        if not isinstance(origem, str):
+            origem.seek(0)
+        
+        if compressao is None:
+            return open(origem, 'rb') if isinstance(origem, str) else origem
+        if compressao == 'gzip':
+            return gzip.open(origem, 'rb')
+        if compressao == 'bz2':
+            return bz2.open(origem, 'rb')
+        if compressao == 'xz':
+            return lzma.open(origem, 'rb')
+        if compressao == 'zstd':
+            if not ZSTANDARD_DISPONIVEL:
+                raise ImportError("zstandard é necessário para ler arquivos .zst")
+            bruto = open(origem, 'rb') if isinstance(origem, str) else origem
+            return zstandard.ZstdDecompressor().stream_reader(bruto, closefd=isinstance(origem, str))
+        raise ValueError(f"Compressão não suportada: {compressao}")
 
     def detectar_formato_arquivo(self, caminho_arquivo: str) -> str:
-        """Detectar formato do arquivo"""
-        _, ext = os.path.splitext(caminho_arquivo)
+        """Detectar formato do arquivo (olhando dentro de arquivos comprimidos)"""
+        base, ext = os.path.splitext(caminho_arquivo)
+        if ext.lower() in EXTENSOES_COMPRESSAO:
+            # dados.csv.gz -> .csv
+            ext = os.path.splitext(base)[1]
         ext = ext.lower()
         
         if ext == '.csv':
             return 'csv'
         elif ext in ['.xlsx', '.xls']:
             return 'excel'
+        elif ext in ['.jsonl', '.ndjson']:
+            return 'jsonl'
         elif ext == '.json':
-            return 'json'
+            return 'jsonl' if self._eh_json_linhas(caminho_arquivo) else 'json'
+        elif ext in ['.parquet', '.pq']:
+            return 'parquet'
+        elif ext in ['.feather', '.arrow', '.ipc']:
+            return 'feather'
         else:
             try:
-                with open(caminho_arquivo, 'r', encoding='utf-8') as f:
+                with self.abrir_descomprimido(caminho_arquivo) as f:
+                    assinatura = f.read(6)
+                if assinatura[:4] == b'PAR1':
+                    return 'parquet'
+                if assinatura == b'ARROW1':
+                    return 'feather'
+                
+                with self._abrir_texto_json(caminho_arquivo) as f:
                     primeira_linha = f.readline().strip()
                     if primeira_linha.startswith('{') or primeira_linha.startswith('['):
-                        return 'json'
+                        return 'jsonl' if self._eh_json_linhas(caminho_arquivo) else 'json'
                     elif ',' in primeira_linha:
                         return 'csv'
             except:
@@ -156,68 +1596,392 @@ class AnalisadorChatBot:
             
             return 'csv'
 
-    def carregar_e_previsualizar_dados(self, caminho_arquivo: str, nome_planilha: str = None) -> pd.DataFrame:
-        """Carregar arquivo CSV, Excel ou JSON"""
+    def _eh_json_linhas(self, caminho_arquivo: str) -> bool:
+        """Verificar se as duas primeiras linhas não vazias são objetos JSON independentes"""
+        try:
+            registros = []
+            with self._abrir_texto_json(caminho_arquivo) as f:
+                for linha in f:
+                    linha = linha.strip()
+                    if not linha:
+                        continue
+                    registros.append(json.loads(linha))
+                    if len(registros) == 2:
+                        break
+            return len(registros) == 2 and all(isinstance(registro, dict) for registro in registros)
+        except (ValueError, UnicodeDecodeError, OSError, EOFError):
+            return False
+
+    def obter_colunas_arquivo_colunar(self, origem, formato_arquivo: str) -> List[str]:
+        """Obter nomes das colunas de um Parquet/Feather sem ler os dados"""
+        if not PYARROW_DISPONIVEL:
+            raise ImportError("pyarrow é necessário para ler arquivos Parquet e Feather")
+        
+        origem = self._origem_colunar(origem)
+        if formato_arquivo == 'parquet':
+            return pq.read_schema(origem, memory_map=isinstance(origem, str)).names
+        with pa.ipc.open_file(origem) as leitor:
+            return leitor.schema.names
+
+    def ler_arquivo_colunar(self, origem, formato_arquivo: str, colunas: List[str] = None, max_linhas: int = None) -> pd.DataFrame:
+        """Ler Parquet ou Feather/Arrow IPC apenas com as colunas pedidas (caminhos são mapeados em memória)"""
+        if not PYARROW_DISPONIVEL:
+            raise ImportError("pyarrow é necessário para ler arquivos Parquet e Feather")
+        
+        origem = self._origem_colunar(origem)
+        mapear_memoria = isinstance(origem, str)
+        
+        if formato_arquivo == 'parquet':
+            arquivo_parquet = pq.ParquetFile(origem, memory_map=mapear_memoria)
+            if max_linhas is None:
+                tabela = arquivo_parquet.read(columns=colunas)
+            else:
+                # Ler somente os row groups necessários para cobrir max_linhas
+                grupos, linhas = [], 0
+                for i in range(arquivo_parquet.num_row_groups):
+                    if linhas >= max_linhas:
+                        break
+                    grupos.append(i)
+                    linhas += arquivo_parquet.metadata.row_group(i).num_rows
+                tabela = arquivo_parquet.read_row_groups(grupos, columns=colunas).slice(0, max_linhas)
+        elif formato_arquivo == 'feather':
+            if max_linhas is None:
+                tabela = feather.read_table(origem, columns=colunas, memory_map=mapear_memoria)
+            else:
+                if mapear_memoria:
+                    origem = pa.memory_map(origem)
+                with pa.ipc.open_file(origem) as leitor:
+                    lotes, linhas = [], 0
+                    for i in range(leitor.num_record_batches):
+                        if linhas >= max_linhas:
+                            break
+                        lote = leitor.get_batch(i)
+                        lotes.append(lote.select(colunas) if colunas else lote)
+                        linhas += lote.num_rows
+                    esquema = leitor.schema if not colunas else pa.schema([leitor.schema.field(c) for c in colunas])
+                    tabela = pa.Table.from_batches(lotes, schema=esquema).slice(0, max_linhas)
+        else:
+            raise ValueError(f"Formato colunar não suportado: {formato_arquivo}")
+        
+        return self._tabela_arrow_para_pandas(tabela)
+
+    def _origem_colunar(self, origem):
+        """Aceitar caminhos, bytes ou objetos de arquivo (ex.: uploads do Streamlit)"""
+        if not isinstance(origem, (bytes, bytearray)) and self.detectar_compressao(origem):
+            # Parquet/Feather exigem acesso aleatório: descomprimir uma vez em memória
+            with self.abrir_descomprimido(origem) as fluxo:
+                return pa.BufferReader(fluxo.read())
+        if isinstance(origem, str):
+            return origem
+        if isinstance(origem, (bytes, bytearray)):
+            return pa.BufferReader(origem)
+        if hasattr(origem, 'getvalue'):
+            return pa.BufferReader(origem.getvalue())
+        return origem
+
+    def _tabela_arrow_para_pandas(self, tabela) -> pd.DataFrame:
+        """Converter tabela Arrow para pandas, mantendo texto/datas em Arrow quando usar_arrow"""
+        mapeador_tipos = None
+        if self.usar_arrow:
+            def mapeador_tipos(tipo_arrow):
+                if pa.types.is_string(tipo_arrow) or pa.types.is_large_string(tipo_arrow) or pa.types.is_timestamp(tipo_arrow):
+                    return pd.ArrowDtype(tipo_arrow)
+                return None
+        return tabela.to_pandas(types_mapper=mapeador_tipos, split_blocks=True, self_destruct=True)
+
+    def ler_json_linhas(self, origem, tamanho_bloco: int = 10000, max_linhas: int = None, amostra_aleatoria: bool = False):
+        """
+        Ler JSON Lines (NDJSON) em blocos de tamanho fixo.
+        Objetos aninhados viram colunas com ponto, como nos arrays JSON.
+        Cada bloco atualiza o perfil do arquivo inteiro; só as primeiras max_linhas são mantidas,
+        ou, com amostra_aleatoria, uma amostra uniforme de max_linhas de todo o arquivo.
+        """
+        with self._abrir_texto_json(origem) as texto, pd.read_json(texto, lines=True, chunksize=tamanho_bloco) as leitor:
+            return self._coletar_blocos(map(self._achatar_bloco_json, leitor), max_linhas, amostra_aleatoria)
+
+    def _achatar_bloco_json(self, bloco: pd.DataFrame) -> pd.DataFrame:
+        """Achatar os objetos aninhados de um bloco de JSON Lines em colunas com ponto, como _achatar_registro_json"""
+        colunas, achatado = [], False
+        for coluna in bloco.columns:
+            valores = bloco[coluna]
+            aninhados = valores.map(lambda valor: isinstance(valor, dict)) if valores.dtype == object else None
+            if aninhados is None or not aninhados.any():
+                colunas.append(valores)
+                continue
+            achatado = True
+            # Escalares misturados a objetos mantêm sua coluna, ao lado dos subcampos do objeto
+            if valores[~aninhados].notna().any():
+                colunas.append(valores.where(~aninhados))
+            colunas.append(pd.DataFrame([self._achatar_registro_json(valor, prefixo=f"{coluna}.") if eh_objeto else {}
+                                         for valor, eh_objeto in zip(valores, aninhados)], index=bloco.index))
+        return pd.concat(colunas, axis=1) if achatado else bloco
+
+    def _coletar_blocos(self, blocos, max_linhas: int = None, amostra_aleatoria: bool = False):
+        """Alimentar o perfil em fluxo com os blocos e manter as primeiras max_linhas (ou uma amostra de reservatório)"""
+        reservatorio = AmostraReservatorio(max_linhas) if amostra_aleatoria and max_linhas is not None else None
+        perfil = {'linhas': 0, 'blocos': 0, 'nao_nulos': pd.Series(dtype='int64'), 'numericas': {}, 'amostrado': reservatorio is not None}
+        blocos_mantidos, linhas_mantidas = [], 0
+        
+        for bloco in blocos:
+            self._atualizar_perfil_fluxo(perfil, bloco)
+            
+            if reservatorio is not None:
+                reservatorio.adicionar(bloco)
+            elif max_linhas is None or linhas_mantidas < max_linhas:
+                if max_linhas is not None:
+                    bloco = bloco.iloc[:max_linhas - linhas_mantidas]
+                # Texto compactado bloco a bloco, antes de ler o próximo
+                blocos_mantidos.append(self.converter_para_arrow(bloco) if self.usar_arrow else bloco)
+                linhas_mantidas += len(bloco)
+        
+        if reservatorio is not None and reservatorio.linhas_vistas:
+            amostra = reservatorio.resultado()
+            blocos_mantidos = [self.converter_para_arrow(amostra) if self.usar_arrow else amostra]
+        
+        if not blocos_mantidos:
+            return pd.DataFrame(), perfil
+        
+        # Colunas ausentes ou nulas em algum bloco voltam como object; restaurar o dtype
+        df = pd.concat(blocos_mantidos, ignore_index=True).infer_objects()
+        return df, perfil
+
+    def carregar_json_linhas(self, origem, tamanho_bloco: int = 10000, max_linhas: int = None,
+                             amostra_aleatoria: bool = False) -> pd.DataFrame:
+        """Carregar JSON Lines (caminho ou upload) bloco a bloco no analisador"""
+        df, perfil = self.ler_json_linhas(origem, tamanho_bloco=tamanho_bloco, max_linhas=max_linhas,
+                                          amostra_aleatoria=amostra_aleatoria)
+        self.carregar_dados(df)
+        self.perfil_fluxo = perfil
+        return self.df
+
+    def eh_array_json(self, origem) -> bool:
+        """Verificar se um arquivo ou upload JSON é um array no nível superior"""
+        with self._abrir_texto_json(origem) as texto:
+            inicio = texto.read(1024).lstrip()
+        return inicio.startswith('[')
+
+    def ler_array_json(self, origem, campos: List[str] = None, tamanho_bloco: int = 10000, max_linhas: int = None,
+                       amostra_aleatoria: bool = False):
+        """
+        Ler os registros de um array JSON em fluxo, achatando objetos aninhados em colunas
+        com ponto (como json_normalize). Com campos (ex.: ['usuario.nome', 'pedido'])
+        apenas esses caminhos e seus subcampos são montados.
+        """
+        manter, ancestrais = self._filtro_campos_json(campos)
+        
+        def blocos_registros():
+            linhas = []
+            with self._abrir_texto_json(origem) as texto:
+                for registro in self._iterar_array_json(texto):
+                    if not isinstance(registro, dict):
+                        registro = {'valor': registro}
+                    linhas.append(self._achatar_registro_json(registro, manter, ancestrais))
+                    if len(linhas) == tamanho_bloco:
+                        yield pd.DataFrame(linhas)
+                        linhas = []
+            if linhas:
+                yield pd.DataFrame(linhas)
+        
+        return self._coletar_blocos(blocos_registros(), max_linhas, amostra_aleatoria)
+
+    def carregar_array_json(self, origem, campos: List[str] = None, tamanho_bloco: int = 10000, max_linhas: int = None,
+                            amostra_aleatoria: bool = False) -> pd.DataFrame:
+        """Carregar um array JSON no analisador, achatando os registros em fluxo"""
+        df, perfil = self.ler_array_json(origem, campos=campos, tamanho_bloco=tamanho_bloco, max_linhas=max_linhas,
+                                         amostra_aleatoria=amostra_aleatoria)
+        self.carregar_dados(df)
+        self.perfil_fluxo = perfil
+        return self.df
+
+    def obter_campos_array_json(self, origem, registros_amostra: int = 1000) -> List[str]:
+        """Listar os caminhos achatados encontrados nos primeiros registros de um array JSON"""
+        campos = {}
+        with self._abrir_texto_json(origem) as texto:
+            for i, registro in enumerate(self._iterar_array_json(texto)):
+                if i >= registros_amostra:
+                    break
+                if isinstance(registro, dict):
+                    campos.update(dict.fromkeys(self._achatar_registro_json(registro)))
+        return list(campos)
+
+    def _abrir_texto_json(self, origem):
+        """Abrir um caminho ou rebobinar um upload e decodificá-lo como texto UTF-8 (descomprimindo se preciso)"""
+        comprimido = self.detectar_compressao(origem) is not None
+        if isinstance(origem, str):
+            if not comprimido:
+                return open(origem, 'r', encoding='utf-8')
+            return io.TextIOWrapper(self.abrir_descomprimido(origem), encoding='utf-8')
+        origem.seek(0)
+        fluxo = self.abrir_descomprimido(origem) if comprimido else origem
+        # O upload continua aberto: leituras seguintes o rebobinam novamente
+        return contextlib.nullcontext(codecs.getreader('utf-8')(fluxo))
+
+    def _iterar_array_json(self, texto, tamanho_bloco: int = 1 << 20):
+        """Produzir os elementos de um array JSON mantendo cerca de um bloco em memória"""
+        decodificador = json.JSONDecoder()
+        separadores = re.compile(r'[\s,]*')
+        buffer = texto.read(tamanho_bloco).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError("Esperado um array JSON no nível superior")
+        pos = 1
+        
+        while True:
+            pos = separadores.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                return
+            try:
+                elemento, fim = decodificador.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Elemento cortado no limite do bloco: manter o restante e continuar lendo
+                bloco = texto.read(tamanho_bloco)
+                if not bloco:
+                    raise
+                buffer = buffer[pos:] + bloco
+                pos = 0
+                continue
+            yield elemento
+            pos = fim
+
+    def _filtro_campos_json(self, campos: List[str] = None):
+        """Separar caminhos JSON em campos mantidos e objetos pais a percorrer"""
+        if not campos:
+            return None, None
+        manter = {campo[2:] if campo.startswith('$.') else campo for campo in campos}
+        ancestrais = set()
+        for campo in manter:
+            partes = campo.split('.')
+            ancestrais.update('.'.join(partes[:i]) for i in range(1, len(partes)))
+        return manter, ancestrais
+
+    def _achatar_registro_json(self, registro: Dict[str, Any], manter=None, ancestrais=None, prefixo: str = '') -> Dict[str, Any]:
+        """Achatar objetos aninhados em chaves com ponto, ignorando caminhos fora de manter"""
+        plano = {}
+        for chave, valor in registro.items():
+            caminho = f"{prefixo}{chave}"
+            if manter is not None and caminho not in manter:
+                if caminho in ancestrais and isinstance(valor, dict):
+                    plano.update(self._achatar_registro_json(valor, manter, ancestrais, caminho + '.'))
+                continue
+            if isinstance(valor, dict):
+                # Tudo abaixo de um caminho mantido é mantido; objetos vazios não geram coluna
+                plano.update(self._achatar_registro_json(valor, prefixo=caminho + '.'))
+            else:
+                plano[caminho] = valor
+        return plano
+
+    def _atualizar_perfil_fluxo(self, perfil: Dict[str, Any], bloco: pd.DataFrame):
+        """Somar um bloco às contagens de linhas, não nulos e momentos das colunas numéricas"""
+        perfil['linhas'] += len(bloco)
+        perfil['blocos'] += 1
+        perfil['nao_nulos'] = perfil['nao_nulos'].add(bloco.count(), fill_value=0).astype('int64')
+        
+        for col in bloco.select_dtypes(include='number').columns:
+            valores = bloco[col].dropna().to_numpy(dtype='float64')
+            if len(valores) == 0:
+                continue
+            
+            # Atualização paralela de contagem/média/M2 (Chan et al.), estável com muitos blocos
+            est = perfil['numericas'].setdefault(col, {'contagem': 0, 'media': 0.0, 'm2': 0.0, 'min': np.inf, 'max': -np.inf})
+            contagem, media = len(valores), valores.mean()
+            m2 = ((valores - media) ** 2).sum()
+            total = est['contagem'] + contagem
+            delta = media - est['media']
+            est['media'] += delta * contagem / total
+            est['m2'] += m2 + delta ** 2 * est['contagem'] * contagem / total
+            est['contagem'] = total
+            est['min'] = min(est['min'], valores.min())
+            est['max'] = max(est['max'], valores.max())
+
+    def carregar_e_previsualizar_dados(self, caminho_arquivo: str, nome_planilha: str = None,
+                                       colunas: List[str] = None, max_linhas: int = None,
+                                       amostra_aleatoria: bool = False) -> pd.DataFrame:
+        """Carregar arquivo CSV, Excel, JSON, Parquet ou Feather"""
         try:
             formato_arquivo = self.detectar_formato_arquivo(caminho_arquivo)
+            self.liberar_conjunto_compartilhado()
+            perfil_fluxo = None
+            cronometro = self.iniciar_cronometro_carga()
             
-            if formato_arquivo == 'csv':
-                self.df = pd.read_csv(caminho_arquivo)
-            elif formato_arquivo == 'excel':
-                if nome_planilha:
-                    self.df = pd.read_excel(caminho_arquivo, sheet_name=nome_planilha)
+            with cronometro.etapa('carga', perfilar=True):
+                if formato_arquivo == 'csv':
+                    with self.abrir_descomprimido(caminho_arquivo) as fluxo:
+                        self.df = pd.read_csv(fluxo)
+                elif formato_arquivo == 'excel':
+                    if self._arquivo_excel is None or self._origem_excel != caminho_arquivo:
+                        self.abrir_pasta_trabalho_excel(caminho_arquivo)
+                    self.df = self.ler_planilha_excel(nome_planilha)
+                elif formato_arquivo == 'json':
+                    if self.eh_array_json(caminho_arquivo):
+                        # Arrays de registros são achatados em fluxo, sem carregar o documento inteiro
+                        self.df, perfil_fluxo = self.ler_array_json(caminho_arquivo, campos=colunas, max_linhas=max_linhas,
+                                                                        amostra_aleatoria=amostra_aleatoria)
+                    else:
+                        with self._abrir_texto_json(caminho_arquivo) as texto:
+                            self.df = pd.read_json(texto)
+                elif formato_arquivo == 'jsonl':
+                    self.df, perfil_fluxo = self.ler_json_linhas(caminho_arquivo, max_linhas=max_linhas,
+                                                                   amostra_aleatoria=amostra_aleatoria)
+                elif formato_arquivo in ['parquet', 'feather']:
+                    self.df = self.ler_arquivo_colunar(caminho_arquivo, formato_arquivo, colunas=colunas, max_linhas=max_linhas)
                 else:
-                    self.df = pd.read_excel(caminho_arquivo)
-            elif formato_arquivo == 'json':
-                self.df = pd.read_json(caminho_arquivo)
-            else:
-                raise ValueError(f"Formato não suportado: {formato_arquivo}")
+                    raise ValueError(f"Formato não suportado: {formato_arquivo}")
             
-            self.df = self.corrigir_tipos_incorretos(self.df)
+            with cronometro.etapa('correcao_tipos', perfilar=True):
+                self.df = self.corrigir_tipos_incorretos(self.df)
+            if self.usar_arrow:
+                with cronometro.etapa('conversao_arrow'):
+                    self.df = self.converter_para_arrow(self.df)
+            self.perfil_fluxo = perfil_fluxo
             self._cache_estatisticas = None
-            self._cache_tipos = None
+            self._perfil = None
             
             return self.df
             
         except Exception as e:
             if formato_arquivo == 'json':
                 try:
-                    with open(caminho_arquivo, 'r', encoding='utf-8') as f:
+                    with self._abrir_texto_json(caminho_arquivo) as f:
                         dados = json.load(f)
                     self.df = pd.json_normalize(dados)
                     self.df = self.corrigir_tipos_incorretos(self.df)
+                    if self.usar_arrow:
+                        self.df = self.converter_para_arrow(self.df)
+                    self.perfil_fluxo = None
                     self._cache_estatisticas = None
-                    self._cache_tipos = None
+                    self._perfil = None
                     return self.df
                 except Exception:
                     pass
             return None
 
     # === MÉTODOS DE ANÁLISE ESTATÍSTICA ===
+    def obter_perfil(self) -> Optional[PerfilConjuntoDados]:
+        """Obter o perfil compartilhado do DataFrame carregado, criado uma vez por conjunto de dados"""
+        if self.df is None:
+            return None
+        criado = self._perfil is not None and self._perfil.df is self.df
+        METRICAS.incrementar('consultas_cache_total', cache='perfil', resultado='acerto' if criado else 'falha')
+        if not criado:
+            # Predicados de tipo do pandas também reconhecem os dtypes Arrow
+            grupos = {
+                'Numérica': 'Numéricas', 'Categórica': 'Categóricas',
+                'Verdadeiro/Falso': 'Verdadeiro/Falso', 'Data/Hora': 'Data/Hora'
+            }
+            tipos_colunas = {grupo: [] for grupo in grupos.values()}
+            for col, tipo_dado in self.df.dtypes.items():
+                tipos_colunas[grupos[self._obter_tipo_dado_simples(tipo_dado)]].append(col)
+            self._perfil = PerfilConjuntoDados(self.df, tipos_colunas)
+        return self._perfil
+
     def obter_tipos_coluna_simples(self) -> Dict[str, List[str]]:
-        """Obter tipos de coluna simplificados (com cache)"""
-        if self._cache_tipos is not None:
-            return self._cache_tipos
-            
+        """Obter tipos de coluna simplificados (do perfil do conjunto de dados)"""
         if self.df is None:
             return {
                 'Numéricas': [], 'Categóricas': [], 
                 'Verdadeiro/Falso': [], 'Data/Hora': []
             }
         
-        colunas_numericas = self.df.select_dtypes(include=['int64', 'int32', 'int16', 'int8', 'float64', 'float32', 'float16']).columns.tolist()
-        colunas_categoricas = self.df.select_dtypes(include=['object', 'category', 'string']).columns.tolist()
-        colunas_booleanas = self.df.select_dtypes(include='bool').columns.tolist()
-        colunas_data_hora = self.df.select_dtypes(include=['datetime64', 'timedelta64']).columns.tolist()
-        
-        self._cache_tipos = {
-            'Numéricas': colunas_numericas,
-            'Categóricas': colunas_categoricas,
-            'Verdadeiro/Falso': colunas_booleanas,
-            'Data/Hora': colunas_data_hora
-        }
-        
-        return self._cache_tipos
+        return self.obter_perfil().tipos_colunas
 
     def obter_info_coluna_detalhada(self) -> pd.DataFrame:
         """Obter informações detalhadas sobre cada coluna"""
@@ -225,11 +1989,12 @@ class AnalisadorChatBot:
             return pd.DataFrame()
         
         info_colunas = []
+        contagem_ausentes = self.obter_perfil().contagem_ausentes
         
         for col in self.df.columns:
             tipo_col = self._obter_tipo_dado_simples(self.df[col].dtype)
-            contagem_nao_nulos = self.df[col].count()
-            contagem_nulos = self.df[col].isnull().sum()
+            contagem_nulos = contagem_ausentes[col]
+            contagem_nao_nulos = len(self.df) - contagem_nulos
             percentual_nulos = (contagem_nulos / len(self.df)) * 100 if len(self.df) > 0 else 0
             valores_unicos = self.df[col].nunique()
             
@@ -241,120 +2006,106 @@ class AnalisadorChatBot:
         
         return pd.DataFrame(info_colunas)
 
+    def obter_hashes_linhas(self, colunas: List[str] = None) -> np.ndarray:
+        """Obter um hash de 64 bits por linha (todas as colunas ou um subconjunto), calculado uma vez por DataFrame"""
+        if self.df is None:
+            return np.empty(0, dtype='uint64')
+        
+        # Guardados no perfil do conjunto de dados: um novo carregamento começa do zero
+        perfil = self.obter_perfil()
+        chave = tuple(colunas) if colunas else None
+        with perfil.trava:
+            if chave not in perfil.hashes_linhas:
+                perfil.hashes_linhas[chave] = self._calcular_hash_linhas(self.df[list(colunas)] if colunas else self.df)
+            return perfil.hashes_linhas[chave]
+
+    def obter_assinatura_conjunto(self) -> Optional[str]:
+        """Obter um hash do conteúdo do DataFrame carregado (valores, nomes e tipos das colunas), a partir dos hashes das linhas"""
+        if self.df is None:
+            return None
+        
+        perfil = self.obter_perfil()
+        with perfil.trava:
+            if perfil.assinatura is None:
+                resumo = hashlib.blake2b(digest_size=16)
+                resumo.update(self.obter_hashes_linhas().tobytes())
+                resumo.update(repr([(str(col), str(tipo)) for col, tipo in self.df.dtypes.items()]).encode('utf-8'))
+                perfil.assinatura = resumo.hexdigest()
+            return perfil.assinatura
+
+    def _calcular_hash_linhas(self, df: pd.DataFrame) -> np.ndarray:
+        """Calcular um uint64 por linha com o hashing vetorizado do pandas"""
+        if df.shape[1] == 0:
+            return np.zeros(len(df), dtype='uint64')
+        try:
+            return pd.util.hash_pandas_object(df, index=False).to_numpy()
+        except TypeError:
+            # Células não hasheáveis (listas, dicionários) usam sua representação em texto
+            return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+
+    def obter_mascara_duplicadas(self, colunas: List[str] = None, manter='first') -> np.ndarray:
+        """Máscara booleana de linhas duplicadas, com a mesma semântica de keep do DataFrame.duplicated"""
+        if self.df is None or self.df.shape[1] == 0:
+            return np.zeros(0 if self.df is None else len(self.df), dtype=bool)
+        return pd.Series(self.obter_hashes_linhas(colunas)).duplicated(keep=manter).to_numpy()
+
+    def contar_linhas_duplicadas(self, colunas: List[str] = None) -> int:
+        """Contar linhas que repetem uma linha anterior (todas as colunas ou um subconjunto)"""
+        return int(self.obter_mascara_duplicadas(colunas).sum())
+
+    def obter_linhas_duplicadas(self, colunas: List[str] = None) -> pd.DataFrame:
+        """Obter todas as linhas que pertencem a um grupo de duplicadas"""
+        if self.df is None:
+            return pd.DataFrame()
+        return self.df[self.obter_mascara_duplicadas(colunas, manter=False)]
+
+    def obter_grupos_duplicados(self, colunas: List[str] = None) -> pd.DataFrame:
+        """Obter um registro por grupo de linhas idênticas, com tamanho e posições, maiores primeiro"""
+        mascara = self.obter_mascara_duplicadas(colunas, manter=False)
+        posicoes = pd.Series(np.flatnonzero(mascara))
+        grupos = posicoes.groupby(self.obter_hashes_linhas(colunas)[mascara], sort=False)
+        
+        return pd.DataFrame({
+            'Hash': grupos.size().index,
+            'Quantidade': grupos.size().to_numpy(),
+            'Linhas': grupos.agg(list).to_numpy()
+        }).sort_values('Quantidade', ascending=False, kind='stable').reset_index(drop=True)
+
     def _obter_tipo_dado_simples(self, tipo_dado):
         """Converter tipo de dado para categoria simplificada"""
-        if np.issubdtype(tipo_dado, np.number):
-            return "Numérica"
-        elif np.issubdtype(tipo_dado, np.bool_):
+        if pd.api.types.is_bool_dtype(tipo_dado):
             return "Verdadeiro/Falso"
-        elif np.issubdtype(tipo_dado, np.datetime64) or np.issubdtype(tipo_dado, np.timedelta64):
+        elif pd.api.types.is_numeric_dtype(tipo_dado):
+            return "Numérica"
+        elif pd.api.types.is_datetime64_any_dtype(tipo_dado) or pd.api.types.is_timedelta64_dtype(tipo_dado):
             return "Data/Hora"
         else:
             return "Categórica"
 
+    def obter_estatisticas_descritivas(self, cronometro: CronometroEtapas = None, prazo: Prazo = None) -> Optional[EstatisticasDescritivas]:
+        """Estatísticas descritivas tipadas do conjunto carregado, renderizadas sob demanda (com cache)"""
+        if self.df is None:
+            return None
+        METRICAS.incrementar('consultas_cache_total', cache='estatisticas',
+                             resultado='falha' if self._cache_estatisticas is None else 'acerto')
+        if self._cache_estatisticas is None:
+            cronometro = cronometro or CronometroEtapas()
+            with cronometro.etapa('tipos_colunas'):
+                perfil = self.obter_perfil()
+            prazo = prazo or Prazo()
+            prazo.verificar('duplicadas')
+            with cronometro.etapa('duplicadas'):
+                linhas_duplicadas = self.contar_linhas_duplicadas()
+            self._cache_estatisticas = EstatisticasDescritivas.de_perfil(
+                perfil, linhas_duplicadas, self.perfil_fluxo, cronometro=cronometro, prazo=prazo
+            )
+        return self._cache_estatisticas
+
     def gerar_estatisticas_descritivas(self) -> str:
-        """Gerar estatísticas descritivas abrangentes (com cache)"""
-        if self._cache_estatisticas is not None:
-            return self._cache_estatisticas
-            
+        """Gerar estatísticas descritivas abrangentes em Markdown"""
         if self.df is None:
             return "## ❌ Nenhum dado carregado\n\nPor favor, carregue um conjunto de dados primeiro."
-            
-        resumo_estatisticas = "# 📊 Relatório de Estatísticas Descritivas\n\n"
-        
-        # Visão Geral
-        resumo_estatisticas += "## 📋 Visão Geral do Conjunto de Dados\n\n"
-        resumo_estatisticas += f"- **Total de Linhas**: {self.df.shape[0]:,}\n"
-        resumo_estatisticas += f"- **Total de Colunas**: {self.df.shape[1]}\n"
-        resumo_estatisticas += f"- **Valores Ausentes**: {self.df.isnull().sum().sum()}\n"
-        resumo_estatisticas += f"- **Linhas Duplicadas**: {self.df.duplicated().sum()}\n\n"
-        
-        # Resumo de Tipos
-        resumo_estatisticas += "## 🔧 Resumo de Tipos de Dados\n\n"
-        tipos_simples = self.obter_tipos_coluna_simples()
-        
-        for tipo, colunas in tipos_simples.items():
-            if colunas:
-                resumo_estatisticas += f"- **{tipo}**: {len(colunas)} colunas\n"
-        resumo_estatisticas += "\n"
-        
-        # Colunas numéricas
-        if tipos_simples['Numéricas']:
-            resumo_estatisticas += "## 🔢 Colunas Numéricas\n\n"
-            for col in tipos_simples['Numéricas']:
-                resumo_estatisticas += self._gerar_estatisticas_numericas(col)
-        
-        # Colunas categóricas
-        if tipos_simples['Categóricas']:
-            resumo_estatisticas += "## 📝 Colunas Categóricas\n\n"
-            for col in tipos_simples['Categóricas']:
-                resumo_estatisticas += self._gerar_estatisticas_categoricas(col)
-        
-        # Colunas booleanas
-        if tipos_simples['Verdadeiro/Falso']:
-            resumo_estatisticas += "## ✅ Colunas Verdadeiro/Falso\n\n"
-            for col in tipos_simples['Verdadeiro/Falso']:
-                resumo_estatisticas += self._gerar_estatisticas_booleanas(col)
-        
-        self._cache_estatisticas = resumo_estatisticas
-        return resumo_estatisticas
-
-    def _gerar_estatisticas_numericas(self, col: str) -> str:
-        """Gerar estatísticas para coluna numérica"""
-        estatisticas = f"### 📈 {col}\n\n"
-        estatisticas += f"- **Média**: {self.df[col].mean():.2f}\n"
-        estatisticas += f"- **Mediana**: {self.df[col].median():.2f}\n"
-        estatisticas += f"- **Variância**: {self.df[col].var():.2f}\n"
-        estatisticas += f"- **Desvio Padrão**: {self.df[col].std():.2f}\n"
-        estatisticas += f"- **Mínimo**: {self.df[col].min():.2f}\n"
-        estatisticas += f"- **Máximo**: {self.df[col].max():.2f}\n"
-        estatisticas += f"- **Intervalo**: {self.df[col].max() - self.df[col].min():.2f}\n"
-        estatisticas += f"- **Valores Ausentes**: {self.df[col].isnull().sum()}\n"
-        estatisticas += f"- **Percentil 05**: {self.df[col].quantile(0.05):.2f}\n"
-        estatisticas += f"- **Percentil 25**: {self.df[col].quantile(0.25):.2f}\n"
-        estatisticas += f"- **Percentil 75**: {self.df[col].quantile(0.75):.2f}\n"
-        estatisticas += f"- **Percentil 95**: {self.df[col].quantile(0.95):.2f}\n"
-        estatisticas += f"- **IQR**: {self.df[col].quantile(0.75) - self.df[col].quantile(0.25):.2f}\n"
-        
-        media = self.df[col].mean()
-        if media != 0:
-            cv = (self.df[col].std() / media) * 100
-            estatisticas += f"- **Coeficiente de Variação**: {cv:.2f}%\n"
-        
-        estatisticas += f"- **Curtose**: {self.df[col].kurt():.2f}\n"
-        estatisticas += f"- **Assimetria**: {self.df[col].skew():.2f}\n\n"
-        
-        return estatisticas
-
-    def _gerar_estatisticas_categoricas(self, col: str) -> str:
-        """Gerar estatísticas para coluna categórica"""
-        estatisticas = f"### 🏷️ {col}\n\n"
-        estatisticas += f"- **Valores Únicos**: {self.df[col].nunique()}\n"
-        estatisticas += f"- **Valores Ausentes**: {self.df[col].isnull().sum()}\n"
-        estatisticas += f"- **3 Valores Principais**:\n"
-        
-        valores_principais = self.df[col].value_counts().head(3)
-        for valor, contagem in valores_principais.items():
-            estatisticas += f"  - `{valor}`: {contagem} ocorrências\n"
-        estatisticas += "\n"
-        
-        return estatisticas
-
-    def _gerar_estatisticas_booleanas(self, col: str) -> str:
-        """Gerar estatísticas para coluna booleana"""
-        estatisticas = f"### 🔘 {col}\n\n"
-        contagem_valores = self.df[col].value_counts()
-        percentual = self.df[col].value_counts(normalize=True) * 100
-        
-        estatisticas += f"- **Distribuição**:\n"
-        for val, contagem in contagem_valores.items():
-            estatisticas += f"  - `{val}`: {contagem} ({percentual[val]:.1f}%)\n"
-        
-        estatisticas += f"- **Variância**: {self.df[col].var():.2f}\n"
-        estatisticas += f"- **Desvio Padrão**: {self.df[col].std():.2f}\n"
-        estatisticas += f"- **Valores Ausentes**: {self.df[col].isnull().sum()}\n\n"
-        
-        return estatisticas
+        return self.obter_estatisticas_descritivas().para_markdown()
 
     # === MÉTODOS DE ANÁLISE COM IA ===
     def criar_prompt_analise(self, resumo_estatisticas: str, contexto_usuario: str = "") -> str:
@@ -409,10 +2160,89 @@ class AnalisadorChatBot:
         
         return prompt
 
-    def chamar_api_open_router(self, prompt: str) -> Optional[str]:
-        """Fazer chamada API para Open Router"""
+    def chamar_api_open_router(self, prompt: str, modelos: List[str] = None, prazo: Prazo = None) -> Optional[str]:
+        """
+        Fazer chamada API para Open Router, consultando os modelos em ordem (self.modelos por padrão).
+        Quando a requisição mais recente não transmitiu nada após self.espera_hedge segundos, um hedge vai para o
+        modelo seguinte; quando todas as requisições abertas falharam, o modelo seguinte é consultado como reserva.
+        A primeira resposta completa vence e as requisições ainda em andamento são canceladas, como todas são
+        quando o prazo chega.
+        """
+        modelos = list(modelos or self.modelos)
+        prazo = prazo or Prazo()
+        conjunto = self.obter_assinatura_conjunto()
+        respostas = queue.Queue()
+        # Sinalizado no retorno, quando as respostas ainda abertas são interrompidas para que transmissões em silêncio também larguem a conexão
+        cancelado = threading.Event()
+        respostas_abertas = []
+        # Eventos de primeiro byte das requisições em andamento, da mais antiga para a mais recente
+        em_andamento = []
+        # Sinalizado também no retorno: uma resposta completa é contada depois de marcada como vencedora, ou deixada concluida
+        decidido = threading.Event()
+        disparadas = 0
+        
+        def disparar(papel: str):
+            nonlocal disparadas
+            primeiro_byte = threading.Event()
+            em_andamento.append(primeiro_byte)
+            modelo = modelos[disparadas]
+            disparadas += 1
+            tempo_limite = prazo.tempo_limite(TEMPO_LIMITE_API_SEGUNDOS)
+            
+            def executar():
+                conteudo, chamada = self._transmitir_resposta(modelo, prompt, papel, conjunto, primeiro_byte, cancelado,
+                                                              tempo_limite, respostas_abertas)
+                respostas.put((primeiro_byte, conteudo, chamada))
+                if conteudo:
+                    decidido.wait()
+                METRICAS.incrementar('requisicoes_llm_total', papel=papel, resultado=chamada['resultado'])
+            
+            # Threads daemon: uma requisição cancelada ainda conectando não segura o interpretador na saída
+            threading.Thread(target=executar, name=f'llm-{papel}', daemon=True).start()
+        
+        disparar('principal')
+        disparada_em = time.perf_counter()
+        try:
+            while em_andamento:
+                if prazo.deve_parar:
+                    print("🛑 Análise cancelada ou sem tempo, abandonando as requisições ao LLM")
+                    return None
+                try:
+                    primeiro_byte, conteudo, chamada = respostas.get(timeout=INTERVALO_VERIFICACAO_HEDGE)
+                except queue.Empty:
+                    # Um hedge por vez, e só enquanto a requisição mais recente está em silêncio
+                    mais_recente = em_andamento[-1]
+                    if (len(em_andamento) == 1 and disparadas < len(modelos) and not mais_recente.is_set()
+                            and time.perf_counter() - disparada_em >= self.espera_hedge):
+                        print(f"⏳ Sem saída após {self.espera_hedge:.0f}s, hedge com o próximo modelo...")
+                        disparar('hedge')
+                        disparada_em = time.perf_counter()
+                    continue
+                
+                em_andamento.remove(primeiro_byte)
+                if conteudo:
+                    chamada['resultado'] = 'venceu'
+                    return conteudo
+                if not em_andamento and disparadas < len(modelos):
+                    print("🔁 Recorrendo ao próximo modelo...")
+                    disparar('reserva')
+                    disparada_em = time.perf_counter()
+            return None
+        finally:
+            cancelado.set()
+            for resposta in respostas_abertas:
+                self._interromper_resposta(resposta)
+            decidido.set()
+
+    def _transmitir_resposta(self, modelo: str, prompt: str, papel: str, conjunto: Optional[str], primeiro_byte: threading.Event,
+                             cancelado: threading.Event, tempo_limite: float = TEMPO_LIMITE_API_SEGUNDOS,
+                             respostas_abertas: List[requests.Response] = None) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Transmitir uma resposta de um modelo, registrando seu uso; retorna o texto (None se falhou ou foi cancelada).
+        A resposta entra em respostas_abertas, para quem chamou interrompê-la depois de cancelar.
+        """
         payload = {
-            "model": "tngtech/deepseek-r1t2-chimera:free",
+            "model": modelo,
             "messages": [
                 {
                     "role": "system",
@@ -425,117 +2255,231 @@ class AnalisadorChatBot:
             ],
             "temperature": 0.1,
             "max_tokens": 4000,
-            "stream": False
+            # Transmitida como server-sent events, para ver o primeiro token gerado assim que ele existe
+            "stream": True,
+            # Pedir ao OpenRouter o custo junto com a contagem de tokens
+            "usage": {"include": True}
         }
         
+        chamada = dict.fromkeys(CAMPOS_CHAMADA_LLM)
+        chamada.update(momento=time.time(), conjunto=conjunto, papel=papel, modelo_solicitado=modelo, modelo=modelo,
+                       caracteres_prompt=len(prompt))
+        partes = []
+        resposta = None
+        inicio = time.perf_counter()
         try:
-            resposta = requests.post(self.url_base, headers=self.cabecalhos, json=payload, timeout=120)
+            resposta = requests.post(self.url_base, headers=self.cabecalhos, json=payload, timeout=tempo_limite, stream=True)
+            if respostas_abertas is not None:
+                respostas_abertas.append(resposta)
+            # Cancelada antes de quem chamou ver esta resposta: ela não será interrompida, então parar aqui
+            if cancelado.is_set():
+                chamada['resultado'] = 'cancelada'
+                return None, chamada
+            chamada['status'] = resposta.status_code
+            METRICAS.incrementar('requisicoes_api_total', status=resposta.status_code)
             resposta.raise_for_status()
             
-            resultado = resposta.json()
-            return resultado['choices'][0]['message']['content']
+            for linha in resposta.iter_lines(chunk_size=None, decode_unicode=True):
+                if cancelado.is_set():
+                    break
+                # Linhas de comentário (": OPENROUTER PROCESSING") só mantêm a conexão viva
+                if not linha or not linha.startswith('data: '):
+                    continue
+                if linha == 'data: [DONE]':
+                    break
+                bloco = json.loads(linha[len('data: '):])
+                if 'error' in bloco:
+                    raise ValueError(bloco['error'].get('message', bloco['error']))
+                chamada['modelo'] = bloco.get('model') or chamada['modelo']
+                delta = bloco['choices'][0].get('delta', {}) if bloco.get('choices') else {}
+                # Modelos de raciocínio transmitem o raciocínio antes: conta como saída, mas não como resposta
+                if (delta.get('content') or delta.get('reasoning')) and not primeiro_byte.is_set():
+                    chamada['tempo_primeiro_byte'] = time.perf_counter() - inicio
+                    primeiro_byte.set()
+                    METRICAS.observar('tempo_primeiro_byte_api_segundos', chamada['tempo_primeiro_byte'])
+                if delta.get('content'):
+                    partes.append(delta['content'])
+                if bloco.get('usage'):
+                    uso = bloco['usage']
+                    chamada.update(tokens_prompt=uso.get('prompt_tokens'), tokens_resposta=uso.get('completion_tokens'),
+                                   tokens_total=uso.get('total_tokens'), custo=uso.get('cost'))
             
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Erro de API: {e}")
-            return None
+            if cancelado.is_set():
+                chamada['resultado'] = 'cancelada'
+                return None, chamada
+            chamada['resultado'] = 'concluida' if partes else 'falhou'
+            for tipo in ['prompt', 'resposta']:
+                if chamada[f'tokens_{tipo}'] is not None:
+                    METRICAS.incrementar('tokens_llm_total', chamada[f'tokens_{tipo}'], tipo=tipo, modelo=chamada['modelo'])
+            if chamada['custo'] is not None:
+                METRICAS.incrementar('custo_llm_total', chamada['custo'], modelo=chamada['modelo'])
+            return ''.join(partes) or None, chamada
+            
+        except Exception as e:
+            # Interrompida por quem chamou, ou cortada pelo prazo da análise (o único que encurta o tempo limite)
+            if cancelado.is_set() or (isinstance(e, requests.exceptions.Timeout) and tempo_limite < TEMPO_LIMITE_API_SEGUNDOS):
+                chamada['resultado'] = 'cancelada'
+                return None, chamada
+            chamada['resultado'] = 'falhou'
+            if chamada['status'] is None:
+                chamada['status'] = type(e).__name__
+                METRICAS.incrementar('requisicoes_api_total', status=type(e).__name__)
+            print(f"❌ Erro de API ({modelo}): {e}")
+            return None, chamada
+        finally:
+            # Fechada pela thread que a lê: fechar de outra thread esperaria a leitura pendente
+            if resposta is not None:
+                resposta.close()
+            chamada['latencia'] = time.perf_counter() - inicio
+            self.uso_llm.registrar(chamada)
+            METRICAS.observar('duracao_requisicao_api_segundos', chamada['latencia'])
+
+    @staticmethod
+    def _interromper_resposta(resposta: requests.Response):
+        """Acordar a thread que lê uma resposta: desligar o socket não depende das travas que close() espera"""
+        sock = getattr(getattr(resposta.raw, 'connection', None), 'sock', None)
+        if sock is not None:
+            with contextlib.suppress(OSError):
+                socket.socket.shutdown(sock, socket.SHUT_RDWR)
+
+    def _registrar_metricas_analise(self, sucesso: bool, cancelada: bool = False):
+        """Contar uma análise e o tamanho do conjunto, e atualizar o arquivo de métricas quando houver um configurado"""
+        METRICAS.incrementar('analises_total', resultado='cancelada' if cancelada else 'sucesso' if sucesso else 'falha')
+        METRICAS.incrementar('linhas_processadas_total', len(self.df))
+        METRICAS.incrementar('colunas_processadas_total', len(self.df.columns))
+        METRICAS.observar('linhas_conjunto', len(self.df))
+        METRICAS.observar('colunas_conjunto', len(self.df.columns))
+        if os.environ.get(VARIAVEL_ARQUIVO_METRICAS):
+            METRICAS.gravar(os.environ[VARIAVEL_ARQUIVO_METRICAS])
 
-    def analisar_conjunto_dados(self, contexto_usuario: str = "") -> Dict[str, Any]:
-        """Analisar o conjunto de dados atualmente carregado"""
+    def analisar_conjunto_dados(self, contexto_usuario: str = "", prazo: Union[float, Prazo] = None) -> Dict[str, Any]:
+        """
+        Analisar o conjunto de dados atualmente carregado, dentro do prazo (segundos ou um Prazo que pode ser cancelado).
+        Uma análise interrompida depois das estatísticas as retorna sem a análise da IA, com o motivo em 'cancelada'.
+        """
         if self.df is None:
             return None
         
         inicio_tempo = time.time()
+        prazo = prazo if isinstance(prazo, Prazo) else Prazo(prazo)
+        # As etapas desta análise seguem as da última carga
+        cronometro = CronometroEtapas(self.perfilador, self.cronometro_carga.etapas, self.cronometro_carga.perfis)
+        estatisticas_descritivas = None
         
-        resumo_estatisticas = self.gerar_estatisticas_descritivas()
-        prompt = self.criar_prompt_analise(resumo_estatisticas, contexto_usuario)
-        resultado_analise = self.chamar_api_open_router(prompt)
-        visualizacoes = self.gerar_visualizacoes()
+        try:
+            prazo.verificar('estatisticas')
+            with cronometro.etapa('estatisticas', perfilar=True):
+                estatisticas_descritivas = self.obter_estatisticas_descritivas(cronometro, prazo)
+            prazo.verificar('prompt')
+            with cronometro.etapa('prompt'):
+                prompt = self.criar_prompt_analise(estatisticas_descritivas.para_prompt(), contexto_usuario)
+            prazo.verificar('chamada_api')
+            chamadas_antes = len(self.uso_llm.chamadas)
+            with cronometro.etapa('chamada_api', perfilar=True):
+                resultado_analise = self.chamar_api_open_router(prompt, prazo=prazo)
+            prazo.verificar('chamada_api')
+        except AnaliseCancelada as e:
+            print(f"🛑 {e}")
+            self._registrar_metricas_analise(False, cancelada=True)
+            if estatisticas_descritivas is None:
+                return None
+            # Resultado parcial: tudo menos a análise da IA
+            return self._resultado_analise(estatisticas_descritivas, None, cronometro, None, time.time() - inicio_tempo,
+                                           cancelada=str(e))
         
+        chamada_llm = next((chamada for chamada in self.uso_llm.chamadas[chamadas_antes:] if chamada['resultado'] == 'venceu'), None)
         tempo_decorrido = time.time() - inicio_tempo
+        self._registrar_metricas_analise(bool(resultado_analise))
         
         if resultado_analise:
-            return {
-                'dataframe': self.df,
-                'estatisticas': resumo_estatisticas,
-                'analise_ia': resultado_analise,
-                'visualizacoes': visualizacoes,
-                'tempo_analise': tempo_decorrido
-            }
+            return self._resultado_analise(estatisticas_descritivas, resultado_analise, cronometro, chamada_llm, tempo_decorrido)
         
         return None
 
+    def _resultado_analise(self, estatisticas_descritivas: EstatisticasDescritivas, resultado_analise: Optional[str],
+                           cronometro: CronometroEtapas, chamada_llm: Optional[Dict[str, Any]], tempo_decorrido: float,
+                           cancelada: str = None) -> Dict[str, Any]:
+        """Resultado de uma análise do conjunto carregado"""
+        return {
+            'dataframe': self.df,
+            'perfil': self.obter_perfil(),
+            'assinatura': self.obter_assinatura_conjunto(),
+            'estatisticas': estatisticas_descritivas.para_markdown(),
+            'estatisticas_descritivas': estatisticas_descritivas,
+            'analise_ia': resultado_analise,
+            'tempo_analise': tempo_decorrido,
+            'tempos': cronometro,
+            'chamada_llm': chamada_llm,
+            # Por que a análise parou antes do fim (None quando terminou)
+            'cancelada': cancelada
+        }
+
     # === MÉTODOS DE VISUALIZAÇÃO ===
     def gerar_visualizacoes(self) -> Dict[str, go.Figure]:
-        """Gerar visualizações interativas para o conjunto de dados"""
+        """Gerar visualizações interativas do conjunto de dados (o app gera as suas em cada aba)"""
         if self.df is None or self.df.empty:
             return {}
         
+        perfil = self.obter_perfil()
         visualizacoes = {}
-        amostra_df = self.df.sample(1000, random_state=42) if len(self.df) > 1000 else self.df
+        for nome, gerador in [
+            ('tipos_dados', self._gerar_grafico_tipos_dados),
+            ('dados_ausentes', self._gerar_grafico_dados_ausentes),
+            ('distribuicoes_numericas', self._gerar_distribuicoes_numericas),
+            ('distribuicoes_categoricas', self._gerar_distribuicoes_categoricas),
+            ('mapa_calor_correlacao', self._gerar_mapa_calor_correlacao)
+        ]:
+            try:
+                fig = gerador(perfil)
+            except Exception as e:
+                print(f"⚠️ Erro ao gerar visualização '{nome}': {e}")
+                continue
+            if fig is not None:
+                visualizacoes[nome] = fig
         
-        try:
-            # Gráfico de tipos de dados
-            def categorizar_tipo_dado(tipo_dado):
-                if np.issubdtype(tipo_dado, np.number):
-                    return "Numérica"
-                elif np.issubdtype(tipo_dado, np.bool_):
-                    return "Booleana"
-                elif np.issubdtype(tipo_dado, np.datetime64) or np.issubdtype(tipo_dado, np.timedelta64):
-                    return "Data/Hora"
-                else:
-                    return "Categórica"
-            
-            contagem_tipos = self.df.dtypes.apply(categorizar_tipo_dado).value_counts()
-            
-            if len(contagem_tipos) > 0:
-                fig_tipos = px.pie(
-                    values=contagem_tipos.values,
-                    names=contagem_tipos.index,
-                    title="Distribuição de Tipos de Dados",
-                    color_discrete_sequence=px.colors.qualitative.Set3
-                )
-                fig_tipos.update_traces(textposition='inside', textinfo='percent+label')
-                fig_tipos.update_layout(height=400, showlegend=False)
-                visualizacoes['tipos_dados'] = fig_tipos
-            
-            # Gráfico de dados ausentes
-            dados_ausentes = self.df.isnull().sum()
-            dados_ausentes = dados_ausentes[dados_ausentes > 0].head(15)
-            if len(dados_ausentes) > 0:
-                fig_ausentes = px.bar(
-                    x=dados_ausentes.values,
-                    y=dados_ausentes.index,
-                    orientation='h',
-                    title="Valores Ausentes por Coluna (Top 15)",
-                    color=dados_ausentes.values,
-                    color_continuous_scale='Viridis'
-                )
-                fig_ausentes.update_layout(height=400, xaxis_title="Contagem de Valores Ausentes", yaxis_title="Colunas")
-                visualizacoes['dados_ausentes'] = fig_ausentes
-            
-            # Distribuições numéricas
-            colunas_numericas = self.df.select_dtypes(include=['int64', 'int32', 'int16', 'int8', 'float64', 'float32', 'float16']).columns
-            if len(colunas_numericas) > 0:
-                visualizacoes.update(self._gerar_distribuicoes_numericas(amostra_df, colunas_numericas))
-            
-            # Distribuições categóricas
-            colunas_categoricas = self.df.select_dtypes(include=['object', 'category', 'string']).columns
-            if len(colunas_categoricas) > 0:
-                visualizacoes.update(self._gerar_distribuicoes_categoricas(amostra_df, colunas_categoricas))
+        return visualizacoes
 
-            # Mapa de calor de correlação
-            colunas_numericas_corr = self.df.select_dtypes(include=['int64', 'int32', 'int16', 'int8', 'float64', 'float32', 'float16']).columns
-            if len(colunas_numericas_corr) > 1:
-                visualizacoes.update(self._gerar_mapa_calor_correlacao(amostra_df, colunas_numericas_corr))
-            
-        except Exception as e:
-            print(f"⚠️ Erro ao gerar visualizações: {e}")
+    def _gerar_grafico_tipos_dados(self, perfil: PerfilConjuntoDados) -> Optional[go.Figure]:
+        """Gerar gráfico de tipos de dados"""
+        nomes_tipos = {'Numéricas': 'Numérica', 'Categóricas': 'Categórica', 'Verdadeiro/Falso': 'Booleana', 'Data/Hora': 'Data/Hora'}
+        contagem_tipos = pd.Series({
+            nomes_tipos[grupo]: len(colunas) for grupo, colunas in perfil.tipos_colunas.items() if colunas
+        }).sort_values(ascending=False)
         
-        return visualizacoes
+        if len(contagem_tipos) == 0:
+            return None
+        fig_tipos = px.pie(
+            values=contagem_tipos.values,
+            names=contagem_tipos.index,
+            title="Distribuição de Tipos de Dados",
+            color_discrete_sequence=px.colors.qualitative.Set3
+        )
+        fig_tipos.update_traces(textposition='inside', textinfo='percent+label')
+        fig_tipos.update_layout(height=400, showlegend=False)
+        return fig_tipos
 
-    def _gerar_distribuicoes_numericas(self, amostra_df: pd.DataFrame, colunas_numericas: List[str]) -> Dict[str, go.Figure]:
-        """Gerar distribuições para colunas numéricas"""
-        colunas_para_grafico = colunas_numericas[:6]
+    def _gerar_grafico_dados_ausentes(self, perfil: PerfilConjuntoDados) -> Optional[go.Figure]:
+        """Gerar gráfico de dados ausentes"""
+        dados_ausentes = perfil.contagem_ausentes
+        dados_ausentes = dados_ausentes[dados_ausentes > 0].head(15)
+        if len(dados_ausentes) == 0:
+            return None
+        fig_ausentes = px.bar(
+            x=dados_ausentes.values,
+            y=dados_ausentes.index,
+            orientation='h',
+            title="Valores Ausentes por Coluna (Top 15)",
+            color=dados_ausentes.values,
+            color_continuous_scale='Viridis'
+        )
+        fig_ausentes.update_layout(height=400, xaxis_title="Contagem de Valores Ausentes", yaxis_title="Colunas")
+        return fig_ausentes
+
+    def _gerar_distribuicoes_numericas(self, perfil: PerfilConjuntoDados) -> Optional[go.Figure]:
+        """Gerar distribuições para colunas numéricas (histogramas do perfil, sobre todas as linhas)"""
+        colunas_para_grafico = perfil.tipos_colunas['Numéricas'][:6]
+        if len(colunas_para_grafico) == 0:
+            return None
         n_cols = min(3, len(colunas_para_grafico))
         n_linhas = (len(colunas_para_grafico) + n_cols - 1) // n_cols
         
@@ -551,17 +2495,19 @@ class AnalisadorChatBot:
             col_num = i % n_cols + 1
             
             fig_dist.add_trace(
-                go.Histogram(x=amostra_df[col], name=col, nbinsx=20),
+                perfil.barras_histograma(col, name=col),
                 row=linha, col=col_num
             )
         
-        fig_dist.update_layout(height=300*n_linhas, title_text="Distribuições de Variáveis Numéricas (Amostra)", showlegend=False)
+        fig_dist.update_layout(height=300*n_linhas, title_text="Distribuições de Variáveis Numéricas", showlegend=False)
         
-        return {'distribuicoes_numericas': fig_dist}
+        return fig_dist
 
-    def _gerar_distribuicoes_categoricas(self, amostra_df: pd.DataFrame, colunas_categoricas: List[str]) -> Dict[str, go.Figure]:
-        """Gerar distribuições para colunas categóricas"""
-        colunas_para_grafico = colunas_categoricas[:6]
+    def _gerar_distribuicoes_categoricas(self, perfil: PerfilConjuntoDados) -> Optional[go.Figure]:
+        """Gerar distribuições para colunas categóricas (contagens exatas do perfil, sobre todas as linhas)"""
+        colunas_para_grafico = perfil.tipos_colunas['Categóricas'][:6]
+        if len(colunas_para_grafico) == 0:
+            return None
         n_cols = min(3, len(colunas_para_grafico))
         n_linhas = (len(colunas_para_grafico) + n_cols - 1) // n_cols
 
@@ -576,31 +2522,38 @@ class AnalisadorChatBot:
             linha = i // n_cols + 1
             col_num = i % n_cols + 1
             
-            contagem_valores = amostra_df[col].value_counts().head(8)
+            contagem_valores = perfil.contagem_valores(col).head(8)
             fig_dist_cat.add_trace(
                 go.Bar(x=contagem_valores.index, y=contagem_valores.values, name=col),
                 row=linha, col=col_num
             )
             fig_dist_cat.update_xaxes(tickangle=45, row=linha, col=col_num)
         
-        fig_dist_cat.update_layout(height=300*n_linhas, title_text="Distribuições de Variáveis Categóricas (Amostra)", showlegend=False)
+        fig_dist_cat.update_layout(height=300*n_linhas, title_text="Distribuições de Variáveis Categóricas", showlegend=False)
         
-        return {'distribuicoes_categoricas': fig_dist_cat}
+        return fig_dist_cat
 
-    def _gerar_mapa_calor_correlacao(self, amostra_df: pd.DataFrame, colunas_numericas_corr: List[str]) -> Dict[str, go.Figure]:
+    def _gerar_mapa_calor_correlacao(self, perfil: PerfilConjuntoDados) -> Optional[go.Figure]:
         """Gerar mapa de calor de correlação"""
-        matriz_corr = amostra_df[colunas_numericas_corr].corr()
+        colunas_numericas_corr = perfil.tipos_colunas['Numéricas']
+        if len(colunas_numericas_corr) <= 1:
+            return None
+        matriz_corr = perfil.df[colunas_numericas_corr].corr()
         fig_corr = px.imshow(
             matriz_corr,
-            title="Mapa de Calor de Correlação (Amostra)",
+            title="Mapa de Calor de Correlação (Variáveis Numéricas)",
             color_continuous_scale='RdBu_r',
             aspect="auto"
         )
         fig_corr.update_layout(height=500)
         
-        return {'mapa_calor_correlacao': fig_corr}
+        return fig_corr
 
     # === MÉTODOS DE CORRELAÇÃO ===
+    def _eh_categorica(self, serie: pd.Series) -> bool:
+        """Verificar se a coluna é categórica (object, category ou texto Arrow)"""
+        return self._obter_tipo_dado_simples(serie.dtype) == "Categórica"
+
     @staticmethod
     def cramers_v(x, y) -> float:
         """Calcula Cramér's V para duas variáveis categóricas"""
@@ -754,12 +2707,17 @@ class AnalisadorChatBot:
                     if metodo == "Automático":
                         df_codificado = self.df.copy()
                         
-                        for col in df_codificado.select_dtypes(include=['object', 'category']).columns:
+                        tipos_simples = self.obter_tipos_coluna_simples()
+                        for col in tipos_simples['Categóricas']:
                             df_codificado[col] = pd.factorize(df_codificado[col])[0]
                         
-                        for col in df_codificado.select_dtypes(include='bool').columns:
+                        for col in tipos_simples['Verdadeiro/Falso']:
                             df_codificado[col] = df_codificado[col].astype(int)
                         
+                        # Datas viram segundos desde o mínimo (mesma correlação, também para timestamps Arrow)
+                        for col in tipos_simples['Data/Hora']:
+                            df_codificado[col] = (df_codificado[col] - df_codificado[col].min()).dt.total_seconds()
+                        
                         if len(df_codificado) > 1:
                             corr_matrix = df_codificado.corr()
                             matriz.iloc[i, j] = corr_matrix.loc[col1, col2]
@@ -806,31 +2764,31 @@ class AnalisadorChatBot:
                             matriz.iloc[i, j] = np.nan
                             
                     elif metodo == "Cramers V":
-                        if (pd.api.types.is_object_dtype(self.df[col1]) or pd.api.types.is_categorical_dtype(self.df[col1])) and \
-                           (pd.api.types.is_object_dtype(self.df[col2]) or pd.api.types.is_categorical_dtype(self.df[col2])):
+                        if self._eh_categorica(self.df[col1]) and \
+                           self._eh_categorica(self.df[col2]):
                             matriz.iloc[i, j] = self.cramers_v(self.df[col1], self.df[col2])
                         else:
                             matriz.iloc[i, j] = np.nan
                             
                     elif metodo == "Theils U":
-                        if (pd.api.types.is_object_dtype(self.df[col1]) or pd.api.types.is_categorical_dtype(self.df[col1])) and \
-                           (pd.api.types.is_object_dtype(self.df[col2]) or pd.api.types.is_categorical_dtype(self.df[col2])):
+                        if self._eh_categorica(self.df[col1]) and \
+                           self._eh_categorica(self.df[col2]):
                             matriz.iloc[i, j] = self.theils_u(self.df[col1], self.df[col2])
                         else:
                             matriz.iloc[i, j] = np.nan
                             
                     elif metodo == "Phi":
-                        if (pd.api.types.is_object_dtype(self.df[col1]) or pd.api.types.is_categorical_dtype(self.df[col1])) and \
-                           (pd.api.types.is_object_dtype(self.df[col2]) or pd.api.types.is_categorical_dtype(self.df[col2])):
+                        if self._eh_categorica(self.df[col1]) and \
+                           self._eh_categorica(self.df[col2]):
                             matriz.iloc[i, j] = self.phi_coefficient(self.df[col1], self.df[col2])
                         else:
                             matriz.iloc[i, j] = np.nan
                             
                     elif metodo == "Correlation Ratio":
-                        if (pd.api.types.is_object_dtype(self.df[col1]) or pd.api.types.is_categorical_dtype(self.df[col1])) and \
+                        if self._eh_categorica(self.df[col1]) and \
                            pd.api.types.is_numeric_dtype(self.df[col2]):
                             matriz.iloc[i, j] = self.correlation_ratio(self.df[col1], self.df[col2])
-                        elif (pd.api.types.is_object_dtype(self.df[col2]) or pd.api.types.is_categorical_dtype(self.df[col2])) and \
+                        elif self._eh_categorica(self.df[col2]) and \
                              pd.api.types.is_numeric_dtype(self.df[col1]):
                             matriz.iloc[i, j] = self.correlation_ratio(self.df[col2], self.df[col1])
                         else:
@@ -892,36 +2850,273 @@ class AnalisadorChatBot:
             if tamanho_arquivo == 0:
                 return []
             
-            engines_para_tentar = []
-            if caminho_arquivo.endswith('.xlsx'):
-                engines_para_tentar = ['openpyxl', 'xlrd']
-            elif caminho_arquivo.endswith('.xls'):
-                engines_para_tentar = ['xlrd', 'openpyxl']
-            else:
-                engines_para_tentar = ['openpyxl', 'xlrd']
-            
-            planilhas = []
-            engine_sucesso = None
+            # O pandas escolhe o engine pelo conteúdo: o arquivo é aberto uma única vez
+            return self.abrir_pasta_trabalho_excel(caminho_arquivo)
             
-            for engine in engines_para_tentar:
-                try:
-                    arquivo_excel = pd.ExcelFile(caminho_arquivo, engine=engine)
-                    planilhas = arquivo_excel.sheet_names
-                    engine_sucesso = engine
-                    break
-                except ImportError:
-                    continue
-                except Exception:
-                    continue
-            
-            if not planilhas and not engine_sucesso:
-                try:
-                    arquivo_excel = pd.ExcelFile(caminho_arquivo)
-                    planilhas = arquivo_excel.sheet_names
-                except Exception:
-                    pass
-            
-            return planilhas
+        except Exception:
+            return []
+
+    def abrir_pasta_trabalho_excel(self, origem) -> List[str]:
+        """Abrir a pasta de trabalho (caminho ou upload) uma vez e manter o handle"""
+        self.fechar_pasta_trabalho_excel()
+        pasta_trabalho = origem
+        if self.detectar_compressao(origem):
+            # O contêiner zip exige acesso aleatório: descomprimir uma vez em memória
+            with self.abrir_descomprimido(origem) as fluxo:
+                pasta_trabalho = io.BytesIO(fluxo.read())
+        # O openpyxl é aberto em modo somente leitura pelo pandas (leitura em streaming)
+        self._arquivo_excel = pd.ExcelFile(pasta_trabalho)
+        self._origem_excel = origem
+        self._cache_planilhas = {}
+        return self._arquivo_excel.sheet_names
+
+    def ler_planilha_excel(self, nome_planilha=None) -> pd.DataFrame:
+        """Ler planilha da pasta de trabalho aberta, analisando cada uma no máximo uma vez"""
+        if self._arquivo_excel is None:
+            raise ValueError("Nenhuma pasta de trabalho Excel aberta")
+        
+        if nome_planilha is None:
+            nome_planilha = self._arquivo_excel.sheet_names[0]
+        
+        METRICAS.incrementar('consultas_cache_total', cache='planilha_excel',
+                             resultado='acerto' if nome_planilha in self._cache_planilhas else 'falha')
+        if nome_planilha not in self._cache_planilhas:
+            self._cache_planilhas[nome_planilha] = self._arquivo_excel.parse(nome_planilha)
+        
+        return self._cache_planilhas[nome_planilha]
+
+    def fechar_pasta_trabalho_excel(self):
+        """Liberar o handle da pasta de trabalho e as planilhas em cache"""
+        if self._arquivo_excel is not None:
+            self._arquivo_excel.close()
+        self._arquivo_excel = None
+        self._origem_excel = None
+        self._cache_planilhas = {}
+
+    def analisar_todas_planilhas(self, max_workers: int = None) -> Optional[Dict[str, Any]]:
+        """Perfilar todas as planilhas da pasta de trabalho em paralelo e gerar relatório combinado"""
+        if self._arquivo_excel is None:
+            return None
+        
+        nomes_planilhas = self._arquivo_excel.sheet_names
+        
+        # O handle da pasta de trabalho não é thread-safe: as planilhas são lidas uma a uma
+        # (e ficam em cache) e depois perfiladas em paralelo
+        planilhas = {nome: self.ler_planilha_excel(nome) for nome in nomes_planilhas}
+        trabalhadores = max_workers or min(len(nomes_planilhas), os.cpu_count() or 1)
+        
+        with ThreadPoolExecutor(max_workers=max(1, trabalhadores)) as executor:
+            perfis = list(executor.map(lambda nome: self._perfilar_planilha(nome, planilhas[nome]), nomes_planilhas))
+        
+        resumo = pd.DataFrame([perfil['resumo'] for perfil in perfis])
+        resultados_planilhas = {perfil['resumo']['Planilha']: perfil for perfil in perfis}
+        
+        return {
+            'resumo': resumo,
+            'planilhas': resultados_planilhas,
+            'relatorio': self._gerar_relatorio_pasta_trabalho(resumo, resultados_planilhas)
+        }
+
+    def _perfilar_planilha(self, nome_planilha: str, df: pd.DataFrame) -> Dict[str, Any]:
+        """Perfilar uma planilha com uma cópia rasa do analisador"""
+        analisador_planilha = copy.copy(self)
+        analisador_planilha._cache_estatisticas = None
+        analisador_planilha._perfil = None
+        analisador_planilha.perfil_fluxo = None
+        
+        try:
+            analisador_planilha.df = self.corrigir_tipos_incorretos(df)
+            if self.usar_arrow:
+                analisador_planilha.df = self.converter_para_arrow(analisador_planilha.df)
             
+            df_planilha = analisador_planilha.df
+            tipos_simples = analisador_planilha.obter_tipos_coluna_simples()
+            resumo = {
+                'Planilha': nome_planilha,
+                'Linhas': df_planilha.shape[0],
+                'Colunas': df_planilha.shape[1],
+                'Valores Ausentes': analisador_planilha.obter_perfil().total_ausentes,
+                'Linhas Duplicadas': analisador_planilha.contar_linhas_duplicadas(),
+                'Numéricas': len(tipos_simples['Numéricas']),
+                'Categóricas': len(tipos_simples['Categóricas']),
+                'Verdadeiro/Falso': len(tipos_simples['Verdadeiro/Falso']),
+                'Data/Hora': len(tipos_simples['Data/Hora']),
+                'Status': 'OK'
+            }
+            estatisticas = analisador_planilha.gerar_estatisticas_descritivas()
+        except Exception as e:
+            resumo = {'Planilha': nome_planilha, 'Linhas': df.shape[0], 'Colunas': df.shape[1], 'Status': f'Erro: {e}'}
+            estatisticas = f"## ❌ Não foi possível perfilar a planilha\n\n{e}\n"
+        
+        return {'resumo': resumo, 'estatisticas': estatisticas, 'dataframe': analisador_planilha.df}
+
+    def _gerar_relatorio_pasta_trabalho(self, resumo: pd.DataFrame, resultados_planilhas: Dict[str, Dict[str, Any]]) -> str:
+        """Gerar relatório Markdown combinado de todas as planilhas"""
+        resumo = resumo.fillna('')
+        cabecalho = "| " + " | ".join(resumo.columns) + " |"
+        separador = "|" + "---|" * len(resumo.columns)
+        linhas = ["| " + " | ".join(str(valor) for valor in linha) + " |" for linha in resumo.itertuples(index=False)]
+        
+        partes = [
+            "# 📚 Relatório da Pasta de Trabalho\n",
+            "## 📋 Visão Geral das Planilhas\n",
+            "\n".join([cabecalho, separador] + linhas) + "\n"
+        ]
+        for nome_planilha, resultado in resultados_planilhas.items():
+            partes.append(f"---\n\n# 📄 Planilha: {nome_planilha}\n")
+            partes.append(resultado['estatisticas'])
+        
+        return "\n".join(partes)
+
+def _iniciar_processo_tarefa():
+    """Processos de trabalho não servem nem gravam as métricas: eles as devolvem com cada resultado"""
+    os.environ.pop(VARIAVEL_PORTA_METRICAS, None)
+    os.environ.pop(VARIAVEL_ARQUIVO_METRICAS, None)
+
+def _executar_tarefa_analise(carga: bytes, caminho_dados: Optional[str], contexto_usuario: str, segundos: Optional[float],
+                             enviada: float, situacao, evento_cancelamento):
+    """Executar uma análise num processo de trabalho; retorna o que ela calculou, as chamadas ao LLM feitas e as métricas registradas"""
+    analisador = pickle.loads(carga)
+    situacao.update(estado='executando', iniciada=time.time())
+    METRICAS.observar('espera_tarefa_analise_segundos', time.time() - enviada)
+    if caminho_dados is not None:
+        analisador.df = pd.read_pickle(caminho_dados)
+    prazo = Prazo(segundos, evento_cancelamento,
+                  ao_verificar=lambda etapa: situacao.update(etapa=etapa, progresso=PROGRESSO_ETAPAS_TAREFA.get(etapa, situacao['progresso'])))
+    # O tempo de espera por um processo de trabalho conta para o prazo
+    prazo.inicio -= time.time() - enviada
+    chamadas_antes = len(analisador.uso_llm.chamadas)
+    resultados = analisador.analisar_conjunto_dados(contexto_usuario, prazo)
+    situacao.update(interrompida=prazo.deve_parar)
+    if resultados is not None:
+        resultados = {chave: resultados[chave] for chave in CHAVES_RESULTADO_TAREFA}
+    return resultados, analisador.uso_llm.chamadas[chamadas_antes:], METRICAS.coletar()
+
+class ExecutorTarefas:
+    """
+    Grupo de processos de trabalho que executa análises longe da thread do script Streamlit e do seu GIL.
+    enviar() retorna o id da tarefa para consultar com situacao(); resultado() recolhe uma tarefa terminada uma vez,
+    juntando suas chamadas ao LLM às do analisador que a enviou e suas métricas às deste processo. O conjunto chega
+    ao processo de trabalho como um arquivo temporário e nunca volta: o resultado é completado com o DataFrame e o perfil
+    mantidos aqui.
+    """
+
+    def __init__(self, max_processos: int = PROCESSOS_TAREFAS):
+        self.max_processos = max_processos
+        self._grupo = None
+        self._gerenciador = None
+        self._tarefas = {}
+        self._trava = threading.Lock()
+
+    def _iniciar(self):
+        # Processos iniciados com spawn e não fork: um fork do servidor com várias threads poderia herdar uma trava presa
+        contexto = multiprocessing.get_context('spawn')
+        self._gerenciador = contexto.Manager()
+        self._grupo = ProcessPoolExecutor(self.max_processos, mp_context=contexto, initializer=_iniciar_processo_tarefa)
+
+    def enviar(self, analisador: AnalisadorChatBot, contexto_usuario: str = "", segundos: float = None) -> str:
+        """Enfileirar uma análise do conjunto carregado no analisador, dentro de segundos (None = sem limite); retorna o id da tarefa"""
+        # Gravado agora, para a tarefa ver o conjunto como está no envio, faça a sessão o que fizer depois;
+        # o analisador serializado leva só suas configurações, o uso do LLM e as estatísticas já calculadas
+        analisador_tarefa = copy.copy(analisador)
+        analisador_tarefa.df = None
+        analisador_tarefa._perfil = None
+        carga = pickle.dumps(analisador_tarefa, protocol=pickle.HIGHEST_PROTOCOL)
+        caminho_dados = self._gravar_conjunto(analisador.df)
+        with self._trava:
+            if self._grupo is None:
+                self._iniciar()
+            id_tarefa = uuid.uuid4().hex[:12]
+            enviada = time.time()
+            situacao = self._gerenciador.dict(estado='na_fila', etapa=None, progresso=0.0, segundos=segundos, iniciada=None,
+                                              interrompida=False)
+            evento_cancelamento = self._gerenciador.Event()
+            futuro = self._grupo.submit(_executar_tarefa_analise, carga, caminho_dados, contexto_usuario, segundos, enviada,
+                                        situacao, evento_cancelamento)
+            futuro.add_done_callback(lambda _: self._remover_conjunto(caminho_dados))
+            self._tarefas[id_tarefa] = {'analisador': analisador, 'df': analisador.df, 'perfil': analisador.obter_perfil(),
+                                        'futuro': futuro, 'situacao': situacao, 'cancelamento': evento_cancelamento,
+                                        'enviada': enviada, 'chave_compartilhada': analisador.chave_compartilhada,
+                                        'variante': (tuple(analisador.modelos), contexto_usuario)}
+        return id_tarefa
+
+    @staticmethod
+    def _gravar_conjunto(df: Optional[pd.DataFrame]) -> Optional[str]:
+        """Gravar um conjunto num arquivo temporário para o processo de trabalho ler; só o caminho passa pelo grupo"""
+        if df is None:
+            return None
+        descritor, caminho = tempfile.mkstemp(prefix='tarefa-analise-', suffix='.pkl')
+        os.close(descritor)
+        df.to_pickle(caminho)
+        return caminho
+
+    @staticmethod
+    def _remover_conjunto(caminho: Optional[str]):
+        """Remover o arquivo de uma tarefa encerrada (concluída, com falha ou descartada da fila)"""
+        if caminho is not None:
+            with contextlib.suppress(OSError):
+                os.remove(caminho)
+
+    def situacao(self, id_tarefa: str) -> Optional[Dict[str, Any]]:
+        """
+        Estado (na_fila, executando, concluida, falhou ou cancelada), última etapa alcançada, progresso de 0 a 1, tempo limite,
+        segundos desde o envio, e se um cancelamento foi pedido; None para uma tarefa desconhecida
+        """
+        tarefa = self._tarefas.get(id_tarefa)
+        if tarefa is None:
+            return None
+        futuro = tarefa['futuro']
+        info = dict(tarefa['situacao'])
+        if futuro.cancelled():
+            info['estado'] = 'cancelada'
+        elif futuro.done():
+            info['estado'] = 'falhou' if futuro.exception() is not None else 'concluida'
+            info['progresso'] = 1.0
+        info.update(decorrido=time.time() - tarefa['enviada'], cancelando=tarefa['cancelamento'].is_set())
+        return info
+
+    def cancelar(self, id_tarefa: str):
+        """Descartar uma tarefa na fila, ou pedir que uma em execução pare no próximo ponto de verificação"""
+        tarefa = self._tarefas.get(id_tarefa)
+        if tarefa is not None:
+            tarefa['cancelamento'].set()
+            tarefa['futuro'].cancel()
+
+    def resultado(self, id_tarefa: str) -> Optional[Dict[str, Any]]:
+        """Recolher uma tarefa terminada (resultado parcial se foi interrompida, None se nada foi calculado); relança seu erro"""
+        with self._trava:
+            tarefa = self._tarefas.pop(id_tarefa)
+        futuro = tarefa['futuro']
+        if futuro.cancelled():
+            METRICAS.incrementar('tarefas_analise_total', estado='cancelada')
+            return None
+        try:
+            resultados_tarefa, chamadas, metricas = futuro.result()
         except Exception:
-            return []
\ No newline at end of file
+            METRICAS.incrementar('tarefas_analise_total', estado='falhou')
+            raise
+        
+        analisador = tarefa['analisador']
+        analisador.uso_llm.chamadas.extend(chamadas)
+        METRICAS.mesclar(metricas)
+        METRICAS.incrementar('tarefas_analise_total', estado='concluida')
+        resultados = None
+        if resultados_tarefa is not None:
+            # O conjunto como estava no envio, com o perfil que este processo já tem dele
+            perfil = tarefa['perfil']
+            with perfil.trava:
+                if perfil.assinatura is None:
+                    perfil.assinatura = resultados_tarefa['assinatura']
+            estatisticas_descritivas = resultados_tarefa['estatisticas_descritivas']
+            resultados = {'dataframe': tarefa['df'], 'perfil': perfil,
+                          'estatisticas': estatisticas_descritivas.para_markdown(), **resultados_tarefa}
+            if analisador.df is tarefa['df'] and analisador._cache_estatisticas is None:
+                analisador._cache_estatisticas = estatisticas_descritivas
+        if tarefa['chave_compartilhada'] is not None and resultados is not None:
+            CACHE_COMPARTILHADO.guardar_resultados(tarefa['chave_compartilhada'], tarefa['variante'], resultados)
+        if os.environ.get(VARIAVEL_ARQUIVO_METRICAS):
+            METRICAS.gravar(os.environ[VARIAVEL_ARQUIVO_METRICAS])
+        return resultados
+
+# Um grupo por processo, compartilhado por todas as sessões
+TAREFAS = ExecutorTarefas()
@@ -5,13 +5,32 @@ import tempfile
 import os
 import time
 import base64
+import json
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 
 # Importar de nossos módulos
-from pt_01_analyzer import AnalisadorChatBot
+from pt_01_analyzer import (AnalisadorChatBot, TAREFAS, CACHE_COMPARTILHADO, PYARROW_DISPONIVEL, PYINSTRUMENT_DISPONIVEL, EXTENSOES_COMPRESSAO,
+                            TAMANHOS_AMOSTRA, PERFILADORES)
+
+# Arquivos Parquet/Feather largos pedem a seleção de colunas antes da leitura
+MAX_COLUNAS_SEM_SELECAO = 50
+EXTENSOES_COLUNARES = {'parquet': 'parquet', 'feather': 'feather', 'arrow': 'feather'}
+# Formatos lidos como fluxo de registros, aos quais o limite de linhas se aplica
+EXTENSOES_EM_FLUXO = ('json', 'jsonl', 'ndjson')
+
+# Gráficos memorizados com st.cache_data têm como chave a assinatura do conjunto de dados e seus parâmetros
+ENTRADAS_CACHE_GRAFICOS = 512
+
+# Dispersão numérica: SVG até LIMITE_PONTOS_SVG, WebGL até LIMITE_PONTOS_WEBGL e densidade 2D acima disso
+LIMITE_PONTOS_SVG = 10_000
+LIMITE_PONTOS_WEBGL = 200_000
+
+# Tempo limite padrão de uma análise (0 = nenhum), e a frequência de consulta de uma análise em andamento
+PRAZO_ANALISE_SEGUNDOS = 300
+INTERVALO_CONSULTA_ANALISE = 0.5
 
 # Configurar página
 st.set_page_config(
@@ -367,6 +386,30 @@ def obter_link_download(conteudo, nome_arquivo, texto):
     b64 = base64.b64encode(conteudo.encode()).decode()
     return f'<a href="data:file/txt;base64,{b64}" download="{nome_arquivo}" class="download-btn">{texto}</a>'
 
+def obter_extensao_arquivo(nome_arquivo):
+    """Obter a extensão do formato, ignorando o sufixo de compressão (dados.csv.gz -> csv)"""
+    base, ext = os.path.splitext(nome_arquivo.lower())
+    if ext in EXTENSOES_COMPRESSAO:
+        ext = os.path.splitext(base)[1]
+    return ext.lstrip('.')
+
+def obter_limite_linhas():
+    """Limite de linhas e amostragem escolhidos na barra lateral para os formatos JSON lidos em fluxo"""
+    return {'max_linhas': st.session_state.max_linhas_fluxo or None, 'amostra_aleatoria': st.session_state.amostra_aleatoria_fluxo}
+
+def obter_chave_conteudo(arquivo_carregado, *opcoes):
+    """Chave de um upload no cache compartilhado: seus bytes e as opções com que é carregado"""
+    extensao_arquivo = obter_extensao_arquivo(arquivo_carregado.name)
+    if extensao_arquivo in EXTENSOES_EM_FLUXO:
+        opcoes = tuple(obter_limite_linhas().values()) + opcoes
+    return CACHE_COMPARTILHADO.chave_conteudo(arquivo_carregado, extensao_arquivo, st.session_state.analisador.usar_arrow, *opcoes)
+
+def compartilhar_conjunto_carregado(chave, df_anterior):
+    """Oferecer um conjunto recém-carregado por esta sessão às outras que enviarem os mesmos bytes"""
+    analisador = st.session_state.analisador
+    if analisador.df is not None and analisador.df is not df_anterior and analisador.chave_compartilhada is None:
+        analisador.compartilhar_conjunto(chave)
+
 def criar_container_visual(titulo, conteudo, tipo="card"):
     """Criar container visual consistente"""
     if tipo == "card":
@@ -470,7 +513,7 @@ def exibir_tela_boas_vindas(arquivo_carregado=None):
             st.markdown("""
             <div class="feature-card">
                 <h4 style="margin: 0.5rem 0; font-size: 1.1rem; color: #3498db;">📊 Suporte a Múltiplos Formatos</h4>
-                <p style="font-size: 0.95rem; margin: 0; line-height: 1.4;">CSV, Excel (XLSX) e JSON com detecção automática</p>
+                <p style="font-size: 0.95rem; margin: 0; line-height: 1.4;">CSV, Excel (XLSX), JSON, JSON Lines, Parquet e Feather com detecção automática</p>
             </div>
             """, unsafe_allow_html=True)
         
@@ -497,7 +540,7 @@ def exibir_tela_boas_vindas(arquivo_carregado=None):
             st.markdown("""
             <div class="card">
                 <ol style="font-size: 1rem; margin: 0.8rem 0; padding-left: 1.5rem; line-height: 1.6;">
-                    <li style="margin-bottom: 1rem;"><strong>Carregue seu arquivo</strong> - CSV, Excel ou JSON</li>
+                    <li style="margin-bottom: 1rem;"><strong>Carregue seu arquivo</strong> - CSV, Excel, JSON, JSON Lines, Parquet ou Feather</li>
                     <li style="margin-bottom: 1rem;"><strong>Selecione a planilha</strong> (se Excel) na barra lateral</li>
                     <li style="margin-bottom: 1rem;"><strong>Clique em "Analisar Dados"</strong> para iniciar</li>
                     <li style="margin-bottom: 1rem;"><strong>Aguarde o processamento</strong> automático</li>
@@ -579,9 +622,18 @@ def exibir_aba_visao_geral(resultados):
     
     with col4:
         st.markdown("#### 🔍 Linhas Duplicadas")
-        linhas_duplicadas = df[df.duplicated(keep=False)]
+        colunas_duplicadas = st.multiselect(
+            "Comparar apenas as colunas",
+            df.columns.tolist(),
+            key="colunas_duplicadas",
+            help="Deixe vazio para comparar as linhas inteiras"
+        )
+        # Vem do índice de hashes das linhas, calculado uma vez por conjunto de dados
+        linhas_duplicadas = analisador.obter_linhas_duplicadas(colunas_duplicadas)
         
         if len(linhas_duplicadas) > 0:
+            num_grupos = len(analisador.obter_grupos_duplicados(colunas_duplicadas))
+            st.caption(f"{len(linhas_duplicadas):,} linhas em {num_grupos:,} grupos de duplicadas")
             st.dataframe(linhas_duplicadas, use_container_width=True, height=350, hide_index=True)
         else:
             st.markdown("""
@@ -593,7 +645,7 @@ def exibir_aba_visao_geral(resultados):
     # Gráfico de dados vazios por variável
     st.markdown("### 📊 Dados Vazios")
     
-    dados_vazios = df.isnull().sum()
+    dados_vazios = resultados['perfil'].contagem_ausentes
     dados_vazios = dados_vazios[dados_vazios > 0]
     
     if len(dados_vazios) > 0:
@@ -638,7 +690,7 @@ def exibir_aba_visao_geral(resultados):
     # Gráfico de dispersão interativo
     st.markdown("### 📈 Gráfico de Dispersão Interativo")
     
-    fig_scatter = criar_scatterplot_interativo(df)
+    fig_scatter = criar_scatterplot_interativo(resultados['perfil'], resultados['assinatura'])
     if fig_scatter:
         st.plotly_chart(fig_scatter, use_container_width=True)
     
@@ -686,7 +738,7 @@ def exibir_aba_visao_geral(resultados):
     
     with col_viz:
         try:
-            fig, matriz_corr = analisador.criar_mapa_calor_correlacao_completo(metodo_selecionado)
+            fig, matriz_corr = calcular_correlacao(resultados['assinatura'], metodo_selecionado, analisador)
             
             if matriz_corr is not None:
                 if tipo_visualizacao == "Gráfico Heatmap":
@@ -712,8 +764,34 @@ def exibir_aba_visao_geral(resultados):
             st.error(f"❌ Erro ao calcular correlação: {str(e)}")
             st.info("Tente selecionar um método diferente ou verificar os tipos de dados")
 
-def criar_scatterplot_interativo(df):
+def criar_boxplot(estatisticas, titulo, cores=None):
+    """Criar um box plot a partir de estatísticas pré-calculadas: só quartis, bigodes e a amostra de atípicos vão ao navegador"""
+    cores = cores or px.colors.qualitative.Plotly
+    fig = go.Figure()
+    for i, (rotulo, est) in enumerate(estatisticas.iterrows()):
+        cor = cores[i % len(cores)]
+        fig.add_trace(go.Box(
+            x=[str(rotulo)], q1=[est['q1']], median=[est['mediana']], q3=[est['q3']],
+            lowerfence=[est['limite_inferior']], upperfence=[est['limite_superior']],
+            name=str(rotulo), marker_color=cor, legendgroup=str(rotulo)
+        ))
+        if len(est['atipicos']) > 0:
+            fig.add_trace(go.Scatter(
+                x=[str(rotulo)] * len(est['atipicos']), y=est['atipicos'],
+                mode='markers', marker=dict(color=cor, size=4),
+                name=f"{rotulo} atípicos", legendgroup=str(rotulo), showlegend=False
+            ))
+    fig.update_layout(title=titulo)
+    return fig
+
+@st.cache_data(show_spinner=False, max_entries=ENTRADAS_CACHE_GRAFICOS)
+def calcular_correlacao(chave_conjunto, metodo, _analisador):
+    """Calcular o mapa de calor e a matriz de correlação de um método (cache por conjunto e método)"""
+    return _analisador.criar_mapa_calor_correlacao_completo(metodo)
+
+def criar_scatterplot_interativo(perfil, chave_conjunto):
     """Criar gráfico de dispersão interativo otimizado para todos os tipos de variáveis"""
+    df = perfil.df
     if df is None or df.empty:
         return None
     
@@ -763,105 +841,132 @@ def criar_scatterplot_interativo(df):
     st.session_state.scatter_y = nova_selecao_y
     
     try:
-        df_plot = df[[st.session_state.scatter_x, st.session_state.scatter_y]].copy()
-        
-        def classificar_tipo(serie):
-            if pd.api.types.is_numeric_dtype(serie):
-                return 'numerico'
-            elif pd.api.types.is_datetime64_any_dtype(serie):
-                return 'datetime'
-            else:
-                return 'categorico'
-        
-        tipo_x = classificar_tipo(df_plot[st.session_state.scatter_x])
-        tipo_y = classificar_tipo(df_plot[st.session_state.scatter_y])
-        
-        combinacao = f"{tipo_x}_{tipo_y}"
+        return construir_grafico_dispersao(chave_conjunto, st.session_state.scatter_x, st.session_state.scatter_y, perfil)
+    except Exception as e:
+        st.error(f"Erro ao criar gráfico: {str(e)}")
+        return None
+
+@st.cache_data(show_spinner=False, max_entries=ENTRADAS_CACHE_GRAFICOS)
+def construir_grafico_dispersao(chave_conjunto, eixo_x, eixo_y, _perfil):
+    """Construir o gráfico de dispersão de um par de variáveis conforme seus tipos (cache por conjunto e par)"""
+    df_plot = _perfil.df[[eixo_x, eixo_y]]
+    
+    def classificar_tipo(serie):
+        if pd.api.types.is_numeric_dtype(serie):
+            return 'numerico'
+        elif pd.api.types.is_datetime64_any_dtype(serie):
+            return 'datetime'
+        else:
+            return 'categorico'
+    
+    tipo_x = classificar_tipo(df_plot[eixo_x])
+    tipo_y = classificar_tipo(df_plot[eixo_y])
+    
+    combinacao = f"{tipo_x}_{tipo_y}"
+    
+    if combinacao == 'numerico_numerico':
+        # Reta de tendência a partir das estatísticas suficientes do perfil, desenhada com dois pontos
+        regressao = _perfil.regressao_linear(eixo_x, eixo_y)
         
-        if combinacao == 'numerico_numerico':
+        if regressao['n'] > LIMITE_PONTOS_WEBGL:
+            # Densidade 2D: a grade de contagens substitui os pontos (células vazias ficam transparentes)
+            contagens, bordas_x, bordas_y = _perfil.densidade_2d(eixo_x, eixo_y)
+            fig = go.Figure(go.Heatmap(
+                x=(bordas_x[:-1] + bordas_x[1:]) / 2,
+                y=(bordas_y[:-1] + bordas_y[1:]) / 2,
+                z=np.where(contagens.T > 0, contagens.T, np.nan),
+                colorscale='Viridis',
+                colorbar=dict(title="Contagem"),
+                name='Densidade'
+            ))
+            fig.update_layout(
+                title=f"Densidade: {eixo_x} vs {eixo_y} ({regressao['n']:,} pontos)",
+                xaxis_title=eixo_x,
+                yaxis_title=eixo_y
+            )
+        else:
+            # Acima do tamanho de amostra da dispersão, os pontos vêm de uma amostra que mantém os extremos
+            titulo = f"Dispersão: {eixo_x} vs {eixo_y}"
+            if regressao['n'] > TAMANHOS_AMOSTRA['dispersao']:
+                df_plot = _perfil.amostra('dispersao', [eixo_x, eixo_y])
+                titulo += f" (amostra de {len(df_plot):,} de {regressao['n']:,} pontos)"
             fig = px.scatter(
                 df_plot, 
-                x=st.session_state.scatter_x, 
-                y=st.session_state.scatter_y,
-                title=f"Dispersão: {st.session_state.scatter_x} vs {st.session_state.scatter_y}",
-                color_discrete_sequence=['#3498db']
+                x=eixo_x, 
+                y=eixo_y,
+                title=titulo,
+                color_discrete_sequence=['#3498db'],
+                render_mode='webgl' if regressao['n'] > LIMITE_PONTOS_SVG else 'svg'
             )
-            
-            dados_sem_na = df_plot.dropna()
-            if len(dados_sem_na) > 1:
-                try:
-                    z = np.polyfit(dados_sem_na[st.session_state.scatter_x], dados_sem_na[st.session_state.scatter_y], 1)
-                    p = np.poly1d(z)
-                    fig.add_trace(go.Scatter(
-                        x=dados_sem_na[st.session_state.scatter_x],
-                        y=p(dados_sem_na[st.session_state.scatter_x]),
-                        mode='lines', line=dict(color='#e74c3c', width=2, dash='dash'),
-                        name='Linha de Tendência'
-                    ))
-                except:
-                    pass
-        
-        elif combinacao in ['categorico_numerico', 'numerico_categorico']:
-            if tipo_x == 'categorico':
-                fig = px.box(df_plot, x=st.session_state.scatter_x, y=st.session_state.scatter_y,
-                           title=f"Distribuição por Categoria: {st.session_state.scatter_y} vs {st.session_state.scatter_x}",
-                           color=st.session_state.scatter_x)
-            else:
-                fig = px.box(df_plot, x=st.session_state.scatter_y, y=st.session_state.scatter_x,
-                           title=f"Distribuição por Categoria: {st.session_state.scatter_x} vs {st.session_state.scatter_y}",
-                           color=st.session_state.scatter_y)
-        
-        elif combinacao == 'categorico_categorico':
-            contagem = df_plot.groupby([st.session_state.scatter_x, st.session_state.scatter_y]).size().reset_index(name='count')
-            fig = px.scatter(contagem, x=st.session_state.scatter_x, y=st.session_state.scatter_y, size='count',
-                           title=f"Relação entre Categorias: {st.session_state.scatter_x} vs {st.session_state.scatter_y}",
-                           color='count', color_continuous_scale='Viridis')
-        
-        elif 'datetime' in combinacao:
-            if tipo_x == 'datetime':
-                df_temporal = df_plot.groupby(st.session_state.scatter_x)[st.session_state.scatter_y].mean().reset_index()
-                fig = px.line(df_temporal, x=st.session_state.scatter_x, y=st.session_state.scatter_y,
-                            title=f"Evolução Temporal: {st.session_state.scatter_y}", markers=True)
-            else:
-                df_temporal = df_plot.groupby(st.session_state.scatter_y)[st.session_state.scatter_x].mean().reset_index()
-                fig = px.line(df_temporal, x=st.session_state.scatter_y, y=st.session_state.scatter_x,
-                            title=f"Evolução Temporal: {st.session_state.scatter_x}", markers=True)
-        
-        else:
-            fig = px.scatter(df_plot, x=st.session_state.scatter_x, y=st.session_state.scatter_y,
-                           title=f"Relação: {st.session_state.scatter_x} vs {st.session_state.scatter_y}")
-        
-        fig.update_layout(
-            height=500,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white'),
-            showlegend=True,
-            xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
-            yaxis=dict(gridcolor='rgba(255,255,255,0.1)')
-        )
         
+        if np.isfinite(regressao['inclinacao']):
+            x_reta = np.array([regressao['x_min'], regressao['x_max']])
+            fig.add_trace(go.Scatter(
+                x=x_reta,
+                y=regressao['intercepto'] + regressao['inclinacao'] * x_reta,
+                mode='lines', line=dict(color='#e74c3c', width=2, dash='dash'),
+                name=f"Linha de Tendência (R² = {regressao['r2']:.3f})"
+            ))
+    
+    elif combinacao in ['categorico_numerico', 'numerico_categorico']:
+        # Caixas por categoria a partir das estatísticas do perfil, não dos valores brutos
         if tipo_x == 'categorico':
-            fig.update_xaxes(tickangle=45)
-        if tipo_y == 'categorico':
-            fig.update_yaxes(tickangle=45)
-            
-        return fig
-        
-    except Exception as e:
-        st.error(f"Erro ao criar gráfico: {str(e)}")
-        return None
+            fig = criar_boxplot(_perfil.estatisticas_boxplot(eixo_y, agrupar_por=eixo_x),
+                              f"Distribuição por Categoria: {eixo_y} vs {eixo_x}")
+            fig.update_layout(xaxis_title=eixo_x, yaxis_title=eixo_y)
+        else:
+            fig = criar_boxplot(_perfil.estatisticas_boxplot(eixo_x, agrupar_por=eixo_y),
+                              f"Distribuição por Categoria: {eixo_x} vs {eixo_y}")
+            fig.update_layout(xaxis_title=eixo_y, yaxis_title=eixo_x)
+    
+    elif combinacao == 'categorico_categorico':
+        contagem = df_plot.groupby([eixo_x, eixo_y]).size().reset_index(name='count')
+        fig = px.scatter(contagem, x=eixo_x, y=eixo_y, size='count',
+                       title=f"Relação entre Categorias: {eixo_x} vs {eixo_y}",
+                       color='count', color_continuous_scale='Viridis')
+    
+    elif 'datetime' in combinacao:
+        if tipo_x == 'datetime':
+            df_temporal = df_plot.groupby(eixo_x)[eixo_y].mean().reset_index()
+            fig = px.line(df_temporal, x=eixo_x, y=eixo_y,
+                        title=f"Evolução Temporal: {eixo_y}", markers=True)
+        else:
+            df_temporal = df_plot.groupby(eixo_y)[eixo_x].mean().reset_index()
+            fig = px.line(df_temporal, x=eixo_y, y=eixo_x,
+                        title=f"Evolução Temporal: {eixo_x}", markers=True)
+    
+    else:
+        fig = px.scatter(_perfil.amostra('relacao', [eixo_x, eixo_y]), x=eixo_x, y=eixo_y,
+                       title=f"Relação: {eixo_x} vs {eixo_y}")
+    
+    fig.update_layout(
+        height=500,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        showlegend=True,
+        xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
+        yaxis=dict(gridcolor='rgba(255,255,255,0.1)')
+    )
+    
+    if tipo_x == 'categorico':
+        fig.update_xaxes(tickangle=45)
+    if tipo_y == 'categorico':
+        fig.update_yaxes(tickangle=45)
+    
+    return fig
 
 def exibir_analise_exploratoria(resultados):
     """Exibir análise exploratória de dados com abas"""
     st.markdown('<div class="section-header">📊 Análise Exploratória de Dados</div>', unsafe_allow_html=True)
     
     # Botão de download do relatório
-    if 'analise_ia' in resultados and 'estatisticas' in resultados:
+    if resultados.get('analise_ia') and 'estatisticas' in resultados:
         relatorio_combinado = f"# Relatório de Análise de Dados\n\n## Estatísticas Descritivas\n\n{resultados['estatisticas']}\n\n## Análise IA\n\n{resultados['analise_ia']}"
         st.markdown(obter_link_download(relatorio_combinado, "relatorio_analise_completo.txt", "📥 Baixar Relatório Completo (TXT)"), unsafe_allow_html=True)
     
     df = resultados['dataframe']
+    perfil = resultados['perfil']
     
     # Cartões de métricas principais
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -870,9 +975,9 @@ def exibir_analise_exploratoria(resultados):
     with col2:
         st.markdown(criar_cartao_estatistica(f"{df.shape[1]}", "Total de Colunas", "📊", "#3498db"), unsafe_allow_html=True)
     with col3:
-        st.markdown(criar_cartao_estatistica(f"{df.isnull().sum().sum():,}", "Valores Ausentes", "⚠️", "#f39c12"), unsafe_allow_html=True)
+        st.markdown(criar_cartao_estatistica(f"{perfil.total_ausentes:,}", "Valores Ausentes", "⚠️", "#f39c12"), unsafe_allow_html=True)
     with col4:
-        st.markdown(criar_cartao_estatistica(f"{df.duplicated().sum():,}", "Linhas Duplicadas", "🔍", "#e74c3c"), unsafe_allow_html=True)
+        st.markdown(criar_cartao_estatistica(f"{st.session_state.analisador.contar_linhas_duplicadas():,}", "Linhas Duplicadas", "🔍", "#e74c3c"), unsafe_allow_html=True)
     with col5:
         total_celulas = df.shape[0] * df.shape[1]
         st.markdown(criar_cartao_estatistica(f"{total_celulas:,}", "Total de Células", "🔢", "#9b59b6"), unsafe_allow_html=True)
@@ -895,42 +1000,52 @@ def exibir_analise_exploratoria(resultados):
         nomes_abas.append("Colunas Data/Hora")
     
     # Criar as abas
-    abas = st.tabs(nomes_abas)
+    # Abas sob demanda: só a aba selecionada executa, então seus gráficos são gerados na primeira abertura
+    abas = st.tabs(nomes_abas, key="abas_analise", on_change="rerun")
     
     # Aba Visão Geral
     with abas[0]:
-        exibir_aba_visao_geral(resultados)
+        if abas[0].open:
+            exibir_aba_visao_geral(resultados)
     
     # Abas específicas por tipo de dados
     if tipos_simples['Numéricas']:
         indice_aba = nomes_abas.index("Colunas Numéricas")
         with abas[indice_aba]:
-            exibir_aba_numericas(resultados)
+            if abas[indice_aba].open:
+                exibir_aba_numericas(resultados)
     
     if tipos_simples['Categóricas']:
         indice_aba = nomes_abas.index("Colunas Categóricas")
         with abas[indice_aba]:
-            exibir_aba_categoricas(resultados)
+            if abas[indice_aba].open:
+                exibir_aba_categoricas(resultados)
     
     if tipos_simples['Verdadeiro/Falso']:
         indice_aba = nomes_abas.index("Colunas Verdadeiro/Falso")
         with abas[indice_aba]:
-            exibir_aba_booleanas(resultados)
+            if abas[indice_aba].open:
+                exibir_aba_booleanas(resultados)
     
     if tipos_simples['Data/Hora']:
         indice_aba = nomes_abas.index("Colunas Data/Hora")
         with abas[indice_aba]:
-            exibir_aba_data_hora(resultados)
+            if abas[indice_aba].open:
+                exibir_aba_data_hora(resultados)
 
 def exibir_insights_ia(resultados):
     """Exibir análise da IA com seções estruturadas"""
     st.markdown('<div class="section-header">🔎 Insights Gerados por IA</div>', unsafe_allow_html=True)
     
     # Botão de download
-    if 'analise_ia' in resultados and 'estatisticas' in resultados:
+    if resultados.get('analise_ia') and 'estatisticas' in resultados:
         relatorio_combinado = f"# Relatório de Análise de Dados\n\n## Estatísticas Descritivas\n\n{resultados['estatisticas']}\n\n## Análise IA\n\n{resultados['analise_ia']}"
         st.markdown(obter_link_download(relatorio_combinado, "relatorio_analise_completo.txt", "📥 Baixar Relatório Completo (TXT)"), unsafe_allow_html=True)
     
+    if resultados.get('cancelada'):
+        st.warning(f"⏹️ {resultados['cancelada']}. As estatísticas e os gráficos estão disponíveis; execute a análise de novo para os insights da IA.")
+        return
+    
     # Verificar se há análise IA disponível
     if 'analise_ia' not in resultados or not resultados['analise_ia']:
         st.error("❌ Nenhuma análise IA disponível. Por favor, execute a análise primeiro.")
@@ -999,13 +1114,215 @@ def exibir_insights_ia(resultados):
         </div>
         """, unsafe_allow_html=True)
         st.markdown(f'<div class="card" style="background: #2d3256; padding: 1.5rem; border-radius: 10px;">{texto_analise}</div>', unsafe_allow_html=True)
+    
+    exibir_uso_llm(resultados)
+
+def formatar_opcional(valor, modelo):
+    """Formatar um valor que pode estar ausente (None ou NaN)"""
+    return "-" if valor is None or pd.isna(valor) else modelo.format(valor)
+
+def exibir_uso_llm(resultados):
+    """Exibir tokens, latência e custo da chamada ao LLM desta análise e da sessão inteira"""
+    st.markdown("### 📟 Uso do LLM")
+    
+    chamada = resultados.get('chamada_llm')
+    if resultados.get('reutilizado'):
+        st.info("♻️ Esta análise foi reutilizada de outra sessão sobre os mesmos dados: nenhuma chamada ao LLM foi feita para ela aqui")
+    elif chamada:
+        st.markdown(f"**Esta análise** — modelo `{chamada['modelo'] or chamada['modelo_solicitado']}` (requisição {chamada['papel']}), status {chamada['status']}")
+        cartoes = [
+            (formatar_opcional(chamada['tokens_prompt'], "{:,}"), "Tokens do Prompt", "📝", "#3498db"),
+            (formatar_opcional(chamada['tokens_resposta'], "{:,}"), "Tokens da Resposta", "💬", "#9b59b6"),
+            (formatar_opcional(chamada['tempo_primeiro_byte'], "{:.2f}s"), "Tempo até o 1º Byte", "📡", "#f39c12"),
+            (formatar_opcional(chamada['latencia'], "{:.2f}s"), "Latência Total", "⏱️", "#e74c3c"),
+            (formatar_opcional(chamada['custo'], "{:.5f}"), "Custo (créditos)", "💰", "#2ecc71")
+        ]
+        for coluna, cartao in zip(st.columns(len(cartoes)), cartoes):
+            with coluna:
+                st.markdown(criar_cartao_estatistica(*cartao), unsafe_allow_html=True)
+    
+    uso = st.session_state.analisador.uso_llm
+    if not uso.chamadas:
+        return
+    
+    totais = uso.totais()
+    st.markdown(
+        f"**Esta sessão** — {totais['chamadas']} chamadas ({totais['chamadas_falhas']} com falha, {totais['chamadas_canceladas']} canceladas), "
+        f"{totais['tokens_prompt']:,} tokens de prompt + {totais['tokens_resposta']:,} de resposta, "
+        f"latência média {formatar_opcional(totais['latencia_media'], '{:.2f}s')}, "
+        f"primeiro byte em média {formatar_opcional(totais['primeiro_byte_medio'], '{:.2f}s')}, "
+        f"{formatar_opcional(totais['tokens_resposta_por_segundo'], '{:.1f}')} tokens de resposta/s, "
+        f"custo {formatar_opcional(totais['custo'], '{:.5f}')}"
+    )
+    
+    por_conjunto = uso.por_conjunto()
+    por_conjunto['conjunto'] = por_conjunto['conjunto'].fillna('-').str[:12]
+    st.dataframe(
+        por_conjunto.rename(columns={
+            'conjunto': 'Conjunto', 'chamadas': 'Chamadas', 'chamadas_falhas': 'Falhas', 'chamadas_canceladas': 'Canceladas',
+            'tokens_prompt': 'Tokens Prompt', 'tokens_resposta': 'Tokens Resposta', 'custo': 'Custo', 'latencia': 'Latência Total (s)',
+            'latencia_media': 'Latência Média (s)', 'primeiro_byte_medio': '1º Byte Médio (s)',
+            'tokens_resposta_por_segundo': 'Tokens Resposta/s'
+        }).round(4),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    with st.expander("📜 Todas as chamadas ao LLM", expanded=False):
+        chamadas = uso.para_tabela()
+        chamadas['momento'] = pd.to_datetime(chamadas['momento'], unit='s')
+        chamadas['conjunto'] = chamadas['conjunto'].fillna('-').str[:12]
+        st.dataframe(chamadas.round({'custo': 6, 'tempo_primeiro_byte': 4, 'latencia': 4}), use_container_width=True, hide_index=True)
+
+@st.cache_data(show_spinner=False, max_entries=ENTRADAS_CACHE_GRAFICOS)
+def construir_graficos_numericos(chave_conjunto, col, _perfil, bins=None):
+    """Construir o gráfico de área da distribuição e o box plot de uma coluna numérica (cache por conjunto e coluna)"""
+    fig_area = None
+    # Contagens do serviço de histogramas do perfil, compartilhadas com os gráficos do analisador
+    valores_hist, bordas_bin = _perfil.histograma(col, bins)
+    if valores_hist.sum() > 0:
+        centros_bin = (bordas_bin[:-1] + bordas_bin[1:]) / 2
+        
+        fig_area = px.area(
+            x=centros_bin, 
+            y=valores_hist, 
+            title=f"Distribuição - {col}",
+            labels={'x': col, 'y': 'Frequência'}
+        )
+        
+        fig_area.update_traces(
+            line=dict(color='#3498db', width=2),
+            fillcolor='rgba(52, 152, 219, 0.5)'
+        )
+        
+        fig_area.update_layout(
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='white'),
+            showlegend=False,
+            xaxis_title=col,
+            yaxis_title="Frequência"
+        )
+    
+    # Box plot
+    fig_box = criar_boxplot(_perfil.estatisticas_boxplot(col), f"Box Plot - {col}", cores=['#e74c3c'])
+    fig_box.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        showlegend=False,
+        yaxis_title=col
+    )
+    
+    return fig_area, fig_box
+
+@st.cache_data(show_spinner=False, max_entries=ENTRADAS_CACHE_GRAFICOS)
+def construir_grafico_categorias(chave_conjunto, col, _perfil, num_principais=10):
+    """Construir o gráfico de barras das categorias principais de uma coluna (cache por conjunto e coluna)"""
+    contagem_valores = _perfil.contagem_valores(col).head(num_principais)
+    
+    if len(contagem_valores) <= 5:
+        # Horizontal para poucas categorias
+        fig_barra = px.bar(
+            x=contagem_valores.values,
+            y=contagem_valores.index,
+            orientation='h',
+            title=f"Categorias Principais - {col}",
+            color_discrete_sequence=['#3498db']
+        )
+        fig_barra.update_layout(
+            xaxis_title="Contagem",
+            yaxis_title="Categorias",
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='white'),
+            showlegend=False
+        )
+    else:
+        # Vertical para muitas categorias
+        fig_barra = px.bar(
+            x=contagem_valores.index,
+            y=contagem_valores.values,
+            title=f"Categorias Principais - {col}",
+            color_discrete_sequence=['#3498db']
+        )
+        fig_barra.update_layout(
+            xaxis_title="Categorias",
+            yaxis_title="Contagem",
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='white'),
+            showlegend=False
+        )
+        fig_barra.update_xaxes(tickangle=45)
+    
+    return fig_barra
+
+@st.cache_data(show_spinner=False, max_entries=ENTRADAS_CACHE_GRAFICOS)
+def construir_grafico_rosca(chave_conjunto, col, _perfil):
+    """Construir o gráfico de rosca de uma coluna Verdadeiro/Falso (cache por conjunto e coluna)"""
+    contagem_valores = _perfil.contagem_valores(col)
+    cores = {'True': 'rgba(46, 204, 113, 0.8)', 'False': 'rgba(231, 76, 60, 0.8)'}
+    sequencia_cores = [cores.get(str(rotulo), '#3498db') for rotulo in contagem_valores.index]
+
+    fig_rosca = px.pie(
+        values=contagem_valores.values,
+        names=[str(rotulo) for rotulo in contagem_valores.index],
+        title=f"Distribuição - {col}",
+        hole=0.5,
+        color_discrete_sequence=sequencia_cores
+    )
+    fig_rosca.update_traces(
+        textposition='inside', 
+        textinfo='percent+label',
+        marker=dict(line=dict(color="#000000", width=2)),
+        textfont=dict(color='white', size=14)
+    )
+    fig_rosca.update_layout(
+        height=400,
+        showlegend=True,
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.2,
+            xanchor="center",
+            x=0.5
+        )
+    )
+    
+    return fig_rosca
+
+@st.cache_data(show_spinner=False, max_entries=ENTRADAS_CACHE_GRAFICOS)
+def construir_grafico_linha_temporal(chave_conjunto, col, _perfil):
+    """Construir a linha temporal da contagem de registros de uma coluna data/hora (cache por conjunto e coluna)"""
+    # Agrupada pelo perfil (minuto a N anos) para a linha ficar dentro de um limite fixo de pontos
+    dados_timeline, intervalo = _perfil.linha_temporal(col)
+    fig_timeline = px.line(
+        x=dados_timeline.index,
+        y=dados_timeline.values,
+        title=f"Linha Temporal - {col} (por {intervalo})",
+        labels={'x': 'Data', 'y': f'Registros por {intervalo}'}
+    )
+    fig_timeline.update_traces(line=dict(color='#3498db', width=3))
+    fig_timeline.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        showlegend=False
+    )
+    
+    return fig_timeline
 
 def exibir_aba_numericas(resultados):
     """Exibir análise de colunas numéricas"""
     df = resultados['dataframe']
-    colunas_numericas = df.select_dtypes(include=['int64', 'int32', 'int16', 'int8', 'float64', 'float32', 'float16']).columns
+    perfil = resultados['perfil']
+    colunas_numericas = perfil.tipos_colunas['Numéricas']
     
     for col in colunas_numericas:
+        cartoes = resultados['estatisticas_descritivas'].cartoes_metricas(col)
         with st.container():
             st.markdown(f'<div class="analysis-card">', unsafe_allow_html=True)
             st.markdown(f"#### 📈 {col}")
@@ -1014,93 +1331,44 @@ def exibir_aba_numericas(resultados):
             st.markdown("##### 📊 Estatísticas Gerais")
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Média", f"{df[col].mean():.2f}")
-                st.metric("Mediana", f"{df[col].median():.2f}")
-                st.metric("Variância", f"{df[col].var():.2f}")
+                for rotulo in ("Média", "Mediana", "Variância"):
+                    st.metric(rotulo, cartoes[rotulo])
             with col2:
-                st.metric("Desvio Padrão", f"{df[col].std():.2f}")
-                st.metric("Mínimo", f"{df[col].min():.2f}")
-                st.metric("Máximo", f"{df[col].max():.2f}")
+                for rotulo in ("Desvio Padrão", "Mínimo", "Máximo"):
+                    st.metric(rotulo, cartoes[rotulo])
             
-            st.metric("Valores Ausentes", f"{df[col].isnull().sum()}")
+            st.metric("Valores Ausentes", cartoes["Valores Ausentes"])
             
             # Estatísticas Avançadas
             with st.expander("📈 Estatísticas Avançadas", expanded=False):
                 col3, col4 = st.columns(2)
                 
                 with col3:
-                    st.metric("Percentil 5", f"{df[col].quantile(0.05):.2f}")
-                    st.metric("Percentil 25 (Q1)", f"{df[col].quantile(0.25):.2f}")
-                    st.metric("Percentil 75 (Q3)", f"{df[col].quantile(0.75):.2f}")
-                    st.metric("Percentil 95", f"{df[col].quantile(0.95):.2f}")
+                    for rotulo in ("Percentil 5", "Percentil 25 (Q1)", "Percentil 75 (Q3)", "Percentil 95"):
+                        st.metric(rotulo, cartoes[rotulo])
                 
                 with col4:
-                    iqr = df[col].quantile(0.75) - df[col].quantile(0.25)
-                    st.metric("IQR (Q3 - Q1)", f"{iqr:.2f}")
-                    
-                    media = df[col].mean()
-                    desvio_padrao = df[col].std()
-                    if media != 0:
-                        cv = (desvio_padrao / media) * 100
-                        st.metric("Coeficiente de Variação (CV)", f"{cv:.2f}%")
-                    else:
-                        st.metric("Coeficiente de Variação (CV)", "Indefinido")
-                    
-                    curtose = df[col].kurt()
-                    assimetria = df[col].skew()
-                    st.metric("Curtose", f"{curtose:.2f}")
-                    st.metric("Assimetria", f"{assimetria:.2f}")
+                    for rotulo in ("IQR (Q3 - Q1)", "Coeficiente de Variação (CV)", "Curtose", "Assimetria"):
+                        st.metric(rotulo, cartoes[rotulo])
             
             # Visualizações
+            fig_area, fig_box = construir_graficos_numericos(resultados['assinatura'], col, perfil)
             col_viz1, col_viz2 = st.columns(2)
             with col_viz1:
                 # Gráfico de área (distribuição)
-                dados_grafico = df[col].dropna()
-                if len(dados_grafico) > 0:
-                    valores_hist, bordas_bin = np.histogram(dados_grafico, bins=50)
-                    centros_bin = (bordas_bin[:-1] + bordas_bin[1:]) / 2
-                    
-                    fig_area = px.area(
-                        x=centros_bin, 
-                        y=valores_hist, 
-                        title=f"Distribuição - {col}",
-                        labels={'x': col, 'y': 'Frequência'}
-                    )
-                    
-                    fig_area.update_traces(
-                        line=dict(color='#3498db', width=2),
-                        fillcolor='rgba(52, 152, 219, 0.5)'
-                    )
-                    
-                    fig_area.update_layout(
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        font=dict(color='white'),
-                        showlegend=False,
-                        xaxis_title=col,
-                        yaxis_title="Frequência"
-                    )
-                    
+                if fig_area is not None:
                     st.plotly_chart(fig_area, use_container_width=True)
             
             with col_viz2:
                 # Box plot
-                fig_box = px.box(df, y=col, title=f"Box Plot - {col}")
-                fig_box.update_traces(marker_color='#e74c3c')
-                fig_box.update_layout(
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    showlegend=False
-                )
                 st.plotly_chart(fig_box, use_container_width=True)
             
             st.markdown('</div>', unsafe_allow_html=True)
 
 def exibir_aba_categoricas(resultados):
     """Exibir análise de colunas categóricas"""
-    df = resultados['dataframe']
-    colunas_categoricas = df.select_dtypes(include=['object', 'category', 'string']).columns
+    perfil = resultados['perfil']
+    colunas_categoricas = perfil.tipos_colunas['Categóricas']
     
     for col in colunas_categoricas:
         with st.container():
@@ -1108,60 +1376,24 @@ def exibir_aba_categoricas(resultados):
             st.markdown(f"#### 🏷️ {col}")
             
             # Estatísticas básicas
-            contagem_unicos = df[col].nunique()
-            contagem_ausentes = df[col].isnull().sum()
+            cartoes = resultados['estatisticas_descritivas'].cartoes_metricas(col)
             
             col_met1, col_met2 = st.columns(2)
             with col_met1:
-                st.metric("Categorias Únicas", contagem_unicos)
+                st.metric("Categorias Únicas", cartoes["Categorias Únicas"])
             with col_met2:
-                st.metric("Valores Ausentes", contagem_ausentes)
-            
-            # Gráfico de barras
-            contagem_valores = df[col].value_counts().head(10)
+                st.metric("Valores Ausentes", cartoes["Valores Ausentes"])
             
-            if len(contagem_valores) <= 5:
-                # Horizontal para poucas categorias
-                fig_barra = px.bar(
-                    x=contagem_valores.values,
-                    y=contagem_valores.index,
-                    orientation='h',
-                    title=f"Categorias Principais - {col}",
-                    color_discrete_sequence=['#3498db']
-                )
-                fig_barra.update_layout(
-                    xaxis_title="Contagem",
-                    yaxis_title="Categorias",
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    showlegend=False
-                )
-            else:
-                # Vertical para muitas categorias
-                fig_barra = px.bar(
-                    x=contagem_valores.index,
-                    y=contagem_valores.values,
-                    title=f"Categorias Principais - {col}",
-                    color_discrete_sequence=['#3498db']
-                )
-                fig_barra.update_layout(
-                    xaxis_title="Categorias",
-                    yaxis_title="Contagem",
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    showlegend=False
-                )
-                fig_barra.update_xaxes(tickangle=45)
+            # Gráfico de barras (10 principais)
+            fig_barra = construir_grafico_categorias(resultados['assinatura'], col, perfil)
             
             st.plotly_chart(fig_barra, use_container_width=True)
             
             # Tabela detalhada
             st.markdown("##### 📋 Distribuição Completa das Categorias")
             
-            distribuicao_completa = df[col].value_counts()
-            percentuais = (df[col].value_counts(normalize=True) * 100).round(2)
+            distribuicao_completa = perfil.contagem_valores(col)
+            percentuais = perfil.percentuais_valores(col).round(2)
             
             tabela_distribuicao = pd.DataFrame({
                 'Categoria': distribuicao_completa.index,
@@ -1184,58 +1416,23 @@ def exibir_aba_categoricas(resultados):
 
 def exibir_aba_booleanas(resultados):
     """Exibir análise de colunas booleanas"""
-    df = resultados['dataframe']
-    colunas_booleanas = df.select_dtypes(include='bool').columns
+    perfil = resultados['perfil']
+    colunas_booleanas = perfil.tipos_colunas['Verdadeiro/Falso']
     
     for col in colunas_booleanas:
         with st.container():
             st.markdown(f'<div class="analysis-card">', unsafe_allow_html=True)
             st.markdown(f"#### ✅ {col}")
             
-            contagem_valores = df[col].value_counts()
-            percentuais = df[col].value_counts(normalize=True) * 100
-            
             col1, col2 = st.columns([1, 2])
             
             with col1:
-                for val, contagem in contagem_valores.items():
-                    percentual = percentuais[val]
-                    st.metric(
-                        f"Contagem {val}", 
-                        f"{contagem} ({percentual:.1f}%)"
-                    )
+                for rotulo, valor in resultados['estatisticas_descritivas'].cartoes_metricas(col).items():
+                    st.metric(rotulo, valor)
             
             with col2:
                 # Gráfico de rosca
-                cores = {'True': 'rgba(46, 204, 113, 0.8)', 'False': 'rgba(231, 76, 60, 0.8)'}
-                sequencia_cores = [cores.get(str(rotulo), '#3498db') for rotulo in contagem_valores.index]
-
-                fig_rosca = px.pie(
-                    values=contagem_valores.values,
-                    names=[str(rotulo) for rotulo in contagem_valores.index],
-                    title=f"Distribuição - {col}",
-                    hole=0.5,
-                    color_discrete_sequence=sequencia_cores
-                )
-                fig_rosca.update_traces(
-                    textposition='inside', 
-                    textinfo='percent+label',
-                    marker=dict(line=dict(color="#000000", width=2)),
-                    textfont=dict(color='white', size=14)
-                )
-                fig_rosca.update_layout(
-                    height=400,
-                    showlegend=True,
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=-0.2,
-                        xanchor="center",
-                        x=0.5
-                    )
-                )
+                fig_rosca = construir_grafico_rosca(resultados['assinatura'], col, perfil)
                 st.plotly_chart(fig_rosca, use_container_width=True)
             
             st.markdown('</div>', unsafe_allow_html=True)
@@ -1243,20 +1440,22 @@ def exibir_aba_booleanas(resultados):
 def exibir_aba_data_hora(resultados):
     """Exibir análise de colunas data/hora"""
     df = resultados['dataframe']
-    colunas_data_hora = df.select_dtypes(include=['datetime64']).columns
+    perfil = resultados['perfil']
+    colunas_data_hora = [col for col in perfil.tipos_colunas['Data/Hora']
+                         if pd.api.types.is_datetime64_any_dtype(df[col])]
     
     for col in colunas_data_hora:
         with st.container():
             st.markdown(f'<div class="analysis-card">', unsafe_allow_html=True)
             st.markdown(f"#### 📅 {col}")
             
-            # Estatísticas básicas
-            data_min = df[col].min()
-            data_max = df[col].max()
+            # Estatísticas básicas, da contagem de datas já guardada no perfil
+            contagem_datas = perfil.contagem_valores(col)
+            data_min = contagem_datas.index.min()
+            data_max = contagem_datas.index.max()
             intervalo_data = data_max - data_min
             
             # Data mais frequente
-            contagem_datas = df[col].value_counts()
             data_mais_frequente = contagem_datas.index[0] if len(contagem_datas) > 0 else None
             contagem_mais_frequente = contagem_datas.iloc[0] if len(contagem_datas) > 0 else 0
             
@@ -1272,24 +1471,128 @@ def exibir_aba_data_hora(resultados):
                     st.metric("Frequência", contagem_mais_frequente)
             
             # Gráfico de linha temporal
-            dados_timeline = df[col].value_counts().sort_index()
-            fig_timeline = px.line(
-                x=dados_timeline.index,
-                y=dados_timeline.values,
-                title=f"Linha Temporal - {col}",
-                labels={'x': 'Data', 'y': 'Contagem de Registros'}
-            )
-            fig_timeline.update_traces(line=dict(color='#3498db', width=3))
-            fig_timeline.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white'),
-                showlegend=False
-            )
+            fig_timeline = construir_grafico_linha_temporal(resultados['assinatura'], col, perfil)
             st.plotly_chart(fig_timeline, use_container_width=True)
             
             st.markdown('</div>', unsafe_allow_html=True)
 
+def exibir_painel_desempenho(resultados):
+    """Exibir os tempos das etapas da última carga e análise, com os perfis capturados"""
+    st.markdown('<div class="section-header">⏱️ Desempenho</div>', unsafe_allow_html=True)
+    
+    cronometro = resultados['tempos']
+    if cronometro is None:
+        st.info("♻️ Esta análise foi reutilizada de outra sessão sobre os mesmos dados: os tempos aparecem quando "
+                "esta sessão roda sua própria análise")
+        return
+    etapas = cronometro.para_tabela()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown(criar_cartao_estatistica(f"{cronometro.total:.2f}s", "Tempo Total", "⏱️", "#2ecc71"), unsafe_allow_html=True)
+    with col2:
+        st.markdown(criar_cartao_estatistica(f"{len(etapas)}", "Etapas", "🧩", "#3498db"), unsafe_allow_html=True)
+    with col3:
+        mais_lenta = etapas[etapas['nivel'] == 0].nlargest(1, 'segundos')
+        nome_mais_lenta = mais_lenta['etapa'].iloc[0] if not mais_lenta.empty else "-"
+        st.markdown(criar_cartao_estatistica(nome_mais_lenta, "Etapa Mais Lenta", "🐢", "#e74c3c"), unsafe_allow_html=True)
+    
+    # Etapas de primeiro nível em barras; as etapas internas aparecem na tabela abaixo
+    primeiro_nivel = etapas[etapas['nivel'] == 0]
+    fig = px.bar(primeiro_nivel, x='segundos', y='etapa', orientation='h', title="Tempo por Etapa",
+                 labels={'segundos': 'Segundos', 'etapa': 'Etapa'}, color_discrete_sequence=['#667eea'])
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        yaxis=dict(autorange='reversed'),
+        height=max(250, 40 * len(primeiro_nivel))
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    tabela = etapas.assign(etapa=['\u2003' * nivel + nome.rsplit('.', 1)[-1] for nome, nivel in zip(etapas['etapa'], etapas['nivel'])])
+    st.dataframe(
+        tabela[['etapa', 'chamadas', 'segundos', 'percentual']].rename(columns={
+            'etapa': 'Etapa', 'chamadas': 'Chamadas', 'segundos': 'Segundos', 'percentual': '% do Total'
+        }).round({'Segundos': 4, '% do Total': 1}),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.markdown(obter_link_download(json.dumps(cronometro.para_dict(), indent=2, ensure_ascii=False), "tempos_analise.json",
+                                    "📥 Baixar Tempos (JSON)"), unsafe_allow_html=True)
+    
+    if cronometro.perfis:
+        st.markdown(f"### 🔬 Perfis ({cronometro.perfilador})")
+        for etapa, relatorio in cronometro.perfis.items():
+            with st.expander(f"🔬 {etapa}", expanded=False):
+                st.code(relatorio, language=None)
+    else:
+        st.info("Escolha um perfilador na barra lateral para capturar os perfis da próxima carga e análise.")
+
+def aguardar_analise(id_tarefa):
+    """Acompanhar uma tarefa de análise até o fim, e guardar seus resultados (talvez parciais)"""
+    # Cada nova execução do script (um clique em Cancelar inclusive) interrompe este laço na próxima atualização e volta a consultar
+    progresso = st.empty()
+    while True:
+        situacao = TAREFAS.situacao(id_tarefa)
+        if situacao is None or situacao['estado'] in ('concluida', 'falhou', 'cancelada'):
+            break
+        if situacao['cancelando']:
+            mensagem = "⏹️ Cancelando a análise..."
+        elif situacao['estado'] == 'na_fila':
+            mensagem = f"⏳ Aguardando um processo livre... {situacao['decorrido']:.0f}s"
+        else:
+            mensagem = f"🔎 Analisando os dados com IA ({situacao['etapa']})... {situacao['decorrido']:.0f}s"
+            if situacao['segundos']:
+                mensagem += f" (restam {max(situacao['segundos'] - situacao['decorrido'], 0):.0f}s)"
+        progresso.progress(situacao['progresso'], text=mensagem)
+        time.sleep(INTERVALO_CONSULTA_ANALISE)
+    progresso.empty()
+    st.session_state.tarefa_analise = None
+    
+    if situacao is None:
+        st.error("❌ A tarefa de análise não está mais disponível. Por favor, execute-a de novo.")
+        return
+    try:
+        resultados = TAREFAS.resultado(id_tarefa)
+    except Exception as e:
+        st.error(f"❌ Erro durante a análise: {str(e)}")
+        return
+    if resultados:
+        st.session_state.resultados_analise = resultados
+        st.session_state.resultados_pasta_trabalho = None
+        st.rerun()
+    elif situacao['cancelando'] or situacao['interrompida']:
+        st.warning("⏹️ A análise parou antes de as estatísticas ficarem prontas.")
+    else:
+        st.error("❌ Análise falhou. Por favor, verifique seus dados e tente novamente.")
+
+def exibir_analise_pasta_trabalho(resultados_pasta):
+    """Exibir resumo por planilha e relatório combinado da pasta de trabalho"""
+    st.markdown('<div class="section-header">📚 Análise da Pasta de Trabalho</div>', unsafe_allow_html=True)
+    
+    st.markdown(obter_link_download(resultados_pasta['relatorio'], "relatorio_pasta_trabalho.txt", "📥 Baixar Relatório da Pasta de Trabalho (TXT)"), unsafe_allow_html=True)
+    
+    resumo = resultados_pasta['resumo']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.markdown(criar_cartao_estatistica(f"{len(resumo)}", "Planilhas", "📑", "#3498db"), unsafe_allow_html=True)
+    with col2:
+        st.markdown(criar_cartao_estatistica(f"{int(resumo['Linhas'].sum()):,}", "Total de Linhas", "📈", "#2ecc71"), unsafe_allow_html=True)
+    with col3:
+        st.markdown(criar_cartao_estatistica(f"{int(resumo['Colunas'].sum()):,}", "Total de Colunas", "📊", "#9b59b6"), unsafe_allow_html=True)
+    with col4:
+        ausentes = int(resumo['Valores Ausentes'].sum()) if 'Valores Ausentes' in resumo else 0
+        st.markdown(criar_cartao_estatistica(f"{ausentes:,}", "Valores Ausentes", "⚠️", "#f39c12"), unsafe_allow_html=True)
+    
+    st.markdown("### 📋 Visão Geral das Planilhas")
+    st.dataframe(resumo, use_container_width=True, hide_index=True)
+    
+    st.markdown("### 📄 Relatórios por Planilha")
+    for nome_planilha, resultado_planilha in resultados_pasta['planilhas'].items():
+        with st.expander(f"📄 {nome_planilha}", expanded=False):
+            st.markdown(resultado_planilha['estatisticas'])
+
 def main():
     """Função principal do aplicativo"""
     # Inicializar variáveis de sessão
@@ -1297,6 +1600,8 @@ def main():
         st.session_state.analisador = None
     if 'resultados_analise' not in st.session_state:
         st.session_state.resultados_analise = None
+    if 'resultados_pasta_trabalho' not in st.session_state:
+        st.session_state.resultados_pasta_trabalho = None
     if 'arquivo_carregado' not in st.session_state:
         st.session_state.arquivo_carregado = False
     if 'arquivo_atual' not in st.session_state:
@@ -1305,8 +1610,14 @@ def main():
         st.session_state.planilha_selecionada = None
     if 'planilhas_excel' not in st.session_state:
         st.session_state.planilhas_excel = []
+    if 'colunas_arquivo' not in st.session_state:
+        st.session_state.colunas_arquivo = []
+    if 'colunas_selecionadas' not in st.session_state:
+        st.session_state.colunas_selecionadas = None
     if 'contexto_usuario' not in st.session_state:
         st.session_state.contexto_usuario = ""
+    if 'tarefa_analise' not in st.session_state:
+        st.session_state.tarefa_analise = None
     if 'scatter_x' not in st.session_state:
         st.session_state.scatter_x = None
     if 'scatter_y' not in st.session_state:
@@ -1319,10 +1630,69 @@ def main():
     with st.sidebar:
         st.markdown("## ⚙️ Configuração")
         
+        st.session_state.analisador.usar_arrow = st.checkbox(
+            "🏹 Armazenamento Arrow",
+            value=st.session_state.analisador.usar_arrow,
+            disabled=not PYARROW_DISPONIVEL,
+            help="Armazena colunas de texto e data em dtypes Arrow para reduzir o uso de memória. Vale para arquivos carregados após ativar (requer pyarrow)."
+        ) and PYARROW_DISPONIVEL
+        
+        # Painel com o tempo de cada etapa, opcionalmente com o perfil de cada uma
+        exibir_desempenho = st.checkbox(
+            "⏱️ Painel de desempenho",
+            key="exibir_desempenho",
+            help="Mostra o tempo gasto em cada etapa da carga e da análise"
+        )
+        if exibir_desempenho:
+            perfiladores = [None] + [nome for nome in PERFILADORES if nome != 'pyinstrument' or PYINSTRUMENT_DISPONIVEL]
+            st.session_state.analisador.perfilador = st.selectbox(
+                "🔬 Perfilador",
+                perfiladores,
+                index=perfiladores.index(st.session_state.analisador.perfilador) if st.session_state.analisador.perfilador in perfiladores else 0,
+                format_func=lambda nome: "Desligado" if nome is None else nome,
+                help="Captura o perfil das etapas lentas da próxima carga e análise"
+            )
+        else:
+            st.session_state.analisador.perfilador = None
+        
+        # Tempo limite da próxima análise; uma em andamento também pode ser cancelada
+        st.number_input(
+            "⏳ Tempo limite (segundos)",
+            min_value=0,
+            value=PRAZO_ANALISE_SEGUNDOS,
+            step=30,
+            key="prazo_analise",
+            help="Interrompe a análise após estes segundos, mantendo as estatísticas já calculadas (0 = sem limite)"
+        )
+        
+        # Sessões que analisam o mesmo arquivo com os mesmos modelos e contexto compartilham os resultados de IA
+        st.checkbox(
+            "♻️ Reutilizar resultados compartilhados",
+            value=True,
+            key="reutilizar_resultados",
+            help="Mostrar a análise que outra sessão já fez sobre dados idênticos em vez de chamar a IA novamente"
+        )
+        
+        # Formatos JSON em fluxo mantêm as primeiras linhas ou uma amostra uniforme; a memória fica limitada ao tamanho do bloco
+        st.number_input(
+            "📏 Máximo de linhas (JSON / JSON Lines)",
+            min_value=0,
+            value=0,
+            step=10_000,
+            key="max_linhas_fluxo",
+            help="Manter no máximo estas linhas de uploads JSON e JSON Lines, perfilando o arquivo inteiro durante a leitura (0 = todas)"
+        )
+        st.checkbox(
+            "🎲 Amostra aleatória",
+            key="amostra_aleatoria_fluxo",
+            disabled=not st.session_state.max_linhas_fluxo,
+            help="Manter uma amostra aleatória uniforme do arquivo inteiro em vez das primeiras linhas"
+        )
+        
         arquivo_carregado = st.file_uploader(
             "📁 Carregar Arquivo de Dados",
-            type=['csv', 'xlsx', 'json'],
-            help="Carregue arquivos CSV, Excel (XLSX) ou JSON"
+            type=['csv', 'xlsx', 'json', 'jsonl', 'ndjson', 'parquet', 'feather', 'arrow', 'gz', 'bz2', 'xz', 'zst'],
+            help="Carregue arquivos CSV, Excel (XLSX), JSON, JSON Lines, Parquet ou Feather/Arrow IPC, opcionalmente comprimidos (.gz, .bz2, .xz, .zst)"
         )
         
         if arquivo_carregado is not None:
@@ -1332,28 +1702,39 @@ def main():
                 st.session_state.arquivo_carregado = True
                 st.session_state.arquivo_atual = arquivo_carregado
                 st.session_state.resultados_analise = None
+                st.session_state.resultados_pasta_trabalho = None
                 st.session_state.planilha_selecionada = None
                 st.session_state.planilhas_excel = []
+                st.session_state.colunas_arquivo = []
+                st.session_state.colunas_selecionadas = None
                 st.session_state.contexto_usuario = ""
                 st.session_state.scatter_x = None
                 st.session_state.scatter_y = None
                 
-                with st.spinner("🔄 Processando arquivo carregado..."):
+                with st.spinner("🔄 Processando arquivo carregado..."), st.session_state.analisador.iniciar_cronometro_carga().etapa('carga', perfilar=True):
                     try:
-                        extensao_arquivo = arquivo_carregado.name.split('.')[-1].lower()
+                        extensao_arquivo = obter_extensao_arquivo(arquivo_carregado.name)
+                        # Uploads comprimidos são descomprimidos em fluxo pelos leitores
+                        compressao = st.session_state.analisador.detectar_compressao(arquivo_carregado)
+                        # Bytes idênticos enviados por outra sessão não são lidos de novo
+                        chave_conteudo = obter_chave_conteudo(arquivo_carregado)
+                        df_anterior = st.session_state.analisador.df
+                        
+                        if st.session_state.analisador.usar_conjunto_compartilhado(chave_conteudo):
+                            st.success("♻️ Conjunto já carregado por outra sessão - reutilizando!")
                         
-                        if extensao_arquivo == 'csv':
-                            df = pd.read_csv(arquivo_carregado)
+                        elif extensao_arquivo == 'csv':
+                            df = pd.read_csv(arquivo_carregado, compression=compressao)
                             st.session_state.analisador.carregar_dados(df)
                             st.success("✅ Arquivo CSV carregado com sucesso!")
                             
                         elif extensao_arquivo == 'xlsx':
-                            arquivo_excel = pd.ExcelFile(arquivo_carregado)
-                            nomes_planilhas = arquivo_excel.sheet_names
+                            # A pasta de trabalho é analisada uma única vez; planilhas ficam em cache
+                            nomes_planilhas = st.session_state.analisador.abrir_pasta_trabalho_excel(arquivo_carregado)
                             st.session_state.planilhas_excel = nomes_planilhas
                             
                             if len(nomes_planilhas) == 1:
-                                df = pd.read_excel(arquivo_carregado, sheet_name=nomes_planilhas[0])
+                                df = st.session_state.analisador.ler_planilha_excel(nomes_planilhas[0])
                                 st.session_state.analisador.carregar_dados(df)
                                 st.success(f"✅ Arquivo Excel carregado com sucesso! (Planilha: {nomes_planilhas[0]})")
                             else:
@@ -1361,94 +1742,159 @@ def main():
                                 st.info(f"📑 Arquivo Excel tem {len(nomes_planilhas)} planilhas. Por favor, selecione uma abaixo.")
                             
                         elif extensao_arquivo == 'json':
-                            df = pd.read_json(arquivo_carregado)
-                            st.session_state.analisador.carregar_dados(df)
-                            st.success("✅ Arquivo JSON carregado com sucesso!")
+                            if st.session_state.analisador.eh_array_json(arquivo_carregado):
+                                # Registros achatados em fluxo; documentos largos escolhem os campos antes
+                                campos = st.session_state.analisador.obter_campos_array_json(arquivo_carregado)
+                                st.session_state.colunas_arquivo = campos
+                                
+                                if len(campos) <= MAX_COLUNAS_SEM_SELECAO:
+                                    st.session_state.analisador.carregar_array_json(arquivo_carregado, **obter_limite_linhas())
+                                    st.session_state.colunas_selecionadas = campos
+                                    st.success("✅ Arquivo JSON carregado com sucesso!")
+                                else:
+                                    st.info(f"🧩 Registros JSON têm {len(campos)} campos. Por favor, selecione os campos abaixo.")
+                            else:
+                                df = pd.read_json(arquivo_carregado, compression=compressao)
+                                st.session_state.analisador.carregar_dados(df)
+                                st.success("✅ Arquivo JSON carregado com sucesso!")
+                        
+                        elif extensao_arquivo in ['jsonl', 'ndjson']:
+                            # Lido em blocos de tamanho fixo; a memória acompanha o tamanho do bloco
+                            st.session_state.analisador.carregar_json_linhas(arquivo_carregado, **obter_limite_linhas())
+                            st.success("✅ Arquivo JSON Lines carregado com sucesso!")
+                        
+                        elif extensao_arquivo in EXTENSOES_COLUNARES:
+                            # Lê apenas o esquema; os dados são lidos por coluna selecionada
+                            formato = EXTENSOES_COLUNARES[extensao_arquivo]
+                            colunas = st.session_state.analisador.obter_colunas_arquivo_colunar(arquivo_carregado, formato)
+                            st.session_state.colunas_arquivo = colunas
+                            
+                            if len(colunas) <= MAX_COLUNAS_SEM_SELECAO:
+                                df = st.session_state.analisador.ler_arquivo_colunar(arquivo_carregado, formato)
+                                st.session_state.analisador.carregar_dados(df)
+                                st.session_state.colunas_selecionadas = colunas
+                                st.success(f"✅ Arquivo {formato.capitalize()} carregado com sucesso!")
+                            else:
+                                st.info(f"🗂️ Arquivo tem {len(colunas)} colunas. Por favor, selecione as colunas abaixo.")
+                        
+                        compartilhar_conjunto_carregado(chave_conteudo, df_anterior)
                         
                     except Exception as e:
                         st.error(f"❌ Erro ao carregar arquivo: {str(e)}")
                         st.session_state.arquivo_carregado = False
                         st.session_state.arquivo_atual = None
             
-            if (arquivo_carregado.name.endswith('.xlsx') and 
-                st.session_state.planilha_selecionada is None and
+            # Seletor permanece visível para alternar entre planilhas já em cache
+            if (obter_extensao_arquivo(arquivo_carregado.name) == 'xlsx' and 
                 len(st.session_state.planilhas_excel) > 1):
                 
                 try:
+                    planilhas = st.session_state.planilhas_excel
                     planilha_selecionada = st.selectbox(
                         "📑 Selecionar Planilha",
-                        st.session_state.planilhas_excel,
+                        planilhas,
+                        index=planilhas.index(st.session_state.planilha_selecionada) if st.session_state.planilha_selecionada in planilhas else 0,
                         help="Escolha qual planilha analisar"
                     )
                     
-                    if st.button("Carregar Planilha Selecionada", type="secondary"):
-                        with st.spinner(f"🔄 Carregando planilha: {planilha_selecionada}..."):
-                            df = pd.read_excel(arquivo_carregado, sheet_name=planilha_selecionada)
-                            st.session_state.analisador.carregar_dados(df)
+                    if st.button("Carregar Planilha Selecionada", type="secondary", disabled=planilha_selecionada == st.session_state.planilha_selecionada):
+                        with st.spinner(f"🔄 Carregando planilha: {planilha_selecionada}..."), st.session_state.analisador.iniciar_cronometro_carga().etapa('carga', perfilar=True):
+                            chave_planilha = obter_chave_conteudo(arquivo_carregado, 'planilha', planilha_selecionada)
+                            df_anterior = st.session_state.analisador.df
+                            if not st.session_state.analisador.usar_conjunto_compartilhado(chave_planilha):
+                                df = st.session_state.analisador.ler_planilha_excel(planilha_selecionada)
+                                st.session_state.analisador.carregar_dados(df)
+                                compartilhar_conjunto_carregado(chave_planilha, df_anterior)
                             st.session_state.planilha_selecionada = planilha_selecionada
+                            st.session_state.resultados_analise = None
                             st.session_state.scatter_x = None
                             st.session_state.scatter_y = None
                             st.success(f"✅ Planilha '{planilha_selecionada}' carregada com sucesso!")
                             st.rerun()
+                    
+                    # Modo pasta de trabalho completa: perfila todas as planilhas em paralelo
+                    if st.button("📚 Analisar Todas as Planilhas", type="secondary", use_container_width=True):
+                        with st.spinner(f"📚 Perfilando {len(planilhas)} planilhas..."):
+                            st.session_state.resultados_pasta_trabalho = st.session_state.analisador.analisar_todas_planilhas()
+                            st.session_state.resultados_analise = None
+                            st.rerun()
                 except Exception as e:
                     st.error(f"❌ Erro ao ler arquivo Excel: {str(e)}")
+            
+            extensao_arquivo = obter_extensao_arquivo(arquivo_carregado.name)
+            if ((extensao_arquivo in EXTENSOES_COLUNARES or extensao_arquivo == 'json') and
+                st.session_state.colunas_selecionadas is None and
+                len(st.session_state.colunas_arquivo) > MAX_COLUNAS_SEM_SELECAO):
+                
+                try:
+                    colunas_selecionadas = st.multiselect(
+                        "🗂️ Selecionar Colunas",
+                        st.session_state.colunas_arquivo,
+                        default=st.session_state.colunas_arquivo[:MAX_COLUNAS_SEM_SELECAO],
+                        help="Somente as colunas selecionadas são lidas do arquivo"
+                    )
+                    
+                    if st.button("Carregar Colunas Selecionadas", type="secondary", disabled=not colunas_selecionadas):
+                        with st.spinner(f"🔄 Carregando {len(colunas_selecionadas)} colunas..."), st.session_state.analisador.iniciar_cronometro_carga().etapa('carga', perfilar=True):
+                            chave_colunas = obter_chave_conteudo(arquivo_carregado, 'colunas', tuple(colunas_selecionadas))
+                            df_anterior = st.session_state.analisador.df
+                            if not st.session_state.analisador.usar_conjunto_compartilhado(chave_colunas):
+                                if extensao_arquivo == 'json':
+                                    st.session_state.analisador.carregar_array_json(arquivo_carregado, campos=colunas_selecionadas, **obter_limite_linhas())
+                                else:
+                                    df = st.session_state.analisador.ler_arquivo_colunar(
+                                        arquivo_carregado, EXTENSOES_COLUNARES[extensao_arquivo], colunas=colunas_selecionadas
+                                    )
+                                    st.session_state.analisador.carregar_dados(df)
+                                compartilhar_conjunto_carregado(chave_colunas, df_anterior)
+                            st.session_state.colunas_selecionadas = colunas_selecionadas
+                            st.session_state.scatter_x = None
+                            st.session_state.scatter_y = None
+                            st.success(f"✅ {len(colunas_selecionadas)} colunas carregadas com sucesso!")
+                            st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Erro ao ler arquivo: {str(e)}")
         
         st.markdown("---")
         analise_clicada = st.button(
             "🚀 Analisar Dados",
             type="primary",
             use_container_width=True,
-            disabled=not st.session_state.arquivo_carregado or st.session_state.analisador.df is None
+            disabled=(not st.session_state.arquivo_carregado or st.session_state.analisador.df is None
+                      or st.session_state.tarefa_analise is not None)
         )
         
         if analise_clicada:
-            if st.session_state.analisador.df is not None:
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                def atualizar_progresso(fase, progresso):
-                    status_text.text(f"⏳ {fase}...")
-                    progress_bar.progress(progresso)
-                
-                with st.spinner("🔎 Iniciando análise completa..."):
-                    try:
-                        atualizar_progresso("Preparando dados", 10)
-                        time.sleep(0.5)
-                        
-                        atualizar_progresso("Gerando estatísticas", 30)
-                        time.sleep(0.3)
-                        
-                        contexto_usuario = st.session_state.get('contexto_usuario', '')
-                        
-                        atualizar_progresso("Solicitando análise da IA", 60)
-                        resultados = st.session_state.analisador.analisar_conjunto_dados(contexto_usuario)
-                        
-                        atualizar_progresso("Processando resultados", 90)
-                        
-                        if resultados:
-                            st.session_state.resultados_analise = resultados
-                            atualizar_progresso("Análise concluída", 100)
-                            st.success("✅ Análise concluída com sucesso!")
-                            time.sleep(1)
-                            st.rerun()
-                        else:
-                            st.error("❌ Análise falhou. Por favor, verifique seus dados e tente novamente.")
-                            
-                    except Exception as e:
-                        st.error(f"❌ Erro durante a análise: {str(e)}")
-                
-                progress_bar.empty()
-                status_text.empty()
+            resultados_compartilhados = (st.session_state.analisador.obter_resultados_compartilhados(st.session_state.get('contexto_usuario', ''))
+                                         if st.session_state.reutilizar_resultados else None)
+            if resultados_compartilhados is not None:
+                st.session_state.resultados_analise = resultados_compartilhados
+                st.session_state.resultados_pasta_trabalho = None
+                st.success("♻️ Mostrando a análise que outra sessão fez sobre este conjunto")
+            elif st.session_state.analisador.df is not None:
+                # Executada no grupo de processos: esta sessão segue responsiva e as outras mantêm sua parte da CPU
+                st.session_state.tarefa_analise = TAREFAS.enviar(
+                    st.session_state.analisador, st.session_state.get('contexto_usuario', ''), st.session_state.prazo_analise or None
+                )
             else:
                 st.error("❌ Por favor, carregue um arquivo de dados primeiro.")
         
-        if st.session_state.resultados_analise:
+        if st.session_state.tarefa_analise is not None:
+            st.button("⏹️ Cancelar Análise", on_click=TAREFAS.cancelar, args=(st.session_state.tarefa_analise,), use_container_width=True)
+            aguardar_analise(st.session_state.tarefa_analise)
+        
+        if st.session_state.resultados_analise or st.session_state.resultados_pasta_trabalho:
             if st.button("🗑️ Limpar Análise", type="secondary", use_container_width=True):
                 st.session_state.resultados_analise = None
+                st.session_state.resultados_pasta_trabalho = None
                 st.session_state.arquivo_carregado = False
                 st.session_state.arquivo_atual = None
                 st.session_state.planilha_selecionada = None
                 st.session_state.planilhas_excel = []
+                st.session_state.colunas_arquivo = []
+                st.session_state.colunas_selecionadas = None
+                st.session_state.analisador.fechar_pasta_trabalho_excel()
+                st.session_state.analisador.liberar_conjunto_compartilhado()
                 st.session_state.analisador.df = None
                 st.session_state.contexto_usuario = ""
                 st.session_state.scatter_x = None
@@ -1486,11 +1932,19 @@ def main():
 
     # Conteúdo principal
     if st.session_state.resultados_analise is not None:
-        aba1, aba2 = st.tabs(["📊 Análise Exploratória de Dados", "🔎 Insights IA"])
-        with aba1:
+        nomes_abas = ["📊 Análise Exploratória de Dados", "🔎 Insights IA"]
+        if st.session_state.exibir_desempenho:
+            nomes_abas.append("⏱️ Desempenho")
+        abas = st.tabs(nomes_abas)
+        with abas[0]:
             exibir_analise_exploratoria(st.session_state.resultados_analise)
-        with aba2:
+        with abas[1]:
             exibir_insights_ia(st.session_state.resultados_analise)
+        if st.session_state.exibir_desempenho:
+            with abas[2]:
+                exibir_painel_desempenho(st.session_state.resultados_analise)
+    elif st.session_state.resultados_pasta_trabalho is not None:
+        exibir_analise_pasta_trabalho(st.session_state.resultados_pasta_trabalho)
     elif st.session_state.arquivo_carregado and st.session_state.arquivo_atual is not None:
         exibir_tela_boas_vindas(arquivo_carregado=st.session_state.arquivo_atual)
     else:
@@ -0,0 +1,337 @@
+# pt_03_benchmark.py
+#
+# Benchmark do AnalisadorChatBot em conjuntos sintéticos, etapa por etapa, com a chamada ao LLM substituída
+# por um stub local. Cada execução é acrescentada a um arquivo JSON Lines para comparar commits:
+#
+#   python pt_03_benchmark.py                              # todos os conjuntos, escala 1
+#   python pt_03_benchmark.py --conjuntos alto largo --escala 0.2
+#   python pt_03_benchmark.py --comparar a1b2c3d           # compara a última execução com outro commit
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Callable
+
+import numpy as np
+import pandas as pd
+
+from pt_01_analyzer import AnalisadorChatBot, CAMPOS_CHAMADA_LLM
+
+# resource só existe em sistemas Unix; sem ele o pico de memória do processo não é registrado
+try:
+    import resource
+    RESOURCE_DISPONIVEL = True
+except ImportError:
+    RESOURCE_DISPONIVEL = False
+
+DIRETORIO_BENCHMARK = os.path.dirname(os.path.abspath(__file__))
+# Resultados acumulados entre commits, um registro por conjunto de dados e execução
+ARQUIVO_RESULTADOS = os.path.join(DIRETORIO_BENCHMARK, "pt_resultados_benchmark.jsonl")
+# Mesmos métodos oferecidos na aba de correlação da interface
+METODOS_CORRELACAO = ["Automático", "Pearson", "Spearman", "Kendall Tau", "Cramers V", "Theils U", "Phi", "Correlation Ratio"]
+# A matriz de correlação é calculada par a par; o benchmark usa só as primeiras colunas e linhas de cada conjunto
+MAX_COLUNAS_CORRELACAO = 12
+MAX_LINHAS_CORRELACAO = 5_000
+# Resposta fixa do stub do LLM
+RESPOSTA_STUB_LLM = "## Insights\n\n- Resposta gerada localmente pelo benchmark.\n"
+
+
+def _texto_aleatorio(rng: np.random.Generator, n: int, palavras: int) -> np.ndarray:
+    """Frases de palavras sorteadas de um vocabulário fixo"""
+    vocabulario = np.array(["dados", "cliente", "pedido", "entrega", "produto", "valor", "atraso", "qualidade",
+                            "suporte", "pagamento", "cadastro", "retorno", "preço", "estoque", "serviço", "nota"])
+    sorteio = vocabulario[rng.integers(0, len(vocabulario), size=(n, palavras))]
+    return np.array([" ".join(linha) for linha in sorteio], dtype=object)
+
+
+def gerar_alto(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Muitas linhas e poucas colunas de todos os tipos"""
+    return pd.DataFrame({
+        'valor': rng.lognormal(3, 1, n),
+        'quantidade': rng.integers(1, 50, n),
+        'desconto': rng.normal(0.1, 0.05, n),
+        'nota': rng.integers(1, 6, n).astype(float),
+        'regiao': rng.choice(['Norte', 'Nordeste', 'Centro-Oeste', 'Sudeste', 'Sul'], n),
+        'canal': rng.choice(['loja', 'site', 'app', 'telefone'], n, p=[0.4, 0.3, 0.25, 0.05]),
+        'recorrente': rng.random(n) < 0.35,
+        'data_pedido': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 4 * 365 * 24 * 3600, n), unit='s')
+    })
+
+
+def gerar_largo(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Poucas linhas e centenas de colunas (3 numéricas para cada categórica)"""
+    colunas = {}
+    for i in range(200):
+        if i % 4 == 3:
+            colunas[f'cat_{i:03d}'] = rng.choice([f'c{k}' for k in range(8)], n)
+        else:
+            colunas[f'num_{i:03d}'] = rng.normal(i, 1 + i % 7, n)
+    return pd.DataFrame(colunas)
+
+
+def gerar_texto(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Colunas de texto livre longas ao lado de algumas numéricas"""
+    return pd.DataFrame({
+        'comentario': _texto_aleatorio(rng, n, 30),
+        'titulo': _texto_aleatorio(rng, n, 6),
+        'avaliacao': rng.integers(1, 6, n),
+        'tempo_leitura': rng.exponential(40, n)
+    })
+
+
+def gerar_alta_cardinalidade(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Identificadores quase únicos e categorias com dezenas de milhares de valores"""
+    return pd.DataFrame({
+        'id_transacao': np.char.add('T', rng.permutation(n).astype(str)),
+        'id_cliente': np.char.add('C', rng.integers(0, max(1, n // 4), n).astype(str)),
+        'produto': np.char.add('P', rng.zipf(1.3, n).clip(max=50_000).astype(str)),
+        'valor': rng.gamma(2, 50, n),
+        'parcelas': rng.integers(1, 13, n)
+    })
+
+
+def gerar_datas(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Várias colunas de data/hora com granularidades diferentes"""
+    inicio = pd.Timestamp('2015-01-01')
+    colunas = {f'evento_{i}': inicio + pd.to_timedelta(rng.integers(0, 10 * 365 * 24 * 3600 // (i + 1), n), unit='s')
+               for i in range(8)}
+    colunas['duracao'] = rng.exponential(3600, n)
+    colunas['tentativas'] = rng.integers(0, 5, n)
+    return pd.DataFrame(colunas)
+
+
+def gerar_nulos(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Colunas mistas com 20% a 70% de valores ausentes"""
+    df = gerar_alto(n, rng)
+    for i, col in enumerate(df.columns):
+        ausentes = rng.random(n) < 0.2 + 0.5 * i / len(df.columns)
+        df[col] = df[col].astype(object if df[col].dtype == bool else df[col].dtype).mask(ausentes)
+    return df
+
+
+# Nome -> (gerador, linhas na escala 1)
+CONJUNTOS = {
+    'alto': (gerar_alto, 300_000),
+    'largo': (gerar_largo, 5_000),
+    'texto': (gerar_texto, 100_000),
+    'alta_cardinalidade': (gerar_alta_cardinalidade, 200_000),
+    'datas': (gerar_datas, 100_000),
+    'nulos': (gerar_nulos, 200_000)
+}
+
+
+def identificar_commit() -> str:
+    """Commit atual (com -dirty se houver alterações não commitadas), ou 'desconhecido' fora do git"""
+    try:
+        saida = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=DIRETORIO_BENCHMARK,
+                               capture_output=True, text=True, timeout=30)
+        return saida.stdout.strip() or 'desconhecido'
+    except (OSError, subprocess.SubprocessError):
+        return 'desconhecido'
+
+
+def criar_analisador() -> AnalisadorChatBot:
+    """Analisador com as requisições ao LLM respondidas por um stub local, ainda passando pelo coordenador real"""
+    analisador = AnalisadorChatBot(chave_api='benchmark')
+
+    def transmissao_stub(modelo, prompt, papel, conjunto, primeiro_byte, cancelado, *args):
+        primeiro_byte.set()
+        chamada = dict.fromkeys(CAMPOS_CHAMADA_LLM)
+        chamada.update(momento=time.time(), conjunto=conjunto, papel=papel, modelo_solicitado=modelo, modelo=modelo,
+                       caracteres_prompt=len(prompt), latencia=0.0, resultado='concluida')
+        analisador.uso_llm.registrar(chamada)
+        return RESPOSTA_STUB_LLM, chamada
+
+    analisador._transmitir_resposta = transmissao_stub
+    return analisador
+
+
+def executar_etapas(caminho: str, medir: Callable[[str], Any], max_colunas_correlacao: int, max_linhas_correlacao: int):
+    """Executar uma vez todas as etapas do pipeline sobre o arquivo, medindo cada uma com medir(nome)"""
+    analisador = criar_analisador()
+    with medir('carga'):
+        analisador.carregar_e_previsualizar_dados(caminho)
+
+    # A correção de tipos também roda dentro da carga; aqui é medida sozinha sobre o arquivo lido cru
+    df_bruto = pd.read_parquet(caminho) if caminho.endswith('.parquet') else pd.read_csv(caminho)
+    with medir('correcao_tipos'):
+        analisador.corrigir_tipos_incorretos(df_bruto)
+    del df_bruto
+
+    with medir('estatisticas'):
+        analisador.obter_estatisticas_descritivas().para_markdown()
+
+    with medir('visualizacoes'):
+        analisador.gerar_visualizacoes()
+
+    with medir('prompt'):
+        analisador.criar_prompt_analise(analisador.obter_estatisticas_descritivas().para_prompt())
+
+    analisador_correlacao = criar_analisador()
+    analisador_correlacao.carregar_dados(analisador.df.iloc[:max_linhas_correlacao, :max_colunas_correlacao])
+    for metodo in METODOS_CORRELACAO:
+        with medir(f"correlacao_{metodo.lower().replace(' ', '_')}"):
+            analisador_correlacao.calcular_matriz_correlacao(metodo)
+
+    # Análise completa a frio, em outro analisador, sem os caches das etapas acima
+    analisador_completo = criar_analisador()
+    analisador_completo.carregar_dados(analisador.df)
+    with medir('analise_completa'):
+        analisador_completo.analisar_conjunto_dados()
+
+
+def medir_conjunto(nome: str, escala: float, repeticoes: int, medir_memoria: bool, formato: str,
+                   max_colunas_correlacao: int, max_linhas_correlacao: int, diretorio: str) -> Dict[str, Any]:
+    """Gerar um conjunto, gravá-lo no formato pedido e medir as etapas (mediana das repetições e pico de memória)"""
+    gerador, linhas_base = CONJUNTOS[nome]
+    df = gerador(max(10, int(linhas_base * escala)), np.random.default_rng(42))
+    caminho = os.path.join(diretorio, f"{nome}.{formato}")
+    # CSV não guarda tipos: datas e booleanos com ausentes voltam como texto
+    if formato == 'parquet':
+        df.to_parquet(caminho, index=False)
+    else:
+        df.to_csv(caminho, index=False)
+
+    tempos: Dict[str, List[float]] = {}
+    memoria: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def medir_tempo(etapa):
+        inicio = time.perf_counter()
+        yield
+        tempos.setdefault(etapa, []).append(time.perf_counter() - inicio)
+
+    @contextlib.contextmanager
+    def medir_pico(etapa):
+        atual, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        yield
+        memoria[etapa] = (tracemalloc.get_traced_memory()[1] - atual) / 2**20
+
+    # Os logs do analisador iriam para o terminal a cada etapa
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticoes):
+            executar_etapas(caminho, medir_tempo, max_colunas_correlacao, max_linhas_correlacao)
+
+        # Rodada separada com tracemalloc, que deixa as alocações mais lentas
+        if medir_memoria:
+            tracemalloc.start()
+            try:
+                executar_etapas(caminho, medir_pico, max_colunas_correlacao, max_linhas_correlacao)
+            finally:
+                tracemalloc.stop()
+
+    return {
+        'conjunto': nome,
+        'linhas': int(df.shape[0]),
+        'colunas': int(df.shape[1]),
+        'formato': formato,
+        'tamanho_arquivo_mb': round(os.path.getsize(caminho) / 2**20, 2),
+        'etapas': {
+            etapa: {'segundos': round(statistics.median(valores), 4),
+                    'pico_memoria_mb': round(memoria[etapa], 2) if etapa in memoria else None}
+            for etapa, valores in tempos.items()
+        }
+    }
+
+
+def carregar_resultados(arquivo: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(arquivo):
+        return []
+    with open(arquivo, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def comparar(registros: List[Dict[str, Any]], referencia: str = None):
+    """Comparar a execução mais recente com a de outro commit (por padrão, o commit anterior no arquivo)"""
+    if not registros:
+        print("Nenhum resultado salvo para comparar.")
+        return
+
+    atual = registros[-1]['commit']
+    commits = list(dict.fromkeys(registro['commit'] for registro in registros))
+    if referencia is None:
+        anteriores = [commit for commit in commits if commit != atual]
+        if not anteriores:
+            print(f"Só há resultados do commit {atual}.")
+            return
+        referencia = anteriores[-1]
+    else:
+        referencia = next((commit for commit in reversed(commits) if commit.startswith(referencia)), referencia)
+
+    # O último registro de cada (commit, conjunto, escala, formato) vale
+    ultimos = {(registro['commit'], registro['conjunto'], registro['escala'], registro['formato']): registro
+               for registro in registros}
+    print(f"\nComparação: {referencia} -> {atual} (variação do tempo mediano)")
+    for (commit, conjunto, escala, formato), registro in ultimos.items():
+        if commit != atual or (referencia, conjunto, escala, formato) not in ultimos:
+            continue
+        base = ultimos[(referencia, conjunto, escala, formato)]['etapas']
+        print(f"\n  {conjunto} (escala {escala}, {formato})")
+        for etapa, medida in registro['etapas'].items():
+            if etapa not in base:
+                continue
+            antes, depois = base[etapa]['segundos'], medida['segundos']
+            variacao = f"{(depois - antes) / antes * 100:+.1f}%" if antes > 0 else "n/d"
+            print(f"    {etapa:<32} {antes:>9.3f}s {depois:>9.3f}s {variacao:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline do AnalisadorChatBot em conjuntos sintéticos")
+    parser.add_argument('--conjuntos', nargs='+', choices=list(CONJUNTOS), default=list(CONJUNTOS))
+    parser.add_argument('--escala', type=float, default=1.0, help="Multiplica o número de linhas de cada conjunto")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Execuções por etapa; vale a mediana")
+    parser.add_argument('--formato', choices=['parquet', 'csv'], default='parquet', help="Formato do arquivo carregado")
+    parser.add_argument('--sem-memoria', action='store_true', help="Não fazer a rodada com tracemalloc")
+    parser.add_argument('--max-colunas-correlacao', type=int, default=MAX_COLUNAS_CORRELACAO)
+    parser.add_argument('--max-linhas-correlacao', type=int, default=MAX_LINHAS_CORRELACAO)
+    parser.add_argument('--saida', default=ARQUIVO_RESULTADOS, help="Arquivo JSON Lines onde os resultados são acrescentados")
+    parser.add_argument('--comparar', nargs='?', const='', default=None, metavar='COMMIT',
+                        help="Só comparar resultados salvos (com o commit informado ou o anterior)")
+    args = parser.parse_args()
+
+    if args.comparar is not None:
+        comparar(carregar_resultados(args.saida), args.comparar or None)
+        return
+
+    ambiente = {
+        'commit': identificar_commit(),
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'escala': args.escala,
+        'repeticoes': args.repeticoes
+    }
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome in args.conjuntos:
+            print(f"⏱️ {nome}...", flush=True)
+            registro = {**ambiente, **medir_conjunto(nome, args.escala, args.repeticoes, not args.sem_memoria, args.formato,
+                                                     args.max_colunas_correlacao, args.max_linhas_correlacao, diretorio)}
+            if RESOURCE_DISPONIVEL:
+                # ru_maxrss vem em KB no Linux: pico do processo até aqui, não só deste conjunto
+                registro['pico_processo_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+            print(f"   {registro['linhas']:,} linhas × {registro['colunas']} colunas, {registro['tamanho_arquivo_mb']} MB em {args.formato}")
+            for etapa, medida in registro['etapas'].items():
+                pico = f"{medida['pico_memoria_mb']:>9.1f} MB" if medida['pico_memoria_mb'] is not None else ""
+                print(f"   {etapa:<32} {medida['segundos']:>9.3f}s {pico}")
+
+            with open(args.saida, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    print(f"\n💾 Resultados acrescentados a {args.saida}")
+    comparar(carregar_resultados(args.saida))
+
+
+if __name__ == "__main__":
+    main()